@@ -13,19 +13,33 @@ File purpose:
 from __future__ import annotations
 
 # Built-Ins
+import os
+import enum
+import hashlib
+import pathlib
+import itertools
 import threading
+import contextlib
 from multiprocessing import shared_memory
 
+from typing import Any
+from typing import Dict
 from typing import Callable
 
 # Third Party
 import numpy as np
+import pandas as pd
 
 # Local Imports
 
 
 class SharedNumpyArrayHelper:
-    """Shared numpy array to allow threads/processes to communicate"""
+    """Shared numpy array to allow threads/processes to communicate
+
+    When pickled, e.g. to be passed to another process, the shared memory
+    is attached to by name rather than copied. To keep writes between
+    processes safe, a `multiprocessing` lock should be given.
+    """
 
     def __init__(
         self,
@@ -79,6 +93,15 @@ class SharedNumpyArrayHelper:
     def shared_memory(self):
         return self._shm
 
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state['_shm']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._shm = shared_memory.SharedMemory(name=self._name, create=False)
+
     def __enter__(self) -> SharedNumpyArrayHelper:
         return self
 
@@ -127,3 +150,194 @@ class SharedNumpyArrayHelper:
         with self._lock:
             shared_array = self.get_shared_array()
             shared_array[:] = np.full_like(shared_array, fill_value=fill_value)
+
+
+@enum.unique
+class SharingMethod(enum.Enum):
+    """Ways of sharing read-only data between processes"""
+    SHARED_MEMORY = 'shared_memory'
+    MEMORY_MAP = 'memory_map'
+
+
+class SharedDataFrameHandle:
+    """Picklable handle to a read-only DataFrame shared between processes
+
+    The values of the DataFrame are held once, either in named shared
+    memory, or in a memory-mapped .npy file. Only the handle (the index,
+    columns and the name of where the values are held) is pickled when
+    sending to other processes. Use `get_df()` to view the DataFrame
+    without copying its values.
+    """
+
+    def __init__(
+        self,
+        index: pd.Index,
+        columns: pd.Index,
+        shared_array: SharedNumpyArrayHelper = None,
+        npy_path: os.PathLike = None,
+    ):
+        if (shared_array is None) == (npy_path is None):
+            raise ValueError(
+                "Exactly one of shared_array or npy_path must be given."
+            )
+
+        self.index = index
+        self.columns = columns
+        self._npy_path = npy_path
+
+        # Only keep what's needed to attach. The values are read-only, so
+        # there's no need to pass a lock around
+        self._shm_name = None
+        self._shm_shape = None
+        self._shm_dtype = None
+        if shared_array is not None:
+            self._shm_name = shared_array.name
+            self._shm_shape = shared_array.shape
+            self._shm_dtype = shared_array.dtype
+        self._shm = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_shm'] = None
+        return state
+
+    def get_values(self) -> np.ndarray:
+        """Gets a read-only view of the shared values"""
+        if self._npy_path is not None:
+            return np.load(self._npy_path, mmap_mode='r')
+
+        # Attach once, and stay attached while this handle exists
+        if self._shm is None:
+            self._shm = shared_memory.SharedMemory(name=self._shm_name, create=False)
+        values = np.ndarray(self._shm_shape, dtype=self._shm_dtype, buffer=self._shm.buf)
+        values.flags.writeable = False
+        return values
+
+    def get_df(self) -> pd.DataFrame:
+        """Gets a read-only view of the shared DataFrame"""
+        return pd.DataFrame(
+            self.get_values(),
+            index=self.index,
+            columns=self.columns,
+            copy=False,
+        )
+
+
+class SharedDataFramePublisher:
+    """Publishes DataFrames once, to be shared between processes
+
+    Each distinct DataFrame is only published once, no matter how many
+    times it is published. DataFrames are the same if they are the same
+    object, or if they have the same index, columns and values.
+    Everything published is removed again when the context is exited.
+
+    Examples
+    --------
+    >>> with SharedDataFramePublisher(SharingMethod.SHARED_MEMORY) as publisher:
+    ...     handle = publisher.publish(df)
+    ...     # Pass handle to other processes and call handle.get_df()
+    """
+    # Names need to stay short for some operating systems
+    _shm_name_format = 'nd_%s_%s'
+    _npy_fname_format = 'shared_df_%s.npy'
+
+    def __init__(
+        self,
+        method: SharingMethod = SharingMethod.SHARED_MEMORY,
+        memory_map_dir: os.PathLike = None,
+    ):
+        """
+        Parameters
+        ----------
+        method:
+            How to share the DataFrame values.
+
+        memory_map_dir:
+            The directory to write the .npy files to when using
+            SharingMethod.MEMORY_MAP. Must be given when using that method.
+        """
+        method = SharingMethod(method)
+        if method == SharingMethod.MEMORY_MAP and memory_map_dir is None:
+            raise ValueError(
+                "memory_map_dir must be given to share using %s."
+                % method
+            )
+
+        self.method = method
+        self.memory_map_dir = memory_map_dir
+
+        self._ctx_manager = contextlib.ExitStack()
+        self._name_ids = itertools.count()
+        self._handles_by_id = dict()
+        self._handles_by_hash = dict()
+
+    def __enter__(self) -> SharedDataFramePublisher:
+        return self
+
+    def __exit__(self, *args, **kwargs) -> None:
+        self.close()
+
+    @staticmethod
+    def _hash_df(df: pd.DataFrame) -> str:
+        """Hashes the index, columns and values of df"""
+        values = np.ascontiguousarray(df.values)
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(str((values.shape, values.dtype)).encode())
+        hasher.update(pd.util.hash_pandas_object(df.index).values.tobytes())
+        hasher.update(pd.util.hash_pandas_object(df.columns).values.tobytes())
+        hasher.update(memoryview(values).cast('B'))
+        return hasher.hexdigest()
+
+    def _create_handle(self, df: pd.DataFrame) -> SharedDataFrameHandle:
+        """Writes out the values of df and creates a handle to them"""
+        name_id = next(self._name_ids)
+
+        if self.method == SharingMethod.SHARED_MEMORY:
+            shared_array = SharedNumpyArrayHelper(
+                name=self._shm_name_format % (os.getpid(), name_id),
+                data=df.values,
+            )
+            self._ctx_manager.enter_context(shared_array)
+            return SharedDataFrameHandle(df.index, df.columns, shared_array=shared_array)
+
+        path = pathlib.Path(self.memory_map_dir) / (self._npy_fname_format % name_id)
+        np.save(path, df.values)
+        self._ctx_manager.callback(path.unlink, missing_ok=True)
+        return SharedDataFrameHandle(df.index, df.columns, npy_path=path)
+
+    def publish(self, df: pd.DataFrame) -> SharedDataFrameHandle:
+        """Publishes df, or finds where the same df was published
+
+        Parameters
+        ----------
+        df:
+            The DataFrame to publish. Must only contain a single dtype.
+
+        Returns
+        -------
+        handle:
+            A picklable handle to the published DataFrame.
+        """
+        # Fast path for the same object being published more than once
+        if id(df) in self._handles_by_id:
+            return self._handles_by_id[id(df)][1]
+
+        df_hash = self._hash_df(df)
+        if df_hash not in self._handles_by_hash:
+            self._handles_by_hash[df_hash] = self._create_handle(df)
+        handle = self._handles_by_hash[df_hash]
+
+        # Keep a reference to df so its id can't be reused
+        self._handles_by_id[id(df)] = (df, handle)
+        return handle
+
+    @property
+    def n_published(self) -> int:
+        """The number of distinct DataFrames that have been published"""
+        return len(self._handles_by_hash)
+
+    def close(self) -> None:
+        """Removes all the published DataFrames"""
+        self._handles_by_id.clear()
+        self._handles_by_hash.clear()
+        self._ctx_manager.close()
@@ -5,9 +5,12 @@ from normits_demand.core.data_structures import DVectorError
 
 # ## EXPOSE CORE OBJECTS ## #
 from normits_demand.core.segments import SegmentationLevel
+from normits_demand.core.segments import SegmentAggregationIndex
+from normits_demand.core.segments import SegmentCombineIndex
 from normits_demand.core.zoning import ZoningSystem, BalancingZones
 
 from normits_demand.core.data_structures import DVector
+from normits_demand.core.data_structures import LazyDVector
 from normits_demand.core.data_structures import TimeFormat
 
 # ## EXPOSE GETTER FUNCTIONS ## #
@@ -15,14 +15,15 @@ from __future__ import annotations
 
 # Builtins
 import os
+import copy
 import math
 import enum
-import copy
 import pickle
 import pathlib
 import warnings
 import operator
 import itertools
+import collections.abc
 
 from os import PathLike
 
@@ -30,7 +31,9 @@ from typing import Any
 from typing import Dict
 from typing import List
 from typing import Union
+from typing import Tuple
 from typing import Callable
+from typing import Iterable
 from typing import Optional
 
 # Third Party
@@ -234,6 +237,156 @@ class TimeFormat(enum.Enum):
         return factors_fn()
 
 
+class DenseDVectorData(collections.abc.MutableMapping):
+    """Dictionary-like DVector data, stored in a single 2D numpy array
+
+    Holds all segment data in one contiguous float64 array of shape
+    (n_segments, n_zones), or (n_segments, ) when there is no zoning
+    system, alongside an index of segment name to row. Indexing by
+    segment name returns a view onto the relevant row, so any code written
+    against the nd.DVectorData dictionary interface keeps working.
+    The whole array can be accessed through `array` for vectorised
+    operations.
+
+    Segments cannot be added to, or removed from, an instance once it has
+    been created. The data of existing segments can be overwritten.
+
+    Attributes
+    ----------
+    array:
+        The underlying numpy array. Each row is the data of one segment.
+
+    segment_names:
+        A list of the segment names, in the same order as the rows of array.
+    """
+
+    def __init__(self,
+                 segment_names: List[str],
+                 values: np.ndarray,
+                 ) -> None:
+        """
+        Validates the input arguments and creates a DenseDVectorData
+
+        Parameters
+        ----------
+        segment_names:
+            The names of each of the segments, in the same order as the
+            rows of values.
+
+        values:
+            The data for each segment. Should be of shape
+            (len(segment_names), n_zones), or (len(segment_names), ) if
+            there is no zoning.
+        """
+        segment_names = list(segment_names)
+        values = np.asarray(values, dtype=np.float64)
+
+        if values.shape[0] != len(segment_names):
+            raise ValueError(
+                "The number of rows in values does not match the number of "
+                "segment names given. Got %s segment names and %s rows."
+                % (len(segment_names), values.shape[0])
+            )
+
+        self._segment_names = segment_names
+        self._index = {name: i for i, name in enumerate(segment_names)}
+        self._values = values
+
+    @property
+    def array(self) -> np.ndarray:
+        return self._values
+
+    @property
+    def segment_names(self) -> List[str]:
+        return self._segment_names
+
+    def __getitem__(self, key: str) -> Union[np.ndarray, float]:
+        return self._values[self._index[key]]
+
+    def __setitem__(self, key: str, value: Union[np.ndarray, float]) -> None:
+        if key not in self._index:
+            raise KeyError(
+                "Cannot add new segment '%s' to a DenseDVectorData. Only "
+                "existing segments can be overwritten." % key
+            )
+        self._values[self._index[key]] = value
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError("Segments cannot be removed from a DenseDVectorData.")
+
+    def __iter__(self):
+        return iter(self._segment_names)
+
+    def __len__(self) -> int:
+        return len(self._segment_names)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._index
+
+    def rows(self, segment_names: Iterable[str]) -> np.ndarray:
+        """Get the row index of each of segment_names
+
+        Parameters
+        ----------
+        segment_names:
+            The segment names to get the row index of.
+
+        Returns
+        -------
+        rows:
+            An integer numpy array of the row index of each segment name,
+            in the same order as segment_names.
+        """
+        index = self._index
+        return np.array([index[name] for name in segment_names], dtype=np.int64)
+
+    def reorder(self, segment_names: List[str]) -> DenseDVectorData:
+        """Get a DenseDVectorData with rows ordered as segment_names
+
+        Returns self if the rows are already in the given order.
+        """
+        if segment_names == self._segment_names:
+            return self
+        return DenseDVectorData(segment_names, self._values[self.rows(segment_names)])
+
+    def to_dict(self) -> nd.DVectorData:
+        """Converts into a standard DVectorData dictionary of copied arrays"""
+        return {name: self._values[i].copy() for name, i in self._index.items()}
+
+    def copy(self) -> DenseDVectorData:
+        """Returns a deep copy of this object"""
+        return DenseDVectorData(self._segment_names, self._values.copy())
+
+    @staticmethod
+    def from_dict(data: nd.DVectorData,
+                  segment_names: List[str],
+                  ) -> DenseDVectorData:
+        """Builds a DenseDVectorData from a DVectorData dictionary
+
+        Parameters
+        ----------
+        data:
+            The DVectorData dictionary to convert. Must contain a value for
+            every name in segment_names.
+
+        segment_names:
+            The names of the segments, in the order the rows should be
+            stored in.
+
+        Returns
+        -------
+        dense_data:
+            The data in data, stored in a single array.
+        """
+        if isinstance(data, DenseDVectorData):
+            return data.reorder(list(segment_names))
+
+        values = np.array([data[name] for name in segment_names], dtype=np.float64)
+        if values.ndim > 2:
+            values = values.reshape(len(segment_names), -1)
+        return DenseDVectorData(segment_names, values)
+
+
 class DVector:
     """One dimensional, segmentation and zoning flexible, heterogeneous data.
 
@@ -246,6 +399,12 @@ class DVector:
     Create a Dvector by passing in a pandas.DataFrame, or a "data
     dictionary".
 
+    Alternatively, a DVector can be created in "dense" mode. Dense DVectors
+    store all data in a single (n_segments, n_zones) array (see
+    DenseDVectorData), which allows most operations to be carried out as
+    vectorised numpy calls instead of looping over every segment. Dense
+    DVectors keep the same interface as the "data dictionary" DVectors.
+
     WARNING: DVectors can be converted into Pandas.DatFrame, however this is
     not recommended for large DVectors as DataFrames are incredibly inefficient
     for storing DVector data due to the number of repeated values needed in
@@ -262,6 +421,9 @@ class DVector:
     process_count:
         The maximum number of parallel processes that this DVector can use
         when processing data.
+
+    dense:
+        Whether this DVector stores its data in a single dense array.
     """
     # Constants
     __version__ = nd.__version__
@@ -273,11 +435,18 @@ class DVector:
 
     _dvec_suffix = '_dvec%s' % consts.COMPRESSION_SUFFIX
 
+    # Memory mapped save format
+    _memory_map_format = 'dvec_memory_map'
+    _memory_map_values_suffix = '.npy'
+
     # Default chunk sizes for multiprocessing
     # Chosen through best guesses and tests
     _chunk_size = 100000
     _to_df_min_chunk_size = 400
-    _translate_zoning_min_chunk_size = 700
+
+    # Maximum number of intermediate segment rows to hold in memory at once
+    # when multiplying and aggregating dense DVectors
+    _dense_chunk_rows = 2000
 
     # Use for getting a bunch of progress bars for mp code
     _debugging_mp_code = False
@@ -293,6 +462,7 @@ class DVector:
                  df_chunk_size: Optional[int] = None,
                  infill: Optional[Any] = 0,
                  process_count: Optional[int] = consts.PROCESS_COUNT,
+                 dense: Optional[bool] = None,
                  ) -> None:
         """
         Validates the input arguments and creates a DVector
@@ -335,11 +505,10 @@ class DVector:
 
         df_chunk_size:
             Only used when import_data is a pandas.DataFrame.
-            The size of each chunk when processing a large pandas.DataFrame
-            into a DVector. Often, the size of the DataFrame can be the
-            primary cause of slowdown. By processing in chunks, the conversion
-            runs much faster. By default, set to DVector._chunk_size. Play
-            with different values to get speedup.
+            The number of rows to convert at once when processing a large
+            pandas.DataFrame into a DVector. Smaller chunks limit the memory
+            used by temporary arrays during the conversion. By default, set
+            to DVector._chunk_size.
 
         infill:
             If there are any missing segmentation/zone combinations this value
@@ -352,6 +521,13 @@ class DVector:
             would be os.cpu_count() - 2. If set to zero, multiprocessing
             will not be used.
             Defaults to consts.PROCESS_COUNT.
+
+        dense:
+            Whether to store the data in a single (n_segments, n_zones)
+            array, rather than a dictionary of per-segment arrays. Dense
+            storage allows most operations to be vectorised. If left as
+            None, dense storage will be used only if import_data is a
+            DenseDVectorData.
         """
         # Validate arguments
         if zoning_system is not None:
@@ -389,8 +565,15 @@ class DVector:
             zone_col = zoning_system.col_name
         self.zone_col = zone_col
 
+        # Default to the storage of the given data
+        if dense is None:
+            dense = isinstance(import_data, DenseDVectorData)
+        self._dense = dense
+
         # Try to convert the given data into DVector format
-        if isinstance(import_data, pd.DataFrame):
+        if isinstance(import_data, DenseDVectorData):
+            self._data = self._dense_to_dvec(import_data)
+        elif isinstance(import_data, pd.DataFrame):
             self._data = self._dataframe_to_dvec(
                 df=import_data,
                 zone_col=zone_col,
@@ -406,9 +589,18 @@ class DVector:
         else:
             raise NotImplementedError(
                 "Don't know how to deal with anything other than: "
-                "pandas DF, or dict"
+                "pandas DF, dict, or DenseDVectorData"
             )
 
+        # Convert into the requested storage
+        if self._dense and not isinstance(self._data, DenseDVectorData):
+            self._data = DenseDVectorData.from_dict(
+                data=self._data,
+                segment_names=self.segmentation.segment_names,
+            )
+        elif not self._dense and isinstance(self._data, DenseDVectorData):
+            self._data = self._data.to_dict()
+
     # SETTERS AND GETTERS
     @property
     def val_col(self):
@@ -445,6 +637,10 @@ class DVector:
         else:
             self._process_count = a
 
+    @property
+    def dense(self):
+        return self._dense
+
     @property
     def time_format(self):
         if self._time_format is None:
@@ -511,9 +707,17 @@ class DVector:
         multiply_dict, return_segmentation = self.segmentation * other.segmentation
 
         # Build the dvec data here with multiplication
-        dvec_data = dict.fromkeys(multiply_dict.keys())
-        for final_seg, (self_key, other_key) in multiply_dict.items():
-            dvec_data[final_seg] = self._data[self_key] * other._data[other_key]
+        if self.dense:
+            dvec_data = self._dense_combine(
+                other=other,
+                combine_dict=multiply_dict,
+                out_segmentation=return_segmentation,
+                operation=operator.mul,
+            )
+        else:
+            dvec_data = dict.fromkeys(multiply_dict.keys())
+            for final_seg, (self_key, other_key) in multiply_dict.items():
+                dvec_data[final_seg] = self._data[self_key] * other._data[other_key]
 
         return DVector(
             zoning_system=return_zoning_system,
@@ -521,6 +725,7 @@ class DVector:
             time_format=self._choose_time_format(other),
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
     def __truediv__(self: DVector, other: DVector) -> DVector:
@@ -553,9 +758,17 @@ class DVector:
         division_dict, return_segmentation = self.segmentation / other.segmentation
 
         # Build the dvec data here with division
-        dvec_data = dict.fromkeys(division_dict.keys())
-        for final_seg, (self_key, other_key) in division_dict.items():
-            dvec_data[final_seg] = self._data[self_key] / other._data[other_key]
+        if self.dense:
+            dvec_data = self._dense_combine(
+                other=other,
+                combine_dict=division_dict,
+                out_segmentation=return_segmentation,
+                operation=operator.truediv,
+            )
+        else:
+            dvec_data = dict.fromkeys(division_dict.keys())
+            for final_seg, (self_key, other_key) in division_dict.items():
+                dvec_data[final_seg] = self._data[self_key] / other._data[other_key]
 
         return DVector(
             zoning_system=return_zoning_system,
@@ -563,6 +776,7 @@ class DVector:
             time_format=self._choose_time_format(other),
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
     def __add__(self, other: DVector) -> DVector:
@@ -601,9 +815,15 @@ class DVector:
             )
 
         # Perform addition
-        dvec_data = {}
-        for segment in self.segmentation.segment_names:
-            dvec_data[segment] = self._data[segment] + other._data[segment]
+        if self.dense:
+            dvec_data = DenseDVectorData(
+                segment_names=self.segmentation.segment_names,
+                values=self._data.array + other._get_dense_data().array,
+            )
+        else:
+            dvec_data = {}
+            for segment in self.segmentation.segment_names:
+                dvec_data[segment] = self._data[segment] + other._data[segment]
 
         return DVector(
             zoning_system=return_zoning_system,
@@ -611,6 +831,7 @@ class DVector:
             time_format=self.time_format,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
     def __sub__(self,other: DVector) -> DVector:
         """
@@ -645,9 +866,15 @@ class DVector:
             )
 
         # Perform addition
-        dvec_data = {}
-        for segment in self.segmentation.segment_names:
-            dvec_data[segment] = self._data[segment] - other._data[segment]
+        if self.dense:
+            dvec_data = DenseDVectorData(
+                segment_names=self.segmentation.segment_names,
+                values=self._data.array - other._get_dense_data().array,
+            )
+        else:
+            dvec_data = {}
+            for segment in self.segmentation.segment_names:
+                dvec_data[segment] = self._data[segment] - other._data[segment]
 
         return DVector(
             zoning_system=return_zoning_system,
@@ -655,6 +882,7 @@ class DVector:
             time_format=self.time_format,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
     def __abs__(self) -> DVector:
         """
@@ -673,6 +901,7 @@ class DVector:
             time_format=self.time_format,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
     def copy(self) -> DVector:
@@ -683,6 +912,7 @@ class DVector:
             time_format=self._time_format,
             import_data=self._data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
     # CUSTOM METHODS
@@ -841,78 +1071,127 @@ class DVector:
         #  We can trust these conditions are met in this environment.
         return import_data
 
-    def _dataframe_to_dvec_internal(self,
-                                    df_chunk,
-                                    ) -> nd.DVectorData:
+    def _dense_to_dvec(self, import_data: DenseDVectorData) -> DenseDVectorData:
         """
-        The internal function of _dataframe_to_dvec - for multiprocessing
+        Validates a given DenseDVectorData.
+
+        Makes sure the given data contains exactly the segments of this
+        DVector's segmentation, and that the rows are in the same order as
+        self.segmentation.segment_names.
         """
+        if not self.segmentation.is_correct_naming(import_data.segment_names):
+            raise core.SegmentationError(
+                "The segment names of the given DenseDVectorData do not match "
+                "the segment names of segmentation %s."
+                % self.segmentation.name
+            )
+
+        # Check the zoning dimension is the right size
         if self.zoning_system is None:
-            # Make sure only one value exists for each segment
-            segments = df_chunk[self._segment_col].tolist()
-            segment_set = set(segments)
-            if len(segment_set) != len(segments):
-                raise ValueError(
-                    "The given DataFrame has one or more repeated values "
-                    "for some of the segments. Found %s segments, but only "
-                    "%s of them are unique."
-                    % (len(segments), len(segment_set))
-                )
+            expected_shape = (len(import_data), )
+        else:
+            expected_shape = (len(import_data), self.zoning_system.n_zones)
 
-            # Can use 1 to 1 connection to speed this up
-            vals = df_chunk[self._val_col].to_list()
-            dvec_chunk = {s: v for s, v, in zip(segments, vals)}
+        if import_data.array.shape != expected_shape:
+            raise ValueError(
+                "The given DenseDVectorData is the wrong shape for this "
+                "DVector. Expected %s, got %s."
+                % (expected_shape, import_data.array.shape)
+            )
 
-        else:
-            # Generate the data on a per segment basis
-            dvec_chunk = dict.fromkeys(df_chunk[self._segment_col].tolist())
+        return import_data.reorder(self.segmentation.segment_names)
 
-            for segment in df_chunk['segment'].unique():
-                # Get all available pop for this segment
-                seg_data = df_chunk[df_chunk[self._segment_col] == segment].copy()
+    def _get_dense_data(self) -> DenseDVectorData:
+        """Returns this DVector's data as a DenseDVectorData
 
-                # Check that it's a valid segment_name
-                if segment not in self.segmentation.segment_names:
-                    raise ValueError(
-                        "%s is not a valid segment name for a Dvector using %s "
-                        "segmentation.\n Data with segment:\n%s"
-                        % (segment, self.segmentation.name, seg_data)
-                    )
+        If this DVector is not dense, the data is converted. Rows are always
+        in the order of self.segmentation.segment_names.
+        """
+        if isinstance(self._data, DenseDVectorData):
+            return self._data
+        return DenseDVectorData.from_dict(self._data, self.segmentation.segment_names)
 
-                # TODO(BT): There's a VERY slight chance that duplicate zones
-                #  could be split across processes. Need to add a check for
-                #  this on the calling function.
-                # Make sure there are no duplicate zones
-                seg_zones = seg_data[self._zone_col].tolist()
-                seg_zones_set = set(seg_zones)
-                if len(seg_zones_set) != len(seg_zones):
-                    raise ValueError(
-                        "The given DataFrame has one or more repeated values "
-                        "for some of the zones in segment %s. Found %s "
-                        "segments, but only %s of them are unique."
-                        % (segment, len(seg_zones), len(seg_zones_set))
-                    )
+    @staticmethod
+    def _align_dense_dims(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Makes dense values with and without zoning broadcastable"""
+        if a.ndim == 1 and b.ndim == 2:
+            a = np.expand_dims(a, axis=1)
+        elif a.ndim == 2 and b.ndim == 1:
+            b = np.expand_dims(b, axis=1)
+        return a, b
+
+    def _dense_combine(self,
+                       other: DVector,
+                       combine_dict: nd.SegmentMultiplyDict,
+                       out_segmentation: core.SegmentationLevel,
+                       operation: Callable[[np.ndarray, np.ndarray], np.ndarray],
+                       ) -> DenseDVectorData:
+        """Vectorised segment-wise operation between self and other
 
-                # Make sure zones that don't exist in this zoning system are found
-                zoning_system_zones = set(self.zoning_system.unique_zones)
-                extra_zones = seg_zones_set - zoning_system_zones
-                if len(extra_zones) > 0:
-                    raise ValueError(
-                        "Found zones that don't exist in %s zoning in the "
-                        "given DataFrame. For segment %s, the following "
-                        "zones do not belong to this zoning system:\n%s"
-                        % (self.zoning_system.name, segment, extra_zones)
-                    )
+        Parameters
+        ----------
+        other:
+            The DVector on the right hand side of operation.
+
+        combine_dict:
+            A dictionary defining how to combine the segments of self and
+            other. Should be in the format of {out_seg: (self_seg, other_seg)}.
+            Usually generated by multiplying, or dividing, two
+            SegmentationLevels.
+
+        out_segmentation:
+            The segmentation of the returned data.
+
+        operation:
+            The function used to combine the values of self and other.
+            e.g. operator.mul
+
+        Returns
+        -------
+        dense_data:
+            The combined data of self and other, in out_segmentation.
+        """
+        self_data = self._get_dense_data()
+        other_data = other._get_dense_data()
+
+        out_names = out_segmentation.segment_names
+        self_keys, other_keys = zip(*[combine_dict[x] for x in out_names])
+
+        self_vals = self_data.array[self_data.rows(self_keys)]
+        other_vals = other_data.array[other_data.rows(other_keys)]
+        self_vals, other_vals = self._align_dense_dims(self_vals, other_vals)
+
+        return DenseDVectorData(out_names, operation(self_vals, other_vals))
+
+    def _dense_aggregate(self,
+                         aggregation_index: core.SegmentAggregationIndex,
+                         out_segmentation: core.SegmentationLevel,
+                         ) -> DenseDVectorData:
+        """Vectorised sum of self segments into out_segmentation
 
-                # Filter down to just data as values, and zoning system as the index
-                seg_data = seg_data.reindex(columns=[self._zone_col, self._val_col])
-                seg_data = seg_data.set_index(self._zone_col)
+        Parameters
+        ----------
+        aggregation_index:
+            The integer index defining how to aggregate self. Usually
+            generated by SegmentationLevel.reduce_index() or
+            SegmentationLevel.aggregate_index().
 
-                # Infill any missing zones as 0
-                seg_data = seg_data.reindex(self.zoning_system.unique_zones, fill_value=0)
-                dvec_chunk[segment] = seg_data.values.flatten()
+        out_segmentation:
+            The segmentation of the returned data.
 
-        return dvec_chunk
+        Returns
+        -------
+        dense_data:
+            The aggregated data of self, in out_segmentation.
+        """
+        # Rows of dense data are always in segment id order
+        self_array = self._get_dense_data().array
+        values = np.add.reduceat(
+            self_array[aggregation_index.rows],
+            aggregation_index.offsets,
+            axis=0,
+        )
+        return DenseDVectorData(out_segmentation.segment_names, values)
 
     def _dataframe_to_dvec(self,
                            df: pd.DataFrame,
@@ -928,15 +1207,15 @@ class DVector:
         - Make sure that any missing segment/zone combinations are infilled
           with infill
         - Make sure only one value exist for each segment/zone combination
+
+        Each row is mapped to an integer segment and zone index, and its
+        value is scattered into a single (n_segments, n_zones) array,
+        self._df_chunk_size rows at a time.
         """
         # Init columns depending on if we have zones
         required_cols = self.segmentation.naming_order + [self._val_col]
-        sort_cols = [self._segment_col]
-
-        # Add zoning if we need it
         if self.zoning_system is not None:
             required_cols += [self._zone_col]
-            sort_cols += [self._zone_col]
 
         # ## VALIDATE AND CONVERT THE GIVEN DATAFRAME ## #
         # Rename import_data columns to internal names
@@ -946,8 +1225,6 @@ class DVector:
         # Rename the segment columns if needed
         if segment_naming_conversion is not None:
             df = self.segmentation.rename_segment_cols(df, segment_naming_conversion)
-            # Set to None so the columns aren't renamed again in `create_segement_col`
-            segment_naming_conversion = None
 
         # Make sure we don't have any extra columns
         extra_cols = set(list(df)) - set(required_cols)
@@ -960,61 +1237,90 @@ class DVector:
                 % extra_cols
             )
 
-        # Add the segment column - drop the individual cols
-        df[self._segment_col] = self.segmentation.create_segment_col(
-            df=df,
-            naming_conversion=segment_naming_conversion
-        )
-        df = df.drop(columns=self.segmentation.naming_order)
-
-        # Sort by the segment columns for MP speed
-        df = df.sort_values(by=sort_cols)
+        # Make sure we have all the columns
+        missing_cols = set(required_cols) - set(list(df))
+        if len(missing_cols) > 0:
+            raise ValueError(
+                "Not all the required columns could be found in the given "
+                "DataFrame. The following columns are missing: %s"
+                % missing_cols
+            )
 
-        # ## MULTIPROCESSING SETUP ## #
-        # If the dataframe is smaller than the chunk size, evenly split across cores
-        if len(df) < self._df_chunk_size * self.process_count:
-            chunk_size = math.ceil(len(df) / self.process_count)
+        # ## SCATTER THE VALUES INTO A SINGLE ARRAY ## #
+        segment_names = self.segmentation.segment_names
+        if self.zoning_system is None:
+            zone_index = None
+            n_zones = 1
         else:
-            chunk_size = self._df_chunk_size
+            zone_index = pd.Index(self.zoning_system.unique_zones)
+            n_zones = self.zoning_system.n_zones
 
-        # setup a pbar
-        pbar_kwargs = {
-            'desc': "Converting df to dvec",
-            'unit': "segment",
-            'disable': (not self._debugging_mp_code),
-            'total': math.ceil(len(df) / chunk_size),
-        }
+        dtype = np.result_type(df[self._val_col].dtype, np.asarray(infill).dtype)
+        values = np.zeros((len(segment_names), n_zones), dtype=dtype)
+        filled = np.zeros(values.shape, dtype=bool)
 
-        # ## MULTIPROCESS THE DATA CONVERSION ## #
-        # Build a list of arguments
-        kwarg_list = list()
-        for df_chunk in pd_utils.chunk_df(df, chunk_size):
-            kwarg_list.append({'df_chunk': df_chunk})
+        for df_chunk in pd_utils.chunk_df(df, max(self._df_chunk_size, 1)):
+            segment_ids = self.segmentation.get_df_segment_ids(df_chunk)
 
-        # Call across multiple threads
-        data_chunks = multiprocessing.multiprocess(
-            fn=self._dataframe_to_dvec_internal,
-            kwargs=kwarg_list,
-            process_count=self.process_count,
-            pbar_kwargs=pbar_kwargs,
-        )
-        data = du.sum_dict_list(data_chunks)
+            # Check that they're all valid segment_names
+            if np.any(segment_ids < 0):
+                bad_rows = df_chunk[segment_ids < 0]
+                raise ValueError(
+                    "Found segments in the given DataFrame that are not valid "
+                    "for a Dvector using %s segmentation.\n"
+                    "Data with invalid segments:\n%s"
+                    % (self.segmentation.name, bad_rows)
+                )
 
-        # ## MAKE SURE DATA CONTAINS ALL SEGMENTS ##
-        # find the segments which arent in there
-        not_in = set(self.segmentation.segment_names) - data.keys()
+            if zone_index is None:
+                zone_ids = np.zeros(len(df_chunk), dtype=np.int64)
+            else:
+                zone_ids = zone_index.get_indexer(df_chunk[self._zone_col])
+
+            # Make sure zones that don't exist in this zoning system are found
+            if np.any(zone_ids < 0):
+                bad_id = segment_ids[zone_ids < 0][0]
+                bad_mask = (segment_ids == bad_id) & (zone_ids < 0)
+                extra_zones = set(df_chunk[self._zone_col].values[bad_mask])
+                raise ValueError(
+                    "Found zones that don't exist in %s zoning in the "
+                    "given DataFrame. For segment %s, the following "
+                    "zones do not belong to this zoning system:\n%s"
+                    % (self.zoning_system.name, segment_names[bad_id], extra_zones)
+                )
+
+            # Make sure only one value exists for each segment / zone
+            duplicated = pd.Index(segment_ids * n_zones + zone_ids).duplicated()
+            duplicated |= filled[segment_ids, zone_ids]
+            if np.any(duplicated):
+                bad_segment = segment_names[segment_ids[duplicated][0]]
+                if zone_index is None:
+                    raise ValueError(
+                        "The given DataFrame has one or more repeated values "
+                        "for some of the segments. Segment %s is repeated."
+                        % bad_segment
+                    )
+                raise ValueError(
+                    "The given DataFrame has one or more repeated values "
+                    "for some of the zones in segment %s."
+                    % bad_segment
+                )
+
+            values[segment_ids, zone_ids] = df_chunk[self._val_col].values
+            filled[segment_ids, zone_ids] = True
+
+        # ## INFILL ANY MISSING SEGMENTS ## #
+        values[~filled.any(axis=1)] = infill
 
-        # Figure out what the default value should be
         if self.zoning_system is None:
-            default_val = infill
-        else:
-            default_val = np.array([infill] * self.zoning_system.n_zones)
+            values = values[:, 0]
 
-        # Infill the missing segments
-        for name in not_in:
-            data[name] = copy.copy(default_val)
+        if self._dense:
+            return DenseDVectorData(segment_names, values)
 
-        return data
+        if self.zoning_system is None:
+            return dict(zip(segment_names, values.tolist()))
+        return dict(zip(segment_names, values))
 
     def get_segment_data(self,
                          segment_name: str = None,
@@ -1170,7 +1476,10 @@ class DVector:
         # Join all the dataframe chunks together
         return pd.concat(dataframe_chunks, ignore_index=True)
 
-    def compress_out(self, path: nd.PathLike) -> pathlib.Path:
+    def compress_out(self,
+                     path: nd.PathLike,
+                     codec: Optional[str] = None,
+                     ) -> pathlib.Path:
         """
         Writes this DVector to disk at path.
 
@@ -1182,6 +1491,13 @@ class DVector:
             If it does not, the suffix will be added, and the new
             path returned.
 
+        codec:
+            The name of the compression codec to write with. One of
+            `compress.CODECS`. If left as None, the default codec is used.
+            The suffix of the chosen codec is used in place of .pbz2.
+            Use `compress.read_in()` to read the DVector back in, the
+            codec is detected automatically.
+
         Returns
         -------
         path:
@@ -1196,10 +1512,15 @@ class DVector:
         # Init
         path = pathlib.Path(path)
 
-        if path.suffix != self._dvec_suffix:
-            path = path.parent / (path.stem + self._dvec_suffix)
+        if codec is None:
+            suffix = self._dvec_suffix
+        else:
+            suffix = '_dvec%s' % compress.get_codec(codec).suffix
+
+        if not path.name.endswith(suffix):
+            path = path.parent / (path.stem + suffix)
 
-        return compress.write_out(self, path, overwrite_suffix=False)
+        return compress.write_out(self, path, overwrite_suffix=False, codec=codec)
 
     @staticmethod
     def _multiply_and_aggregate_internal(aggregation_keys_chunk,
@@ -1270,15 +1591,17 @@ class DVector:
                 % type(out_segmentation)
             )
 
-        # Get the reduction dictionary
-        reduce_dict = self.segmentation.reduce(out_segmentation)
-
         # Reduce!
-        # TODO(BT): Add optional multiprocessing if reduce_dict is big enough
-        dvec_data = dict.fromkeys(reduce_dict.keys())
-        for out_seg_name, in_seg_names in reduce_dict.items():
-            in_lst = [self._data[x].flatten() for x in in_seg_names]
-            dvec_data[out_seg_name] = np.sum(in_lst, axis=0)
+        if self.dense:
+            reduce_index = self.segmentation.reduce_index(out_segmentation)
+            dvec_data = self._dense_aggregate(reduce_index, out_segmentation)
+        else:
+            reduce_dict = self.segmentation.reduce(out_segmentation)
+            # TODO(BT): Add optional multiprocessing if reduce_dict is big enough
+            dvec_data = dict.fromkeys(reduce_dict.keys())
+            for out_seg_name, in_seg_names in reduce_dict.items():
+                in_lst = [self._data[x].flatten() for x in in_seg_names]
+                dvec_data[out_seg_name] = np.sum(in_lst, axis=0)
 
         reduced_dvec = DVector(
             zoning_system=self.zoning_system,
@@ -1286,6 +1609,7 @@ class DVector:
             time_format=self.time_format,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
         if not check_same:
@@ -1351,17 +1675,29 @@ class DVector:
             )
 
         # Get the aggregation dict
+        aggregation_dict = None
         if split_tfntt_segmentation:
             aggregation_dict = self.segmentation.split_tfntt_segmentation(out_segmentation)
-        else:
-            aggregation_dict = self.segmentation.aggregate(out_segmentation)
 
         # Aggregate!
-        # TODO(BT): Add optional multiprocessing if aggregation_dict is big enough
-        dvec_data = dict.fromkeys(aggregation_dict.keys())
-        for out_seg_name, in_seg_names in aggregation_dict.items():
-            in_lst = [self._data[x].flatten() for x in in_seg_names]
-            dvec_data[out_seg_name] = np.sum(in_lst, axis=0)
+        if self.dense:
+            if aggregation_dict is None:
+                aggregation_index = self.segmentation.aggregate_index(out_segmentation)
+            else:
+                aggregation_index = self.segmentation.to_aggregation_index(
+                    out_segmentation,
+                    aggregation_dict,
+                )
+            dvec_data = self._dense_aggregate(aggregation_index, out_segmentation)
+        else:
+            if aggregation_dict is None:
+                aggregation_dict = self.segmentation.aggregate(out_segmentation)
+
+            # TODO(BT): Add optional multiprocessing if aggregation_dict is big enough
+            dvec_data = dict.fromkeys(aggregation_dict.keys())
+            for out_seg_name, in_seg_names in aggregation_dict.items():
+                in_lst = [self._data[x].flatten() for x in in_seg_names]
+                dvec_data[out_seg_name] = np.sum(in_lst, axis=0)
 
         aggregated_dvec = DVector(
             zoning_system=self.zoning_system,
@@ -1369,6 +1705,7 @@ class DVector:
             time_format=self.time_format,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
         if not check_same:
@@ -1431,6 +1768,22 @@ class DVector:
         multiply_dict, mult_return_seg = self.segmentation * other.segmentation
         aggregation_dict = mult_return_seg.aggregate(out_segmentation)
 
+        # Dense data can be done in vectorised chunks instead
+        if self.dense:
+            return DVector(
+                zoning_system=self._check_other(other, "multiply"),
+                segmentation=out_segmentation,
+                time_format=self._choose_time_format(other),
+                import_data=self._dense_multiply_and_aggregate(
+                    other=other,
+                    multiply_dict=multiply_dict,
+                    aggregation_dict=aggregation_dict,
+                    out_segmentation=out_segmentation,
+                ),
+                process_count=self.process_count,
+                dense=self.dense,
+            )
+
         # ## MULTIPROCESS ## #
         # Define the chunk size
         total = len(aggregation_dict)
@@ -1483,8 +1836,74 @@ class DVector:
             time_format=self._choose_time_format(other),
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
+    def _dense_multiply_and_aggregate(self,
+                                      other: DVector,
+                                      multiply_dict: nd.SegmentMultiplyDict,
+                                      aggregation_dict: Dict[str, List[str]],
+                                      out_segmentation: core.SegmentationLevel,
+                                      ) -> DenseDVectorData:
+        """
+        Vectorised version of self.multiply_and_aggregate for dense data.
+
+        Output segments are processed in chunks so that no more than
+        self._dense_chunk_rows rows of the multiplied segmentation are held
+        in memory at once.
+        """
+        # Init
+        self_data = self._get_dense_data()
+        other_data = other._get_dense_data()
+        out_names = out_segmentation.segment_names
+        out_values = list()
+
+        # Group output segments into chunks of roughly equal intermediate size
+        chunks = list()
+        chunk = list()
+        chunk_rows = 0
+        for out_name in out_names:
+            if chunk_rows >= self._dense_chunk_rows:
+                chunks.append(chunk)
+                chunk = list()
+                chunk_rows = 0
+            chunk.append(out_name)
+            chunk_rows += len(aggregation_dict[out_name])
+        chunks.append(chunk)
+
+        for chunk in chunks:
+            # Multiply all the segments needed for this chunk at once
+            mult_names = [aggregation_dict[x] for x in chunk]
+            mult_keys = itertools.chain.from_iterable(mult_names)
+            self_keys, other_keys = zip(*[multiply_dict[x] for x in mult_keys])
+
+            self_vals = self_data.array[self_data.rows(self_keys)]
+            other_vals = other_data.array[other_data.rows(other_keys)]
+            self_vals, other_vals = self._align_dense_dims(self_vals, other_vals)
+            product = self_vals * other_vals
+
+            # Aggregate into the output segments
+            lengths = np.array([len(x) for x in mult_names])
+            offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+            out_values.append(np.add.reduceat(product, offsets, axis=0))
+
+        return DenseDVectorData(out_names, np.concatenate(out_values, axis=0))
+
+    def lazy(self) -> LazyDVector:
+        """Starts a lazy chain of operations from this DVector
+
+        Multiply, aggregate, reduce, and translate_zoning calls on the
+        returned LazyDVector are only recorded. They are all carried out in
+        a single pass once LazyDVector.evaluate() is called, without
+        building any of the intermediate DVectors.
+
+        Returns
+        -------
+        lazy_dvector:
+            A LazyDVector starting from this DVector.
+        """
+        return LazyDVector(self)
+
     def sum_is_close(self,
                      other: nd.DVector,
                      rel_tol: float = 0.0001,
@@ -1533,27 +1952,10 @@ class DVector:
         sum:
             The total sum of all values
         """
+        if self.dense:
+            return np.sum(self._data.array)
         return np.sum([x.flatten() for x in self._data.values()])
 
-    @staticmethod
-    def _translate_zoning_internal(self_data: nd.DVectorData,
-                                   translation: np.array,
-                                   ) -> nd.DVectorData:
-        """
-        Internal function of self.translate_zoning. For multiprocessing
-        """
-        # Init
-        dvec_data = dict.fromkeys(self_data.keys())
-
-        # Translate zoning in chunks
-        for key, value in self_data.items():
-            value = value.flatten()
-            temp = np.broadcast_to(np.expand_dims(value, axis=1), translation.shape)
-            temp = temp * translation
-            dvec_data[key] = temp.sum(axis=0)
-
-        return dvec_data
-
     def translate_zoning(self,
                          new_zoning: core.ZoningSystem,
                          weighting: str = None,
@@ -1595,55 +1997,21 @@ class DVector:
         if self.zoning_system == new_zoning:
             return self.copy()
 
-        # Get translation
-        translation = self.zoning_system.translate(new_zoning, weighting)
-
-        # ## MULTIPROCESS ## #
-        # Define the chunk size
-        total = len(self._data)
-        chunk_size = math.ceil(total / self._chunk_divider)
-
-        # Make sure the chunks aren't too small
-        if chunk_size < self._translate_zoning_min_chunk_size:
-            chunk_size = self._translate_zoning_min_chunk_size
-
-        # Define the kwargs
-        kwarg_list = list()
-        for keys_chunk in du.chunk_list(self._data.keys(), chunk_size):
-            # Calculate subsets of self.data to avoid locks between processes
-            self_data_subset = {k: self._data[k] for k in keys_chunk}
-
-            # Assign to a process
-            kwarg_list.append({
-                'self_data': self_data_subset,
-                'translation': translation.copy(),
-            })
-
-        # Define pbar
-        pbar_kwargs = {
-            'desc': "Translating",
-            'disable': not self._debugging_mp_code,
-        }
+        # Get the translation as a sparse (n_from_zones, n_to_zones) matrix
+        translation = self.zoning_system.translate(new_zoning, weighting, sparse=True)
 
-        # Run across processes
-        data_chunks = multiprocessing.multiprocess(
-            fn=self._translate_zoning_internal,
-            kwargs=kwarg_list,
-            process_count=self.process_count,
-            pbar_kwargs=pbar_kwargs,
-        )
-
-        # Combine all computation chunks into one
-        dvec_data = dict.fromkeys(self._data.keys())
-        for chunk in data_chunks:
-            dvec_data.update(chunk)
+        # Translate all segments at once, (n_segments, n_from_zones) data
+        # is transposed so that the sparse matrix is on the left
+        self_data = self._get_dense_data()
+        translated = translation.T.dot(self_data.array.T).T
 
         return DVector(
             zoning_system=new_zoning,
             segmentation=self.segmentation,
             time_format=self.time_format,
-            import_data=dvec_data,
+            import_data=DenseDVectorData(self_data.segment_names, translated),
             process_count=self.process_count,
+            dense=self.dense,
         )
 
     def expand_segmentation(self,
@@ -1691,18 +2059,29 @@ class DVector:
                 )
 
         # ## EXPAND ## #
-        expand_dict, return_seg = self.segmentation.expand(expansion_dvec.segmentation)
+        if self.dense:
+            expand_index, return_seg = self.segmentation.expand_index(
+                expansion_dvec.segmentation
+            )
+            self_vals = self._get_dense_data().array[expand_index.self_rows]
+            other_vals = expansion_dvec._get_dense_data().array[expand_index.other_rows]
+            self_vals, other_vals = self._align_dense_dims(self_vals, other_vals)
+            dvec_data = DenseDVectorData(return_seg.segment_names, self_vals * other_vals)
+
+        else:
+            expand_dict, return_seg = self.segmentation.expand(expansion_dvec.segmentation)
 
-        # Build the new DVec data from the expansion
-        dvec_data = dict.fromkeys(expand_dict.keys())
-        for final_seg, (self_key, other_key) in expand_dict.items():
-            dvec_data[final_seg] = self._data[self_key] * expansion_dvec._data[other_key]
+            # Build the new DVec data from the expansion
+            dvec_data = dict.fromkeys(expand_dict.keys())
+            for final_seg, (self_key, other_key) in expand_dict.items():
+                dvec_data[final_seg] = self._data[self_key] * expansion_dvec._data[other_key]
 
         expanded_dvec = DVector(
             zoning_system=self.zoning_system,
             segmentation=return_seg,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
         # Make sure we're not dropping any demand
@@ -1751,12 +2130,19 @@ class DVector:
             )
 
         # Get the subset definition
-        subset_list = self.segmentation.subset(out_segmentation)
+        subset_index = self.segmentation.subset_index(out_segmentation)
 
         # Keep just the subset
-        dvec_data = dict.fromkeys(subset_list)
-        for segment in subset_list:
-            dvec_data[segment] = self._data[segment]
+        if self.dense and len(subset_index) == len(out_segmentation):
+            dvec_data = DenseDVectorData(
+                out_segmentation.segment_names,
+                self._get_dense_data().array[subset_index],
+            )
+        else:
+            subset_list = [self.segmentation.segment_names[x] for x in subset_index]
+            dvec_data = dict.fromkeys(subset_list)
+            for segment in subset_list:
+                dvec_data[segment] = self._data[segment]
 
         return DVector(
             zoning_system=self.zoning_system,
@@ -1764,6 +2150,7 @@ class DVector:
             time_format=self.time_format,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
     def split_tfntt_segmentation(self,
@@ -1822,11 +2209,18 @@ class DVector:
         aggregation_dict = self.segmentation.split_tfntt_segmentation(out_segmentation)
 
         # Aggregate!
-        # TODO(BT): Add optional multiprocessing if aggregation_dict is big enough
-        dvec_data = dict()
-        for out_seg_name, in_seg_names in aggregation_dict.items():
-            in_lst = [self._data[x].flatten() for x in in_seg_names]
-            dvec_data[out_seg_name] = np.sum(in_lst, axis=0)
+        if self.dense:
+            aggregation_index = self.segmentation.to_aggregation_index(
+                out_segmentation,
+                aggregation_dict,
+            )
+            dvec_data = self._dense_aggregate(aggregation_index, out_segmentation)
+        else:
+            # TODO(BT): Add optional multiprocessing if aggregation_dict is big enough
+            dvec_data = dict()
+            for out_seg_name, in_seg_names in aggregation_dict.items():
+                in_lst = [self._data[x].flatten() for x in in_seg_names]
+                dvec_data[out_seg_name] = np.sum(in_lst, axis=0)
 
         return DVector(
             zoning_system=self.zoning_system,
@@ -1834,6 +2228,7 @@ class DVector:
             time_format=self.time_format,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
     def duplicate_segment_like(self,
@@ -1901,8 +2296,41 @@ class DVector:
             time_format=self.time_format,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
+    def _dense_split(self,
+                     other: DVector,
+                     zonal_average: bool,
+                     ) -> DenseDVectorData:
+        """Vectorised split of self segments into other.segmentation
+
+        See `split_segmentation_like()` for a full description of the
+        parameters.
+        """
+        # For each segment in other, the segment in self it is split from
+        split_from = self.segmentation.split_index(other.segmentation)
+        n_segments = len(self.segmentation)
+
+        other_vals = other._get_dense_data().array
+        if zonal_average and other_vals.ndim == 2:
+            other_vals = other_vals.mean(axis=1)
+
+        # Total of each split group, and the number of segments in it
+        totals = np.zeros((n_segments, ) + other_vals.shape[1:])
+        np.add.at(totals, split_from, other_vals)
+        totals = totals[split_from]
+        n_splits = np.bincount(split_from, minlength=n_segments)[split_from]
+        n_splits = n_splits.reshape((-1, ) + (1, ) * (other_vals.ndim - 1))
+
+        # If 0 total split evenly
+        with np.errstate(divide='ignore', invalid='ignore'):
+            split_factors = np.where(totals == 0, 1 / n_splits, other_vals / totals)
+
+        self_vals = self._get_dense_data().array[split_from]
+        self_vals, split_factors = self._align_dense_dims(self_vals, split_factors)
+        return DenseDVectorData(other.segmentation.segment_names, self_vals * split_factors)
+
     def split_segmentation_like(self,
                                 other: DVector,
                                 zonal_average: bool = True,
@@ -1954,47 +2382,51 @@ class DVector:
                 % type(other)
             )
 
-        # Get the dictionary defining how to split
-        split_dict = self.segmentation.split(other.segmentation)
-
         # Split!
-        # TODO(BT): Add optional multiprocessing if split_dict is big enough
-        dvec_data = dict.fromkeys(other.segmentation.segment_names)
-        for in_seg_name, out_seg_names in split_dict.items():
-            # Calculate the splitting factors
-            if zonal_average:
-                other_segs = [np.mean(other._data[s]) for s in out_seg_names]
-                split_factors = other_segs / np.sum(other_segs)
-
-                # If 0 total split evenly
-                if np.sum(other_segs) == 0:
-                    split_factors = np.ones_like(other_segs) / len(other_segs)
-                else:
+        if self.dense:
+            dvec_data = self._dense_split(other, zonal_average)
+
+        else:
+            # Get the dictionary defining how to split
+            split_dict = self.segmentation.split(other.segmentation)
+
+            # TODO(BT): Add optional multiprocessing if split_dict is big enough
+            dvec_data = dict.fromkeys(other.segmentation.segment_names)
+            for in_seg_name, out_seg_names in split_dict.items():
+                # Calculate the splitting factors
+                if zonal_average:
+                    other_segs = [np.mean(other._data[s]) for s in out_seg_names]
                     split_factors = other_segs / np.sum(other_segs)
-            else:
-                other_segs = np.array([other._data[s] for s in out_seg_names])
-                zonal_sums = np.sum(other_segs, axis=0)
-                with np.errstate(divide='ignore'):
-                    split_factors = other_segs / zonal_sums
-
-                # If any divide by 0s, split evenly
-                zero_sums = (zonal_sums == 0)
-                if np.count_nonzero(zero_sums) > 0:
-                    # Get even split
-                    n_segs = len(other_segs)
-                    even_split = np.ones((n_segs, 1)) * (1 / n_segs)
-
-                    # Infill the NaNs
-                    zero_loc = zero_sums.nonzero()
-                    for loc in zero_loc:
-                        split_factors[:, loc] = even_split
-
-            # Get the original value
-            self_seg = self._data[in_seg_name]
-
-            # Split
-            for name, factor in zip(out_seg_names, split_factors):
-                dvec_data[name] = self_seg * factor
+
+                    # If 0 total split evenly
+                    if np.sum(other_segs) == 0:
+                        split_factors = np.ones_like(other_segs) / len(other_segs)
+                    else:
+                        split_factors = other_segs / np.sum(other_segs)
+                else:
+                    other_segs = np.array([other._data[s] for s in out_seg_names])
+                    zonal_sums = np.sum(other_segs, axis=0)
+                    with np.errstate(divide='ignore'):
+                        split_factors = other_segs / zonal_sums
+
+                    # If any divide by 0s, split evenly
+                    zero_sums = (zonal_sums == 0)
+                    if np.count_nonzero(zero_sums) > 0:
+                        # Get even split
+                        n_segs = len(other_segs)
+                        even_split = np.ones((n_segs, 1)) * (1 / n_segs)
+
+                        # Infill the NaNs
+                        zero_loc = zero_sums.nonzero()
+                        for loc in zero_loc:
+                            split_factors[:, loc] = even_split
+
+                # Get the original value
+                self_seg = self._data[in_seg_name]
+
+                # Split
+                for name, factor in zip(out_seg_names, split_factors):
+                    dvec_data[name] = self_seg * factor
 
         split_dvec = DVector(
             zoning_system=self.zoning_system,
@@ -2002,6 +2434,7 @@ class DVector:
             time_format=self._choose_time_format(other),
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
         # Check that we haven't dropped anything
@@ -2244,6 +2677,7 @@ class DVector:
             time_format=self.time_format,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
     def sum_zoning(self) -> DVector:
@@ -2295,6 +2729,7 @@ class DVector:
             time_format=self.time_format,
             import_data=dict(zip(keys, values)),
             process_count=self.process_count,
+            dense=self.dense,
         )
 
     def convert_time_format(self,
@@ -2359,6 +2794,7 @@ class DVector:
             time_format=new_time_format,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
     def write_sector_reports(self,
@@ -2475,9 +2911,13 @@ class DVector:
             time_format=self.time_format,
             import_data=dvec_data,
             process_count=self.process_count,
+            dense=self.dense,
         )
 
-    def save(self, path: PathLike = None) -> Union[None, Dict[str, Any]]:
+    def save(self,
+             path: PathLike = None,
+             memory_map: bool = False,
+             ) -> Union[None, Dict[str, Any]]:
         """Converts DVector into and instance dict and saves to disk
 
         The instance_dict contains just enough information to be able to
@@ -2490,6 +2930,14 @@ class DVector:
         path:
             Path to output file to save.
 
+        memory_map:
+            Whether to save in the memory mappable format. If True, the
+            data is written uncompressed to a single .npy file, alongside
+            path, and path only contains a small header with the zoning,
+            segmentation and time_format. DVectors saved this way can be
+            loaded in without reading all the data into memory, see `load()`.
+            path must be set if this is True.
+
         Returns
         -------
         none_or_instance_dict:
@@ -2497,9 +2945,15 @@ class DVector:
             If path is not set, the instance dict that would otherwise
             be sent to disk is returned.
         """
+        if memory_map:
+            if path is None:
+                raise ValueError("path must be given to save a memory mapped DVector.")
+            self._save_memory_map(path)
+            return None
+
         # Create a dictionary of objects needed to recreate this instance
         instance_dict = {
-            "zoning_system": self.zoning_system.save(),
+            "zoning_system": self._save_zoning_system(),
             "segmentation": self.segmentation.save(),
             "time_format": self._time_format,
             "data": self._data,
@@ -2513,8 +2967,45 @@ class DVector:
 
         return instance_dict
 
+    def _save_zoning_system(self) -> Optional[Dict[str, Any]]:
+        """Returns the zoning system instance dict, or None if no zoning"""
+        if self.zoning_system is None:
+            return None
+        return self.zoning_system.save()
+
     @staticmethod
-    def load(path_or_instance_dict: Union[PathLike, Dict[str, Any]]) -> DVector:
+    def _get_memory_map_values_path(path: PathLike) -> pathlib.Path:
+        """Returns the path of the .npy values file to go alongside path"""
+        path = pathlib.Path(path)
+        return path.parent / (path.name + DVector._memory_map_values_suffix)
+
+    def _save_memory_map(self, path: PathLike) -> None:
+        """Writes this DVector to disk in the memory mappable format
+
+        The values are written uncompressed to a single .npy file of shape
+        (n_segments, n_zones). A small pickled header is written to path
+        containing everything else needed to rebuild the DVector.
+        """
+        values_path = self._get_memory_map_values_path(path)
+        dense_data = self._get_dense_data()
+        np.save(values_path, dense_data.array, allow_pickle=False)
+
+        header = {
+            "format": self._memory_map_format,
+            "version": self.__version__,
+            "zoning_system": self._save_zoning_system(),
+            "segmentation": self.segmentation.save(),
+            "time_format": self._time_format,
+            "segment_names": dense_data.segment_names,
+            "values_fname": values_path.name,
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(header, f)
+
+    @staticmethod
+    def load(path_or_instance_dict: Union[PathLike, Dict[str, Any]],
+             mmap_mode: Optional[str] = 'r',
+             ) -> DVector:
         """Creates a DVector instance from path_or_instance_dict
 
         If path_or_instance_dict is a path, the file is loaded in and
@@ -2523,10 +3014,21 @@ class DVector:
         the class constructor.
         Use `save()` to save the data in the correct format.
 
+        Files saved with `save(memory_map=True)` are detected automatically.
+        These are loaded as dense DVectors backed by a memory map of the
+        saved values, so data is only read from disk when it is accessed,
+        e.g. with `get_segment_data()`.
+
         Parameters
         ----------
         path_or_instance_dict:
             Path to read the data in from.
+
+        mmap_mode:
+            Only used when loading a memory mapped DVector. The mode to
+            memory map the values file with, passed directly to
+            `np.load()`. Defaults to read-only access. If None, all the
+            values are read into memory.
         """
         # Read in the file if needed
         if isinstance(path_or_instance_dict, dict):
@@ -2543,12 +3045,322 @@ class DVector:
                 % type(instance_dict)
             )
 
+        # Load the values in from a memory map if that's how they were saved
+        if instance_dict.get("format") == DVector._memory_map_format:
+            if isinstance(path_or_instance_dict, dict):
+                raise ValueError(
+                    "Memory mapped DVectors can only be loaded from a path, "
+                    "not from an instance_dict."
+                )
+            values_path = pathlib.Path(path_or_instance_dict).parent
+            values_path = values_path / instance_dict["values_fname"]
+            import_data = DenseDVectorData(
+                segment_names=instance_dict["segment_names"],
+                values=np.load(values_path, mmap_mode=mmap_mode, allow_pickle=False),
+            )
+        else:
+            import_data = instance_dict['data']
+
         # Instantiate a new object
+        zoning_system = instance_dict['zoning_system']
+        if zoning_system is not None:
+            zoning_system = core.ZoningSystem.load(zoning_system)
+
         return DVector(
-            zoning_system=core.ZoningSystem.load(instance_dict['zoning_system']),
+            zoning_system=zoning_system,
             segmentation=core.SegmentationLevel.load(instance_dict['segmentation']),
             time_format=instance_dict['time_format'],
-            import_data=instance_dict['data'],
+            import_data=import_data,
+        )
+
+
+class LazyDVector:
+    """A deferred chain of DVector operations, evaluated in one fused pass
+
+    Records multiply, aggregate, reduce, and zoning translation steps
+    without building any of the intermediate DVectors. Instead, each output
+    segment is tracked as a sum of "terms", where each term is the product
+    of one row from each of the DVectors being multiplied. Aggregating and
+    reducing only regroups the terms, and multiplying adds another row to
+    each of them, so the only data held before evaluation is a handful of
+    integer arrays, one element per term.
+
+    When `evaluate()` is called, terms are multiplied and summed into their
+    output segments in chunks of DVector._dense_chunk_rows, so a large
+    intermediate segmentation is never held in memory at once. This is a
+    generalisation of DVector.multiply_and_aggregate() to any chain of
+    operations.
+
+    Use DVector.lazy() to start a chain. Every method returns a new
+    LazyDVector, leaving the original unchanged.
+    """
+
+    def __init__(self, dvec: DVector) -> None:
+        """
+        Parameters
+        ----------
+        dvec:
+            The DVector to start the chain of operations from.
+        """
+        if not isinstance(dvec, DVector):
+            raise ValueError(
+                "dvec is not the correct type. Expected DVector, got %s"
+                % type(dvec)
+            )
+
+        n_segments = len(dvec.segmentation)
+
+        # The DVectors being multiplied, and the row of each used in each term
+        self._factors = [dvec]
+        self._factor_rows = [np.arange(n_segments, dtype=np.int64)]
+
+        # Terms are always stored grouped by segment, in segment order. This
+        # is the number of terms summed into each segment
+        self._term_counts = np.ones(n_segments, dtype=np.int64)
+
+        self._segmentation = dvec.segmentation
+        self._zoning_system = dvec.zoning_system
+        self._time_format = dvec._time_format
+        self._process_count = dvec.process_count
+        self._dense = dvec.dense
+
+    @property
+    def segmentation(self) -> core.SegmentationLevel:
+        return self._segmentation
+
+    @property
+    def zoning_system(self) -> Optional[core.ZoningSystem]:
+        return self._zoning_system
+
+    @property
+    def n_terms(self) -> int:
+        """The number of rows that will be multiplied on evaluation"""
+        return int(self._term_counts.sum())
+
+    def _copy_with(self, **kwargs) -> LazyDVector:
+        """Returns a shallow copy of self, with the given attributes replaced"""
+        new = copy.copy(self)
+        new._factors = list(self._factors)
+        new._factor_rows = list(self._factor_rows)
+        for name, value in kwargs.items():
+            setattr(new, name, value)
+        return new
+
+    def _gather_terms(self, segment_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Gets the term ids of each of segment_ids
+
+        Returns
+        -------
+        term_ids:
+            The term ids of each of segment_ids, concatenated in order.
+
+        term_counts:
+            The number of terms of each of segment_ids.
+        """
+        term_starts = np.cumsum(self._term_counts) - self._term_counts
+        term_counts = self._term_counts[segment_ids]
+        group_starts = np.cumsum(term_counts) - term_counts
+
+        # Position in the group, plus the start of that segment's terms
+        shift = np.repeat(term_starts[segment_ids] - group_starts, term_counts)
+        term_ids = np.arange(term_counts.sum(), dtype=np.int64) + shift
+        return term_ids, term_counts
+
+    def _regroup(self,
+                 index: core.SegmentAggregationIndex,
+                 out_segmentation: core.SegmentationLevel,
+                 ) -> LazyDVector:
+        """Sums the segments of self into out_segmentation, using index"""
+        term_ids, term_counts = self._gather_terms(index.rows)
+
+        # Total terms of each output segment, allowing for empty segments
+        group_ends = np.append(index.offsets[1:], len(index.rows))
+        cum_counts = np.concatenate([[0], np.cumsum(term_counts)])
+        out_counts = cum_counts[group_ends] - cum_counts[index.offsets]
+
+        return self._copy_with(
+            _factor_rows=[x[term_ids] for x in self._factor_rows],
+            _term_counts=out_counts.astype(np.int64),
+            _segmentation=out_segmentation,
+        )
+
+    def multiply(self, other: Union[DVector, LazyDVector]) -> LazyDVector:
+        """Records multiplying by other. See DVector.__mul__()"""
+        if isinstance(other, LazyDVector):
+            other = other.evaluate()
+        if not isinstance(other, DVector):
+            raise nd.NormitsDemandError(
+                "The multiply operator can only be used with."
+                "a DVector objects on each side. Got %s and %s."
+                % (type(self), type(other))
+            )
+
+        # Work out the zoning and time format the same way DVector does
+        zoning_system = self._zoning_system
+        if zoning_system is None:
+            zoning_system = other.zoning_system
+        elif other.zoning_system is not None and other.zoning_system != zoning_system:
+            raise nd.ZoningError(
+                "Cannot multiply two Dvectors using different zoning systems.\n"
+                "zoning system of a: %s\n"
+                "zoning system of b: %s\n"
+                % (zoning_system.name, other.zoning_system.name)
+            )
+
+        time_format = self._time_format
+        if time_format is None:
+            time_format = other._time_format
+        elif other._time_format is not None and other._time_format != time_format:
+            warnings.warn(
+                "The time_format of both DVectors is set, but they are not "
+                "set to the same format. This might not give the "
+                "results you expect!\n"
+                "\tself time_format: %s\n"
+                "\tother time_format: %s"
+                % (time_format.name, other.time_format)
+            )
+
+        # Each new segment uses all the terms of one self segment
+        index, return_seg = self._segmentation.multiply_index(other.segmentation)
+        term_ids, term_counts = self._gather_terms(index.self_rows)
+
+        new = self._copy_with(
+            _factor_rows=[x[term_ids] for x in self._factor_rows],
+            _term_counts=term_counts,
+            _segmentation=return_seg,
+            _zoning_system=zoning_system,
+            _time_format=time_format,
+        )
+        new._factors.append(other)
+        new._factor_rows.append(np.repeat(index.other_rows, term_counts))
+        return new
+
+    def __mul__(self, other: Union[DVector, LazyDVector]) -> LazyDVector:
+        return self.multiply(other)
+
+    def aggregate(self,
+                  out_segmentation: core.SegmentationLevel,
+                  split_tfntt_segmentation: bool = False,
+                  ) -> LazyDVector:
+        """Records aggregating into out_segmentation. See DVector.aggregate()"""
+        if not isinstance(out_segmentation, core.SegmentationLevel):
+            raise ValueError(
+                "out_segmentation is not the correct type. "
+                "Expected SegmentationLevel, got %s"
+                % type(out_segmentation)
+            )
+
+        if split_tfntt_segmentation:
+            index = self._segmentation.to_aggregation_index(
+                out_segmentation,
+                self._segmentation.split_tfntt_segmentation(out_segmentation),
+            )
+        else:
+            index = self._segmentation.aggregate_index(out_segmentation)
+
+        return self._regroup(index, out_segmentation)
+
+    def reduce(self, out_segmentation: core.SegmentationLevel) -> LazyDVector:
+        """Records reducing into out_segmentation. See DVector.reduce()"""
+        if not isinstance(out_segmentation, core.SegmentationLevel):
+            raise ValueError(
+                "out_segmentation is not the correct type. "
+                "Expected SegmentationLevel, got %s"
+                % type(out_segmentation)
+            )
+
+        index = self._segmentation.reduce_index(out_segmentation)
+        return self._regroup(index, out_segmentation)
+
+    def translate_zoning(self,
+                         new_zoning: core.ZoningSystem,
+                         weighting: str = None,
+                         ) -> LazyDVector:
+        """Records translating into new_zoning. See DVector.translate_zoning()
+
+        Translation is linear, so if only one of the DVectors being
+        multiplied has a zoning system, that DVector is translated and
+        the chain carries on. Otherwise, the chain so far is evaluated
+        and translated before carrying on.
+        """
+        if self._zoning_system is None:
+            raise nd.NormitsDemandError(
+                "Cannot translate the zoning system of a DVector that does "
+                "not have a zoning system to begin with."
+            )
+
+        zoned = [i for i, x in enumerate(self._factors) if x.zoning_system is not None]
+        if len(zoned) > 1:
+            return self.evaluate().translate_zoning(new_zoning, weighting).lazy()
+
+        new = self._copy_with(_zoning_system=new_zoning)
+        new._factors[zoned[0]] = self._factors[zoned[0]].translate_zoning(
+            new_zoning=new_zoning,
+            weighting=weighting,
+        )
+        return new
+
+    def lazy(self) -> LazyDVector:
+        """Returns self, so chains can be started from DVectors or LazyDVectors"""
+        return self
+
+    def evaluate(self) -> DVector:
+        """Carries out all the recorded operations
+
+        Returns
+        -------
+        dvector:
+            A new DVector, the same as if each of the recorded operations
+            had been carried out on a DVector in turn.
+        """
+        arrays = [x._get_dense_data().array for x in self._factors]
+        n_segments = len(self._term_counts)
+        term_ends = np.cumsum(self._term_counts)
+        term_starts = term_ends - self._term_counts
+        max_rows = DVector._dense_chunk_rows
+
+        out_values = list()
+        seg_start = 0
+        while seg_start < n_segments:
+            # Take as many whole segments as fit in max_rows terms, at least one
+            term_start = term_starts[seg_start]
+            seg_end = np.searchsorted(term_ends, term_start + max_rows, side='right')
+            seg_end = max(int(seg_end), seg_start + 1)
+            term_end = term_ends[seg_end - 1]
+
+            # Multiply all the terms in this chunk
+            product = None
+            for array, rows in zip(arrays, self._factor_rows):
+                values = array[rows[term_start:term_end]]
+                if product is None:
+                    product = values
+                else:
+                    product, values = DVector._align_dense_dims(product, values)
+                    product = product * values
+
+            # Sum into segments, empty segments are zero.
+            # Only reduce over segments with terms, so every offset is valid
+            # and each sum runs up to the start of the next non-empty segment
+            counts = self._term_counts[seg_start:seg_end]
+            has_terms = counts > 0
+            chunk_values = np.zeros((len(counts), ) + product.shape[1:], dtype=product.dtype)
+            if has_terms.any():
+                offsets = term_starts[seg_start:seg_end][has_terms] - term_start
+                chunk_values[has_terms] = np.add.reduceat(product, offsets, axis=0)
+            out_values.append(chunk_values)
+
+            seg_start = seg_end
+
+        return DVector(
+            zoning_system=self._zoning_system,
+            segmentation=self._segmentation,
+            time_format=self._time_format,
+            import_data=DenseDVectorData(
+                self._segmentation.segment_names,
+                np.concatenate(out_values, axis=0),
+            ),
+            process_count=self._process_count,
+            dense=self._dense,
         )
 
 
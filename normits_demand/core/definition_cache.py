@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Created on: 18/10/2026
+Updated on:
+
+Last update made by:
+Other updates made by:
+
+File purpose:
+Compiled binary cache of segmentation and zoning system definitions.
+
+Definitions are stored as uncompressed numpy archives alongside the
+modified times of the source files they were built from. A cached
+definition is only used while all of its source files are unchanged, so
+editing a definition automatically rebuilds its cache on next use.
+"""
+# Built-Ins
+import os
+import logging
+import zipfile
+
+from typing import Dict
+from typing import List
+from typing import Optional
+
+# Third Party
+import numpy as np
+
+# Local Imports
+import normits_demand as nd
+from normits_demand.utils import file_ops
+
+LOG = logging.getLogger(__name__)
+
+# Bump whenever the cached format changes, to invalidate old caches
+CACHE_VERSION = 1
+
+CACHE_FTYPE = '.npz'
+
+# Prefixes of the special keys stored in each cache
+_META_PREFIX = '__'
+_OBJECT_KEYS = '__object_keys'
+_SOURCE_PATHS = '__source_paths'
+_SOURCE_MTIMES = '__source_mtimes'
+_VERSION = '__version'
+
+
+def _get_mtimes(source_paths: List[nd.PathLike]) -> np.ndarray:
+    """Gets the modified time of each of source_paths"""
+    return np.array([os.path.getmtime(x) for x in source_paths], dtype=np.float64)
+
+
+def read_cache(cache_path: nd.PathLike,
+               source_paths: List[nd.PathLike],
+               ) -> Optional[Dict[str, np.ndarray]]:
+    """Reads a cached definition, if it is still valid
+
+    Parameters
+    ----------
+    cache_path:
+        The path to the cached definition.
+
+    source_paths:
+        The paths to the source files the definition is built from. The
+        cache is only valid if it was built from the same files, with the
+        same modified times.
+
+    Returns
+    -------
+    arrays:
+        A dictionary of the arrays passed into `write_cache()`. None if
+        no cache exists, it cannot be read, or it is no longer valid.
+    """
+    if not os.path.isfile(cache_path):
+        return None
+
+    try:
+        with np.load(cache_path, allow_pickle=False) as cache:
+            if int(cache[_VERSION]) != CACHE_VERSION:
+                return None
+
+            # Make sure the sources haven't changed
+            source_paths = [os.fspath(x) for x in source_paths]
+            if cache[_SOURCE_PATHS].tolist() != source_paths:
+                return None
+            if not np.array_equal(cache[_SOURCE_MTIMES], _get_mtimes(source_paths)):
+                return None
+
+            object_keys = set(cache[_OBJECT_KEYS].tolist())
+            arrays = dict()
+            for key in cache.files:
+                if key.startswith(_META_PREFIX):
+                    continue
+                arrays[key] = cache[key]
+                if key in object_keys:
+                    arrays[key] = arrays[key].astype(object)
+
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as err:
+        # A broken cache is the same as no cache
+        LOG.warning("Unable to read definition cache at %s: %s", cache_path, err)
+        return None
+
+    return arrays
+
+
+def write_cache(cache_path: nd.PathLike,
+                source_paths: List[nd.PathLike],
+                arrays: Dict[str, np.ndarray],
+                ) -> None:
+    """Writes a definition to the cache
+
+    Failing to write the cache, e.g. due to permissions, is not fatal.
+    A warning is logged and the definition is not cached.
+
+    Parameters
+    ----------
+    cache_path:
+        The path to write the cached definition to.
+
+    source_paths:
+        The paths to the source files the definition was built from.
+
+    arrays:
+        A dictionary of {name: array} to cache. Object arrays must only
+        contain strings, as they are cached as fixed width strings and
+        converted back into object arrays on read.
+    """
+    # Object arrays can't be saved without pickling
+    object_keys = list()
+    to_save = dict()
+    for key, array in arrays.items():
+        array = np.asarray(array)
+        if array.dtype == object:
+            if not all(isinstance(x, str) for x in array.flat):
+                LOG.warning(
+                    "Not caching definition at %s. %s contains values which "
+                    "are not strings.", cache_path, key,
+                )
+                return
+            object_keys.append(key)
+            array = array.astype(str)
+        to_save[key] = array
+
+    source_paths = [os.fspath(x) for x in source_paths]
+    to_save[_VERSION] = np.array(CACHE_VERSION)
+    to_save[_SOURCE_PATHS] = np.array(source_paths, dtype=str)
+    to_save[_SOURCE_MTIMES] = _get_mtimes(source_paths)
+    to_save[_OBJECT_KEYS] = np.array(object_keys, dtype=str)
+
+    # Write to a temporary file first so a partial write never
+    # leaves a broken cache behind
+    temp_path = '%s.%s.tmp%s' % (cache_path, os.getpid(), CACHE_FTYPE)
+    try:
+        file_ops.create_folder(os.path.dirname(cache_path), verbose_create=False)
+        np.savez(temp_path, **to_save)
+        os.replace(temp_path, cache_path)
+    except (OSError, ValueError) as err:
+        LOG.warning("Unable to cache definition to %s: %s", cache_path, err)
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+
+
+def clear_cache(cache_dir: nd.PathLike) -> None:
+    """Removes all cached definitions in cache_dir
+
+    Parameters
+    ----------
+    cache_dir:
+        The directory containing the cached definitions to remove.
+    """
+    if not os.path.isdir(cache_dir):
+        return
+
+    for fname in os.listdir(cache_dir):
+        if fname.endswith(CACHE_FTYPE):
+            os.remove(os.path.join(cache_dir, fname))
@@ -28,6 +28,8 @@ from typing import List
 from typing import Dict
 from typing import Tuple
 from typing import Union
+from typing import Callable
+from typing import Iterable
 from typing import Optional
 
 # Third Party
@@ -40,6 +42,8 @@ import normits_demand as nd
 from normits_demand import constants as consts
 from normits_demand.concurrency import multiprocessing
 
+from normits_demand.core import definition_cache
+
 from normits_demand.utils import file_ops
 from normits_demand.utils import compress
 from normits_demand.utils import general as du
@@ -50,6 +54,32 @@ from normits_demand import logging as nd_log
 
 LOG = nd_log.get_logger(__name__)
 
+# Process-wide caches of segmentation levels, and definition files keyed
+# by path. Definition files are stored alongside their modified time
+_SEGMENTATION_CACHE = dict()
+_DEFINITIONS_CACHE = dict()
+
+# Types that segment values can be cached as on disk
+_CACHEABLE_SEGMENT_TYPES = {t.__name__: t for t in (int, float, str, bool)}
+
+# ## INDEX TYPES ## #
+# How to sum the segments of one segmentation into another. rows are the
+# segment ids of the input segments, grouped by output segment in output
+# segment order. offsets are the start of each group in rows, ready to be
+# passed to np.add.reduceat()
+SegmentAggregationIndex = collections.namedtuple(
+    typename='SegmentAggregationIndex',
+    field_names=['rows', 'offsets'],
+)
+
+# How to combine the segments of two segmentations into a third. For each
+# output segment, in output segment order, self_rows and other_rows are
+# the segment ids of the segments to combine
+SegmentCombineIndex = collections.namedtuple(
+    typename='SegmentCombineIndex',
+    field_names=['self_rows', 'other_rows'],
+)
+
 # ## CLASSES ## #
 class SegmentationLevel:
     """Segmentation definitions to provide common interface
@@ -138,6 +168,15 @@ class SegmentationLevel:
         'tfn_tt_splits.pbz2',
     )
 
+    _definitions_cache_dir = os.path.join(
+        _segment_definitions_path,
+        '_cache',
+    )
+
+    # Whether to also cache compiled segmentation definitions to disk
+    # between runs. See `get_segmentation_level()`
+    definitions_disk_cache = False
+
     _list_separator = ';'
     _translate_separator = ':'
     _reduce_separator = ':'
@@ -150,6 +189,7 @@ class SegmentationLevel:
                  naming_order: List[str],
                  segment_types: Dict[str, type],
                  valid_segments: pd.DataFrame,
+                 segment_names: Optional[List[str]] = None,
                  ):
         """Builds a SegmentationLevel
 
@@ -173,6 +213,12 @@ class SegmentationLevel:
             A pandas.DataFrame listing all the valid segments of this
             segmentation. The columns should be named after the segments
             they represent, and should correspond to naming_order
+
+        segment_names:
+            The names of each of the segments in valid_segments, in the
+            same order. If left as None, the names are built from
+            valid_segments and naming_order. Should only be set when the
+            names have already been built, e.g. when reading from a cache.
         """
         # TODO: Validate this is a valid segment name
         # Init
@@ -220,13 +266,26 @@ class SegmentationLevel:
 
         # ## BUILD SEGMENT NAMING ## #
         segments_and_names = self.segments.copy()
-        segments_and_names['name'] = pd_utils.str_join_cols(
-            df=segments_and_names,
-            columns=self.naming_order,
-        )
+        if segment_names is None:
+            segments_and_names['name'] = pd_utils.str_join_cols(
+                df=segments_and_names,
+                columns=self.naming_order,
+            )
+        elif len(segment_names) != len(segments_and_names):
+            raise SegmentationError(
+                "The number of segment names given does not match the "
+                "number of valid segments. Got %s names and %s segments."
+                % (len(segment_names), len(segments_and_names))
+            )
+        else:
+            segments_and_names['name'] = segment_names
         self._segments_and_names = segments_and_names
         self._segment_names = segments_and_names['name'].to_list()
 
+        # Integer ids of each segment, and cached mappings built from them
+        self._segment_index = {n: i for i, n in enumerate(self._segment_names)}
+        self._index_cache = dict()
+
     @property
     def name(self):
         return self._name
@@ -251,6 +310,15 @@ class SegmentationLevel:
     def segments_and_names(self):
         return self._segments_and_names
 
+    @property
+    def segment_index(self) -> Dict[str, int]:
+        """A dictionary of {segment_name: segment_id}
+
+        Where segment_id is the position of segment_name in
+        self.segment_names, and in self.segments.
+        """
+        return self._segment_index
+
     def __copy__(self):
         """Returns a copy of this class"""
         return self.copy()
@@ -260,6 +328,10 @@ class SegmentationLevel:
         if not isinstance(other, SegmentationLevel):
             return False
 
+        # Cached segmentations are often the same object
+        if self is other:
+            return True
+
         # Make sure names, naming order, and segment names are all the same
         if self.name != other.name:
             return False
@@ -410,19 +482,19 @@ class SegmentationLevel:
         """
         Returns the multiplication definitions for segments as a pd.DataFrame
         """
-        return pd.read_csv(self._multiply_definitions_path)
+        return _read_definitions(self._multiply_definitions_path)
 
     def _read_expand_definitions(self) -> pd.DataFrame:
         """
         Returns the expansion definitions for segments as a pd.DataFrame
         """
-        return pd.read_csv(self._expand_definitions_path)
+        return _read_definitions(self._expand_definitions_path)
 
     def _read_subset_definitions(self) -> pd.DataFrame:
         """
         Returns the expansion definitions for segments as a pd.DataFrame
         """
-        return pd.read_csv(self._subset_definitions_path)
+        return _read_definitions(self._subset_definitions_path)
 
     def _get_multiply_definition(self,
                                  other: SegmentationLevel,
@@ -551,19 +623,20 @@ class SegmentationLevel:
         """
         Returns the multiplication definitions for segments as a pd.DataFrame
         """
-        return pd.read_csv(self._reduce_definitions_path)
+        return _read_definitions(self._reduce_definitions_path)
 
     def _read_aggregation_definitions(self) -> pd.DataFrame:
         """
         Returns the multiplication definitions for segments as a pd.DataFrame
         """
-        return pd.read_csv(self._aggregation_definitions_path)
+        return _read_definitions(self._aggregation_definitions_path)
 
     def _get_tfn_tt_expansion(self) -> pd.DataFrame:
         """
         Returns the definition for expanding tfn_tt into its components.
         """
-        return file_ops.read_df(self._tfn_tt_expansion_path, find_similar=True)
+        file_path = file_ops.find_filename(self._tfn_tt_expansion_path)
+        return _read_definitions(file_path, read_fn=file_ops.read_df)
 
     def _get_reduce_definition(self,
                                other: SegmentationLevel,
@@ -681,7 +754,7 @@ class SegmentationLevel:
             )
 
         # Must exist if we are here, read in and validate
-        df = file_ops.read_df(file_path)
+        df = _read_definitions(file_path, read_fn=file_ops.read_df)
         return pd_utils.reindex_cols(df, [col1, col2])
 
     def _parse_reduce_cols(self, reduce_cols: str) -> Dict[str, Dict[Any, List[Any]]]:
@@ -984,7 +1057,224 @@ class SegmentationLevel:
         Checks whether the given segment_name is a valid name for this
         SegmentationLevel
         """
-        return segment_name in self.segment_names
+        return segment_name in self._segment_index
+
+    def get_segment_ids(self, segment_names: Iterable[str]) -> np.ndarray:
+        """Converts segment names into their integer segment ids
+
+        Parameters
+        ----------
+        segment_names:
+            The segment names to convert.
+
+        Returns
+        -------
+        segment_ids:
+            An integer array of the position of each of segment_names in
+            self.segment_names.
+
+        Raises
+        ------
+        SegmentationError:
+            If any of segment_names are not valid segment names for this
+            segmentation.
+        """
+        index = self._segment_index
+        try:
+            return np.array([index[name] for name in segment_names], dtype=np.int64)
+        except KeyError as err:
+            raise SegmentationError(
+                "%s is not a valid segment name for segmentation level %s."
+                % (err.args[0], self.name)
+            ) from err
+
+    def get_df_segment_ids(self, df: pd.DataFrame) -> np.ndarray:
+        """Gets the integer segment id of each row of df
+
+        Segment values are compared as strings, in the same way segment
+        names are generated, so each row is matched to the same segment it
+        would be by name. Only the unique values of each column are
+        converted to strings.
+
+        Parameters
+        ----------
+        df:
+            The DataFrame to get the segment of each row for. Must contain
+            all the columns in self.naming_order.
+
+        Returns
+        -------
+        segment_ids:
+            An array of the segment id of each row of df. Rows which are
+            not a valid segment are given -1.
+        """
+        df_keys = np.zeros(len(df), dtype=np.int64)
+        seg_keys = np.zeros(len(self.segments), dtype=np.int64)
+        invalid = np.zeros(len(df), dtype=bool)
+
+        # Build a single integer key from the position of each value in
+        # the unique values of each segment column
+        for col in self.naming_order:
+            seg_codes, seg_uniques = pd.factorize(self.segments[col].astype(str))
+
+            df_codes, df_uniques = pd.factorize(df[col])
+            unique_codes = pd.Index(seg_uniques).get_indexer(df_uniques.astype(str))
+            df_codes = np.where(df_codes < 0, -1, unique_codes[df_codes])
+
+            invalid |= df_codes < 0
+            df_keys = df_keys * len(seg_uniques) + df_codes
+            seg_keys = seg_keys * len(seg_uniques) + seg_codes
+
+        segment_ids = pd.Index(seg_keys).get_indexer(df_keys)
+        segment_ids[invalid] = -1
+        return segment_ids
+
+    def _get_cached_index(self,
+                          method: str,
+                          other: SegmentationLevel,
+                          build_fn: Callable[[], Any],
+                          ) -> Any:
+        """Gets a cached index mapping from self to other, building if needed"""
+        key = (method, other.name, tuple(other.naming_order), len(other))
+        if key not in self._index_cache:
+            self._index_cache[key] = build_fn()
+        return self._index_cache[key]
+
+    @staticmethod
+    def _read_only(array: np.ndarray) -> np.ndarray:
+        """Stops cached arrays being edited by the caller"""
+        array.setflags(write=False)
+        return array
+
+    def to_aggregation_index(self,
+                             other: SegmentationLevel,
+                             aggregation_dict: Dict[str, List[str]],
+                             ) -> SegmentAggregationIndex:
+        """Converts an aggregation dictionary into an aggregation index
+
+        Parameters
+        ----------
+        other:
+            The SegmentationLevel being aggregated into.
+
+        aggregation_dict:
+            A dictionary defining how to aggregate self into other. Should
+            be in the form of {out_seg: [in_seg]}. Usually generated by
+            `reduce()` or `aggregate()`.
+
+        Returns
+        -------
+        aggregation_index:
+            The same aggregation as aggregation_dict, using the integer
+            segment ids of self, in the order of other.segment_names.
+        """
+        in_names = [aggregation_dict[x] for x in other.segment_names]
+        rows = self.get_segment_ids(itertools.chain.from_iterable(in_names))
+        lengths = np.array([len(x) for x in in_names], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]).astype(np.int64)
+        return SegmentAggregationIndex(self._read_only(rows), self._read_only(offsets))
+
+    def reduce_index(self, other: SegmentationLevel) -> SegmentAggregationIndex:
+        """Integer index equivalent of `reduce()`. Cached after the first call"""
+        return self._get_cached_index(
+            method='reduce',
+            other=other,
+            build_fn=lambda: self.to_aggregation_index(other, self.reduce(other)),
+        )
+
+    def aggregate_index(self, other: SegmentationLevel) -> SegmentAggregationIndex:
+        """Integer index equivalent of `aggregate()`. Cached after the first call"""
+        return self._get_cached_index(
+            method='aggregate',
+            other=other,
+            build_fn=lambda: self.to_aggregation_index(other, self.aggregate(other)),
+        )
+
+    def subset_index(self, other: SegmentationLevel) -> np.ndarray:
+        """Integer index equivalent of `subset()`. Cached after the first call
+
+        Returns
+        -------
+        subset_index:
+            The segment ids of self to keep, in the order of
+            other.segment_names.
+        """
+        def build_fn():
+            keep = set(self.subset(other))
+            names = [x for x in other.segment_names if x in keep]
+            return self._read_only(self.get_segment_ids(names))
+
+        return self._get_cached_index('subset', other, build_fn)
+
+    def split_index(self, other: SegmentationLevel) -> np.ndarray:
+        """Integer index equivalent of `split()`. Cached after the first call
+
+        Returns
+        -------
+        split_index:
+            For each segment in other.segment_names, the segment id of the
+            segment in self that it is split from.
+        """
+        def build_fn():
+            split_from = dict()
+            for in_seg, out_segs in self.split(other).items():
+                split_from.update(dict.fromkeys(out_segs, in_seg))
+            names = [split_from[x] for x in other.segment_names]
+            return self._read_only(self.get_segment_ids(names))
+
+        return self._get_cached_index('split', other, build_fn)
+
+    def expand_index(self,
+                     other: SegmentationLevel,
+                     ) -> Tuple[SegmentCombineIndex, SegmentationLevel]:
+        """Integer index equivalent of `expand()`. Cached after the first call
+
+        Returns
+        -------
+        expand_index:
+            For each segment in the returned segmentation, the segment ids
+            of the self and other segments to combine.
+
+        return_segmentation:
+            The segmentation created by expanding self with other.
+        """
+        def build_fn():
+            expand_dict, return_seg = self.expand(other)
+            return self._to_combine_index(other, expand_dict, return_seg), return_seg
+
+        return self._get_cached_index('expand', other, build_fn)
+
+    def multiply_index(self,
+                       other: SegmentationLevel,
+                       ) -> Tuple[SegmentCombineIndex, SegmentationLevel]:
+        """Integer index equivalent of `self * other`. Cached after the first call
+
+        Returns
+        -------
+        multiply_index:
+            For each segment in the returned segmentation, the segment ids
+            of the self and other segments to multiply.
+
+        return_segmentation:
+            The segmentation created by multiplying self and other.
+        """
+        def build_fn():
+            multiply_dict, return_seg = self * other
+            return self._to_combine_index(other, multiply_dict, return_seg), return_seg
+
+        return self._get_cached_index('multiply', other, build_fn)
+
+    def _to_combine_index(self,
+                          other: SegmentationLevel,
+                          combine_dict: Dict[str, Tuple[str, str]],
+                          return_seg: SegmentationLevel,
+                          ) -> SegmentCombineIndex:
+        """Converts a {out_seg: (self_seg, other_seg)} dict into an index"""
+        self_keys, other_keys = zip(*[combine_dict[x] for x in return_seg.segment_names])
+        return SegmentCombineIndex(
+            self_rows=self._read_only(self.get_segment_ids(self_keys)),
+            other_rows=self._read_only(other.get_segment_ids(other_keys)),
+        )
 
     def reduce(self,
                other: SegmentationLevel,
@@ -1676,7 +1966,7 @@ class SegmentationLevel:
         names = set(lst)
 
         # Return False if not all names are valid
-        if len(names - set(self.segment_names)) > 0:
+        if len(names - self._segment_index.keys()) > 0:
             return False
 
         # If the lists are the same length, we can imply all names are contained
@@ -2134,9 +2424,28 @@ def _read_in_and_validate_segment_types(path: nd.PathLike,
     return segment_types
 
 
-def _get_valid_segments(name: str) -> pd.DataFrame:
+def _read_definitions(path: nd.PathLike,
+                      read_fn: Callable[[nd.PathLike], pd.DataFrame] = pd.read_csv,
+                      ) -> pd.DataFrame:
     """
-    Finds and reads in the valid segments data for segmentation with name
+    Reads in a definitions file, caching it until the file is modified
+    """
+    path = os.fspath(path)
+    mtime = os.path.getmtime(path)
+
+    cached = _DEFINITIONS_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, read_fn(path))
+        _DEFINITIONS_CACHE[path] = cached
+
+    # Copy so callers can't edit the cached definitions
+    return cached[1].copy()
+
+
+def _get_segmentation_paths(name: str) -> Tuple[str, str, str]:
+    """
+    Finds the naming order, segment types, and valid segments paths for
+    segmentation with name
     """
     # ## DETERMINE THE IMPORT LOCATION ## #
     import_home = os.path.join(SegmentationLevel._segment_definitions_path, name)
@@ -2149,15 +2458,10 @@ def _get_valid_segments(name: str) -> pd.DataFrame:
             % (name, import_home)
         )
 
-    # ## READ IN THE NAMING ORDER ## #
-    file_path = os.path.join(import_home, SegmentationLevel._naming_order_fname)
-    naming_order = _read_in_and_validate_naming_order(file_path, name)
-
-    # ## READ IN THE SEGMENT TYPING ## #
-    file_path = os.path.join(import_home, SegmentationLevel._segment_type_fname)
-    segment_types = _read_in_and_validate_segment_types(file_path, naming_order)
+    naming_order_path = os.path.join(import_home, SegmentationLevel._naming_order_fname)
+    segment_types_path = os.path.join(import_home, SegmentationLevel._segment_type_fname)
 
-    # ## READ IN THE UNIQUE SEGMENTS ## #
+    # ## FIND THE UNIQUE SEGMENTS ## #
     # Build the two possible paths
     compress_fname = SegmentationLevel._unique_segments_compress_fname
     compress_fname2 = SegmentationLevel._unique_segments_compress_fname2
@@ -2183,7 +2487,22 @@ def _get_valid_segments(name: str) -> pd.DataFrame:
                     % (name, compress_path, csv_path)
                 )
 
-    # Read in the file
+    return naming_order_path, segment_types_path, file_path
+
+
+def _get_valid_segments(name: str) -> pd.DataFrame:
+    """
+    Finds and reads in the valid segments data for segmentation with name
+    """
+    naming_order_path, segment_types_path, file_path = _get_segmentation_paths(name)
+
+    # ## READ IN THE NAMING ORDER ## #
+    naming_order = _read_in_and_validate_naming_order(naming_order_path, name)
+
+    # ## READ IN THE SEGMENT TYPING ## #
+    segment_types = _read_in_and_validate_segment_types(segment_types_path, naming_order)
+
+    # ## READ IN THE UNIQUE SEGMENTS ## #
     df = file_ops.read_df(file_path, find_similar=True)
 
     # Tidy up the column names to match the naming_order
@@ -2194,10 +2513,89 @@ def _get_valid_segments(name: str) -> pd.DataFrame:
     return df, naming_order, segment_types
 
 
+def _get_segmentation_source_paths(name: str) -> List[str]:
+    """
+    Returns the paths to all the files that define segmentation with name
+    """
+    return [x for x in _get_segmentation_paths(name) if os.path.isfile(x)]
+
+
+def _get_segmentation_cache_path(name: str) -> str:
+    """
+    Returns the path to the on-disk cache of segmentation with name
+    """
+    return os.path.join(
+        SegmentationLevel._definitions_cache_dir,
+        name + definition_cache.CACHE_FTYPE,
+    )
+
+
+def _read_segmentation_cache(name: str) -> Optional[SegmentationLevel]:
+    """
+    Reads a segmentation from the on-disk cache, if it is still valid.
+
+    None is returned if there is no valid cache for segmentation with name.
+    """
+    arrays = definition_cache.read_cache(
+        cache_path=_get_segmentation_cache_path(name),
+        source_paths=_get_segmentation_source_paths(name),
+    )
+    if arrays is None:
+        return None
+
+    naming_order = arrays['naming_order'].tolist()
+    segment_types = dict(zip(
+        naming_order,
+        [_CACHEABLE_SEGMENT_TYPES[x] for x in arrays['segment_types'].tolist()],
+    ))
+    valid_segments = pd.DataFrame({x: arrays['segment_%s' % x] for x in naming_order})
+
+    return SegmentationLevel(
+        name=name,
+        naming_order=naming_order,
+        segment_types=segment_types,
+        valid_segments=valid_segments,
+        segment_names=arrays['segment_names'].tolist(),
+    )
+
+
+def _write_segmentation_cache(segmentation: SegmentationLevel) -> None:
+    """
+    Writes a segmentation to the on-disk cache.
+
+    Segmentations with segment types that can't be cached are skipped.
+    """
+    naming_order = segmentation.naming_order
+    type_names = [segmentation.segment_types[x].__name__ for x in naming_order]
+    if not all(x in _CACHEABLE_SEGMENT_TYPES for x in type_names):
+        return
+
+    arrays = {
+        'naming_order': np.array(naming_order, dtype=str),
+        'segment_types': np.array(type_names, dtype=str),
+        'segment_names': np.array(segmentation.segment_names, dtype=str),
+    }
+    for col in naming_order:
+        arrays['segment_%s' % col] = segmentation.segments[col].to_numpy()
+
+    definition_cache.write_cache(
+        cache_path=_get_segmentation_cache_path(segmentation.name),
+        source_paths=_get_segmentation_source_paths(segmentation.name),
+        arrays=arrays,
+    )
+
+
 def get_segmentation_level(name: str) -> SegmentationLevel:
     """
     Creates a SegmentationLevel for segmentation with name.
 
+    SegmentationLevels are cached for the life of the process, so repeated
+    calls with the same name return the same object. If
+    SegmentationLevel.definitions_disk_cache is True, the built
+    segmentation is also cached on disk in
+    SegmentationLevel._definitions_cache_dir, and is rebuilt whenever any
+    of its definition files are modified.
+
     Parameters
     ----------
     name:
@@ -2209,16 +2607,45 @@ def get_segmentation_level(name: str) -> SegmentationLevel:
         A SegmentationLevel object for segmentation with name
     """
     # TODO(BT): Add some validation on the segmentation name
-    # TODO(BT): Add some caching to this function!
-    valid_segments, naming_order, segment_types = _get_valid_segments(name)
+    if name in _SEGMENTATION_CACHE:
+        return _SEGMENTATION_CACHE[name]
+
+    # Check the disk cache, otherwise build from the definitions
+    segmentation = None
+    if SegmentationLevel.definitions_disk_cache:
+        segmentation = _read_segmentation_cache(name)
+
+    if segmentation is None:
+        valid_segments, naming_order, segment_types = _get_valid_segments(name)
+        segmentation = SegmentationLevel(
+            name=name,
+            naming_order=naming_order,
+            segment_types=segment_types,
+            valid_segments=valid_segments,
+        )
+
+        if SegmentationLevel.definitions_disk_cache:
+            _write_segmentation_cache(segmentation)
+
+    _SEGMENTATION_CACHE[name] = segmentation
+    return segmentation
+
+
+def clear_segmentation_cache(clear_disk_cache: bool = False) -> None:
+    """
+    Removes all segmentations and definitions cached by this module.
+
+    Parameters
+    ----------
+    clear_disk_cache:
+        Whether to also delete any segmentations cached on disk.
+    """
+    _SEGMENTATION_CACHE.clear()
+    _DEFINITIONS_CACHE.clear()
+
+    if clear_disk_cache:
+        definition_cache.clear_cache(SegmentationLevel._definitions_cache_dir)
 
-    # Create the SegmentationLevel object and return
-    return SegmentationLevel(
-        name=name,
-        naming_order=naming_order,
-        segment_types=segment_types,
-        valid_segments=valid_segments,
-    )
 
 def list_segmentations() -> List[str]:
     """List names of all available segmentations.
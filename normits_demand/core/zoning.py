@@ -19,6 +19,7 @@ import os
 import logging
 import warnings
 import itertools
+import collections
 import configparser
 
 from os import PathLike
@@ -28,10 +29,13 @@ from typing import Any, Dict, List, Tuple, Union, Optional
 # Third Party
 import numpy as np
 import pandas as pd
+import scipy.sparse
 
 # Local Imports
 import normits_demand as nd
 
+from normits_demand.core import definition_cache
+
 from normits_demand.utils import file_ops
 from normits_demand.utils import compress
 from normits_demand.utils import pandas_utils as pd_utils
@@ -40,6 +44,13 @@ from normits_demand.utils.config_base import BaseConfig
 
 LOG = logging.getLogger(__name__)
 
+# Process-wide cache of (source_mtime, sparse translation), most
+# recently used last
+_TRANSLATION_CACHE = collections.OrderedDict()
+
+# Process-wide cache of zoning systems
+_ZONING_CACHE = dict()
+
 
 class ZoningSystem:
     """Zoning definitions to provide common interface
@@ -85,6 +96,26 @@ class ZoningSystem:
         '_translations'
     )
 
+    _translation_cache_dir = os.path.join(
+        _zoning_definitions_path,
+        '_translations_cache'
+    )
+    _translation_cache_ftype = definition_cache.CACHE_FTYPE
+
+    # Max number of translations to keep in the process-wide cache, and
+    # whether to also cache built translations to disk between runs
+    translation_cache_size = 32
+    translation_disk_cache = False
+
+    _definitions_cache_dir = os.path.join(
+        _zoning_definitions_path,
+        '_cache'
+    )
+
+    # Whether to also cache compiled zoning definitions to disk between
+    # runs. See `get_zoning_system()`
+    definitions_disk_cache = False
+
     _translate_infill = 0
     _translate_base_zone_col = "%s_zone_id"
     _translate_base_trans_col = "%s_to_%s"
@@ -207,6 +238,10 @@ class ZoningSystem:
         if not isinstance(other, ZoningSystem):
             return False
 
+        # Cached zoning systems are often the same object
+        if self is other:
+            return True
+
         # Make sure names, unique zones, and n_zones are all the same
         if self.name != other.name:
             return False
@@ -231,12 +266,12 @@ class ZoningSystem:
             return self._default_weighting_suffix
         return self._weighting_suffix[weighting]
 
-    def _get_translation_definition(self,
-                                    other: ZoningSystem,
-                                    weighting: str = None,
-                                    ) -> pd.DataFrame:
+    def _get_translation_path(self,
+                              other: ZoningSystem,
+                              weighting: str = None,
+                              ) -> Path:
         """
-        Returns a long dataframe defining how to translate from self to other.
+        Returns the path to the file defining how to translate self to other.
         """
         # Init
         home_dir = self._translation_dir
@@ -266,6 +301,19 @@ class ZoningSystem:
                 % (self.name, other.name)
             )
 
+        return file_path
+
+    def _get_translation_definition(self,
+                                    other: ZoningSystem,
+                                    weighting: str = None,
+                                    file_path: PathLike = None,
+                                    ) -> pd.DataFrame:
+        """
+        Returns a long dataframe defining how to translate from self to other.
+        """
+        if file_path is None:
+            file_path = self._get_translation_path(other, weighting)
+
         # Must exist if we are here, read in
         df = file_ops.read_df(file_path)
 
@@ -308,10 +356,159 @@ class ZoningSystem:
             unique_zones=self.unique_zones.copy(),
         )
 
+    def _translation_to_sparse(self,
+                               other: ZoningSystem,
+                               translation_df: pd.DataFrame,
+                               ) -> scipy.sparse.csr_matrix:
+        """
+        Converts a long translation definition into a sparse CSR matrix
+
+        Rows correspond to self.unique_zones and columns correspond to
+        other.unique_zones. Any zones in translation_df that are not in
+        either zoning system are dropped, and duplicate zone pairs are summed.
+        """
+        self_col = self._translate_base_zone_col % self.name
+        other_col = self._translate_base_zone_col % other.name
+        trans_col = self._translate_base_trans_col % (self.name, other.name)
+
+        # Convert the zone names into array positions
+        rows = pd.Index(self.unique_zones).get_indexer(translation_df[self_col])
+        cols = pd.Index(other.unique_zones).get_indexer(translation_df[other_col])
+        values = translation_df[trans_col].values
+
+        # Drop any zones that don't exist in either zoning system
+        mask = (rows >= 0) & (cols >= 0)
+
+        translation = scipy.sparse.coo_matrix(
+            (values[mask], (rows[mask], cols[mask])),
+            shape=(self.n_zones, other.n_zones),
+            dtype=np.float64,
+        )
+        return translation.tocsr()
+
+    def _get_translation_cache_path(self,
+                                    other: ZoningSystem,
+                                    weighting: str = None,
+                                    ) -> Path:
+        """
+        Returns the path to the on-disk cache of the self to other translation.
+        """
+        fname = '%s_to_%s_%s%s' % (
+            self.name,
+            other.name,
+            self._get_weighting_suffix(weighting),
+            self._translation_cache_ftype,
+        )
+        return Path(self._translation_cache_dir) / fname
+
+    def _read_translation_cache(self,
+                                other: ZoningSystem,
+                                cache_path: Path,
+                                source_path: Path,
+                                ) -> Optional[scipy.sparse.csr_matrix]:
+        """
+        Reads a translation from the on-disk cache, if it is still valid.
+
+        The cached translation is only considered valid if it was built from
+        source_path, with the same modified time, and for the same zones as
+        self and other. None is returned otherwise, including when the cache
+        cannot be read.
+        """
+        cache = definition_cache.read_cache(cache_path, [source_path])
+        if cache is None:
+            return None
+
+        # Make sure the zones haven't changed
+        if not np.array_equal(cache['self_zones'], self.unique_zones.astype(str)):
+            return None
+        if not np.array_equal(cache['other_zones'], other.unique_zones.astype(str)):
+            return None
+
+        return scipy.sparse.csr_matrix(
+            (cache['data'], cache['indices'], cache['indptr']),
+            shape=tuple(cache['shape']),
+        )
+
+    def _write_translation_cache(self,
+                                 other: ZoningSystem,
+                                 translation: scipy.sparse.csr_matrix,
+                                 cache_path: Path,
+                                 source_path: Path,
+                                 ) -> None:
+        """
+        Writes a translation to the on-disk cache.
+
+        Failing to write the cache, e.g. due to permissions, is not fatal.
+        A warning is logged and the translation is not cached.
+        """
+        definition_cache.write_cache(
+            cache_path=cache_path,
+            source_paths=[source_path],
+            arrays={
+                'data': translation.data,
+                'indices': translation.indices,
+                'indptr': translation.indptr,
+                'shape': np.array(translation.shape),
+                'self_zones': self.unique_zones.astype(str),
+                'other_zones': other.unique_zones.astype(str),
+            },
+        )
+
+    def _get_sparse_translation(self,
+                                other: ZoningSystem,
+                                weighting: str = None,
+                                ) -> scipy.sparse.csr_matrix:
+        """
+        Gets the sparse translation of self to other, using caches where possible.
+
+        Translations are kept in a process-wide least recently used cache
+        of size ZoningSystem.translation_cache_size. If
+        ZoningSystem.translation_disk_cache is True, translations are also
+        cached on disk in ZoningSystem._translation_cache_dir. Cached
+        translations are rebuilt whenever the source translation file is
+        modified.
+        """
+        source_path = self._get_translation_path(other, weighting)
+        source_mtime = os.path.getmtime(source_path)
+
+        # Check the in memory cache
+        key = (self.name, self.n_zones, other.name, other.n_zones, weighting)
+        if key in _TRANSLATION_CACHE:
+            cached_mtime, translation = _TRANSLATION_CACHE[key]
+            if cached_mtime == source_mtime:
+                _TRANSLATION_CACHE.move_to_end(key)
+                return translation
+
+        cache_path = self._get_translation_cache_path(other, weighting)
+
+        # Check the disk cache, otherwise build from the source file
+        translation = None
+        if self.translation_disk_cache:
+            translation = self._read_translation_cache(other, cache_path, source_path)
+
+        if translation is None:
+            translation_df = self._get_translation_definition(
+                other=other,
+                weighting=weighting,
+                file_path=source_path,
+            )
+            translation = self._translation_to_sparse(other, translation_df)
+
+            if self.translation_disk_cache:
+                self._write_translation_cache(other, translation, cache_path, source_path)
+
+        # Add to the in memory cache, dropping the least recently used
+        _TRANSLATION_CACHE[key] = (source_mtime, translation)
+        while len(_TRANSLATION_CACHE) > max(self.translation_cache_size, 0):
+            _TRANSLATION_CACHE.popitem(last=False)
+
+        return translation
+
     def translate(self,
                   other: ZoningSystem,
                   weighting: str = None,
-                  ) -> np.array:
+                  sparse: bool = False,
+                  ) -> Union[np.ndarray, scipy.sparse.csr_matrix]:
         """
         Returns a numpy array defining the translation of self to other
 
@@ -324,10 +521,17 @@ class ZoningSystem:
             The weighting to use when building the translation. Must be None,
             or one of ZoningSystem.possible_weightings
 
+        sparse:
+            Whether to return the translation as a scipy.sparse.csr_matrix
+            instead of a dense numpy array. Most translations are almost
+            entirely zeros, so this is far more memory efficient for
+            translations between large zoning systems.
+
         Returns
         -------
         translations_array:
-            A numpy array defining the weights to use for the translation.
+            A numpy array, or scipy.sparse.csr_matrix if sparse is True,
+            defining the weights to use for the translation.
             The rows correspond to self.unique_zones
             The columns correspond to other.unique_zones
 
@@ -335,6 +539,11 @@ class ZoningSystem:
         ------
         ZoningError:
             If a translation definition between self and other cannot be found
+
+        Notes
+        -----
+        Translations are cached once they have been built, see
+        `clear_translation_cache()`.
         """
         # Validate input
         if not isinstance(other, ZoningSystem):
@@ -351,19 +560,11 @@ class ZoningSystem:
                 % (weighting, self.possible_weightings)
             )
 
-        # Get a numpy array to define the translation
-        translation_df = self._get_translation_definition(other, weighting)
-        translation = pd_utils.long_to_wide_infill(
-            df=translation_df,
-            index_col=self._translate_base_zone_col % self.name,
-            columns_col=self._translate_base_zone_col % other.name,
-            values_col=self._translate_base_trans_col % (self.name, other.name),
-            index_vals=self.unique_zones,
-            column_vals=other.unique_zones,
-            infill=self._translate_infill
-        )
-
-        return translation.values
+        # Copy so the cached translation can't be edited
+        translation = self._get_sparse_translation(other, weighting)
+        if sparse:
+            return translation.copy()
+        return translation.toarray()
 
     def save(self, path: PathLike = None) -> Union[None, Dict[str, Any]]:
         """Converts ZoningSystem into an instance dict and saves to disk
@@ -760,9 +961,10 @@ class BalancingZones:
 
 
 # ## FUNCTIONS ##
-def _get_zones(name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+def _get_zone_paths(name: str) -> Tuple[str, Optional[str], Optional[str]]:
     """
-    Finds and reads in the unique zone data for zoning system with name
+    Finds the unique, internal, and external zone paths for zoning system
+    with name. Internal and external paths are None if they don't exist.
     """
     # ## DETERMINE THE IMPORT LOCATION ## #
     import_home = os.path.join(ZoningSystem._zoning_definitions_path, name)
@@ -775,7 +977,7 @@ def _get_zones(name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
             % (name, import_home)
         )
 
-    # ## READ IN THE UNIQUE ZONES ## #
+    # ## FIND THE UNIQUE ZONES ## #
     # Build the two possible paths
     compress_fname = ZoningSystem._zones_compress_fname
     compress_fname2 = ZoningSystem._zones_compress_fname2
@@ -801,7 +1003,28 @@ def _get_zones(name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
                     % (name, compress_path, csv_path)
                 )
 
-    # Read in the file
+    # ## FIND THE INTERNAL AND EXTERNAL ZONES ## #
+    def find_optional(fname: str) -> Optional[str]:
+        try:
+            path = os.path.join(import_home, fname)
+            path = file_ops.find_filename(path, alt_types=ZoningSystem._valid_ftypes)
+        except FileNotFoundError:
+            return None
+        return os.fspath(path) if os.path.isfile(path) else None
+
+    internal_path = find_optional(ZoningSystem._internal_zones_fname)
+    external_path = find_optional(ZoningSystem._external_zones_fname)
+
+    return file_path, internal_path, external_path
+
+
+def _get_zones(name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Finds and reads in the unique zone data for zoning system with name
+    """
+    file_path, internal_path, external_path = _get_zone_paths(name)
+
+    # ## READ IN THE UNIQUE ZONES ## #
     df = file_ops.read_df(file_path)
     df = pd_utils.reindex_cols(df, columns=['zone_name'])
 
@@ -813,13 +1036,10 @@ def _get_zones(name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     external_zones = None
 
     # Read in the internal zones
-    try:
-        file_path = os.path.join(import_home, ZoningSystem._internal_zones_fname)
-        file_path = file_ops.find_filename(file_path, alt_types=ZoningSystem._valid_ftypes)
-        if os.path.isfile(file_path):
-            df = file_ops.read_df(file_path)
-            internal_zones = np.sort(df['zone_name'].values)
-    except FileNotFoundError:
+    if internal_path is not None:
+        df = file_ops.read_df(internal_path)
+        internal_zones = np.sort(df['zone_name'].values)
+    else:
         warn_msg = (
             "No internal zones definition found for zoning system '%s'"
             % name
@@ -827,13 +1047,10 @@ def _get_zones(name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         warnings.warn(warn_msg, UserWarning, stacklevel=3)
 
     # Read in the external zones
-    try:
-        file_path = os.path.join(import_home, ZoningSystem._external_zones_fname)
-        file_path = file_ops.find_filename(file_path, alt_types=ZoningSystem._valid_ftypes)
-        if os.path.isfile(file_path):
-            df = file_ops.read_df(file_path)
-            external_zones = np.sort(df['zone_name'].values)
-    except FileNotFoundError:
+    if external_path is not None:
+        df = file_ops.read_df(external_path)
+        external_zones = np.sort(df['zone_name'].values)
+    else:
         warn_msg = (
             "No external zones definition found for zoning system '%s'"
             % name
@@ -843,10 +1060,78 @@ def _get_zones(name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     return unique_zones, internal_zones, external_zones
 
 
+def _get_zoning_cache_path(name: str) -> str:
+    """
+    Returns the path to the on-disk cache of zoning system with name
+    """
+    return os.path.join(
+        ZoningSystem._definitions_cache_dir,
+        name + definition_cache.CACHE_FTYPE,
+    )
+
+
+def _read_zoning_cache(name: str) -> Optional[ZoningSystem]:
+    """
+    Reads a zoning system from the on-disk cache, if it is still valid.
+
+    None is returned if there is no valid cache for zoning system with name.
+    """
+    source_paths = [x for x in _get_zone_paths(name) if x is not None]
+    arrays = definition_cache.read_cache(_get_zoning_cache_path(name), source_paths)
+    if arrays is None:
+        return None
+
+    return ZoningSystem(
+        name=name,
+        unique_zones=arrays['unique_zones'],
+        internal_zones=arrays.get('internal_zones'),
+        external_zones=arrays.get('external_zones'),
+    )
+
+
+def _write_zoning_cache(zoning_system: ZoningSystem) -> None:
+    """
+    Writes a zoning system to the on-disk cache.
+    """
+    arrays = {'unique_zones': zoning_system.unique_zones}
+    if zoning_system.internal_zones is not None:
+        arrays['internal_zones'] = zoning_system.internal_zones
+    if zoning_system.external_zones is not None:
+        arrays['external_zones'] = zoning_system.external_zones
+
+    source_paths = [x for x in _get_zone_paths(zoning_system.name) if x is not None]
+    definition_cache.write_cache(
+        cache_path=_get_zoning_cache_path(zoning_system.name),
+        source_paths=source_paths,
+        arrays=arrays,
+    )
+
+
+def clear_translation_cache(clear_disk_cache: bool = False) -> None:
+    """
+    Removes all translations cached by ZoningSystem.translate().
+
+    Parameters
+    ----------
+    clear_disk_cache:
+        Whether to also delete any translations cached on disk.
+    """
+    _TRANSLATION_CACHE.clear()
+
+    if clear_disk_cache:
+        definition_cache.clear_cache(ZoningSystem._translation_cache_dir)
+
+
 def get_zoning_system(name: str) -> ZoningSystem:
     """
     Creates a ZoningSystem for zoning with name.
 
+    ZoningSystems are cached for the life of the process, so repeated
+    calls with the same name return the same object. If
+    ZoningSystem.definitions_disk_cache is True, the built zoning system
+    is also cached on disk in ZoningSystem._definitions_cache_dir, and is
+    rebuilt whenever any of its definition files are modified.
+
     Parameters
     ----------
     name:
@@ -858,17 +1143,43 @@ def get_zoning_system(name: str) -> ZoningSystem:
         A ZoningSystem object for zoning system with name
     """
     # TODO(BT): Add some validation on the zone name
-    # TODO(BT): Add some caching to this function!
-    # Look for zone definitions
-    unique, internal, external = _get_zones(name)
+    if name in _ZONING_CACHE:
+        return _ZONING_CACHE[name]
+
+    # Check the disk cache, otherwise build from the definitions
+    zoning_system = None
+    if ZoningSystem.definitions_disk_cache:
+        zoning_system = _read_zoning_cache(name)
+
+    if zoning_system is None:
+        unique, internal, external = _get_zones(name)
+        zoning_system = ZoningSystem(
+            name=name,
+            unique_zones=unique,
+            internal_zones=internal,
+            external_zones=external,
+        )
 
-    # Create the ZoningSystem object and return
-    return ZoningSystem(
-        name=name,
-        unique_zones=unique,
-        internal_zones=internal,
-        external_zones=external,
-    )
+        if ZoningSystem.definitions_disk_cache:
+            _write_zoning_cache(zoning_system)
+
+    _ZONING_CACHE[name] = zoning_system
+    return zoning_system
+
+
+def clear_zoning_cache(clear_disk_cache: bool = False) -> None:
+    """
+    Removes all zoning systems cached by get_zoning_system().
+
+    Parameters
+    ----------
+    clear_disk_cache:
+        Whether to also delete any zoning systems cached on disk.
+    """
+    _ZONING_CACHE.clear()
+
+    if clear_disk_cache:
+        definition_cache.clear_cache(ZoningSystem._definitions_cache_dir)
 
 class ZoningSystemMetaData(BaseConfig):
     """
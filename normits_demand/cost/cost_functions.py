@@ -26,6 +26,7 @@ import numpy as np
 import normits_demand as nd
 
 from normits_demand.utils import math_utils
+from normits_demand.utils import numba_kernels
 
 
 @enum.unique
@@ -201,6 +202,10 @@ def tanner(
     """
     math_utils.check_numeric({"alpha": alpha, "beta": beta})
 
+    # Use the single pass kernel if we can
+    if numba_kernels.ENABLED:
+        return numba_kernels.tanner(base_cost, alpha, beta, min_return_val)
+
     # Don't do 0 to the power in case alpha is negative
     # 0^x where x is anything (other than 0) is always 0
     power = np.float_power(
@@ -257,6 +262,10 @@ def log_normal(
     sigma = float(sigma)
     mu = float(mu)
 
+    # Use the single pass kernel if we can
+    if numba_kernels.ENABLED:
+        return numba_kernels.log_normal(base_cost, sigma, mu, min_return_val)
+
     # We need to be careful to avoid 0 in costs
     # First calculate the fraction
     frac_denominator = base_cost * sigma * np.sqrt(2 * np.pi)
@@ -13,7 +13,13 @@ File purpose:
 # Built-Ins
 import os
 
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
 # Third Party
+import numpy as np
 import pandas as pd
 
 # Local Imports
@@ -81,6 +87,26 @@ class TripLengthDistributionBuilder:
     _hb_purposes = [1, 2, 3, 4, 5, 6, 7, 8]
     _nhb_purposes = [11, 12, 13, 14, 15, 16, 18]
 
+    # Target segmentation columns, and the NTS columns they filter on
+    _segment_filter_cols = {
+        'ca': 'ca',
+        'm': 'main_mode',
+        'soc_cat': 'soc_cat',
+        'ns_sec': 'ns_sec',
+        'tfn_area_type': 'tfn_area_type',
+        'agg_tfn_area_type': 'agg_tfn_area_type',
+        'g': 'Sex_B01ID',
+        'agg_gor_to': 'agg_gor_to',
+        'agg_gor_from': 'agg_gor_from',
+    }
+
+    # Prepared NTS columns that trips are grouped by
+    _trip_group_cols = [
+        'trip_origin', 'hb_purpose', 'nhb_purpose', 'nhb_purpose_hb_leg',
+        'ca', 'main_mode', 'start_time', 'soc_cat', 'ns_sec', 'tfn_area_type',
+        'agg_tfn_area_type', 'Sex_B01ID', 'agg_gor_to', 'agg_gor_from', 'band',
+    ]
+
     def __init__(self,
                  tlb_folder: nd.PathLike,
                  nts_import: nd.PathLike,
@@ -179,6 +205,9 @@ class TripLengthDistributionBuilder:
         self.nts_import = pd.read_csv(nts_import)
         self.nts_import['weighted_trip'] = self.nts_import['W1'] * self.nts_import['W5xHH'] * self.nts_import['W2']
 
+        # Grouped NTS trips, by weekdays. Reused between runs
+        self._grouped_trips_cache = dict()
+
     def _apply_geo_filter(self,
                           output_dat):
         """
@@ -239,19 +268,11 @@ class TripLengthDistributionBuilder:
         return output_dat
 
 
-    def run_tlb_lookups(self,
-                        weekdays=[1, 2, 3, 4, 5],
-                        agg_purp=list(), #[13, 14, 15, 18]
-                        write=True):
-        """
-        weekdays: list of ints to consider default 1:5:
+    def _prepare_nts(self, weekdays: List[int]) -> pd.DataFrame:
+        """Adds the aggregate segment columns to the NTS data and filters it
 
-        agg_purp: purposes to aggregate
-
-        region_filter: how to do regional subsets
+        Filters to the given weekdays, and self.geo_area.
         """
-        # TODO: Need smart aggregation based on sample size threshold
-
         # Set target cols
         target_cols = ['SurveyYear', 'TravelWeekDay_B01ID', 'HHoldOSLAUA_B01ID', 'CarAccess_B01ID', 'soc_cat',
                        'ns_sec', 'main_mode', 'hb_purpose', 'nhb_purpose', 'nhb_purpose_hb_leg', 'Sex_B01ID',
@@ -260,10 +281,6 @@ class TripLengthDistributionBuilder:
 
         output_dat = self.nts_import.reindex(target_cols, axis=1)
 
-        # Build a list to record how many records
-        records = list()
-        records.append(len(output_dat))
-
         # CA Map
         """
         1	Main driver of company car
@@ -305,136 +322,193 @@ class TripLengthDistributionBuilder:
                                       how='left',
                                       on='tfn_area_type')
 
-        records.append(len(output_dat))
-
         # Filter to weekdays only
         output_dat = output_dat[
             output_dat['TravelWeekDay_B01ID'].isin(weekdays)].reset_index(drop=True)
-        records.append(len(output_dat))
 
         # Geo filter on self.region_filter and self.geo_area
-        output_dat = self._apply_geo_filter(output_dat)
+        return self._apply_geo_filter(output_dat)
 
-        out_mat = []
-        for index, row in self.target_segmentation.iterrows():
-
-            print(row)
-            op_sub = output_dat.copy()
+    def _get_band_index(self, distance: pd.Series) -> np.ndarray:
+        """Gets the index of the trip length band of each distance
 
-            # Establish if PA cost or OD TLD
-            if 'cost_type' in list(row):
-                cost_type = row['cost_type']
+        Distances outside of all bands are given -1.
+        """
+        lower = self.trip_length_bands['lower'].to_numpy(dtype=float)
+        upper = self.trip_length_bands['upper'].to_numpy(dtype=float)
+
+        order = np.argsort(lower, kind='stable')
+        if np.any(lower[order][1:] < upper[order][:-1]):
+            raise ValueError(
+                "Trip length bands overlap. Each trip must be in at most "
+                "one band."
+            )
+
+        # Find the last band starting at or below each distance
+        distance = distance.to_numpy(dtype=float)
+        position = np.searchsorted(lower[order], distance, side='right') - 1
+        band = order[np.maximum(position, 0)]
+
+        # NaN compares False, so is also dropped here
+        in_band = (position >= 0) & (distance < upper[band])
+        return np.where(in_band, band, -1)
+
+    def _group_trips(self, weekdays: List[int]) -> pd.DataFrame:
+        """Groups the prepared NTS trips by segment and band
+
+        Every trip is assigned to its band once, then trips with the same
+        band and segment column values are summed together. Filtering the
+        much smaller grouped data gives the same totals as filtering the
+        trips. Cached by weekdays.
+
+        Returns
+        -------
+        grouped_trips:
+            A DataFrame of self._trip_group_cols, and the 'trips', 'count',
+            and 'distance' totals of each group.
+        """
+        cache_key = tuple(weekdays)
+        if cache_key in self._grouped_trips_cache:
+            return self._grouped_trips_cache[cache_key]
+
+        output_dat = self._prepare_nts(weekdays)
+        output_dat['band'] = self._get_band_index(output_dat['TripDisIncSW'])
+        output_dat = output_dat[output_dat['band'] >= 0]
+
+        output_dat['trips'] = output_dat['weighted_trip']
+        output_dat['count'] = 1
+        output_dat['distance'] = output_dat['TripDisIncSW']
+
+        # Keep NaN segments, purposes are NaN for the other trip origin
+        grouped = output_dat.groupby(self._trip_group_cols, dropna=False)
+        grouped = grouped[['trips', 'count', 'distance']].sum().reset_index()
+
+        self._grouped_trips_cache[cache_key] = grouped
+        return grouped
+
+    def _get_segment_mask(self,
+                          grouped: pd.DataFrame,
+                          row: pd.Series,
+                          agg_purp: List[int],
+                          ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """Gets the grouped trips in the segment defined by row
+
+        Returns
+        -------
+        mask:
+            A boolean mask of the rows of grouped in this segment.
+
+        values:
+            The value of each segment, 0 where not set.
+        """
+        # Establish if PA cost or OD TLD
+        if 'cost_type' in list(row):
+            cost_type = row['cost_type']
+        else:
+            if 'p' in row:
+                if int(row['p']) in self._hb_purposes:
+                    cost_type = 'pa'
+                elif int(row['p']) in self._nhb_purposes:
+                    cost_type = 'od'
+                else:
+                    raise ValueError('%d non-recognised purpose' % row['p'])
+
+        # Seed values so they can go MIA
+        values = {
+            'trip_origin': 0, 'p': 0, 'tp': 0,
+            **{k: 0 for k in self._segment_filter_cols},
+        }
+
+        # Filters depend on earlier values, so must be in column order
+        mask = np.ones(len(grouped), dtype=bool)
+        for subset, value in row.items():
+            if subset == 'trip_origin':
+                mask &= (grouped['trip_origin'] == value).to_numpy()
+            elif subset == 'p':
+                if values['trip_origin'] == 'hb':
+                    if cost_type == 'pa':
+                        mask &= (
+                            (grouped['nhb_purpose_hb_leg'] == value)
+                            | (grouped['hb_purpose'] == value)
+                        ).to_numpy()
+                    elif cost_type == 'od':
+                        mask &= (grouped['hb_purpose'] == value).to_numpy()
+                elif values['trip_origin'] == 'nhb':
+                    mask &= (grouped['nhb_purpose'] == value).to_numpy()
+            elif subset == 'tp':
+                if value != 0:
+                    # Filter around tp to aggregate
+                    time_vec: list = [value]
+                    if values['p'] in agg_purp:
+                        time_vec = [3, 4]
+                    mask &= grouped['start_time'].isin(time_vec).to_numpy()
+            elif subset in self._segment_filter_cols:
+                if value != 0:
+                    col = self._segment_filter_cols[subset]
+                    mask &= (grouped[col] == value).to_numpy()
             else:
-                if 'p' in row:
-                    if int(row['p']) in self._hb_purposes:
-                        cost_type = 'pa'
-                    elif int(row['p']) in self._nhb_purposes:
-                        cost_type = 'od'
-                    else:
-                        raise ValueError('%d non-recognised purpose' % row['p'])
-
-            # Seed values so they can go MIA
-            trip_origin, purpose, mode, tp, soc, ns = [0, 0, 0, 0, 0, 0]
-            tfn_at, agg_at, g, ca, agg_gor_from, agg_gor_to = [0, 0, 0, 0, 0, 0]
-
-            for subset, value in row.iteritems():
-                if subset == 'trip_origin':
-                    op_sub = op_sub[op_sub['trip_origin'] == value].reset_index(drop=True)
-                    trip_origin = value
-                if subset == 'p':
-                    if trip_origin == 'hb':
-                        if cost_type == 'pa':
-                            op_sub = op_sub[
-                                (op_sub['nhb_purpose_hb_leg'] == value) |
-                                (op_sub['hb_purpose'] == value)
-                            ]
-                        elif cost_type == 'od':
-                            op_sub = op_sub[op_sub['hb_purpose'] == value].reset_index(drop=True)
-                    elif trip_origin == 'nhb':
-                        op_sub = op_sub[op_sub['nhb_purpose'] == value].reset_index(drop=True)
-                    purpose = value
-                if subset == 'ca':
-                    if value != 0:
-                        op_sub = op_sub[op_sub['ca'] == value].reset_index(drop=True)
-                    ca = value
-                if subset == 'm':
-                    if value != 0:
-                        op_sub = op_sub[op_sub['main_mode'] == value].reset_index(drop=True)
-                    mode = value
-                if subset == 'tp':
-                    tp = value
-                    if value != 0:
-                        # Filter around tp to aggregate
-                        time_vec: list = [value]
-                        if purpose in agg_purp:
-                            time_vec = [3, 4]
-                        op_sub = op_sub[
-                            op_sub['start_time'].isin(
-                                time_vec)].reset_index(drop=True)
-                if subset == 'soc_cat':
-                    soc = value
-                    if value != 0:
-                        op_sub = op_sub[
-                            op_sub['soc_cat'] == value].reset_index(drop=True)
-                if subset == 'ns_sec':
-                    ns = value
-                    if value != 0:
-                        op_sub = op_sub[
-                            op_sub['ns_sec'] == value].reset_index(drop=True)
-                if subset == 'tfn_area_type':
-                    tfn_at = value
-                    if value != 0:
-                        op_sub = op_sub[
-                            op_sub[
-                                'tfn_area_type'] == value].reset_index(drop=True)
-                if subset == 'agg_tfn_area_type':
-                    agg_at = value
-                    if value != 0:
-                        op_sub = op_sub[
-                            op_sub[
-                                'agg_tfn_area_type'] == value].reset_index(drop=True)
-                if subset == 'g':
-                    g = value
-                    if value != 0:
-                        op_sub = op_sub[
-                            op_sub['Sex_B01ID'] == value].reset_index(drop=True)
-                if subset == 'agg_gor_to':
-                    agg_gor_to = value
-                    if value != 0:
-                        op_sub = op_sub[
-                            op_sub['agg_gor_to'] == value].reset_index(drop=True)
-                if subset == 'agg_gor_from':
-                    agg_gor_from = value
-                    if value != 0:
-                        op_sub = op_sub[
-                            op_sub['agg_gor_from'] == value].reset_index(drop=True)
-
-            out = self.trip_length_bands.copy()
-
-            out['ave_km'] = 0
-            out['trips'] = 0
+                continue
+            values[subset] = value
+
+        return mask, values
+
+    @staticmethod
+    def _band_totals(grouped: pd.DataFrame,
+                     band: np.ndarray,
+                     mask: np.ndarray,
+                     col: str,
+                     n_bands: int,
+                     ) -> np.ndarray:
+        """Sums col of the rows of grouped in mask, for each trip length band"""
+        weights = grouped[col].to_numpy(dtype=float)[mask]
+        return np.bincount(band[mask], weights=weights, minlength=n_bands)
 
-            for line, thres in self.trip_length_bands.iterrows():
-
-                tlb_sub = op_sub.copy()
+    def run_tlb_lookups(self,
+                        weekdays=[1, 2, 3, 4, 5],
+                        agg_purp=list(), #[13, 14, 15, 18]
+                        write=True):
+        """
+        weekdays: list of ints to consider default 1:5:
 
-                lower = thres['lower']
-                upper = thres['upper']
+        agg_purp: purposes to aggregate
 
-                tlb_sub = tlb_sub[
-                    tlb_sub['TripDisIncSW'] >= lower].reset_index(drop=True)
-                tlb_sub = tlb_sub[
-                    tlb_sub['TripDisIncSW'] < upper].reset_index(drop=True)
+        region_filter: how to do regional subsets
 
-                mean_val = (tlb_sub['TripDisIncSW'].mean() * 1.61)
-                total_trips = (tlb_sub['weighted_trip'].sum())
+        The NTS data is grouped by segment and band once, and cached for
+        later runs with the same weekdays.
+        """
+        # TODO: Need smart aggregation based on sample size threshold
+        grouped = self._group_trips(weekdays)
+        band = grouped['band'].to_numpy()
+        n_bands = len(self.trip_length_bands)
 
-                out.loc[line, 'ave_km'] = mean_val
-                out.loc[line, 'trips'] = total_trips
+        out_mat = []
+        for index, row in self.target_segmentation.iterrows():
 
-                del mean_val
-                del total_trips
+            print(row)
+            mask, values = self._get_segment_mask(grouped, row, agg_purp)
+            trip_origin = values['trip_origin']
+            purpose = values['p']
+            mode = values['m']
+            tp = values['tp']
+            ca = values['ca']
+            soc = values['soc_cat']
+            ns = values['ns_sec']
+            tfn_at = values['tfn_area_type']
+            agg_at = values['agg_tfn_area_type']
+            g = values['g']
+            agg_gor_to = values['agg_gor_to']
+            agg_gor_from = values['agg_gor_from']
+
+            # Sum up every band at once
+            count = self._band_totals(grouped, band, mask, 'count', n_bands)
+            distance = self._band_totals(grouped, band, mask, 'distance', n_bands)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean_val = np.where(count > 0, distance / count, np.nan)
 
+            out = self.trip_length_bands.copy()
+            out['ave_km'] = mean_val * 1.61
+            out['trips'] = self._band_totals(grouped, band, mask, 'trips', n_bands)
             out['band_share'] = out['trips']/out['trips'].sum()
 
             name = (trip_origin + '_tlb' + '_p' +
@@ -26,6 +26,7 @@ from matplotlib.ticker import AutoMinorLocator
 
 # Local Imports
 import normits_demand as nd
+from normits_demand.utils import numba_kernels
 
 sns.set_theme(style="darkgrid")
 
@@ -70,10 +71,169 @@ class DistributionReportCols:
         return order
 
 
+class CostBandIndex:
+    """The cost band of every cell in a cost matrix, calculated once
+
+    Sorting the same cost matrix into the same bands is needed many times
+    during calibration. This class works out which band each cell of
+    cost_matrix falls into once, so that the distribution of any matrix
+    across those bands is a single `np.bincount()`.
+
+    Bands can be defined either by bin_edges, in which case cells are
+    sorted in the same way as `np.histogram()` (the last band includes its
+    right edge), or by min_bounds and max_bounds, in which case each band
+    includes its min value but not its max value, like the band masks
+    `(cost >= min) & (cost < max)` used elsewhere.
+
+    Attributes
+    ----------
+    n_bands:
+        The number of bands.
+
+    shape:
+        The shape of the cost matrix the index was built for.
+
+    band_idx:
+        A flat array of the band of every cell in the cost matrix. Cells
+        which are not in any band are given a band of n_bands.
+    """
+
+    def __init__(self,
+                 cost_matrix: np.ndarray,
+                 bin_edges: List[float] = None,
+                 min_bounds: List[float] = None,
+                 max_bounds: List[float] = None,
+                 ):
+        """
+        Parameters
+        ----------
+        cost_matrix:
+            The matrix of costs to build the index for.
+
+        bin_edges:
+            Defines a monotonically increasing array of bin edges, including
+            the rightmost edge. If given, min_bounds and max_bounds are
+            ignored.
+
+        min_bounds:
+            A list of minimum bounds for each band. Corresponds to max_bounds.
+            Must be sorted, and the bands must not overlap.
+
+        max_bounds:
+            A list of maximum bounds for each band. Corresponds to min_bounds.
+
+        Raises
+        ------
+        ValueError:
+            If the bands are not defined, or the bands are not in order.
+        """
+        cost_matrix = np.asarray(cost_matrix)
+        self.shape = cost_matrix.shape
+        flat_cost = cost_matrix.ravel()
+
+        if bin_edges is not None:
+            bin_edges = np.asarray(bin_edges, dtype=float)
+            if np.any(np.diff(bin_edges) < 0):
+                raise ValueError("bin_edges must increase monotonically.")
+            self.n_bands = len(bin_edges) - 1
+
+            # Same as np.histogram - the last bin includes its right edge
+            band_idx = np.searchsorted(bin_edges, flat_cost, side='right') - 1
+            band_idx[flat_cost == bin_edges[-1]] = self.n_bands - 1
+            in_band = (flat_cost >= bin_edges[0]) & (flat_cost <= bin_edges[-1])
+
+        elif min_bounds is not None and max_bounds is not None:
+            min_bounds = np.asarray(min_bounds, dtype=float)
+            max_bounds = np.asarray(max_bounds, dtype=float)
+            if np.any(min_bounds[1:] < max_bounds[:-1]) or np.any(max_bounds < min_bounds):
+                raise ValueError(
+                    "min_bounds and max_bounds must be sorted and the bands "
+                    "they define must not overlap."
+                )
+            self.n_bands = len(min_bounds)
+
+            # Find the band each cell would be in, then check it is
+            band_idx = np.searchsorted(min_bounds, flat_cost, side='right') - 1
+            in_band = band_idx >= 0
+            in_band[in_band] = flat_cost[in_band] < max_bounds[band_idx[in_band]]
+
+        else:
+            raise ValueError(
+                "Either bin_edges needs to be set, or both min_bounds and "
+                "max_bounds needs to be set."
+            )
+
+        # Put everything not in a band into an extra band at the end
+        band_idx[~in_band] = self.n_bands
+        self.band_idx = band_idx.astype(np.min_scalar_type(self.n_bands))
+        self._cell_counts = None
+
+    def _check_shape(self, matrix: np.ndarray) -> None:
+        if matrix.shape != self.shape:
+            raise ValueError(
+                "matrix is not the same shape as the cost matrix this index "
+                "was built for. Expected %s, got %s."
+                % (self.shape, matrix.shape)
+            )
+
+    def band_totals(self, matrix: np.ndarray) -> np.ndarray:
+        """Returns the sum of matrix in each band"""
+        matrix = np.asarray(matrix)
+        self._check_shape(matrix)
+        totals = np.bincount(
+            self.band_idx,
+            weights=matrix.ravel(),
+            minlength=self.n_bands + 1,
+        )
+        return totals[:self.n_bands]
+
+    def band_shares(self, matrix: np.ndarray) -> np.ndarray:
+        """Returns the share of matrix in each band
+
+        Equivalent to `calculate_cost_distribution()`.
+        """
+        distribution = self.band_totals(matrix)
+        if distribution.sum() == 0:
+            return np.zeros_like(distribution)
+        return distribution / distribution.sum()
+
+    def cell_counts(self) -> np.ndarray:
+        """Returns the number of cells in each band"""
+        if self._cell_counts is None:
+            counts = np.bincount(self.band_idx, minlength=self.n_bands + 1)
+            self._cell_counts = counts[:self.n_bands]
+        return self._cell_counts
+
+    def band_lookup(self, band_values: np.ndarray, fill_value: float = 0) -> np.ndarray:
+        """Returns a matrix of band_values, looked up for each cell's band
+
+        Parameters
+        ----------
+        band_values:
+            An array of length n_bands. One value for each band.
+
+        fill_value:
+            The value to give to cells that are not in any band.
+
+        Returns
+        -------
+        matrix:
+            A matrix of the same shape as the cost matrix, where each cell
+            is the value in band_values for the band that cell is in.
+        """
+        lookup = np.append(np.asarray(band_values, dtype=float), fill_value)
+        return lookup[self.band_idx].reshape(self.shape)
+
+
 def cells_in_bounds(min_bounds: np.ndarray,
                     max_bounds: np.ndarray,
                     cost: np.ndarray,
+                    band_index: CostBandIndex = None,
                     ) -> np.ndarray:
+    # Use the precomputed bands if we can
+    if band_index is not None:
+        return band_index.cell_counts()
+
     cell_counts = list()
     for min_val, max_val in zip(min_bounds, max_bounds):
         band_mask = (cost >= min_val) & (cost < max_val)
@@ -181,11 +341,18 @@ def calculate_cost_distribution(matrix: np.ndarray,
         bin_edges = [min_bounds[0]] + max_bounds
 
     # Sort into bins
-    distribution, _ = np.histogram(
-        a=cost_matrix,
-        bins=bin_edges,
-        weights=matrix,
-    )
+    if numba_kernels.ENABLED:
+        distribution = numba_kernels.weighted_histogram(
+            values=cost_matrix,
+            weights=matrix,
+            bin_edges=bin_edges,
+        )
+    else:
+        distribution, _ = np.histogram(
+            a=cost_matrix,
+            bins=bin_edges,
+            weights=matrix,
+        )
 
     # Normalise
     if distribution.sum() == 0:
@@ -297,6 +464,7 @@ def calculate_average_cost_in_bounds(min_bounds: np.ndarray,
                                      max_bounds: np.ndarray,
                                      cost_matrix: np.ndarray,
                                      trips: np.ndarray,
+                                     band_index: CostBandIndex = None,
                                      ) -> np.ndarray:
     """Calculates the average cost between each bounds pair
 
@@ -315,11 +483,26 @@ def calculate_average_cost_in_bounds(min_bounds: np.ndarray,
         A matrix of trip counts from each point to point. Corresponds to
         cost_matrix.
 
+    band_index:
+        A CostBandIndex of cost_matrix, built using min_bounds and
+        max_bounds. If given, the bands are not recalculated.
+
     Returns
     -------
     average_costs:
          An array of the average cost between each bounds pair
     """
+    # Use the precomputed bands if we can
+    if band_index is not None:
+        band_distance = band_index.band_totals(trips * cost_matrix)
+        band_trips = band_index.band_totals(trips)
+        return np.divide(
+            band_distance,
+            band_trips,
+            where=band_trips != 0,
+            out=np.array(min_bounds, dtype=float),
+        )
+
     average_costs = list()
     for min_val, max_val in zip(min_bounds, max_bounds):
         band_mask = (cost_matrix >= min_val) & (cost_matrix < max_val)
@@ -16,11 +16,14 @@ File purpose:
 import os
 import abc
 import enum
+import tempfile
+import contextlib
 
 from typing import Any
 from typing import List
 from typing import Dict
 from typing import Tuple
+from typing import Callable
 from typing import Optional
 
 # Third Party
@@ -35,14 +38,17 @@ from normits_demand.cost import utils as cost_utils
 
 from normits_demand.utils import timing
 from normits_demand.utils import file_ops
+from normits_demand.utils import checkpoint as nd_checkpoint
 from normits_demand.utils import general as du
 from normits_demand.utils import pandas_utils as pd_utils
 
 from normits_demand.distribution import gravity_model
 from normits_demand.distribution import furness
+from normits_demand.distribution import param_cache
 
 from normits_demand.validation import checks
 from normits_demand.concurrency import multiprocessing
+from normits_demand.concurrency import communication
 
 from normits_demand.pathing.distribution_model import DistributorExportPaths
 
@@ -50,6 +56,8 @@ from normits_demand.pathing.distribution_model import DistributorExportPaths
 class AbstractDistributor(abc.ABC, DistributorExportPaths):
     # Default class constants that can be overwritten
     _default_name = 'Distributor'
+    _log_fname = "Distributor_log.log"
+    _logger_instantiate_msg = "Initialised new Distributor Logger"
 
     # Internal variables for consistent naming
     _pa_val_col = 'trips'
@@ -102,6 +110,15 @@ class AbstractDistributor(abc.ABC, DistributorExportPaths):
             export_home=export_home,
         )
 
+        # Create a logger
+        logger_name = "%s.%s" % (nd.get_package_logger_name(), self.__class__.__name__)
+        log_file_path = os.path.join(self.export_home, self._log_fname)
+        self._logger = nd.get_logger(
+            logger_name=logger_name,
+            log_file_path=log_file_path,
+            instantiate_msg=self._logger_instantiate_msg,
+        )
+
     def _filter_productions_attractions(self,
                                         segment_params: Dict[str, Any],
                                         productions: pd.DataFrame,
@@ -208,6 +225,161 @@ class AbstractDistributor(abc.ABC, DistributorExportPaths):
                            ):
         pass
 
+    def _get_segment_matrix_path(self,
+                                 running_segmentation: nd.SegmentationLevel,
+                                 segment_params: Dict[str, Any],
+                                 ) -> str:
+        """Generates the path to the distributed matrix of a segment"""
+        fname = running_segmentation.generate_file_name(
+            trip_origin=self.trip_origin,
+            year=str(self.year),
+            file_desc='synthetic_pa',
+            segment_params=segment_params,
+            compressed=True,
+        )
+        return os.path.join(self.export_paths.matrix_dir, fname)
+
+    def _distribute_shared_segment(
+        self,
+        segment_checkpoint: Optional[nd_checkpoint.StageCheckpoint] = None,
+        segment_input_hash: Optional[str] = None,
+        **kwargs,
+    ) -> None:
+        """Calls self.distribute_segment(), viewing any shared matrices first
+
+        If segment_checkpoint is given, the segment is recorded as started
+        before distributing, and complete once the distributed matrix has
+        been written out.
+        """
+        for key in ['cost_matrix', 'calibration_matrix']:
+            if isinstance(kwargs[key], communication.SharedDataFrameHandle):
+                kwargs[key] = kwargs[key].get_df()
+
+        if segment_checkpoint is None:
+            self.distribute_segment(**kwargs)
+            return
+
+        running_segmentation = kwargs['running_segmentation']
+        segment_params = kwargs['segment_params']
+        segment_name = running_segmentation.get_segment_name(segment_params)
+
+        segment_checkpoint.mark_started(segment_name, segment_input_hash)
+        self.distribute_segment(**kwargs)
+
+        # Model logs are only written by some calibrations
+        area_names = [kwargs['calibration_naming'][k] for k in kwargs['target_cost_distributions']]
+        output_paths = self._get_segment_output_paths(
+            running_segmentation=running_segmentation,
+            segment_params=segment_params,
+            area_names=area_names,
+        )
+        output_paths += [
+            x for x in self._get_segment_model_log_paths(
+                running_segmentation=running_segmentation,
+                segment_params=segment_params,
+                area_names=area_names,
+            )
+            if os.path.isfile(x)
+        ]
+
+        segment_checkpoint.mark_complete(
+            key=segment_name,
+            input_hash=segment_input_hash,
+            output_paths=output_paths,
+        )
+
+    def _get_overall_log_paths(self, area_names: List[str]) -> List[str]:
+        """Generates the paths to the overall logs
+
+        By default, all segments are logged in a single overall log.
+        Distributors which write an overall log per calibration area
+        should override this.
+        """
+        return [self.report_paths.overall_log]
+
+    def _get_segment_output_paths(self,
+                                  running_segmentation: nd.SegmentationLevel,
+                                  segment_params: Dict[str, Any],
+                                  area_names: List[str],
+                                  ) -> List[str]:
+        """Generates the paths to every file a segment always outputs
+
+        These are recorded in the checkpoint once a segment is complete.
+        If any are removed, the segment is run again on the next resume.
+        """
+        paths = [self._get_segment_matrix_path(running_segmentation, segment_params)]
+        return paths + self._get_overall_log_paths(area_names)
+
+    def _get_segment_model_log_paths(self,
+                                     running_segmentation: nd.SegmentationLevel,
+                                     segment_params: Dict[str, Any],
+                                     area_names: List[str],
+                                     ) -> List[str]:
+        """Generates the paths to the model logs a segment could write"""
+        return list()
+
+    def _reset_overall_logs(self,
+                            running_segmentation: nd.SegmentationLevel,
+                            area_names: List[str],
+                            rerun_segments: List[Dict[str, Any]],
+                            resume: bool,
+                            ) -> None:
+        """Gets the overall logs ready for a new run
+
+        If not resuming, any existing overall logs are removed. When
+        resuming, the rows of skipped segments are kept and only the rows
+        of segments being run again are removed. This stops segments being
+        logged twice, and keeps the logs of segments completed in a
+        previous run.
+        """
+        seg_cols = running_segmentation.naming_order
+        rerun = pd.DataFrame(rerun_segments, columns=seg_cols).astype(str)
+
+        for path in self._get_overall_log_paths(area_names):
+            if not os.path.isfile(path):
+                continue
+
+            if not resume:
+                os.remove(path)
+                continue
+
+            log = pd.read_csv(path)
+            if not set(seg_cols) <= set(log.columns):
+                os.remove(path)
+                continue
+
+            is_rerun = pd.MultiIndex.from_frame(log[seg_cols].astype(str)).isin(
+                pd.MultiIndex.from_frame(rerun)
+            )
+            file_ops.safe_dataframe_to_csv(log[~is_rerun], path, index=False)
+
+    def _get_matrix_publisher(
+        self,
+        share_matrices: Optional[communication.SharingMethod],
+        ctx_manager: contextlib.ExitStack,
+    ) -> Callable[[pd.DataFrame], Any]:
+        """Gets a function to publish matrices to share between processes
+
+        If share_matrices is None, the returned function returns the
+        matrices as they are. Anything published is removed when
+        ctx_manager is closed.
+        """
+        if share_matrices is None:
+            return lambda df: df
+
+        share_matrices = communication.SharingMethod(share_matrices)
+        memory_map_dir = None
+        if share_matrices == communication.SharingMethod.MEMORY_MAP:
+            memory_map_dir = ctx_manager.enter_context(
+                tempfile.TemporaryDirectory(dir=self.export_home)
+            )
+
+        publisher = communication.SharedDataFramePublisher(
+            method=share_matrices,
+            memory_map_dir=memory_map_dir,
+        )
+        return ctx_manager.enter_context(publisher).publish
+
     def distribute(self,
                    productions: pd.DataFrame,
                    attractions: pd.DataFrame,
@@ -218,8 +390,19 @@ class AbstractDistributor(abc.ABC, DistributorExportPaths):
                    calibration_naming: Dict[Any, Any],
                    pa_val_col: Optional[str] = 'val',
                    by_segment_kwargs: Dict[str, Dict[str, Any]] = None,
+                   share_matrices: Optional[communication.SharingMethod] = (
+                       communication.SharingMethod.SHARED_MEMORY
+                   ),
+                   checkpoint: Optional[nd_checkpoint.StageCheckpoint] = None,
                    **kwargs,
                    ):
+        # share_matrices defines how the cost and calibration matrices are
+        # passed to each segment's process. Each distinct matrix is published
+        # once, and only a handle to it is pickled for each segment.
+        # If None, the matrices are pickled for each segment.
+        # If checkpoint is given, each segment is recorded in it once
+        # complete. When resuming, segments already complete with the same
+        # inputs are skipped.
         # Validate inputs
         self._check_segment_keys(
             running_segmentation,
@@ -255,59 +438,113 @@ class AbstractDistributor(abc.ABC, DistributorExportPaths):
         by_segment_kwargs = dict() if by_segment_kwargs is None else by_segment_kwargs
 
         # ## MULTIPROCESS ACROSS SEGMENTS ## #
-        unchanging_kwargs = kwargs.copy()
-        unchanging_kwargs.update({
-            'running_segmentation': running_segmentation,
-            'calibration_matrix': calibration_matrix,
-            'calibration_naming': calibration_naming,
-        })
-
-        pbar_kwargs = {
-            'desc': self.name,
-            'unit': 'segment',
-        }
-
-        # Build a list of kwargs - one for each segment
-        kwarg_list = list()
-        for segment_params in running_segmentation:
-            segment_name = running_segmentation.get_segment_name(segment_params)
-
-            # Get productions, attractions
-            seg_productions, seg_attractions = self._filter_productions_attractions(
-                segment_params=segment_params,
-                productions=productions,
-                attractions=attractions,
-                pa_val_col=pa_val_col,
-            )
-
-            # Get the cost distributions for this segment
-            segment_target_costs = dict().fromkeys(calib_keys)
-            for key in calib_keys:
-                segment_target_costs[key] = target_cost_distributions[key][segment_name]
-
-            # Build the kwargs for this segment
-            segment_kwargs = unchanging_kwargs.copy()
-            segment_kwargs.update({
-                'segment_params': segment_params,
-                'productions': seg_productions,
-                'attractions': seg_attractions,
-                'cost_matrix': cost_matrices[segment_name],
-                'target_cost_distributions': segment_target_costs,
+        with contextlib.ExitStack() as ctx_manager:
+            publish = self._get_matrix_publisher(share_matrices, ctx_manager)
+
+            unchanging_kwargs = kwargs.copy()
+            unchanging_kwargs.update({
+                'running_segmentation': running_segmentation,
+                'calibration_matrix': publish(calibration_matrix),
+                'calibration_naming': calibration_naming,
             })
 
-            # Get any other by_segment kwargs passed in
-            segment_kwargs.update(by_segment_kwargs.get(segment_name, dict()))
-
-            kwarg_list.append(segment_kwargs)
+            pbar_kwargs = {
+                'desc': self.name,
+                'unit': 'segment',
+            }
+
+            # Matrices are often shared between segments, only hash once
+            matrix_hashes = dict()
+
+            def hash_matrix(df: pd.DataFrame) -> str:
+                if id(df) not in matrix_hashes:
+                    matrix_hashes[id(df)] = nd_checkpoint.hash_inputs(df)
+                return matrix_hashes[id(df)]
+
+            if checkpoint is not None:
+                unchanging_hash = nd_checkpoint.hash_inputs(
+                    kwargs,
+                    running_segmentation,
+                    hash_matrix(calibration_matrix),
+                    calibration_naming,
+                )
+
+            # Build a list of kwargs - one for each segment
+            kwarg_list = list()
+            n_skipped = 0
+            for segment_params in running_segmentation:
+                segment_name = running_segmentation.get_segment_name(segment_params)
+
+                # Get productions, attractions
+                seg_productions, seg_attractions = self._filter_productions_attractions(
+                    segment_params=segment_params,
+                    productions=productions,
+                    attractions=attractions,
+                    pa_val_col=pa_val_col,
+                )
+
+                # Get the cost distributions for this segment
+                segment_target_costs = dict().fromkeys(calib_keys)
+                for key in calib_keys:
+                    segment_target_costs[key] = target_cost_distributions[key][segment_name]
+
+                # Build the kwargs for this segment
+                segment_kwargs = unchanging_kwargs.copy()
+                segment_kwargs.update({
+                    'segment_params': segment_params,
+                    'productions': seg_productions,
+                    'attractions': seg_attractions,
+                    'cost_matrix': publish(cost_matrices[segment_name]),
+                    'target_cost_distributions': segment_target_costs,
+                })
+
+                # Get any other by_segment kwargs passed in
+                segment_kwargs.update(by_segment_kwargs.get(segment_name, dict()))
+
+                # Skip the segment if it's already done
+                if checkpoint is not None:
+                    segment_input_hash = nd_checkpoint.hash_inputs(
+                        unchanging_hash,
+                        segment_params,
+                        seg_productions,
+                        seg_attractions,
+                        hash_matrix(cost_matrices[segment_name]),
+                        segment_target_costs,
+                        by_segment_kwargs.get(segment_name, dict()),
+                    )
+                    if checkpoint.is_complete(segment_name, segment_input_hash):
+                        n_skipped += 1
+                        continue
+
+                    segment_kwargs.update({
+                        'segment_checkpoint': checkpoint,
+                        'segment_input_hash': segment_input_hash,
+                    })
+
+                kwarg_list.append(segment_kwargs)
+
+            if n_skipped > 0:
+                self._logger.info(
+                    "%s: Skipping %s segments already completed in a "
+                    "previous run." % (self.name, n_skipped)
+                )
+
+            # Keep the overall logs of any skipped segments
+            self._reset_overall_logs(
+                running_segmentation=running_segmentation,
+                area_names=[calibration_naming[k] for k in calib_keys],
+                rerun_segments=[x['segment_params'] for x in kwarg_list],
+                resume=n_skipped > 0,
+            )
 
-        # Multiprocess
-        multiprocessing.multiprocess(
-            fn=self.distribute_segment,
-            kwargs=kwarg_list,
-            pbar_kwargs=pbar_kwargs,
-            # process_count=0,
-            process_count=self.process_count,
-        )
+            # Multiprocess
+            multiprocessing.multiprocess(
+                fn=self._distribute_shared_segment,
+                kwargs=kwarg_list,
+                pbar_kwargs=pbar_kwargs,
+                # process_count=0,
+                process_count=self.process_count,
+            )
 
     def generate_cost_distribution_report(
         self,
@@ -367,6 +604,13 @@ class AbstractDistributor(abc.ABC, DistributorExportPaths):
         if report_cols is None:
             report_cols = cost_utils.DistributionReportCols(cost_units=self.cost_units)
 
+        # Sort the costs into bands once for all the calculations
+        band_index = cost_utils.CostBandIndex(
+            cost_matrix=cost_matrix,
+            min_bounds=min_bounds,
+            max_bounds=max_bounds,
+        )
+
         # Calculate remaining achieved values
         achieved_band_count = achieved_band_share * achieved_distribution.sum()
         achieved_ave_cost = cost_utils.calculate_average_cost_in_bounds(
@@ -374,6 +618,7 @@ class AbstractDistributor(abc.ABC, DistributorExportPaths):
             max_bounds=max_bounds,
             cost_matrix=cost_matrix,
             trips=achieved_distribution,
+            band_index=band_index,
         )
 
         # Calculate cost distributions
@@ -381,6 +626,7 @@ class AbstractDistributor(abc.ABC, DistributorExportPaths):
             min_bounds=min_bounds,
             max_bounds=max_bounds,
             cost=cost_matrix,
+            band_index=band_index,
         )
         cell_proportions = cell_count / cell_count.sum()
 
@@ -502,6 +748,7 @@ class DistributionMethod(enum.Enum):
 
 class GravityDistributor(AbstractDistributor):
     _log_fname = "Gravity_Model_log.log"
+    _logger_instantiate_msg = "Initialised new Gravity Model Logger"
 
     _base_zone_col = "%s_zone_id"
     _pa_val_col = 'trips'
@@ -540,15 +787,6 @@ class GravityDistributor(AbstractDistributor):
             cost_units=cost_units,
         )
 
-        # Create a logger
-        logger_name = "%s.%s" % (nd.get_package_logger_name(), self.__class__.__name__)
-        log_file_path = os.path.join(self.export_home, self._log_fname)
-        self._logger = nd.get_logger(
-            logger_name=logger_name,
-            log_file_path=log_file_path,
-            instantiate_msg="Initialised new Gravity Model Logger",
-        )
-
     def _write_out_reports(
         self,
         segment_params: Dict[str, Any],
@@ -637,32 +875,13 @@ class GravityDistributor(AbstractDistributor):
         None.
         """
         # Init
+        paths = self._get_report_paths(running_segmentation, segment_params, subdir_name)
         if subdir_name is not None:
-            # Add in the subdir_name to paths
-            report_dir = os.path.join(self.report_paths.tld_report_dir, subdir_name)
-            matrix_dir = os.path.join(self.export_paths.matrix_dir, subdir_name)
-
             # Create the paths if they don't already exist
-            file_ops.create_folder(report_dir)
-            file_ops.create_folder(matrix_dir)
-
-            # Add subdir into final filename
-            stem, ext = os.path.splitext(self.report_paths.overall_log)
-            overall_path = "{stem}_{id}{ext}".format(stem=stem, id=subdir_name, ext=ext)
-        else:
-            report_dir = self.report_paths.tld_report_dir
-            matrix_dir = self.export_paths.matrix_dir
-            overall_path = self.report_paths.overall_log
+            file_ops.create_folder(os.path.dirname(paths['tld_report']))
+            file_ops.create_folder(os.path.dirname(paths['matrix']))
 
         # ## DISTRIBUTION REPORTS ## #
-        # Generate the base filename
-        fname = running_segmentation.generate_file_name(
-            trip_origin=self.trip_origin,
-            year=str(self.year),
-            file_desc='tld_report',
-            segment_params=segment_params,
-        )
-
         report = self.generate_cost_distribution_report(
             min_bounds=min_bounds,
             max_bounds=max_bounds,
@@ -675,13 +894,9 @@ class GravityDistributor(AbstractDistributor):
         )
 
         # Write out report
-        csv_fname = fname + '.csv'
-        path = os.path.join(report_dir, csv_fname)
-        report.to_csv(path, index=False)
+        report.to_csv(paths['tld_report'], index=False)
 
         # Convert to a graph and write out
-        graph_fname = fname + '.png'
-        graph_path = os.path.join(report_dir, graph_fname)
         self.generate_cost_distribution_graph(
             min_bounds=min_bounds,
             max_bounds=max_bounds,
@@ -689,8 +904,8 @@ class GravityDistributor(AbstractDistributor):
             achieved_band_share=achieved_band_share,
             achieved_convergence=achieved_convergence,
             achieved_cost_params=optimal_cost_params,
-            plot_title=fname,
-            graph_path=graph_path,
+            plot_title=os.path.splitext(os.path.basename(paths['tld_graph']))[0],
+            graph_path=paths['tld_graph'],
         )
 
         # ## WRITE DISTRIBUTED DEMAND ## #
@@ -708,15 +923,7 @@ class GravityDistributor(AbstractDistributor):
         )
 
         # Generate path and write out
-        fname = running_segmentation.generate_file_name(
-            trip_origin=self.trip_origin,
-            year=str(self.year),
-            file_desc='synthetic_pa',
-            segment_params=segment_params,
-            compressed=True,
-        )
-        path = os.path.join(matrix_dir, fname)
-        nd.write_df(demand_df, path)
+        nd.write_df(demand_df, paths['matrix'])
 
         # ## ADD TO THE OVERALL LOG ## #
         # Generate the log
@@ -729,12 +936,221 @@ class GravityDistributor(AbstractDistributor):
         # Append this iteration to log file
         file_ops.safe_dataframe_to_csv(
             pd.DataFrame(log_dict, index=[0]),
-            overall_path,
+            paths['overall_log'],
             mode='a',
-            header=(not os.path.exists(overall_path)),
+            header=(not os.path.exists(paths['overall_log'])),
             index=False,
         )
 
+    def _get_report_paths(self,
+                          running_segmentation: nd.SegmentationLevel,
+                          segment_params: Dict[str, Any],
+                          subdir_name: str = None,
+                          ) -> Dict[str, str]:
+        """Generates the paths `_write_out_reports()` writes to
+
+        Returns a dictionary with the keys 'tld_report', 'tld_graph',
+        'matrix' and 'overall_log'. If subdir_name is defined, it is added
+        to each of the paths.
+        """
+        report_dir = self.report_paths.tld_report_dir
+        matrix_dir = self.export_paths.matrix_dir
+
+        if subdir_name is not None:
+            # Add in the subdir_name to paths
+            report_dir = os.path.join(report_dir, subdir_name)
+            matrix_dir = os.path.join(matrix_dir, subdir_name)
+
+        # Generate the base filenames
+        report_fname = running_segmentation.generate_file_name(
+            trip_origin=self.trip_origin,
+            year=str(self.year),
+            file_desc='tld_report',
+            segment_params=segment_params,
+        )
+        matrix_fname = running_segmentation.generate_file_name(
+            trip_origin=self.trip_origin,
+            year=str(self.year),
+            file_desc='synthetic_pa',
+            segment_params=segment_params,
+            compressed=True,
+        )
+
+        return {
+            'tld_report': os.path.join(report_dir, report_fname + '.csv'),
+            'tld_graph': os.path.join(report_dir, report_fname + '.png'),
+            'matrix': os.path.join(matrix_dir, matrix_fname),
+            'overall_log': self._get_overall_log_path(subdir_name),
+        }
+
+    @staticmethod
+    def _get_area_subdirs(area_names: List[str]) -> List[Optional[str]]:
+        """Gets the subdir_name reports are written to for each area"""
+        if len(area_names) > 1:
+            return list(area_names)
+        return [None]
+
+    def _get_overall_log_path(self, subdir_name: str = None) -> str:
+        """Generates the path to the overall log, adding subdir_name if given"""
+        if subdir_name is None:
+            return self.report_paths.overall_log
+
+        # Add subdir into final filename
+        stem, ext = os.path.splitext(self.report_paths.overall_log)
+        return "{stem}_{id}{ext}".format(stem=stem, id=subdir_name, ext=ext)
+
+    def _get_overall_log_paths(self, area_names: List[str]) -> List[str]:
+        """Generates the paths to the overall logs, one per calibration area"""
+        return [self._get_overall_log_path(x) for x in self._get_area_subdirs(area_names)]
+
+    def _get_segment_output_paths(self,
+                                  running_segmentation: nd.SegmentationLevel,
+                                  segment_params: Dict[str, Any],
+                                  area_names: List[str],
+                                  ) -> List[str]:
+        """Generates the paths to every file a segment always outputs"""
+        paths = list()
+        for subdir_name in self._get_area_subdirs(area_names):
+            paths += self._get_report_paths(
+                running_segmentation=running_segmentation,
+                segment_params=segment_params,
+                subdir_name=subdir_name,
+            ).values()
+
+        # Multi area distributions also write out the full matrix
+        matrix_path = self._get_segment_matrix_path(running_segmentation, segment_params)
+        if matrix_path not in paths:
+            paths.append(matrix_path)
+        return paths
+
+    def _get_segment_model_log_paths(self,
+                                     running_segmentation: nd.SegmentationLevel,
+                                     segment_params: Dict[str, Any],
+                                     area_names: List[str],
+                                     ) -> List[str]:
+        """Generates the paths to the gravity model logs a segment could write"""
+        log_path = self._get_model_log_path(running_segmentation, segment_params)
+        if len(area_names) <= 1:
+            return [log_path]
+
+        # Multi area calibrators log each area in a subdir
+        dir_name, fname = os.path.split(log_path)
+        return [os.path.join(dir_name, x, fname) for x in area_names]
+
+    def _get_model_log_path(self,
+                            running_segmentation: nd.SegmentationLevel,
+                            segment_params: Dict[str, Any],
+                            ) -> str:
+        """Generates the path to the gravity model log of a segment"""
+        log_fname = running_segmentation.generate_file_name(
+            trip_origin=self.trip_origin,
+            file_desc='gravity_log',
+            segment_params=segment_params,
+            csv=True,
+        )
+        return os.path.join(self.report_paths.model_log_dir, log_fname)
+
+    @staticmethod
+    def _get_calibration_settings(**kwargs) -> Dict[str, Any]:
+        """Gets the settings which change the outcome of calibration"""
+        cost_function = kwargs.get('cost_function')
+        return {
+            'cost_function': getattr(cost_function, 'name', cost_function),
+            'target_convergence': kwargs.get('target_convergence'),
+            'furness_max_iters': kwargs.get('furness_max_iters'),
+            'furness_tol': kwargs.get('furness_tol'),
+            'use_perceived_factors': kwargs.get('use_perceived_factors'),
+            'grav_max_iters': kwargs.get('grav_max_iters'),
+            'ftol': kwargs.get('ftol', 1e-5),
+            'init_params': kwargs.get('init_params'),
+        }
+
+    def _get_param_cache(self, **kwargs) -> Optional[param_cache.GravityParamsCache]:
+        """Gets the cache of calibrated cost params, if it is being used
+
+        The cache is only used when calibrating, and the `warm_start`
+        kwarg has been set to True. It is off by default so that results
+        don't depend on the contents of the cache from previous runs.
+        """
+        if not kwargs.get('warm_start', False):
+            return None
+        if not kwargs.get('calibrate_params', True):
+            return None
+
+        return param_cache.GravityParamsCache(
+            cache_dir=self.export_paths.cache_dir,
+            tolerance=kwargs.get('warm_start_tol', param_cache.DEFAULT_TOLERANCE),
+        )
+
+    def _find_warm_start(
+        self,
+        cache: param_cache.GravityParamsCache,
+        segment_name: str,
+        input_hash: str,
+        fingerprints: Dict[Any, Dict[str, Any]],
+        target_convergence: float,
+    ) -> Tuple[Dict[Any, Dict[str, Any]], bool]:
+        """Finds cached cost params to start calibration from
+
+        Parameters
+        ----------
+        cache:
+            The cache to search.
+
+        segment_name:
+            The name of the segment being calibrated.
+
+        input_hash:
+            A hash of all the inputs being used in calibration.
+
+        fingerprints:
+            A dictionary of {area_id: fingerprint}. Where fingerprint is a
+            summary of the inputs being used to calibrate area_id.
+
+        target_convergence:
+            The convergence calibration needs to achieve. Cached
+            calibrations are only reused without calibrating if they
+            achieved this.
+
+        Returns
+        -------
+        area_init_params:
+            A dictionary of {area_id: init_params} for each area that a
+            cached calibration could be found for.
+
+        all_identical:
+            True if every area was found in the cache with identical
+            inputs and had converged, meaning calibration can be skipped.
+        """
+        area_init_params = dict()
+        all_identical = True
+        for area_id, fingerprint in fingerprints.items():
+            match, cached = cache.find(
+                segment_name=segment_name,
+                area_id=area_id,
+                input_hash=input_hash,
+                fingerprint=fingerprint,
+                target_convergence=target_convergence,
+            )
+            all_identical &= match == param_cache.CacheMatch.IDENTICAL
+            if cached is not None:
+                area_init_params[area_id] = cached.cost_params
+
+        if all_identical:
+            self._logger.info(
+                "Inputs for %s are identical to a previous run. Skipping "
+                "calibration and using the cached cost params."
+                % segment_name
+            )
+        elif len(area_init_params) > 0:
+            self._logger.info(
+                "Warm starting calibration for %s from the cached cost "
+                "params of %s calibration area(s)."
+                % (segment_name, len(area_init_params))
+            )
+
+        return area_init_params, all_identical
+
     def _single_area_distribution(
         self,
         segment_params: Dict[str, Any],
@@ -746,19 +1162,48 @@ class GravityDistributor(AbstractDistributor):
         **kwargs,
     ):
         # ## SET UP SEGMENT LOG ## #
-        # Logging set up
-        log_fname = running_segmentation.generate_file_name(
-            trip_origin=self.trip_origin,
-            file_desc='gravity_log',
-            segment_params=segment_params,
-            csv=True,
-        )
-        log_path = os.path.join(self.report_paths.model_log_dir, log_fname)
+        log_path = self._get_model_log_path(running_segmentation, segment_params)
 
         # Replace the log if it already exists
         if os.path.isfile(log_path):
             os.remove(log_path)
 
+        # ## WARM START FROM PREVIOUS RUNS ## #
+        init_params = kwargs.get('init_params')
+        calibrate_params = kwargs.get('calibrate_params', True)
+
+        cache = self._get_param_cache(**kwargs)
+        if cache is not None:
+            segment_name = running_segmentation.generate_file_name(
+                trip_origin=self.trip_origin,
+                segment_params=segment_params,
+            )
+            input_hash = param_cache.hash_inputs(
+                arrays=[
+                    np_productions,
+                    np_attractions,
+                    np_cost,
+                    target_cost_distribution[['min', 'max', 'band_share']].values,
+                ],
+                settings=self._get_calibration_settings(**kwargs),
+            )
+            fingerprint = param_cache.fingerprint_inputs(
+                row_targets=np_productions,
+                col_targets=np_attractions,
+                cost_matrix=np_cost,
+                target_cost_distribution=target_cost_distribution,
+                cost_function_name=kwargs.get('cost_function').name,
+            )
+            area_init_params, all_identical = self._find_warm_start(
+                cache=cache,
+                segment_name=segment_name,
+                input_hash=input_hash,
+                fingerprints={1: fingerprint},
+                target_convergence=kwargs.get('target_convergence'),
+            )
+            init_params = area_init_params.get(1, init_params)
+            calibrate_params = not all_identical
+
         # ## CALIBRATE THE GRAVITY MODEL ## #
         calib = gravity_model.GravityModelCalibrator(
             row_targets=np_productions,
@@ -771,21 +1216,32 @@ class GravityDistributor(AbstractDistributor):
             furness_max_iters=kwargs.get('furness_max_iters'),
             furness_tol=kwargs.get('furness_tol'),
             use_perceived_factors=kwargs.get('use_perceived_factors'),
+            jacobian_threads=kwargs.get('jacobian_threads', 1),
         )
 
         optimal_cost_params = calib.calibrate(
-            init_params=kwargs.get('init_params'),
+            init_params=init_params,
             grav_max_iters=kwargs.get('grav_max_iters'),
-            calibrate_params=kwargs.get('calibrate_params', True),
+            calibrate_params=calibrate_params,
             ftol=kwargs.get('ftol', 1e-5),
             verbose=kwargs.get('verbose', 2),
         )
 
+        if cache is not None:
+            cache.save(segment_name, {
+                1: param_cache.CachedCalibration(
+                    cost_params=optimal_cost_params,
+                    convergence=calib.achieved_convergence,
+                    input_hash=input_hash,
+                    fingerprint=fingerprint,
+                ),
+            })
+
         # ## GENERATE REPORTS AND WRITE OUT ## #
         self._write_out_reports(
             segment_params=segment_params,
             running_segmentation=running_segmentation,
-            init_cost_params=kwargs.get('init_params'),
+            init_cost_params=init_params,
             optimal_cost_params=optimal_cost_params,
             min_bounds=target_cost_distribution['min'].values,
             max_bounds=target_cost_distribution['max'].values,
@@ -811,19 +1267,59 @@ class GravityDistributor(AbstractDistributor):
             **kwargs,
     ):
         # ## SET UP SEGMENT LOG ## #
-        # Logging set up
-        log_fname = running_segmentation.generate_file_name(
-            trip_origin=self.trip_origin,
-            file_desc='gravity_log',
-            segment_params=segment_params,
-            csv=True,
-        )
-        log_path = os.path.join(self.report_paths.model_log_dir, log_fname)
+        log_path = self._get_model_log_path(running_segmentation, segment_params)
 
         # Replace the log if it already exists
         if os.path.isfile(log_path):
             os.remove(log_path)
 
+        # ## WARM START FROM PREVIOUS RUNS ## #
+        init_params = kwargs.get('init_params')
+        calibrate_params = kwargs.get('calibrate_params', True)
+        area_init_params = dict()
+
+        cache = self._get_param_cache(**kwargs)
+        if cache is not None:
+            segment_name = running_segmentation.generate_file_name(
+                trip_origin=self.trip_origin,
+                segment_params=segment_params,
+            )
+
+            # Areas are calibrated together, so all inputs affect every area
+            tcd_arrays = list()
+            for calib_id in sorted(target_cost_distributions.keys()):
+                tcd = target_cost_distributions[calib_id]
+                tcd_arrays.append(tcd[['min', 'max', 'band_share']].values)
+
+            input_hash = param_cache.hash_inputs(
+                arrays=[
+                    np_productions,
+                    np_attractions,
+                    np_cost,
+                    np_calibration_matrix,
+                ] + tcd_arrays,
+                settings=self._get_calibration_settings(**kwargs),
+            )
+
+            fingerprints = dict()
+            for calib_id in calibration_naming:
+                fingerprints[calib_id] = param_cache.fingerprint_inputs(
+                    row_targets=np_productions,
+                    col_targets=np_attractions,
+                    cost_matrix=np_cost * (np_calibration_matrix == calib_id),
+                    target_cost_distribution=target_cost_distributions[calib_id],
+                    cost_function_name=kwargs.get('cost_function').name,
+                )
+
+            area_init_params, all_identical = self._find_warm_start(
+                cache=cache,
+                segment_name=segment_name,
+                input_hash=input_hash,
+                fingerprints=fingerprints,
+                target_convergence=kwargs.get('target_convergence'),
+            )
+            calibrate_params = not all_identical
+
         # ## CALIBRATE THE GRAVITY MODEL ## #
         calib = gravity_model.MultiAreaGravityModelCalibrator(
             row_targets=np_productions,
@@ -838,22 +1334,34 @@ class GravityDistributor(AbstractDistributor):
             furness_max_iters=kwargs.get('furness_max_iters'),
             furness_tol=kwargs.get('furness_tol'),
             use_perceived_factors=kwargs.get('use_perceived_factors'),
+            execution_mode=kwargs.get('execution_mode', 'thread'),
         )
 
         optimal_cost_params = calib.calibrate(
-            init_params=kwargs.get('init_params'),
+            init_params=init_params,
             grav_max_iters=kwargs.get('grav_max_iters'),
-            calibrate_params=kwargs.get('calibrate_params', True),
+            calibrate_params=calibrate_params,
             ftol=kwargs.get('ftol', 1e-5),
             verbose=kwargs.get('verbose', 2),
+            area_init_params=area_init_params,
         )
 
+        if cache is not None:
+            cache.save(segment_name, {
+                calib_id: param_cache.CachedCalibration(
+                    cost_params=optimal_cost_params[calib_id],
+                    convergence=calib.achieved_convergence[calib_id],
+                    input_hash=input_hash,
+                    fingerprint=fingerprints[calib_id],
+                )
+                for calib_id in calibration_naming
+            })
+
         # ## GENERATE REPORTS AND WRITE OUT ## #
         # Multiprocessing setup
         unchanging_kwargs = {
             'segment_params': segment_params,
             'running_segmentation': running_segmentation,
-            'init_cost_params': kwargs.get('init_params'),
             'cost_matrix': np_cost,
         }
 
@@ -862,6 +1370,7 @@ class GravityDistributor(AbstractDistributor):
         for calib_id, calib_name in calibration_naming.items():
             calib_kwargs = unchanging_kwargs.copy()
             calib_kwargs.update({
+                'init_cost_params': area_init_params.get(calib_id, init_params),
                 'optimal_cost_params': optimal_cost_params[calib_id],
                 'min_bounds': target_cost_distributions[calib_id]['min'].values,
                 'max_bounds': target_cost_distributions[calib_id]['max'].values,
@@ -899,14 +1408,7 @@ class GravityDistributor(AbstractDistributor):
         )
 
         # Generate path and write out
-        fname = running_segmentation.generate_file_name(
-            trip_origin=self.trip_origin,
-            year=str(self.year),
-            file_desc='synthetic_pa',
-            segment_params=segment_params,
-            compressed=True,
-        )
-        path = os.path.join(self.export_paths.matrix_dir, fname)
+        path = self._get_segment_matrix_path(running_segmentation, segment_params)
         nd.write_df(demand_df, path)
 
     def distribute_segment(
@@ -975,17 +1477,10 @@ class GravityDistributor(AbstractDistributor):
                 **kwargs,
             )
 
-    def distribute(self, *args, **kwargs):
-        # Make new log if one already exists
-        if os.path.isfile(self.report_paths.overall_log):
-            os.remove(self.report_paths.overall_log)
-
-        # Run default distribution
-        super().distribute(*args, **kwargs)
-
 
 class Furness3dDistributor(AbstractDistributor):
     _log_fname = "3D_Furness_log.log"
+    _logger_instantiate_msg = "Initialised new 3D Furness Logger"
 
     _base_zone_col = "%s_zone_id"
     _pa_val_col = 'trips'
@@ -1024,14 +1519,61 @@ class Furness3dDistributor(AbstractDistributor):
             cost_units=cost_units,
         )
 
-        # Create a logger
-        logger_name = "%s.%s" % (nd.get_package_logger_name(), self.__class__.__name__)
-        log_file_path = os.path.join(self.export_home, self._log_fname)
-        self._logger = nd.get_logger(
-            logger_name=logger_name,
-            log_file_path=log_file_path,
-            instantiate_msg="Initialised new 3D Furness Logger",
+    def _get_model_log_path(self,
+                            running_segmentation: nd.SegmentationLevel,
+                            segment_params: Dict[str, Any],
+                            ) -> str:
+        """Generates the path to the 3D furness log of a segment"""
+        log_fname = running_segmentation.generate_file_name(
+            trip_origin=self.trip_origin,
+            file_desc='furness3d_log',
+            segment_params=segment_params,
+            csv=True,
+        )
+        return os.path.join(self.report_paths.model_log_dir, log_fname)
+
+    def _get_tld_report_path(self,
+                             running_segmentation: nd.SegmentationLevel,
+                             segment_params: Dict[str, Any],
+                             area_name: str,
+                             ) -> str:
+        """Generates the path to the TLD report of a segment and area"""
+        fname = running_segmentation.generate_file_name(
+            trip_origin=self.trip_origin,
+            year=str(self.year),
+            file_desc='tld_report',
+            segment_params=segment_params,
+            suffix=area_name,
+            csv=True,
         )
+        return os.path.join(self.report_paths.tld_report_dir, fname)
+
+    def _get_segment_output_paths(self,
+                                  running_segmentation: nd.SegmentationLevel,
+                                  segment_params: Dict[str, Any],
+                                  area_names: List[str],
+                                  ) -> List[str]:
+        """Generates the paths to every file a segment always outputs"""
+        paths = super()._get_segment_output_paths(
+            running_segmentation=running_segmentation,
+            segment_params=segment_params,
+            area_names=area_names,
+        )
+        for area_name in area_names:
+            paths.append(self._get_tld_report_path(
+                running_segmentation=running_segmentation,
+                segment_params=segment_params,
+                area_name=area_name,
+            ))
+        return paths
+
+    def _get_segment_model_log_paths(self,
+                                     running_segmentation: nd.SegmentationLevel,
+                                     segment_params: Dict[str, Any],
+                                     area_names: List[str],
+                                     ) -> List[str]:
+        """Generates the paths to the 3D furness logs a segment could write"""
+        return [self._get_model_log_path(running_segmentation, segment_params)]
 
     def distribute_segment(self,
                            segment_params: Dict[str, Any],
@@ -1050,14 +1592,7 @@ class Furness3dDistributor(AbstractDistributor):
         calibration_keys = np.unique(calibration_matrix).tolist()
 
         # ## SET UP SEGMENT LOG ## #
-        # Logging set up
-        log_fname = running_segmentation.generate_file_name(
-            trip_origin=self.trip_origin,
-            file_desc='furness3d_log',
-            segment_params=segment_params,
-            csv=True,
-        )
-        log_path = os.path.join(self.report_paths.model_log_dir, log_fname)
+        log_path = self._get_model_log_path(running_segmentation, segment_params)
 
         # Replace the log if it already exists
         if os.path.isfile(log_path):
@@ -1133,15 +1668,11 @@ class Furness3dDistributor(AbstractDistributor):
             )
 
             # Write out report
-            fname = running_segmentation.generate_file_name(
-                trip_origin=self.trip_origin,
-                year=str(self.year),
-                file_desc='tld_report',
+            path = self._get_tld_report_path(
+                running_segmentation=running_segmentation,
                 segment_params=segment_params,
-                suffix=calibration_naming[calib_key],
-                csv=True,
+                area_name=calibration_naming[calib_key],
             )
-            path = os.path.join(self.report_paths.tld_report_dir, fname)
             report.to_csv(path, index=False)
 
         # ## WRITE DISTRIBUTED DEMAND ## #
@@ -1159,14 +1690,7 @@ class Furness3dDistributor(AbstractDistributor):
         )
 
         # Generate path and write out
-        fname = running_segmentation.generate_file_name(
-            trip_origin=self.trip_origin,
-            year=str(self.year),
-            file_desc='synthetic_pa',
-            segment_params=segment_params,
-            compressed=True,
-        )
-        path = os.path.join(self.export_paths.matrix_dir, fname)
+        path = self._get_segment_matrix_path(running_segmentation, segment_params)
         nd.write_df(demand_df, path)
 
         # ## ADD TO THE OVERALL LOG ## #
@@ -1191,11 +1715,3 @@ class Furness3dDistributor(AbstractDistributor):
             index=False,
         )
 
-    def distribute(self, *args, **kwargs):
-        # Make new log if one already exists
-        if os.path.isfile(self.report_paths.overall_log):
-            os.remove(self.report_paths.overall_log)
-
-        # Run default distribution
-        super().distribute(*args, **kwargs)
-
@@ -30,6 +30,7 @@ from normits_demand import constants as consts
 from normits_demand.utils import timing
 from normits_demand.utils import file_ops
 from normits_demand.utils import math_utils
+from normits_demand.utils import numba_kernels
 from normits_demand.utils import general as du
 from normits_demand.utils import pandas_utils as pd_utils
 
@@ -105,6 +106,35 @@ class Furness3D:
         self.achieved_band_shares = None
         self.achieved_convergences = None
         self.achieved_distribution = None
+        self._area_band_indices = dict()
+
+    def _get_area_band_index(self,
+                             calib_key: Any,
+                             use_bin_edges: bool = False,
+                             ) -> cost_utils.CostBandIndex:
+        """Gets the CostBandIndex of calib_key's costs, building it if needed
+
+        If use_bin_edges is True, cells are sorted into bands in the same
+        way as `cost_utils.calculate_cost_distribution()`. Otherwise,
+        each band includes its min value, but not its max value.
+        """
+        key = (calib_key, use_bin_edges)
+        if key not in self._area_band_indices:
+            area_tcd = self.target_cost_distributions[calib_key]
+            min_bounds = area_tcd['min'].astype(float).tolist()
+            max_bounds = area_tcd['max'].astype(float).tolist()
+
+            if use_bin_edges:
+                band_kwargs = {'bin_edges': [min_bounds[0]] + max_bounds}
+            else:
+                band_kwargs = {'min_bounds': min_bounds, 'max_bounds': max_bounds}
+
+            area_mask = (self.calibration_matrix == calib_key)
+            self._area_band_indices[key] = cost_utils.CostBandIndex(
+                cost_matrix=self.cost_matrix * area_mask,
+                **band_kwargs,
+            )
+        return self._area_band_indices[key]
 
     def _correct_band_share(self,
                             matrix: np.ndarray,
@@ -123,41 +153,34 @@ class Furness3D:
             # Filter down to this area
             area_mask = (self.calibration_matrix == calib_key)
             area_tcd = self.target_cost_distributions[calib_key]
+            band_index = self._get_area_band_index(calib_key)
 
             area_matrix_values = matrix * area_mask
             area_total = area_matrix_values.sum()
-            area_cost = self.cost_matrix * area_mask
 
-            # Adjust bands one at a time
-            for _, row in area_tcd.iterrows():
-                # Get proportion of all trips that should be in this band
-                target_band_share = row['band_share']
-                min_val = float(row['min'])
-                max_val = float(row['max'])
+            # Figure out the target and achieved for every band
+            target_band_totals = area_total * area_tcd['band_share'].values
+            ach_band_totals = band_index.band_totals(area_matrix_values)
 
-                # Get proportion of all trips that are in this band
-                distance_mask = (area_cost >= min_val) & (area_cost < max_val)
-                band_trips = area_matrix_values * distance_mask
-
-                # Figure out the target and achieved
-                target_band_total = area_total * target_band_share
-                ach_band_total = band_trips.sum()
-
-                # We can't adjust if there are no trips in this band
-                if ach_band_total <= 0:
-                    adj_mat = band_trips
+            # We can't adjust if there are no trips in a band
+            adjustment = np.divide(
+                target_band_totals,
+                ach_band_totals,
+                where=ach_band_totals > 0,
+                out=np.ones_like(ach_band_totals),
+            )
 
-                elif target_band_total <= 0:
-                    # Set to a really small value so furness can use still
-                    adj_mat = np.where(band_trips != 0, 1e-7, 0)
+            # Adjust all bands towards target. Cells not in a band are dropped
+            adj_mat = area_matrix_values * band_index.band_lookup(adjustment)
 
-                else:
-                    # Adjust the matrix towards target
-                    adjustment = target_band_total / ach_band_total
-                    adj_mat = band_trips * adjustment
+            # Set to a really small value so furness can use still
+            zero_target = (target_band_totals <= 0) & (ach_band_totals > 0)
+            if zero_target.any():
+                zero_target_mask = band_index.band_lookup(zero_target).astype(bool)
+                adj_mat[zero_target_mask & (area_matrix_values != 0)] = 1e-7
 
-                # Add into the return matrix
-                out_matrix += adj_mat
+            # Add into the return matrix
+            out_matrix += adj_mat
 
         return out_matrix
 
@@ -209,15 +232,10 @@ class Furness3D:
                 area_tcd = self.target_cost_distributions[calib_key]
 
                 area_matrix_values = matrix * area_mask
-                area_cost = self.cost_matrix * area_mask
 
                 # Calculate the convergence of this area
-                achieved_band_shares = cost_utils.calculate_cost_distribution(
-                    matrix=area_matrix_values,
-                    cost_matrix=area_cost,
-                    min_bounds=area_tcd['min'].tolist(),
-                    max_bounds=area_tcd['max'].tolist(),
-                )
+                band_index = self._get_area_band_index(calib_key, use_bin_edges=True)
+                achieved_band_shares = band_index.band_shares(area_matrix_values)
                 area_convergence = math_utils.curve_convergence(
                     area_tcd['band_share'].values,
                     achieved_band_shares,
@@ -260,6 +278,7 @@ def doubly_constrained_furness(seed_vals: np.array,
                                tol: float = 1e-9,
                                max_iters: int = 5000,
                                warning: bool = True,
+                               check_interval: int = 1,
                                ) -> Tuple[np.array, int, float]:
     """
     Performs a doubly constrained furness for max_iters or until tol is met
@@ -292,6 +311,14 @@ def doubly_constrained_furness(seed_vals: np.array,
         Whether to print a warning or not when the tol cannot be met before
         max_iters.
 
+    check_interval:
+        How often, in iterations, to calculate the RMSE and check for
+        convergence. The achieved row and col totals come from the
+        scaling steps, so a check never needs an extra pass over the
+        matrix. Setting this above 1 only saves the small per-check cost,
+        but may run up to check_interval - 1 more iterations than needed.
+        The RMSE is always checked on the final iteration.
+
     Returns
     -------
     furnessed_matrix:
@@ -311,8 +338,13 @@ def doubly_constrained_furness(seed_vals: np.array,
             % (str(seed_vals.shape), len(row_targets), len(col_targets))
         )
 
+    if check_interval < 1:
+        raise ValueError(
+            "check_interval must be 1 or greater. Got %s" % check_interval
+        )
+
     # Init
-    furnessed_mat = seed_vals.copy()
+    seed_vals = np.asarray(seed_vals, dtype=float)
     early_exit = False
     cur_rmse = np.inf
     iter_num = 0
@@ -323,47 +355,64 @@ def doubly_constrained_furness(seed_vals: np.array,
         warnings.warn("Furness given targets of 0. Returning all 0's")
         return np.zeros(seed_vals.shape), iter_num, cur_rmse
 
+    # The furnessed matrix is always seed * row_scale * col_scale, so only
+    # the scaling vectors are updated in the loop. This means each
+    # iteration only needs two read-only passes over the matrix
+    row_targets = np.asarray(row_targets, dtype=float)
+    col_targets = np.asarray(col_targets, dtype=float)
+    row_scale = np.ones_like(row_targets)
+    col_scale = np.ones_like(col_targets)
+
+    # Preallocate everything used in the loop
+    row_ach = np.empty_like(row_targets)
+    col_ach = np.empty_like(col_targets)
+    row_factor = np.empty_like(row_targets)
+    col_factor = np.empty_like(col_targets)
+
+    # Col totals are only calculated once per iteration. They're needed
+    # after the row constrain to check convergence, and again at the start
+    # of the next iteration
+    np.dot(row_scale, seed_vals, out=col_ach)
+
     # Set up numpy overflow errors
     with np.errstate(over='raise'):
 
         for iter_num in range(max_iters):
             # ## COL CONSTRAIN ## #
-            # Calculate difference factor
-            col_ach = np.sum(furnessed_mat, axis=0)
-            diff_factor = np.divide(
-                col_targets,
-                col_ach,
-                where=col_ach != 0,
-                out=np.ones_like(col_targets, dtype=float),
-            )
-
-            # adjust cols
-            furnessed_mat *= diff_factor
+            col_factor.fill(1)
+            np.divide(col_targets, col_ach, where=col_ach != 0, out=col_factor)
+            col_scale *= col_factor
 
             # ## ROW CONSTRAIN ## #
-            # Calculate difference factor
-            row_ach = np.sum(furnessed_mat, axis=1)
-            diff_factor = np.divide(
-                row_targets,
-                row_ach,
-                where=row_ach != 0,
-                out=np.ones_like(row_targets, dtype=float),
-            )
-
-            # adjust rows
-            furnessed_mat *= np.atleast_2d(diff_factor).T
+            np.dot(seed_vals, col_scale, out=row_ach)
+            row_ach *= row_scale
+            row_factor.fill(1)
+            np.divide(row_targets, row_ach, where=row_ach != 0, out=row_factor)
+            row_scale *= row_factor
+
+            # Achieved col totals for the next iteration and checking
+            np.dot(row_scale, seed_vals, out=col_ach)
+            col_ach *= col_scale
+
+            # Only check the diff every check_interval iterations
+            is_last_iter = (iter_num == max_iters - 1)
+            if (iter_num + 1) % check_interval != 0 and not is_last_iter:
+                continue
+
+            # Row totals are known from the row constrain, don't recalculate
+            row_ach *= row_factor
+            row_diff = np.sum((row_targets - row_ach) ** 2)
+            col_diff = np.sum((col_targets - col_ach) ** 2)
+            cur_rmse = ((row_diff + col_diff) / n_vals) ** 0.5
 
             # Calculate the diff - leave early if met
-            row_diff = (row_targets - np.sum(furnessed_mat, axis=1)) ** 2
-            col_diff = (col_targets - np.sum(furnessed_mat, axis=0)) ** 2
-            cur_rmse = (np.sum(row_diff + col_diff) / n_vals) ** 0.5
             if cur_rmse < tol:
                 early_exit = True
                 break
 
             # We got a NaN! Make sure to point out we didn't converge
             if np.isnan(cur_rmse):
-                return np.zeros(furnessed_mat.shape), iter_num, np.inf
+                return np.zeros(seed_vals.shape), iter_num, np.inf
 
     # Warn the user if we exhausted our number of loops
     if not early_exit and warning:
@@ -372,9 +421,192 @@ def doubly_constrained_furness(seed_vals: np.array,
               "%f. The values returned may not be accurate."
               % (max_iters, cur_rmse))
 
+    # Apply the scaling to get the furnessed matrix
+    furnessed_mat = np.multiply(seed_vals, col_scale)
+    furnessed_mat *= row_scale[:, np.newaxis]
+
     return furnessed_mat, iter_num + 1, cur_rmse
 
 
+def batched_doubly_constrained_furness(seed_vals: np.ndarray,
+                                       row_targets: np.ndarray,
+                                       col_targets: np.ndarray,
+                                       tol: float = 1e-9,
+                                       max_iters: int = 5000,
+                                       warning: bool = True,
+                                       ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Performs a doubly constrained furness on a stack of matrices at once
+
+    Each matrix in the stack is furnessed exactly as
+    `doubly_constrained_furness()` would, but all segments are iterated
+    together. Segments are dropped from the working stack as soon as they
+    converge, so slow segments do not hold up the rest.
+
+    Controls numpy warnings to warn of any overflow errors encountered
+
+    Parameters
+    ----------
+    seed_vals:
+        Initial values for the furness. Must be of shape
+        (n_segments, n_rows, n_cols).
+
+    row_targets:
+        The target values for the sum of each row, for each segment.
+        Must be of shape (n_segments, n_rows).
+
+    col_targets:
+        The target values for the sum of each column, for each segment.
+        Must be of shape (n_segments, n_cols).
+
+    tol:
+        The maximum difference between the achieved and the target values
+        to tolerate before exiting early. R^2 is used to calculate the
+        difference.
+
+    max_iters:
+        The maximum number of iterations to complete before exiting.
+
+    warning:
+        Whether to print a warning or not when the tol cannot be met before
+        max_iters for any of the segments.
+
+    Returns
+    -------
+    furnessed_matrices:
+        The final furnessed matrices. Of shape (n_segments, n_rows, n_cols).
+
+    completed_iters:
+        The number of completed iterations before exiting, for each segment.
+
+    achieved_rmse:
+        The Root Mean Squared Error difference achieved before exiting, for
+        each segment.
+
+    See Also
+    --------
+    `doubly_constrained_furness()`
+    """
+    # Error check
+    if seed_vals.ndim != 3:
+        raise ValueError(
+            "Expected seed_vals to be a 3D stack of matrices. Got %d "
+            "dimensions instead." % seed_vals.ndim
+        )
+
+    n_segments, n_rows, n_cols = seed_vals.shape
+    if row_targets.shape != (n_segments, n_rows):
+        raise ValueError(
+            "The shape of the row targets does not match the seed values. "
+            "Row targets are shape %s. Expected shape (%d, %d)."
+            % (str(row_targets.shape), n_segments, n_rows)
+        )
+
+    if col_targets.shape != (n_segments, n_cols):
+        raise ValueError(
+            "The shape of the col targets does not match the seed values. "
+            "Col targets are shape %s. Expected shape (%d, %d)."
+            % (str(col_targets.shape), n_segments, n_cols)
+        )
+
+    # Init
+    furnessed_mats = np.array(seed_vals, dtype=float)
+    completed_iters = np.zeros(n_segments, dtype=int)
+    achieved_rmse = np.full(n_segments, np.inf)
+
+    # Segments with all 0 targets are returned as all 0's
+    zero_mask = (row_targets.sum(axis=1) == 0) | (col_targets.sum(axis=1) == 0)
+    if zero_mask.any():
+        warnings.warn(
+            "Furness given targets of 0 for %d segments. Returning all 0's "
+            "for these segments." % zero_mask.sum()
+        )
+        furnessed_mats[zero_mask] = 0
+
+    # Build the working stack of unconverged segments
+    active = np.flatnonzero(~zero_mask)
+    mats = furnessed_mats[active]
+    row_t = row_targets[active].astype(float)
+    col_t = col_targets[active].astype(float)
+    cur_rmse = np.full(len(active), np.inf)
+
+    # Set up numpy overflow errors
+    with np.errstate(over='raise'):
+
+        for iter_num in range(max_iters):
+            if len(active) == 0:
+                break
+
+            # Use the fused kernel if we can
+            if numba_kernels.ENABLED:
+                numba_kernels.furness_stack_iteration(mats, row_t, col_t, cur_rmse)
+
+            else:
+                # ## COL CONSTRAIN ## #
+                col_ach = mats.sum(axis=1)
+                diff_factor = np.divide(
+                    col_t,
+                    col_ach,
+                    where=col_ach != 0,
+                    out=np.ones_like(col_t),
+                )
+                mats *= diff_factor[:, np.newaxis, :]
+
+                # ## ROW CONSTRAIN ## #
+                row_ach = mats.sum(axis=2)
+                diff_factor = np.divide(
+                    row_t,
+                    row_ach,
+                    where=row_ach != 0,
+                    out=np.ones_like(row_t),
+                )
+                mats *= diff_factor[:, :, np.newaxis]
+
+                # Calculate the diff for each segment
+                row_diff = ((row_t - mats.sum(axis=2)) ** 2).sum(axis=1)
+                col_diff = ((col_t - mats.sum(axis=1)) ** 2).sum(axis=1)
+                cur_rmse = ((row_diff + col_diff) / n_rows) ** 0.5
+
+            # Remove any finished segments from the working stack
+            converged = cur_rmse < tol
+            failed = np.isnan(cur_rmse)
+            done = converged | failed
+            if not done.any():
+                continue
+
+            # We got a NaN! Make sure to point out we didn't converge
+            mats[failed] = 0
+            cur_rmse[failed] = np.inf
+
+            done_idx = active[done]
+            furnessed_mats[done_idx] = mats[done]
+            completed_iters[done_idx] = iter_num + 1 - failed[done]
+            achieved_rmse[done_idx] = cur_rmse[done]
+
+            keep = ~done
+            active = active[keep]
+            mats = mats[keep]
+            row_t = row_t[keep]
+            col_t = col_t[keep]
+            cur_rmse = cur_rmse[keep]
+
+    # Store any segments that did not converge
+    if len(active) > 0:
+        furnessed_mats[active] = mats
+        completed_iters[active] = max_iters
+        achieved_rmse[active] = cur_rmse
+
+        # Warn the user if we exhausted our number of loops
+        if warning:
+            print("WARNING! The batched doubly constrained furness exhausted "
+                  "its max number of loops (%d) for %d of %d segments, "
+                  "while achieving a worst RMSE difference of %f. The "
+                  "values returned may not be accurate."
+                  % (max_iters, len(active), n_segments, cur_rmse.max()))
+
+    return furnessed_mats, completed_iters, achieved_rmse
+
+
 def _distribute_pa_internal(productions,
                             attraction_weights,
                             seed_year,
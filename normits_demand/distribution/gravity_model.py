@@ -11,16 +11,21 @@ import copy
 import queue
 import warnings
 import operator
+import traceback
 import functools
 import threading
 import contextlib
 import dataclasses
+import multiprocessing
+import concurrent.futures
 
 from typing import Any
 from typing import List
 from typing import Dict
 from typing import Tuple
+from typing import Callable
 from typing import Iterable
+from typing import Optional
 
 # Third Party
 import numpy as np
@@ -97,6 +102,18 @@ class SharedArrays:
     jacobian_out: Dict[str, np.ndarray]
 
 
+@enum.unique
+class MultiAreaExecutionMode(enum.Enum):
+    """How MultiAreaGravityModelCalibrator runs each area's calibration
+
+    THREAD runs each area's optimiser in a thread. PROCESS runs each area's
+    optimiser in its own process, while the furnesses are run centrally in
+    the calling process. Both give identical results.
+    """
+    THREAD = 'thread'
+    PROCESS = 'process'
+
+
 class FurnessThreadBase(abc.ABC, multithreading.ReturnOrErrorThread):
     """Base class for running a threaded furness
 
@@ -275,6 +292,8 @@ class GravityModelBase(abc.ABC):
         self._loop_end_time = None
         self._jacobian_mats = None
         self._perceived_factors = None
+        self._band_indices = dict()
+        self._thread_pool = None
 
         # Additional attributes
         self.initial_cost_params = None
@@ -346,16 +365,27 @@ class GravityModelBase(abc.ABC):
             self._order_cost_params(self.cost_function.param_max),
         )
 
+    def _get_band_index(self, **band_kwargs) -> cost_utils.CostBandIndex:
+        """Gets the CostBandIndex of self.cost_matrix for the given bands
+
+        band_kwargs are passed to `cost_utils.CostBandIndex` to define the
+        bands. Indexes are built once, then cached for later calls.
+        """
+        key = tuple((k, tuple(v)) for k, v in sorted(band_kwargs.items()))
+        if key not in self._band_indices:
+            self._band_indices[key] = cost_utils.CostBandIndex(
+                cost_matrix=self.cost_matrix,
+                **band_kwargs,
+            )
+        return self._band_indices[key]
+
     def _cost_distribution(self,
                            matrix: np.ndarray,
                            tcd_bin_edges: List[float],
                            ) -> np.ndarray:
         """Returns the distribution of matrix across self.tcd_bin_edges"""
-        return cost_utils.calculate_cost_distribution(
-            matrix=matrix,
-            cost_matrix=self.cost_matrix,
-            bin_edges=tcd_bin_edges,
-        )
+        band_index = self._get_band_index(bin_edges=tcd_bin_edges)
+        return band_index.band_shares(matrix)
 
     def _guess_init_params(self,
                            cost_args: List[float],
@@ -429,32 +459,34 @@ class GravityModelBase(abc.ABC):
         ) ** 0.5
         perc_factors = np.clip(perc_factors, 0.5, 2)
 
-        # Initialise loop
-        perc_factors_mat = np.ones_like(self.cost_matrix)
-        min_vals = self.target_cost_distribution['min']
-        max_vals = self.target_cost_distribution['max']
-
         # Convert into factors for the cost matrix
-        for min_val, max_val, factor in zip(min_vals, max_vals, perc_factors):
-            # Get proportion of all trips that are in this band
-            distance_mask = (
-                (self.cost_matrix >= min_val)
-                & (self.cost_matrix < max_val)
-            )
-
-            perc_factors_mat = np.multiply(
-                perc_factors_mat,
-                factor,
-                where=distance_mask,
-                out=perc_factors_mat,
-            )
+        band_index = self._get_band_index(
+            min_bounds=self.target_cost_distribution['min'].tolist(),
+            max_bounds=self.target_cost_distribution['max'].tolist(),
+        )
 
         # Assign to class attribute
-        self._perceived_factors = perc_factors_mat
+        self._perceived_factors = band_index.band_lookup(perc_factors, fill_value=1)
 
     def _apply_perceived_factors(self, cost_matrix: np.ndarray) -> np.ndarray:
         return cost_matrix * self._perceived_factors
 
+    def _map_cost_params(self,
+                         fn: Callable[[str], Any],
+                         cost_params: Iterable[str],
+                         ) -> Dict[str, Any]:
+        """Calls fn on each cost param, returning {cost_param: fn(cost_param)}
+
+        If self._thread_pool has been set, the calls are made concurrently
+        in the pool. Each call must be independent of the others.
+        """
+        cost_params = list(cost_params)
+        if self._thread_pool is None:
+            return {p: fn(p) for p in cost_params}
+
+        futures = [self._thread_pool.submit(fn, p) for p in cost_params]
+        return {p: f.result() for p, f in zip(cost_params, futures)}
+
     def _gravity_function(self,
                           cost_args: List[float],
                           diff_step: float,
@@ -484,16 +516,16 @@ class GravityModelBase(abc.ABC):
         init_matrix = self.cost_function.calculate(cost_matrix, **cost_kwargs)
 
         # Do some prep for jacobian calculations
-        self._jacobian_mats = {'base': init_matrix.copy()}
-        for cost_param in self.cost_function.kw_order:
+        def adjusted_cost(cost_param: str) -> np.ndarray:
             # Adjust cost slightly
             adj_cost_kwargs = cost_kwargs.copy()
             adj_cost_kwargs[cost_param] += adj_cost_kwargs[cost_param] * diff_step
+            return self.cost_function.calculate(cost_matrix, **adj_cost_kwargs)
 
-            # Calculate adjusted cost
-            adj_cost = self.cost_function.calculate(cost_matrix, **adj_cost_kwargs)
-
-            self._jacobian_mats[cost_param] = adj_cost
+        self._jacobian_mats = {'base': init_matrix.copy()}
+        self._jacobian_mats.update(
+            self._map_cost_params(adjusted_cost, self.cost_function.kw_order)
+        )
 
         # Furness trips to trip ends
         matrix, iters, rmse = self.gravity_furness(
@@ -753,8 +785,12 @@ class GravityModelCalibrator(GravityModelBase):
                  furness_tol: float,
                  use_perceived_factors: bool = True,
                  running_log_path: nd.PathLike = None,
+                 jacobian_threads: int = 1,
                  ):
         # TODO(BT): Write GravityModelCalibrator __init__ docs
+        # jacobian_threads is the number of threads to use when evaluating
+        # the perturbed cost functions and their furnesses. Each perturbed
+        # matrix is independent, so results are identical to running serially.
         super().__init__(
             cost_function=cost_function,
             cost_matrix=cost_matrix,
@@ -773,9 +809,28 @@ class GravityModelCalibrator(GravityModelBase):
         self.furness_tol = furness_tol
         self.use_perceived_factors = use_perceived_factors
         self.running_log_path = running_log_path
+        self.jacobian_threads = jacobian_threads
 
         self.target_convergence = target_convergence
 
+    def _calibrate(self, *args, **kwargs) -> None:
+        """Internal function of calibrate.
+
+        Wraps GravityModelBase._calibrate(), evaluating the jacobian
+        matrices in a pool of self.jacobian_threads threads.
+        """
+        if self.jacobian_threads <= 1:
+            super()._calibrate(*args, **kwargs)
+            return
+
+        # NumPy releases the GIL, so threads are enough here
+        with concurrent.futures.ThreadPoolExecutor(self.jacobian_threads) as pool:
+            self._thread_pool = pool
+            try:
+                super()._calibrate(*args, **kwargs)
+            finally:
+                self._thread_pool = None
+
     def gravity_furness(self,
                         seed_matrix: np.ndarray,
                         row_targets: np.ndarray,
@@ -854,18 +909,18 @@ class GravityModelCalibrator(GravityModelBase):
         achieved_rmse:
             The Root Mean Squared Error difference achieved before exiting
         """
-        return_dict = dict.fromkeys(seed_matrices.keys())
-        for cost_param, seed_matrix in seed_matrices.items():
-            return_dict[cost_param], *_ = furness.doubly_constrained_furness(
-                seed_vals=seed_matrix,
+        def run_furness(cost_param: str) -> np.ndarray:
+            furnessed_mat, *_ = furness.doubly_constrained_furness(
+                seed_vals=seed_matrices[cost_param],
                 row_targets=row_targets,
                 col_targets=col_targets,
                 tol=1e-6,
                 max_iters=20,
                 warning=False,
             )
+            return furnessed_mat
 
-        return return_dict
+        return self._map_cost_params(run_furness, seed_matrices.keys())
 
     def calibrate(self,
                   init_params: Dict[str, Any],
@@ -2006,6 +2061,27 @@ class SingleTLDCalibratorThread(multithreading.ReturnOrErrorThread, GravityModel
         return return_mats
 
 
+def _run_calibrator_process(
+    return_q: multiprocessing.Queue,
+    calibrator_kwargs: Dict[str, Any],
+) -> None:
+    """Runs a SingleTLDCalibratorThread calibration in this process
+
+    Used as the target of each process in
+    MultiAreaExecutionMode.PROCESS. Places a tuple of
+    (optimal_cost_params, perceived_factors) onto return_q once complete,
+    or the formatted traceback of any error that occurred.
+    """
+    calibrator = SingleTLDCalibratorThread(**calibrator_kwargs)
+    try:
+        calibrator.run_target()
+    except BaseException:
+        return_q.put(traceback.format_exc())
+        raise
+
+    return_q.put((calibrator.optimal_cost_params, calibrator._perceived_factors))
+
+
 class MultiAreaGravityModelCalibrator:
     # TODO(BT): Write MultiAreaGravityModelCalibrator docs
 
@@ -2024,8 +2100,13 @@ class MultiAreaGravityModelCalibrator:
                  furness_tol: float,
                  use_perceived_factors: bool = True,
                  running_log_path: nd.PathLike = None,
+                 execution_mode: MultiAreaExecutionMode = MultiAreaExecutionMode.THREAD,
                  ):
         # TODO(BT): Write MultiAreaGravityModelCalibrator __init__ docs
+        # execution_mode can also be given as the string value of a
+        # MultiAreaExecutionMode. With MultiAreaExecutionMode.PROCESS,
+        # calibrate() must be called from a `if __name__ == '__main__':`
+        # guarded script, and not from within a daemonic process.
         # Set up logging
         if running_log_path is not None:
             dir_name, _ = os.path.split(running_log_path)
@@ -2052,6 +2133,7 @@ class MultiAreaGravityModelCalibrator:
         self.furness_tol = furness_tol
         self.use_perceived_factors = use_perceived_factors
         self.running_log_path = running_log_path
+        self.execution_mode = MultiAreaExecutionMode(execution_mode)
 
         self.target_convergence = target_convergence
 
@@ -2090,6 +2172,9 @@ class MultiAreaGravityModelCalibrator:
         # Attributes to store from runs
         self.achieved_band_share = dict.fromkeys(self.calib_areas)
         self.perceived_factors = dict.fromkeys(self.calib_areas)
+
+        # Built on first use
+        self._area_band_indices = dict()
         
     @staticmethod
     def _update_tcds(
@@ -2119,6 +2204,16 @@ class MultiAreaGravityModelCalibrator:
 
         return bin_edges
 
+    def _get_area_band_index(self, area_id: Any) -> cost_utils.CostBandIndex:
+        """Gets the CostBandIndex of area_id's costs, building it if needed"""
+        if area_id not in self._area_band_indices:
+            area_cost = self.cost_matrix * (self.calibration_matrix == area_id)
+            self._area_band_indices[area_id] = cost_utils.CostBandIndex(
+                cost_matrix=area_cost,
+                bin_edges=self.tcd_bin_edges[area_id],
+            )
+        return self._area_band_indices[area_id]
+
     def _cost_params_to_kwargs(self, args: List[Any]) -> Dict[str, Any]:
         """Converts a list or args into kwargs that self.cost_function expects"""
         if len(args) != len(self.cost_function.kw_order):
@@ -2140,12 +2235,20 @@ class MultiAreaGravityModelCalibrator:
         return ordered_params
 
     def _setup_furness_threads(self,
-                               shared_arrays: SharedArrays
+                               shared_arrays: SharedArrays,
+                               mp_context: multiprocessing.context.BaseContext = None,
                                ) -> FurnessSetup:
-        """Sets up all the furness/jacobian threads for calibration runs"""
+        """Sets up all the furness/jacobian threads for calibration runs
+
+        If mp_context is given, the queues and events used to communicate
+        with the calibrators are created with it, so the calibrators can
+        be run in other processes.
+        """
         # Init
         gravity_furness_key = 'furness',
         jacobian_key = 'jacobian',
+        ipc = threading if mp_context is None else mp_context
+        ipc_queue = queue.Queue if mp_context is None else mp_context.Queue
 
         # Function to construct FurnessThreadInterface objects
         def create_interface_input(constructor):
@@ -2159,19 +2262,19 @@ class MultiAreaGravityModelCalibrator:
 
         # Use above function to create objects
         interface_putter_qs = create_interface_input(lambda: queue.Queue(1))
-        interface_getter_qs = create_interface_input(lambda: queue.Queue(1))
-        furness_return_qs = create_interface_input(lambda: queue.Queue(10))
+        interface_getter_qs = create_interface_input(lambda: ipc_queue(1))
+        furness_return_qs = create_interface_input(lambda: ipc_queue(10))
         furness_wait_events = create_interface_input(lambda: threading.Event())
 
         # Generate the complete event
-        all_complete_event = threading.Event()
+        all_complete_event = ipc.Event()
 
         # Generate the area mats and complete events for each thread
         area_mats = dict.fromkeys(self.calib_areas)
         complete_events = dict.fromkeys(self.calib_areas)
         for area_id in self.calib_areas:
             area_mats[area_id] = self.calibration_matrix == area_id
-            complete_events[area_id] = threading.Event()
+            complete_events[area_id] = ipc.Event()
 
         # Initialise the interface between gravity and furnesses
         furness_interface = FurnessThreadInterface(
@@ -2239,8 +2342,13 @@ class MultiAreaGravityModelCalibrator:
     def _setup_shared_arrays(self,
                              init_mat: np.ndarray,
                              ctx_manager: contextlib.ExitStack,
+                             mp_context: multiprocessing.context.BaseContext = None,
                              ) -> SharedArrays:
-        """Sets up the needed shared arrays"""
+        """Sets up the needed shared arrays
+
+        If mp_context is given, the arrays are locked with its locks, so
+        they can be safely written to from other processes.
+        """
         # Init
         jac_base_name = 'Jac_%s_%s_%s' % ('%s', '%s', os.getpid())
 
@@ -2250,6 +2358,7 @@ class MultiAreaGravityModelCalibrator:
                 name=name,
                 data=copy.copy(init_mat),
                 dtype=np.float32,
+                lock=None if mp_context is None else mp_context.Lock(),
             )
             return ctx_manager.enter_context(array)
 
@@ -2271,6 +2380,105 @@ class MultiAreaGravityModelCalibrator:
             jacobian_out=jacobian_out,
         )
 
+    @staticmethod
+    def _run_calibrator_threads(
+        calibrator_kwargs: Dict[Any, Dict[str, Any]],
+        furness_setup: FurnessSetup,
+    ) -> Dict[Any, Tuple[Dict[str, Any], np.ndarray]]:
+        """Runs a SingleTLDCalibratorThread for each area
+
+        Returns a dictionary of (optimal_cost_params, perceived_factors)
+        tuples, with the same keys as calibrator_kwargs.
+        """
+        calibrator_threads = dict.fromkeys(calibrator_kwargs.keys())
+        for area_id, kwargs in calibrator_kwargs.items():
+            calibrator_threads[area_id] = SingleTLDCalibratorThread(**kwargs)
+            calibrator_threads[area_id].start()
+
+        multithreading.wait_for_thread_dict_return_or_error(
+            return_threads=calibrator_threads,
+            error_threads_list=furness_setup.all_threads,
+        )
+
+        return {
+            area_id: (thread.optimal_cost_params, thread._perceived_factors)
+            for area_id, thread in calibrator_threads.items()
+        }
+
+    @staticmethod
+    def _run_calibrator_processes(
+        calibrator_kwargs: Dict[Any, Dict[str, Any]],
+        furness_setup: FurnessSetup,
+        mp_context: multiprocessing.context.BaseContext,
+    ) -> Dict[Any, Tuple[Dict[str, Any], np.ndarray]]:
+        """Runs a SingleTLDCalibratorThread for each area, each in its own process
+
+        Returns a dictionary of (optimal_cost_params, perceived_factors)
+        tuples, with the same keys as calibrator_kwargs.
+        """
+        # Init
+        return_qs = {k: mp_context.Queue(1) for k in calibrator_kwargs.keys()}
+        processes = dict.fromkeys(calibrator_kwargs.keys())
+        results = dict.fromkeys(calibrator_kwargs.keys())
+
+        try:
+            for area_id, kwargs in calibrator_kwargs.items():
+                processes[area_id] = mp_context.Process(
+                    target=_run_calibrator_process,
+                    name='Process-%s' % kwargs['thread_name'],
+                    kwargs={'return_q': return_qs[area_id], 'calibrator_kwargs': kwargs},
+                    daemon=True,
+                )
+                processes[area_id].start()
+
+            # Wait for all the results, or an error
+            waiting_ids = list(calibrator_kwargs.keys())
+            while len(waiting_ids) > 0:
+                time.sleep(0.05)
+
+                for thread in furness_setup.all_threads:
+                    if thread.error_event.is_set():
+                        msg = "Error occurred in thread: %s" % thread.name
+                        raise multithreading.MultithreadingError(msg) from thread.error_q.get()
+
+                for area_id in list(waiting_ids):
+                    try:
+                        result = return_qs[area_id].get_nowait()
+                    except queue.Empty:
+                        if processes[area_id].is_alive():
+                            continue
+
+                        # Might have exited just after returning
+                        try:
+                            result = return_qs[area_id].get(timeout=1)
+                        except queue.Empty as err:
+                            raise nd.NormitsDemandError(
+                                "Calibrator process for area %s exited with "
+                                "code %s before returning any results."
+                                % (area_id, processes[area_id].exitcode)
+                            ) from err
+
+                    # Errors come back as formatted tracebacks
+                    if isinstance(result, str):
+                        raise nd.NormitsDemandError(
+                            "Error occurred in the calibrator process for "
+                            "area %s:\n%s"
+                            % (area_id, result)
+                        )
+
+                    results[area_id] = result
+                    waiting_ids.remove(area_id)
+
+        finally:
+            for process in processes.values():
+                if process is None:
+                    continue
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+        return results
+
     def _gravity_function(
         self,
         cost_param_dict: Dict[Any, Dict[str, Any]],
@@ -2341,14 +2549,10 @@ class MultiAreaGravityModelCalibrator:
             # Extract this area
             area_bool = self.calibration_matrix == area_id
             area_matrix = furnessed_matrix * area_bool
-            area_cost = self.cost_matrix * area_bool
 
             # Convert matrix into an achieved distribution curve
-            achieved_band_shares = cost_utils.calculate_cost_distribution(
-                matrix=area_matrix,
-                cost_matrix=area_cost,
-                bin_edges=self.tcd_bin_edges[area_id],
-            )
+            band_index = self._get_area_band_index(area_id)
+            achieved_band_shares = band_index.band_shares(area_matrix)
 
             # Evaluate this run
             target_band_shares = self.target_cost_distributions[area_id]['band_share'].values
@@ -2379,6 +2583,7 @@ class MultiAreaGravityModelCalibrator:
         xtol: float = 1e-4,
         grav_max_iters: int = 100,
         verbose: int = 0,
+        area_init_params: Optional[Dict[Any, Dict[str, Any]]] = None,
     ) -> Dict[Any, Dict[str, Any]]:
         """Finds the optimal parameters for self.cost_function
 
@@ -2446,6 +2651,11 @@ class MultiAreaGravityModelCalibrator:
             - 1 : display a termination report.
             - 2 : display progress during iterations (not supported by ‘lm’ method).
 
+        area_init_params:
+            A dictionary of {area_id: init_params}. Used to give some
+            calibration areas different initial parameters to the others.
+            Any areas not in area_init_params will use init_params.
+
         Returns
         -------
         optimal_cost_params:
@@ -2467,12 +2677,23 @@ class MultiAreaGravityModelCalibrator:
         gravity_model
         scipy.optimize.least_squares
         """
-        # Validate init_params
-        self.cost_function.validate_params(init_params)
+        # Work out the init_params for each area
+        if area_init_params is None:
+            area_init_params = dict()
+        area_init_params = {
+            area_id: area_init_params.get(area_id, init_params)
+            for area_id in self.calib_areas
+        }
+
+        # Validate and assign the initial cost params
+        for area_id, area_params in area_init_params.items():
+            self.cost_function.validate_params(area_params)
+            self.initial_cost_params[area_id] = area_params.copy()
 
-        # Assign the initial cost params
-        for key in self.initial_cost_params:
-            self.initial_cost_params[key] = init_params.copy()
+        # Processes need queues, events and locks that can be shared
+        mp_context = None
+        if self.execution_mode == MultiAreaExecutionMode.PROCESS:
+            mp_context = multiprocessing.get_context('spawn')
 
         # Create the shared arrays for all to communicate
         init_mat = np.zeros_like(self.cost_matrix)
@@ -2480,13 +2701,14 @@ class MultiAreaGravityModelCalibrator:
             shared_arrays = self._setup_shared_arrays(
                 init_mat=init_mat,
                 ctx_manager=ctx_manager,
+                mp_context=mp_context,
             )
 
             # Set up the furness threads for gravity threads
-            furness_setup = self._setup_furness_threads(shared_arrays)
+            furness_setup = self._setup_furness_threads(shared_arrays, mp_context)
 
-            # Start the gravity processes
-            calibrator_threads = dict.fromkeys(self.calib_areas)
+            # Set up a calibrator for each area
+            calibrator_kwargs = dict.fromkeys(self.calib_areas)
             for area_id in self.calib_areas:
                 # Get just the costs for this area
                 area_cost = self.cost_matrix * furness_setup.area_mats[area_id]
@@ -2501,13 +2723,12 @@ class MultiAreaGravityModelCalibrator:
                 if os.path.isfile(area_running_log_path):
                     os.remove(area_running_log_path)
 
-                # Start a thread to calibrate each area
                 # TODO(BT): pass in objects rather than individual
-                calibrator_threads[area_id] = SingleTLDCalibratorThread(
+                calibrator_kwargs[area_id] = dict(
                     thread_name=self.calibration_naming[area_id],
                     cost_function=self.cost_function,
                     cost_matrix=area_cost,
-                    init_params=init_params,
+                    init_params=area_init_params[area_id],
                     estimate_init_params=estimate_init_params,
                     target_cost_distribution=self.target_cost_distributions[area_id],
                     target_convergence=self.target_convergence,
@@ -2529,17 +2750,23 @@ class MultiAreaGravityModelCalibrator:
                     grav_max_iters=grav_max_iters,
                     verbose=verbose,
                 )
-                calibrator_threads[area_id].start()
 
-            multithreading.wait_for_thread_dict_return_or_error(
-                return_threads=calibrator_threads,
-                error_threads_list=furness_setup.all_threads,
-            )
+            # Calibrate each area alongside one another
+            if mp_context is None:
+                calibration_results = self._run_calibrator_threads(
+                    calibrator_kwargs=calibrator_kwargs,
+                    furness_setup=furness_setup,
+                )
+            else:
+                calibration_results = self._run_calibrator_processes(
+                    calibrator_kwargs=calibrator_kwargs,
+                    furness_setup=furness_setup,
+                    mp_context=mp_context,
+                )
 
         # Save the optimal cost params for each area
         for area_id in self.calib_areas:
-            optimal_params = calibrator_threads[area_id].optimal_cost_params
-            perceived_factors = calibrator_threads[area_id]._perceived_factors
+            optimal_params, perceived_factors = calibration_results[area_id]
             self.optimal_cost_params[area_id] = optimal_params
             self.perceived_factors[area_id] = perceived_factors
 
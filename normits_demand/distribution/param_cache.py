@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""
+Created on: 18/10/2026
+Updated on:
+
+Last update made by:
+Other updates made by:
+
+File purpose:
+Persistent cache of calibrated gravity model cost parameters.
+
+Stores the optimal cost parameters found for each segment and calibration
+area, alongside a hash and a cheap fingerprint of the inputs that were used
+to find them. Later runs can use these to skip calibration entirely when
+the inputs are identical and the cached calibration converged, or to start
+calibration from the cached parameters when the inputs are similar.
+"""
+# Built-Ins
+import os
+import enum
+import json
+import hashlib
+import dataclasses
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Optional
+
+# Third Party
+import numpy as np
+import pandas as pd
+
+# Local Imports
+import normits_demand as nd
+from normits_demand.utils import file_ops
+
+# The default relative difference allowed between inputs for them to be
+# considered close enough to warm start from
+DEFAULT_TOLERANCE = 0.05
+
+# Bump whenever the cached format changes, to invalidate old caches
+CACHE_VERSION = 1
+
+
+class CacheMatch(enum.Enum):
+    """How closely the cached inputs match the current inputs"""
+    IDENTICAL = 'identical'
+    CLOSE = 'close'
+    NONE = 'none'
+
+
+@dataclasses.dataclass
+class CachedCalibration:
+    """The results of a calibration, and the inputs used to get them
+
+    Attributes
+    ----------
+    cost_params:
+        A dictionary of {parameter_name: parameter_value} of the optimal
+        cost parameters found.
+
+    convergence:
+        The band share convergence achieved with cost_params.
+
+    input_hash:
+        A hash of all the inputs used in calibration. See `hash_inputs()`.
+
+    fingerprint:
+        A cheap summary of the inputs used in calibration, used to
+        decide whether two sets of inputs are close. See
+        `fingerprint_inputs()`.
+    """
+    cost_params: Dict[str, float]
+    convergence: float
+    input_hash: str
+    fingerprint: Dict[str, Any]
+
+
+def hash_inputs(arrays: List[np.ndarray], settings: Dict[str, Any]) -> str:
+    """Generates a hash of the given arrays and settings
+
+    Parameters
+    ----------
+    arrays:
+        A list of arrays to hash. Both the values and the shape of each
+        array are hashed.
+
+    settings:
+        A dictionary of any other settings which would change the outcome
+        of calibration. Must be JSON serialisable once any non-serialisable
+        values have been converted to strings.
+
+    Returns
+    -------
+    input_hash:
+        A hex string hash of arrays and settings.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(str(CACHE_VERSION).encode())
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        hasher.update(str((array.shape, array.dtype.str)).encode())
+        hasher.update(array.tobytes())
+    hasher.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return hasher.hexdigest()
+
+
+def fingerprint_inputs(row_targets: np.ndarray,
+                       col_targets: np.ndarray,
+                       cost_matrix: np.ndarray,
+                       target_cost_distribution: pd.DataFrame,
+                       cost_function_name: str,
+                       ) -> Dict[str, Any]:
+    """Generates a cheap summary of the calibration inputs
+
+    Parameters
+    ----------
+    row_targets:
+        The row targets being used in calibration.
+
+    col_targets:
+        The col targets being used in calibration.
+
+    cost_matrix:
+        The cost matrix being used in calibration. Only non-zero costs
+        are summarised, so costs outside of a calibration area are ignored.
+
+    target_cost_distribution:
+        The target cost distribution being calibrated to. Must contain
+        the columns ['min', 'max', 'band_share'].
+
+    cost_function_name:
+        The name of the cost function being calibrated.
+
+    Returns
+    -------
+    fingerprint:
+        A JSON serialisable dictionary summarising the inputs.
+    """
+    costs = cost_matrix[cost_matrix != 0]
+    cost_mean = float(costs.mean()) if costs.size else 0.0
+    cost_std = float(costs.std()) if costs.size else 0.0
+
+    return {
+        'cost_function': cost_function_name,
+        'shape': list(cost_matrix.shape),
+        'row_total': float(np.sum(row_targets)),
+        'col_total': float(np.sum(col_targets)),
+        'cost_mean': cost_mean,
+        'cost_std': cost_std,
+        'min_bounds': target_cost_distribution['min'].astype(float).tolist(),
+        'max_bounds': target_cost_distribution['max'].astype(float).tolist(),
+        'band_share': target_cost_distribution['band_share'].astype(float).tolist(),
+    }
+
+
+def _relative_diff(a: float, b: float) -> float:
+    """Calculates the relative difference between a and b"""
+    if a == b:
+        return 0.0
+    return abs(a - b) / max(abs(a), abs(b))
+
+
+def fingerprints_close(fingerprint: Dict[str, Any],
+                       other: Dict[str, Any],
+                       tolerance: float = DEFAULT_TOLERANCE,
+                       ) -> bool:
+    """Checks whether two input fingerprints are close enough to warm start
+
+    Fingerprints can only be close if they use the same cost function,
+    matrix shape and cost distribution bands. On top of that, the trip end
+    totals and cost summaries must be within a relative tolerance of one
+    another, and each band share must be within tolerance of the other.
+
+    Parameters
+    ----------
+    fingerprint:
+        A fingerprint generated by `fingerprint_inputs()`.
+
+    other:
+        Another fingerprint generated by `fingerprint_inputs()`.
+
+    tolerance:
+        The tolerance to use when comparing the fingerprints.
+
+    Returns
+    -------
+    is_close:
+        True if the fingerprints are close, otherwise False.
+    """
+    # Must be exactly the same
+    for key in ['cost_function', 'shape', 'min_bounds', 'max_bounds']:
+        if fingerprint.get(key) != other.get(key):
+            return False
+
+    # Can be within a relative tolerance
+    for key in ['row_total', 'col_total', 'cost_mean', 'cost_std']:
+        if key not in fingerprint or key not in other:
+            return False
+        if _relative_diff(fingerprint[key], other[key]) > tolerance:
+            return False
+
+    # Band shares are already relative
+    band_share = np.array(fingerprint['band_share'])
+    other_band_share = np.array(other.get('band_share', list()))
+    if band_share.shape != other_band_share.shape:
+        return False
+    return bool(np.all(np.abs(band_share - other_band_share) <= tolerance))
+
+
+class GravityParamsCache:
+    """Reads and writes calibrated gravity model cost params between runs
+
+    Each segment is cached in its own JSON file in cache_dir, so segments
+    being distributed in parallel never write to the same file. Each file
+    contains the cached calibration of every calibration area in that
+    segment.
+    """
+    _fname_suffix = '_gravity_params.json'
+
+    def __init__(self,
+                 cache_dir: nd.PathLike,
+                 tolerance: float = DEFAULT_TOLERANCE,
+                 ):
+        """
+        Parameters
+        ----------
+        cache_dir:
+            The directory to read and write the cached params. Will be
+            created if it does not exist.
+
+        tolerance:
+            The tolerance to use when deciding whether cached inputs are
+            close enough to the current inputs to warm start from.
+            See `fingerprints_close()`.
+        """
+        if tolerance < 0:
+            raise ValueError(
+                "tolerance cannot be negative. Got %s."
+                % tolerance
+            )
+
+        self.cache_dir = cache_dir
+        self.tolerance = tolerance
+        file_ops.create_folder(self.cache_dir, verbose_create=False)
+
+    def _get_path(self, segment_name: str) -> str:
+        """Generates the path to the cache for segment_name"""
+        return os.path.join(self.cache_dir, segment_name + self._fname_suffix)
+
+    def load(self, segment_name: str) -> Dict[str, CachedCalibration]:
+        """Loads the cached calibrations for segment_name
+
+        Parameters
+        ----------
+        segment_name:
+            The name of the segment to load.
+
+        Returns
+        -------
+        cached_calibrations:
+            A dictionary of {area_id: cached_calibration}. The area_ids are
+            always strings, as they have been read in from JSON. An empty
+            dictionary is returned if nothing has been cached, or the
+            cache cannot be read.
+        """
+        path = self._get_path(segment_name)
+        if not os.path.isfile(path):
+            return dict()
+
+        try:
+            with open(path, 'r') as f:
+                contents = json.load(f)
+            if contents.get('version') != CACHE_VERSION:
+                return dict()
+            return {
+                area_id: CachedCalibration(**cached)
+                for area_id, cached in contents['areas'].items()
+            }
+        except (ValueError, KeyError, TypeError, AttributeError):
+            # A broken cache is the same as no cache
+            return dict()
+
+    def save(self,
+             segment_name: str,
+             cached_calibrations: Dict[Any, CachedCalibration],
+             ) -> None:
+        """Writes the cached calibrations for segment_name to disk
+
+        Any previously cached calibrations for segment_name are replaced.
+
+        Parameters
+        ----------
+        segment_name:
+            The name of the segment being saved.
+
+        cached_calibrations:
+            A dictionary of {area_id: cached_calibration} to save.
+        """
+        contents = {
+            'version': CACHE_VERSION,
+            'areas': {
+                str(area_id): dataclasses.asdict(cached)
+                for area_id, cached in cached_calibrations.items()
+            },
+        }
+
+        # Write to a temporary file first so a partial write never
+        # leaves a broken cache behind
+        path = self._get_path(segment_name)
+        temp_path = '%s.%s.tmp' % (path, os.getpid())
+        with open(temp_path, 'w') as f:
+            json.dump(contents, f, indent=2, default=float)
+        os.replace(temp_path, path)
+
+    def find(self,
+             segment_name: str,
+             area_id: Any,
+             input_hash: str,
+             fingerprint: Dict[str, Any],
+             target_convergence: Optional[float] = None,
+             ) -> Tuple[CacheMatch, Optional[CachedCalibration]]:
+        """Finds a cached calibration to use for the given inputs
+
+        Parameters
+        ----------
+        segment_name:
+            The name of the segment being calibrated.
+
+        area_id:
+            The ID of the calibration area being calibrated.
+
+        input_hash:
+            A hash of the inputs being used in calibration. Generated by
+            `hash_inputs()`.
+
+        fingerprint:
+            A summary of the inputs being used in calibration. Generated by
+            `fingerprint_inputs()`.
+
+        target_convergence:
+            The convergence the calibration needs to achieve. Cached
+            calibrations of identical inputs which did not achieve this
+            are only returned as CacheMatch.CLOSE, so they are
+            recalibrated. If None, the cached convergence is not checked.
+
+        Returns
+        -------
+        cache_match:
+            How closely the cached inputs match the given inputs.
+
+        cached_calibration:
+            The cached calibration. None if cache_match is CacheMatch.NONE.
+        """
+        cached = self.load(segment_name).get(str(area_id))
+        if cached is None:
+            return CacheMatch.NONE, None
+
+        if cached.input_hash == input_hash:
+            converged = (
+                target_convergence is None
+                or cached.convergence >= target_convergence
+            )
+            if converged:
+                return CacheMatch.IDENTICAL, cached
+            return CacheMatch.CLOSE, cached
+
+        if fingerprints_close(fingerprint, cached.fingerprint, self.tolerance):
+            return CacheMatch.CLOSE, cached
+
+        return CacheMatch.NONE, None
@@ -605,18 +605,53 @@ def gen_cost_elasticity_mins(elasticity: float,
     return elasticity * (averages["gc"] / (averages["cost"] * cost_factor))
 
 
-def get_costs(cost_file: Path,
+def read_cost_file(cost_file: Path, mode: str) -> pd.DataFrame:
+    """Reads the columns in `COST_LOOKUP` from the given cost file.
+
+    Parameters
+    ----------
+    cost_file : Path
+        Path to the CSV file containing cost data.
+
+    mode : str
+        The mode of the costs, either rail or car.
+
+    Returns
+    -------
+    pd.DataFrame
+        The costs, with the original column names.
+
+    Raises
+    ------
+    ValueError
+        If any expected columns are missing.
+    """
+    mode = mode.lower()
+
+    # Try to load costs - let user know which columns are missing if cant
+    try:
+        return pd.read_csv(cost_file, usecols=ec.COST_LOOKUP[mode].values())
+    except ValueError as e:
+        loc = str(e).find("columns expected")
+        e_str = str(e)[loc:] if loc != -1 else str(e)
+        raise ValueError(f"Columns missing from {mode} cost, {e_str}") from e
+
+
+def get_costs(cost_file: Union[Path, pd.DataFrame],
               mode: str,
               zone_system: str,
               zone_translation_folder: Path,
               translation_weights: pd.DataFrame = None,
+              zone_lookup: pd.DataFrame = None,
               ) -> pd.DataFrame:
     """Reads the given cost file, expected columns are in `COST_LOOKUP`.
 
+    Can be given the costs, as read by `read_cost_file`, instead of a path.
+
     Parameters
     ----------
-    cost_file : Path
-        Path to the CSV file containing cost data.
+    cost_file : Union[Path, pd.DataFrame]
+        Path to the CSV file containing cost data, or the cost data.
 
     mode : str
         The mode of the costs, either rail or car.
@@ -633,6 +668,11 @@ def get_costs(cost_file: Path,
         weight average cost when converting between zone systems,
         only required if `zone_system` != `COMMON_ZONE_SYSTEM`.
 
+    zone_lookup : pd.DataFrame, optional
+        The lookup from `zone_system` to `COMMON_ZONE_SYSTEM`, as returned
+        by `du.get_zone_translation`. If not given, it is read in from
+        `zone_translation_folder` when needed.
+
     Returns
     -------
     pd.DataFrame
@@ -646,13 +686,16 @@ def get_costs(cost_file: Path,
     # Init
     mode = mode.lower()
 
-    # Try to load costs - let user know which columns are missing if cant
-    try:
-        costs = pd.read_csv(cost_file, usecols=ec.COST_LOOKUP[mode].values())
-    except ValueError as e:
-        loc = str(e).find("columns expected")
-        e_str = str(e)[loc:] if loc != -1 else str(e)
-        raise ValueError(f"Columns missing from {mode} cost, {e_str}") from e
+    if isinstance(cost_file, pd.DataFrame):
+        missing = [x for x in ec.COST_LOOKUP[mode].values() if x not in cost_file]
+        if missing != list():
+            raise ValueError(
+                f"Columns missing from {mode} cost, columns expected but "
+                f"not found: {missing}"
+            )
+        costs = cost_file.reindex(columns=list(ec.COST_LOOKUP[mode].values()))
+    else:
+        costs = read_cost_file(cost_file, mode)
 
     # Rename columns to standard format across modes
     costs.rename(
@@ -673,12 +716,14 @@ def get_costs(cost_file: Path,
     # Convert zone system if required
     if zone_system != ec.COMMON_ZONE_SYSTEM:
         # Get the translation
-        lookup = du.get_zone_translation(
-            import_dir=zone_translation_folder,
-            from_zone=zone_system,
-            to_zone=ec.COMMON_ZONE_SYSTEM,
-            return_dataframe=True,
-        )
+        lookup = zone_lookup
+        if lookup is None:
+            lookup = du.get_zone_translation(
+                import_dir=zone_translation_folder,
+                from_zone=zone_system,
+                to_zone=ec.COMMON_ZONE_SYSTEM,
+                return_dataframe=True,
+            )
 
         # Check that weights are the right type
         if not isinstance(translation_weights, pd.DataFrame):
@@ -10,11 +10,24 @@ Other updates made by:
 File purpose:
 Collection of functions to compile matrices into different formats.
 Primarily used to compile ouputs into NoRMS or NoHAM formats
+
+Also defines the array format for decompile factors. All the factors are
+stored in a single float32 .npy file of shape (n_parts, n_rows, n_cols),
+alongside a .json index of which parts belong to each compilation. The
+array can be written in place by many processes, and is memory mapped
+when read back in.
 """
 # Built ins
 import os
+import json
+import pathlib
+
+from typing import Dict
+from typing import List
+from typing import Tuple
 
 # Third Party
+import numpy as np
 import pandas as pd
 
 # Local
@@ -96,3 +109,165 @@ def convert_efs_to_norms_matrices(mat_import: nd.PathLike,
             fname = file_ops.add_to_fname(out_mat_name, "_%s" % yr_str)
             out_path = os.path.join(mat_export, fname)
             file_ops.write_df(out_mat, out_path)
+
+
+# ## DECOMPILE FACTOR ARRAYS ## #
+# The suffix of decompile factors stored as an array
+FACTORS_ARRAY_SUFFIX = '.npy'
+FACTORS_INDEX_SUFFIX = '.json'
+FACTORS_DTYPE = np.float32
+
+
+def is_factors_array(path: nd.PathLike) -> bool:
+    """Checks whether path points to decompile factors stored as an array"""
+    return pathlib.Path(path).suffix.lower() == FACTORS_ARRAY_SUFFIX
+
+
+def _factors_index_path(path: nd.PathLike) -> pathlib.Path:
+    return pathlib.Path(path).with_suffix(FACTORS_INDEX_SUFFIX)
+
+
+def _read_factors_index(path: nd.PathLike) -> dict:
+    with open(_factors_index_path(path), 'r') as f:
+        return json.load(f)
+
+
+def create_factors_array(path: nd.PathLike,
+                         compilations: Dict[str, List[str]],
+                         index: pd.Index,
+                         columns: pd.Index,
+                         ) -> None:
+    """
+    Creates an empty decompile factors array on disk, ready to be filled
+
+    Parameters
+    ----------
+    path:
+        Where to write the factors array. Should end in FACTORS_ARRAY_SUFFIX.
+        The index is written to the same path with FACTORS_INDEX_SUFFIX.
+
+    compilations:
+        A dictionary of {compiled_name: part_names}. The factors of each
+        compilation are stored in this order.
+
+    index:
+        The zones of the rows of every factor matrix.
+
+    columns:
+        The zones of the columns of every factor matrix.
+
+    Returns
+    -------
+    None
+    """
+    start = 0
+    factors_index = {
+        'index': index.tolist(),
+        'columns': columns.tolist(),
+        'compilations': dict(),
+    }
+    for comp_name, part_names in compilations.items():
+        factors_index['compilations'][comp_name] = {
+            'start': start,
+            'parts': list(part_names),
+        }
+        start += len(part_names)
+
+    np.lib.format.open_memmap(
+        path,
+        mode='w+',
+        dtype=FACTORS_DTYPE,
+        shape=(start, len(index), len(columns)),
+    ).flush()
+
+    with open(_factors_index_path(path), 'w') as f:
+        json.dump(factors_index, f)
+
+
+def write_compilation_factors(path: nd.PathLike,
+                              comp_name: str,
+                              factors: np.ndarray,
+                              ) -> None:
+    """
+    Writes the decompile factors of a single compilation
+
+    Only the factors of comp_name are written, so different compilations
+    can be written by different processes at the same time.
+
+    Parameters
+    ----------
+    path:
+        The path to the factors array, as created by create_factors_array().
+
+    comp_name:
+        The name of the compilation these factors are for.
+
+    factors:
+        The decompile factors, of shape (n_parts, n_rows, n_cols). Parts
+        should be in the same order as given to create_factors_array().
+
+    Returns
+    -------
+    None
+    """
+    comp_index = _read_factors_index(path)['compilations'][comp_name]
+    start = comp_index['start']
+    stop = start + len(comp_index['parts'])
+
+    factors_array = np.lib.format.open_memmap(path, mode='r+')
+    if factors.shape != factors_array[start:stop].shape:
+        raise ValueError(
+            "Factors for %s should have shape %s. Got %s"
+            % (comp_name, factors_array[start:stop].shape, factors.shape)
+        )
+
+    factors_array[start:stop] = factors
+    factors_array.flush()
+    del factors_array
+
+
+def read_factors_array(path: nd.PathLike,
+                       as_dataframes: bool = False,
+                       ) -> nd.FactorsDict:
+    """
+    Reads in a decompile factors array, memory mapping the factors
+
+    Parameters
+    ----------
+    path:
+        The path to the factors array, as created by create_factors_array().
+
+    as_dataframes:
+        Whether to return each factor matrix as a DataFrame labelled with
+        its zones, rather than an array.
+
+    Returns
+    -------
+    decompile_factors:
+        A nested dictionary of:
+        dict[compiled_name][part_name] = matrix of splitting factors
+        The matrices are read only views of the file on disk.
+    """
+    factors_index = _read_factors_index(path)
+    factors_array = np.load(path, mmap_mode='r')
+
+    decompile_factors = dict()
+    for comp_name, comp_index in factors_index['compilations'].items():
+        decompile_factors[comp_name] = dict()
+        for i, part_name in enumerate(comp_index['parts']):
+            factors = factors_array[comp_index['start'] + i]
+            if as_dataframes:
+                factors = pd.DataFrame(
+                    factors,
+                    index=factors_index['index'],
+                    columns=factors_index['columns'],
+                )
+            decompile_factors[comp_name][part_name] = factors
+
+    return decompile_factors
+
+
+def read_factors_zones(path: nd.PathLike) -> Tuple[pd.Index, pd.Index]:
+    """Reads the (index, columns) zones of a decompile factors array"""
+    factors_index = _read_factors_index(path)
+    return pd.Index(factors_index['index']), pd.Index(factors_index['columns'])
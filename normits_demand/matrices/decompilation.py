@@ -17,6 +17,7 @@ import operator
 
 from typing import Any
 from typing import Dict
+from typing import Tuple
 
 # 3rd Party
 import numpy as np
@@ -33,6 +34,7 @@ from normits_demand.utils import general as du
 from normits_demand.utils import file_ops
 from normits_demand.utils import compress
 
+from normits_demand.matrices import compilation as mat_comp
 from normits_demand.matrices import matrix_processing as mat_p
 from normits_demand.matrices import od_to_pa as od2pa
 
@@ -328,7 +330,9 @@ def decompile_matrices(matrix_import: nd.PathLike,
         Path to the directory to write the decompiled OD matrices.
 
     decompile_factors_path:
-        Full path to the pickle file containing the decompile factors to use.
+        Full path to the file containing the decompile factors to use. Either
+        a factors array, see compilation.create_factors_array(), or a
+        compressed pickle.
 
     audit:
         Whether to perform a check to make sure the decompiled matrices are
@@ -344,8 +348,13 @@ def decompile_matrices(matrix_import: nd.PathLike,
     -------
     None
     """
-    # Load the factors
-    decompile_factors = compress.read_in(decompile_factors_path)
+    # Load the factors, memory mapping them if we can
+    if mat_comp.is_factors_array(decompile_factors_path):
+        decompile_factors = mat_comp.read_factors_array(decompile_factors_path)
+        factor_zones = mat_comp.read_factors_zones(decompile_factors_path)
+    else:
+        decompile_factors = compress.read_in(decompile_factors_path)
+        factor_zones = None
 
     # Loop through the compiled matrices and decompile
     # TODO: Multiprocess decompile_od()
@@ -359,12 +368,23 @@ def decompile_matrices(matrix_import: nd.PathLike,
         comp_mat = file_ops.read_df(path, index_col=0)
         print("Decompiling %s..." % in_mat_name)
 
+        if factor_zones is not None:
+            _check_factor_zones(comp_mat, factor_zones, in_mat_name)
+            comp_values = comp_mat.to_numpy()
+
         # Loop through the factors and decompile the matrix
         decompiled_mats = list()
         for part_mat_name in decompile_factors[comp_mat_name].keys():
             # Decompile the matrix using the factors
             factors = decompile_factors[comp_mat_name][part_mat_name]
-            part_mat = comp_mat * factors
+            if factor_zones is None:
+                part_mat = comp_mat * factors
+            else:
+                part_mat = pd.DataFrame(
+                    comp_values * factors,
+                    index=comp_mat.index,
+                    columns=comp_mat.columns,
+                )
 
             # Write the decompiled matrix to disk
             path = os.path.join(matrix_export, part_mat_name)
@@ -405,6 +425,22 @@ def decompile_matrices(matrix_import: nd.PathLike,
                     % (in_mat_name, str(audit_tol), perc_diff, abs_diff))
 
 
+def _check_factor_zones(comp_mat: pd.DataFrame,
+                        factor_zones: Tuple[pd.Index, pd.Index],
+                        mat_name: str,
+                        ) -> None:
+    """Raises an error if comp_mat isn't in the same zones as the factors"""
+    # Compare as strings as CSV columns are read in as strings
+    for labels, zones in zip((comp_mat.index, comp_mat.columns), factor_zones):
+        labels = labels.to_numpy().astype(str)
+        zones = zones.to_numpy().astype(str)
+        if len(labels) != len(zones) or np.any(labels != zones):
+            raise nd.NormitsDemandError(
+                "The zones of %s do not match the zones of the decompile "
+                "factors." % mat_name
+            )
+
+
 def decompile_norms(year: int,
                     post_me_import: nd.PathLike,
                     post_me_renamed_export: nd.PathLike,
@@ -14,6 +14,7 @@ that do not belong specifically to pa_to_od.py, or od_to_pa.py.
 # Builtins
 import os
 import pickle
+import concurrent.futures
 import pathlib
 import operator
 import itertools
@@ -48,62 +49,176 @@ from normits_demand.utils import pandas_utils as pd_utils
 from normits_demand.matrices import pa_to_od as pa2od
 from normits_demand.matrices import utils as mat_utils
 from normits_demand.matrices import compilation as mat_comp
+from normits_demand.matrices import matrix_store as mat_store
 from normits_demand.distribution import furness
 from normits_demand.concurrency import multiprocessing
 from normits_demand.validation import checks
 
 from normits_demand.matrices.tms_matrix_processing import *
 
+# The number of OD pairs to furness at once when generating tour proportions
+TOUR_PROP_FURNESS_CHUNK_SIZE = 50000
 
+# The maximum number of aggregated matrices each process holds in memory
+AGGREGATE_MAX_OPEN_OUTPUTS = 16
 
-def _aggregate(
+# The number of threads each process uses to write aggregated matrices
+AGGREGATE_WRITE_THREADS = 4
+
+
+def _aggregate_batch(
     import_dir: str,
-    in_fnames: List[str],
-    export_path: str,
+    plan: Dict[str, List[str]],
     round_dp: int = consts.DEFAULT_ROUNDING,
-) -> str:
+    write_threads: int = AGGREGATE_WRITE_THREADS,
+) -> None:
     """
-    Loads the given files, aggregates together and saves in given location
+    Builds every output matrix in plan, reading each input matrix only once
+
+    Parameters
+    ----------
+    import_dir:
+        Directory, or MatrixStore, where the input matrices can be found.
+
+    plan:
+        A dictionary of {export_path: in_fnames} defining which matrices are
+        summed to create each output. A buffer is held in memory for each
+        output, so plan should only contain a few outputs.
+
+    round_dp:
+        The number of decimal places to round the output values to.
+        Uses efs_consts.DEFAULT_ROUNDING by default.
+
+    write_threads:
+        The number of threads to write the finished outputs with.
 
     Returns
     -------
-    Path of the exported matrix
+    None
     """
-    # Load in files and aggregate
-    aggregated_mat = None
+    # Invert the plan so each input can be added to all its outputs at once
+    input_outputs = defaultdict(list)
+    for export_path, in_fnames in plan.items():
+        for fname in in_fnames:
+            input_outputs[fname].append(export_path)
+
+    # Read each input once, adding to each of the output buffers
+    buffers = dict()
+    labels = dict()
+    for fname in sorted(input_outputs):
+        mat = mat_store.read_matrix(os.path.join(import_dir, fname))
+        values = mat.to_numpy(dtype=float)
+
+        for export_path in input_outputs[fname]:
+            if export_path not in buffers:
+                buffers[export_path] = np.zeros_like(values)
+                labels[export_path] = (mat.index, mat.columns)
+
+            index, columns = labels[export_path]
+            if not (mat.index.equals(index) and mat.columns.equals(columns)):
+                raise nd.NormitsDemandError(
+                    "Cannot aggregate %s into %s. The zones do not match the "
+                    "other matrices being aggregated."
+                    % (fname, os.path.basename(export_path))
+                )
+            buffers[export_path] += values
+
+    # Write out the finished matrices
+    def write_out(export_path):
+        index, columns = labels[export_path]
+        aggregated_mat = pd.DataFrame(
+            np.round(buffers[export_path], decimals=round_dp),
+            index=index,
+            columns=columns,
+        )
+        mat_store.write_matrix(aggregated_mat, export_path)
+        print("Aggregated matrix written: %s" % os.path.basename(export_path))
+
+    with concurrent.futures.ThreadPoolExecutor(write_threads) as pool:
+        # Get the results to raise any errors
+        list(pool.map(write_out, buffers))
+
+
+def _batch_aggregation_plan(
+    plan: Dict[str, List[str]],
+    max_open_outputs: int,
+) -> List[Dict[str, List[str]]]:
+    """
+    Splits an aggregation plan into batches of at most max_open_outputs
+
+    Outputs which share inputs are kept in the same batch wherever they fit,
+    so that shared inputs are only read once. If a group of outputs sharing
+    inputs is larger than max_open_outputs, it is split and the shared
+    inputs are read once per batch.
 
-    if in_fnames == list():
-        raise nd.NormitsDemandError(
-            "Couldn't find any matrices to aggregate up to create %s!"
-            % os.path.basename(export_path)
+    Parameters
+    ----------
+    plan:
+        A dictionary of {export_path: in_fnames}, as built by
+        _plan_aggregation().
+
+    max_open_outputs:
+        The maximum number of outputs in each batch.
+
+    Returns
+    -------
+    batches:
+        A list of plans, each containing at most max_open_outputs outputs.
+    """
+    if max_open_outputs < 1:
+        raise ValueError(
+            "max_open_outputs must be 1 or greater. Got %s" % max_open_outputs
         )
 
-    for fname in in_fnames:
-        mat = file_ops.read_df(os.path.join(import_dir, fname), index_col=0)
+    # Group outputs which share inputs
+    parent = {x: x for x in plan}
 
-        # Build a matching df of 0s if not done yet
-        if aggregated_mat is None:
-            aggregated_mat = pd.DataFrame(0, index=mat.index, columns=mat.columns)
-        aggregated_mat += mat
+    def find(output):
+        while parent[output] != output:
+            parent[output] = parent[parent[output]]
+            output = parent[output]
+        return output
 
-    # Write new matrix out
-    file_ops.write_df(aggregated_mat.round(decimals=round_dp), export_path)
-    print("Aggregated matrix written: %s" % os.path.basename(export_path))
+    first_output = dict()
+    for export_path, in_fnames in plan.items():
+        for fname in in_fnames:
+            other = first_output.setdefault(fname, export_path)
+            parent[find(export_path)] = find(other)
 
+    groups = defaultdict(list)
+    for export_path in plan:
+        groups[find(export_path)].append(export_path)
 
-def _recursive_aggregate(
+    # Pack the groups into batches
+    batches = list()
+    batch = list()
+    for group in groups.values():
+        if batch != list() and len(batch) + len(group) > max_open_outputs:
+            batches.append(batch)
+            batch = list()
+
+        for export_path in group:
+            batch.append(export_path)
+            if len(batch) == max_open_outputs:
+                batches.append(batch)
+                batch = list()
+
+    if batch != list():
+        batches.append(batch)
+
+    return [{x: plan[x] for x in batch} for batch in batches]
+
+
+def _recursive_plan_aggregation(
     candidates: List[str],
     segmentations: List[List[int]],
     segmentation_strs: List[List[str]],
-    import_dir: str,
     export_path: str,
-    compress_out: bool = False,
-    round_dp: int = consts.DEFAULT_ROUNDING,
-) -> None:
+    ftype: str,
+) -> Dict[str, List[str]]:
     """
-    The internal function of aggregate_matrices(). Recursively steps through
-    the segmentations given, aggregating as it goes.
-
+    The internal function of _plan_aggregation(). Recursively steps through
+    the segmentations given, narrowing down the candidates as it goes.
 
     Parameters
     ----------
@@ -121,19 +236,25 @@ def _recursive_aggregate(
         be considered. Directly relates to segmentations. Narrowed
         down through the recursive calls.
 
-    import_dir:
-        Directory where the candidate matrices can be found.
-
     export_path:
-        Directory to output the aggregated matrices.
+        The path to output the aggregated matrices, without the segments
+        still to be added.
 
-    compress_out:
-        Whether to compress the write to disk or not.
+    ftype:
+        The filetype to give the output matrices.
 
-    round_dp:
-        The number of decimal places to round the output values to.
-        Uses efs_consts.DEFAULT_ROUNDING by default.
+    Returns
+    -------
+    plan:
+        A dictionary of {export_path: in_fnames} defining which matrices
+        should be summed to create each output.
+
+    Raises
+    ------
+    NormitsDemandError:
+        If there are no candidate matrices for an output.
     """
+    plan = dict()
 
     # ## EXIT CONDITION ## #
     if len(segmentations) == 1:
@@ -141,30 +262,22 @@ def _recursive_aggregate(
         segmentations = segmentations[0]
         segmentation_strs = segmentation_strs[0]
 
-        # Determine the ftype
-        ftype = ".csv"
-        if compress_out:
-            ftype = consts.COMPRESSION_SUFFIX
-
         if du.is_none_like(segmentations):
             # Aggregate remaining candidates
-            _aggregate(
-                import_dir=import_dir,
-                in_fnames=candidates,
-                export_path=export_path + ftype,
-                round_dp=round_dp,
-            )
+            plan[export_path + ftype] = candidates
         else:
-            # Loop through and aggregate
-            for segment, seg_str in zip(segmentations, segmentation_strs):
-                _aggregate(
-                    import_dir=import_dir,
-                    in_fnames=[x for x in candidates.copy() if seg_str in x],
-                    export_path=export_path + seg_str + ftype,
-                    round_dp=round_dp,
+            for seg_str in segmentation_strs:
+                plan[export_path + seg_str + ftype] = [x for x in candidates if seg_str in x]
+
+        for out_path, in_fnames in plan.items():
+            if in_fnames == list():
+                raise nd.NormitsDemandError(
+                    "Couldn't find any matrices to aggregate up to create %s!"
+                    % os.path.basename(out_path)
                 )
+
         # Exit condition done, leave recursion
-        return
+        return plan
 
     # ## RECURSIVELY LOOP ## #
     seg, other_seg = segmentations[0], segmentations[1:]
@@ -172,35 +285,31 @@ def _recursive_aggregate(
 
     if du.is_none_like(seg):
         # Don't need to segment here, next loop
-        _recursive_aggregate(
+        return _recursive_plan_aggregation(
             candidates=candidates,
             segmentations=other_seg,
             segmentation_strs=other_strs,
-            import_dir=import_dir,
             export_path=export_path,
-            compress_out=compress_out,
-            round_dp=round_dp,
+            ftype=ftype,
         )
-    else:
-        # Narrow down search, loop again
-        for segment, seg_str in zip(seg, strs):
-            _recursive_aggregate(
-                candidates=[x for x in candidates.copy() if seg_str in x],
-                segmentations=other_seg,
-                segmentation_strs=other_strs,
-                import_dir=import_dir,
-                export_path=export_path + seg_str,
-                compress_out=compress_out,
-                round_dp=round_dp,
-            )
 
+    # Narrow down search, loop again
+    for seg_str in strs:
+        plan.update(_recursive_plan_aggregation(
+            candidates=[x for x in candidates if seg_str in x],
+            segmentations=other_seg,
+            segmentation_strs=other_strs,
+            export_path=export_path + seg_str,
+            ftype=ftype,
+        ))
+    return plan
 
-def _aggregate_matrices_internal(
+
+def _plan_aggregation(
     year,
     p,
     m,
     all_matrices,
-    import_dir,
     export_dir,
     trip_origin,
     matrix_format,
@@ -211,20 +320,25 @@ def _aggregate_matrices_internal(
     ca_strs,
     tp_strs,
     compress_out,
-    round_dp,
-):
+) -> Dict[str, List[str]]:
     """
-    The internal function of aggregate_matrices(). Used for multiprocessing.
+    The internal function of aggregate_matrices(). Plans the aggregation of
+    a single year, purpose and mode.
+
+    Returns
+    -------
+    plan:
+        A dictionary of {export_path: in_fnames} defining which matrices
+        should be summed to create each output.
     """
     # ## NARROW DOWN TO RELEVANT MATRICES ## #
     # Create segmentation strings
-    compile_mats = all_matrices.copy()
     p_str = "_p" + str(p) + "_"
     m_str = "_m" + str(m) + "_"
     year_str = "_yr" + str(year) + "_"
 
     # Narrow down to matrices in this category
-    compile_mats = [x for x in compile_mats if p_str in x]
+    compile_mats = [x for x in all_matrices if p_str in x]
     compile_mats = [x for x in compile_mats if m_str in x]
     compile_mats = [x for x in compile_mats if year_str in x]
 
@@ -236,16 +350,13 @@ def _aggregate_matrices_internal(
         purpose=str(p),
         mode=str(m),
     )
-    out_path = os.path.join(export_dir, base_fname)
 
-    _recursive_aggregate(
+    return _recursive_plan_aggregation(
         candidates=compile_mats,
         segmentations=[segment_needed, ca_needed, tp_needed],
         segmentation_strs=[segment_str, ca_strs, tp_strs],
-        import_dir=import_dir,
-        export_path=out_path,
-        compress_out=compress_out,
-        round_dp=round_dp,
+        export_path=os.path.join(export_dir, base_fname),
+        ftype=consts.COMPRESSION_SUFFIX if compress_out else ".csv",
     )
 
 
@@ -264,18 +375,25 @@ def aggregate_matrices(
     compress_out: bool = False,
     round_dp: int = consts.DEFAULT_ROUNDING,
     process_count: int = consts.PROCESS_COUNT,
+    max_open_outputs: int = AGGREGATE_MAX_OPEN_OUTPUTS,
 ):
     """
     Aggregates the matrices in import_dir up to the given level and writes
     the new matrices out to export_dir
 
+    All the outputs are planned up front. Outputs are then built in batches,
+    reading each input matrix once per batch and adding it to every output
+    that needs it.
+
     Parameters
     ----------
     import_dir:
-        Where to find the starting matrices.
+        Where to find the starting matrices. Either a directory or a
+        MatrixStore path, see matrix_store.is_matrix_store().
 
     export_dir:
-        Where to output the aggregated matrices.
+        Where to output the aggregated matrices. Either a directory or a
+        MatrixStore path, see matrix_store.is_matrix_store().
 
     trip_origin:
         Where did the trips originate. Usually 'nhb' or 'hb'.
@@ -320,6 +438,11 @@ def aggregate_matrices(
         concurrency.multiprocess() to see what the vales mean.
         Set to 0 to not use multiprocessing.
 
+    max_open_outputs:
+        The maximum number of aggregated matrices each process holds in
+        memory at once. Memory use is roughly
+        `max_open_outputs * process_count` matrices.
+
     Returns
     -------
     """
@@ -340,16 +463,13 @@ def aggregate_matrices(
 
     # Load in all the candidate matrices and narrow down
     mat_format_str = "_" + matrix_format + "_"
-    all_matrices = du.list_files(import_dir)
+    all_matrices = mat_store.list_matrices(import_dir)
     all_matrices = [x for x in all_matrices if mat_format_str in x]
     all_matrices = [x for x in all_matrices if du.starts_with(x, trip_origin)]
 
-    # for year, purpose, mode, time_period
-    print("Writing files to: %s" % export_dir)
-    # ## MULTIPROCESS ## #
+    # ## PLAN THE AGGREGATION ## #
     unchanging_kwargs = {
         "all_matrices": all_matrices,
-        "import_dir": import_dir,
         "export_dir": export_dir,
         "trip_origin": trip_origin,
         "matrix_format": matrix_format,
@@ -358,11 +478,9 @@ def aggregate_matrices(
         "ca_strs": ca_strs,
         "tp_strs": tp_strs,
         "compress_out": compress_out,
-        "round_dp": round_dp,
     }
 
-    # Build the kwarg list
-    kwarg_list = list()
+    plan = dict()
     for year, m, p in product(years_needed, m_needed, p_needed):
         # Init
         if p in consts.SOC_P:
@@ -379,24 +497,29 @@ def aggregate_matrices(
                 "Purpose '%s' is neither a soc, ns or nhb " "segmentation somehow?" % str(p)
             )
 
-        kwargs = unchanging_kwargs.copy()
-        kwargs.update(
-            {
-                "year": year,
-                "p": p,
-                "m": m,
-                "segment_needed": segment_needed,
-                "segment_str": segment_str,
-            }
-        )
-        kwarg_list.append(kwargs)
+        plan.update(_plan_aggregation(
+            year=year,
+            p=p,
+            m=m,
+            segment_needed=segment_needed,
+            segment_str=segment_str,
+            **unchanging_kwargs,
+        ))
+
+    # ## MULTIPROCESS THE BATCHES ## #
+    print("Writing files to: %s" % export_dir)
+    kwarg_list = list()
+    for batch in _batch_aggregation_plan(plan, max_open_outputs):
+        kwarg_list.append({
+            "import_dir": import_dir,
+            "plan": batch,
+            "round_dp": round_dp,
+        })
 
-    # Run
     multiprocessing.multiprocess(
-        fn=_aggregate_matrices_internal,
+        fn=_aggregate_batch,
         kwargs=kwarg_list,
         process_count=process_count,
-        # process_count=0,
     )
 
 
@@ -550,11 +673,8 @@ def furness_tour_proportions(
     generate_tour_props=True,
 ):
     # TODO: Write furness_tour_proportions() docs()
-    # ## INIT LOOP ## #
-    # Create empty matrices for PA outputs
+    # ## INIT ## #
     pa_out_mats = dict()
-    for tp in tp_needed:
-        pa_out_mats[tp] = pd.DataFrame(0.0, index=orig_vals, columns=dest_vals)
 
     # Load the zone aggregation dictionaries for this model
     model2lad = du.get_zone_translation(
@@ -568,110 +688,113 @@ def furness_tour_proportions(
     def empty_tour_prop():
         return np.zeros((len(tp_needed), len(tp_needed)))
 
-    # Use function to initialise defaultdicts
-    lad_tour_props = defaultdict(lambda: defaultdict(empty_tour_prop))
-    tfn_tour_props = defaultdict(lambda: defaultdict(empty_tour_prop))
+    # ## BUILD THE TARGET STACKS ## #
+    # One row per OD pair, in the same order as product(orig_vals, dest_vals)
+    n_tp = len(tp_needed)
+    n_pairs = len(orig_vals) * len(dest_vals)
+    fh_targets = np.stack(
+        [fh_mats[tp].loc[orig_vals, dest_vals].values for tp in tp_needed],
+        axis=-1,
+    ).reshape(n_pairs, n_tp).astype(float)
+    th_targets = np.stack(
+        [th_mats[tp].loc[orig_vals, dest_vals].values for tp in tp_needed],
+        axis=-1,
+    ).reshape(n_pairs, n_tp).astype(float)
+    pre_bal_fh = fh_targets.copy()
+    pre_bal_th = th_targets.copy()
+
+    # ## BALANCE FROM_HOME AND TO_HOME ## #
+    # First use tp4 to bring both vector sums to average
+    fh_th_avg = (fh_targets.sum(axis=1) + th_targets.sum(axis=1)) / 2
+    fh_targets[:, -1] = fh_th_avg - fh_targets[:, :-1].sum(axis=1)
+    th_targets[:, -1] = fh_th_avg - th_targets[:, :-1].sum(axis=1)
+
+    # Correct for the resulting negative value
+    seed_val = seed_values[-1][-1]
+    fh_neg = fh_targets[:, -1] < 0
+    th_targets[fh_neg, -1] -= (1 + seed_val) * fh_targets[fh_neg, -1]
+    fh_targets[fh_neg, -1] *= -seed_val
+
+    th_neg = ~fh_neg & (th_targets[:, -1] < 0)
+    fh_targets[th_neg, -1] -= (1 + seed_val) * th_targets[th_neg, -1]
+    th_targets[th_neg, -1] *= -seed_val
+
+    # ## STORE NEW PA VALS ## #
+    for i, tp in enumerate(tp_needed):
+        pa_out_mats[tp] = pd.DataFrame(
+            fh_targets[:, i].reshape(len(orig_vals), len(dest_vals)),
+            index=orig_vals,
+            columns=dest_vals,
+        )
 
-    # TODO: optimise with numpy.
-    # To preserve index/columns use i/j then:
-    # cell_val = array[df.index[i], df.columns[j]]
+    # ## Check for unbalanced tour proportions ## #
+    fh_totals = fh_targets.sum(axis=1)
+    th_totals = th_targets.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        temp_fh_tp4 = np.where(th_totals != 0, fh_targets[:, -1] / fh_totals, 0)
+        temp_th_tp4 = np.where(th_totals != 0, th_targets[:, -1] / th_totals, 0)
 
-    # Value Init
-    zero_count = 0
+    # If tp4 is greater than the tolerance, this usually means the original
+    # to_home and from_home targets were not balanced
     report = defaultdict(list)
-    tour_proportions = defaultdict(dict)
-
-    total = len(orig_vals) * len(dest_vals)
-    desc = "Generating tour props for %s..." % tour_prop_name
-    for orig, dest in tqdm(product(orig_vals, dest_vals), total=total, desc=desc):
-        # Build the from_home vector
-        fh_target = list()
-        for tp in tp_needed:
-            fh_target.append(fh_mats[tp].loc[orig, dest])
-        fh_target = np.array(fh_target)
-        pre_bal_fh = fh_target.copy()
-
-        # Build the to_home vector
-        th_target = list()
-        for tp in tp_needed:
-            th_target.append(th_mats[tp].loc[orig, dest])
-        th_target = np.array(th_target)
-        pre_bal_th = th_target.copy()
-
-        # ## BALANCE FROM_HOME AND TO_HOME ## #
-        # First use tp4 to bring both vector sums to average
-        fh_th_avg = (fh_target.sum() + th_target.sum()) / 2
-        fh_target[-1] = fh_th_avg - np.sum(fh_target[:-1])
-        th_target[-1] = fh_th_avg - np.sum(th_target[:-1])
-
-        # Correct for the resulting negative value
-        seed_val = seed_values[-1][-1]
-        if fh_target[-1] < 0:
-            th_target[-1] -= (1 + seed_val) * fh_target[-1]
-            fh_target[-1] *= -seed_val
-        elif th_target[-1] < 0:
-            fh_target[-1] -= (1 + seed_val) * th_target[-1]
-            th_target[-1] *= -seed_val
-
-        # ## STORE NEW PA VALS ## #
-        for i, tp in enumerate(tp_needed):
-            pa_out_mats[tp].loc[orig, dest] = fh_target[i]
-
-        # ## Check for unbalanced tour proportions ## #
-        if th_target.sum() != 0:
-            temp_fh_target = fh_target.copy() / fh_target.sum()
-            temp_th_target = th_target.copy() / th_target.sum()
-        else:
-            temp_fh_target = np.array([0] * len(tp_needed))
-            temp_th_target = np.array([0] * len(tp_needed))
-
-        # If tp4 is greater than the tolerance, this usually means the original
-        # to_home and from_home targets were not balanced
-        if temp_th_target[-1] > tour_prop_tol or temp_fh_target[-1] > tour_prop_tol:
-            report["tour_prop_fname"].append(tour_prop_name)
-            report["OD_pair"].append((orig, dest))
-            report["fh_before"].append(pre_bal_fh)
-            report["fh_after"].append(fh_target)
-            report["th_before"].append(pre_bal_th)
-            report["th_after"].append(th_target)
-
-        # ## FURNESS ## #
-        if not generate_tour_props:
-            # Return all zeroes if we don't need to furness
-            furnessed_mat = np.zeros((len(tp_needed), len(tp_needed)))
-        elif fh_target.sum() == 0 or th_target.sum() == 0:
-            # Skip furness, create matrix of 0s instead
-            zero_count += 1
-            furnessed_mat = np.zeros((len(tp_needed), len(tp_needed)))
-
-        else:
-            furnessed_mat, *_ = furness.doubly_constrained_furness(
-                seed_vals=seed_values,
-                row_targets=fh_target,
-                col_targets=th_target,
+    unbalanced = (temp_th_tp4 > tour_prop_tol) | (temp_fh_tp4 > tour_prop_tol)
+    for idx in np.flatnonzero(unbalanced):
+        orig, dest = orig_vals[idx // len(dest_vals)], dest_vals[idx % len(dest_vals)]
+        report["tour_prop_fname"].append(tour_prop_name)
+        report["OD_pair"].append((orig, dest))
+        report["fh_before"].append(pre_bal_fh[idx])
+        report["fh_after"].append(fh_targets[idx])
+        report["th_before"].append(pre_bal_th[idx])
+        report["th_after"].append(th_targets[idx])
+
+    # ## FURNESS ## #
+    # Return all zeroes if we don't need to furness, or there's nothing to furness
+    furnessed_mats = np.zeros((n_pairs, n_tp, n_tp))
+    zero_count = 0
+    if generate_tour_props:
+        zero_mask = (fh_totals == 0) | (th_totals == 0)
+        zero_count = int(zero_mask.sum())
+
+        # Furness all OD pairs together, in chunks to limit memory use
+        furness_idx = np.flatnonzero(~zero_mask)
+        desc = "Generating tour props for %s..." % tour_prop_name
+        chunk_size = TOUR_PROP_FURNESS_CHUNK_SIZE
+        for start in tqdm(range(0, len(furness_idx), chunk_size), desc=desc):
+            chunk_idx = furness_idx[start:start + chunk_size]
+            seed_stack = np.broadcast_to(seed_values, (len(chunk_idx), n_tp, n_tp))
+            furnessed_mats[chunk_idx], *_ = furness.batched_doubly_constrained_furness(
+                seed_vals=seed_stack,
+                row_targets=fh_targets[chunk_idx],
+                col_targets=th_targets[chunk_idx],
                 tol=furness_tol,
                 max_iters=furness_max_iters,
             )
 
-        # Store the tour proportions
-        # furnessed_mat = furnessed_mat.astype('float64')
-        tour_proportions[orig][dest] = furnessed_mat
-
-        # TODO: Manually assign the missing aggregation zones
-        # NOTE: Here we are assigning any zone we can't aggregate to
-        # -1. These are usually point zones etc. and won't cause a problem
-        # when we use these aggregated tour proportions later.
-        # Making a note here in case it becomes a problem later
-
-        # Calculate the lad aggregated tour proportions
-        lad_orig = model2lad.get(orig, -1)
-        lad_dest = model2lad.get(dest, -1)
-        lad_tour_props[lad_orig][lad_dest] += furnessed_mat
-
-        # Calculate the tfn aggregated tour proportions
-        tfn_orig = model2tfn.get(orig, -1)
-        tfn_dest = model2tfn.get(dest, -1)
-        tfn_tour_props[tfn_orig][tfn_dest] += furnessed_mat
+    # Store the tour proportions
+    tour_proportions = defaultdict(dict)
+    pair_furnessed_mats = iter(furnessed_mats)
+    for orig, dest in product(orig_vals, dest_vals):
+        tour_proportions[orig][dest] = next(pair_furnessed_mats)
+
+    # TODO: Manually assign the missing aggregation zones
+    # NOTE: Here we are assigning any zone we can't aggregate to
+    # -1. These are usually point zones etc. and won't cause a problem
+    # when we use these aggregated tour proportions later.
+    # Making a note here in case it becomes a problem later
+    def aggregate_tour_props(zone_translation):
+        agg_orig = np.repeat([zone_translation.get(o, -1) for o in orig_vals], len(dest_vals))
+        agg_dest = np.tile([zone_translation.get(d, -1) for d in dest_vals], len(orig_vals))
+        agg_mats = pd.DataFrame(furnessed_mats.reshape(n_pairs, -1))
+        agg_mats = agg_mats.groupby([agg_orig, agg_dest]).sum()
+
+        agg_tour_props = defaultdict(lambda: defaultdict(empty_tour_prop))
+        for (agg_o, agg_d), vals in zip(agg_mats.index, agg_mats.values):
+            agg_tour_props[agg_o][agg_d] += vals.reshape(n_tp, n_tp)
+        return agg_tour_props
+
+    # Calculate the lad and tfn aggregated tour proportions
+    lad_tour_props = aggregate_tour_props(model2lad)
+    tfn_tour_props = aggregate_tour_props(model2tfn)
 
     return (tour_proportions, lad_tour_props, tfn_tour_props, pa_out_mats, report, zero_count)
 
@@ -2381,9 +2504,13 @@ def _compile_matrices_internal(
     round_dp,
     factor_pickle_path,
     avoid_zero_splits,
-) -> None:
+) -> Union[Dict[str, pd.DataFrame], None]:
     """
     The internal function of compile_matrices
+
+    If factor_pickle_path is a factors array, the decompile factors are
+    written straight into it and None is returned. Otherwise the factors are
+    returned as a dictionary of {input_name: factors}.
     """
     # ## COMPILE THE MATRICES ## #
     # Get the input matrices
@@ -2391,21 +2518,34 @@ def _compile_matrices_internal(
     subset = compile_params[mask].copy()
     input_mat_names = subset["distribution_name"].unique()
 
-    # Read in all the matrices
-    in_mats = list()
-    for mat_name in input_mat_names:
+    # Read in all the matrices into a single stacked array
+    in_mats = None
+    for i, mat_name in enumerate(input_mat_names):
         in_path = os.path.join(mat_import, mat_name)
-        df = file_ops.read_df(in_path, index_col=0)
+        df = mat_store.read_matrix(in_path)
         df.columns = df.columns.astype(df.index.dtype)
-        in_mats.append(df)
+
+        if in_mats is None:
+            index, columns = df.index, df.columns
+            in_mats = np.empty((len(input_mat_names), *df.shape))
+        elif not (df.index.equals(index) and df.columns.equals(columns)):
+            raise nd.NormitsDemandError(
+                "Cannot compile %s into %s. The zones do not match the other "
+                "matrices being compiled." % (mat_name, comp_name)
+            )
+        in_mats[i] = df.to_numpy()
 
     # Combine all matrices together
-    full_mat = functools.reduce(operator.add, in_mats)
+    full_mat = in_mats.sum(axis=0)
 
     # Output to file
     output_path = os.path.join(mat_export, comp_name)
-    full_mat = full_mat.round(decimals=round_dp)
-    file_ops.write_df(full_mat, output_path)
+    full_df = pd.DataFrame(
+        np.round(full_mat, decimals=round_dp),
+        index=index,
+        columns=columns,
+    )
+    mat_store.write_matrix(full_df, output_path)
 
     # Go to the next iteration if we don't need the factors
     if factor_pickle_path is None:
@@ -2414,17 +2554,25 @@ def _compile_matrices_internal(
     # ## CALCULATE THE DECOMPILE FACTORS ## #
     # Infill all zeroes with a small number - ensures no 0 splits
     if avoid_zero_splits:
-        in_mats = [x.where(x != 0, 1e-8) for x in in_mats]
-        full_mat = functools.reduce(operator.add, in_mats)
-
-    decompile_factors = dict()
-    for part_mat, mat_name in zip(in_mats, input_mat_names):
-        # Avoid divide by zero
-        full_mat = np.where(full_mat == 0, 0.0001, full_mat)
-        # decompile_factors[comp_name][mat_name] = part_mat / full_mat
-        decompile_factors[mat_name] = part_mat / full_mat
+        in_mats[in_mats == 0] = 1e-8
+        full_mat = in_mats.sum(axis=0)
+
+    # Avoid divide by zero, then split all inputs at once
+    full_mat[full_mat == 0] = 0.0001
+    decompile_factors = np.divide(in_mats, full_mat, out=in_mats)
+
+    if mat_comp.is_factors_array(factor_pickle_path):
+        mat_comp.write_compilation_factors(
+            path=factor_pickle_path,
+            comp_name=comp_name,
+            factors=decompile_factors,
+        )
+        return None
 
-    return decompile_factors
+    return {
+        mat_name: pd.DataFrame(factors, index=index, columns=columns)
+        for mat_name, factors in zip(input_mat_names, decompile_factors)
+    }
 
 
 def compile_matrices(
@@ -2443,10 +2591,12 @@ def compile_matrices(
     Parameters
     ----------
     mat_import:
-        Path to the directory containing the matrices to compile
+        Path to the directory, or MatrixStore, containing the matrices
+        to compile
 
     mat_export:
-        Path to the directory to output the compiled matrices
+        Path to the directory, or MatrixStore, to output the compiled
+        matrices
 
     compile_params_path:
         Path to the compile params, as produced by build_compile_params()
@@ -2456,9 +2606,11 @@ def compile_matrices(
             Uses efs_consts.DEFAULT_ROUNDING by default.
 
     factor_pickle_path:
-        Where to export the decompile factors. This should be a path to a
-        directory, not including the filename. If left as None, mat_export
-        will be used in place.
+        Where to export the decompile factors. If this ends in
+        compilation.FACTORS_ARRAY_SUFFIX, the factors are written as a single
+        float32 array, see compilation.create_factors_array(). Otherwise they
+        are written as a compressed pickle of DataFrames.
+        If left as None, no factors are written.
 
     factors_fname:
         The filename to give to the exported decompile factors when writing to
@@ -2474,10 +2626,10 @@ def compile_matrices(
     None
     """
     # TODO: Add in some Audit checks and return the report
-    if not os.path.isdir(mat_import):
+    if not mat_store.matrix_location_exists(mat_import):
         raise IOError("Matrix import path '%s' does not exist." % mat_import)
 
-    if not os.path.isdir(mat_export):
+    if not mat_store.matrix_location_exists(mat_export):
         raise IOError("Matrix export path '%s' does not exist." % mat_export)
 
     if factor_pickle_path is not None:
@@ -2493,18 +2645,22 @@ def compile_matrices(
     compile_params = pd.read_csv(compile_params_path)
     compiled_names = compile_params["compilation"].unique()
 
-    # Need to get the size of the output matrices
-    check_mat_name = compile_params.loc[0, "distribution_name"]
-    check_mat = file_ops.read_df(os.path.join(mat_import, check_mat_name), index_col=0)
-    n_rows = len(check_mat.index)
-    n_cols = len(check_mat.columns)
-
-    # Define the default value for the nested defaultdict
-    def empty_factors():
-        return np.zeros(n_rows, n_cols)
-
-    # Use function to initialise defaultdict
-    decompile_factors = defaultdict(lambda: defaultdict(empty_factors))
+    # Create the factors array for each process to write to
+    if factor_pickle_path is not None and mat_comp.is_factors_array(factor_pickle_path):
+        check_mat_name = compile_params.loc[0, "distribution_name"]
+        check_mat = mat_store.read_matrix(os.path.join(mat_import, check_mat_name))
+        compilations = {
+            c: compile_params.loc[
+                compile_params["compilation"] == c, "distribution_name"
+            ].unique()
+            for c in compiled_names
+        }
+        mat_comp.create_factors_array(
+            path=factor_pickle_path,
+            compilations=compilations,
+            index=check_mat.index,
+            columns=check_mat.columns.astype(check_mat.index.dtype),
+        )
 
     # ## MP Matrix compilation ## #
     unchanging_kwargs = {
@@ -2541,6 +2697,9 @@ def compile_matrices(
     decompile_factors = {c: f for c, f in zip(compiled_names, factors)}
 
     # Write factors to disk if we made them
+    if factor_pickle_path is not None and mat_comp.is_factors_array(factor_pickle_path):
+        return factor_pickle_path
+
     if factor_pickle_path is not None:
         print("Writing decompile factors to disk - might take a while...")
         decompile_factors = du.defaultdict_to_regular(decompile_factors)
@@ -2558,7 +2717,8 @@ def load_matrix_from_disk(
     Parameters
     ----------
     mat_import_dir:
-        The path to a directory containing the pa or od matrices.
+        The path to a directory, or MatrixStore, containing the pa or od
+        matrices.
 
     segment_dict:
         A segment dictionary where the keys are segmentation types, and the
@@ -2598,7 +2758,7 @@ def load_matrix_from_disk(
             csv=True,
         )
         mat_path = os.path.join(mat_import_dir, mat_fname)
-        return pd.read_csv(mat_path, index_col=0), completed_segments
+        return mat_store.read_matrix(mat_path), completed_segments
 
     # Lets make sure we only carry on with the right formats
     if segment_dict["matrix_format"] not in ["od_from", "od_to"]:
@@ -2625,13 +2785,13 @@ def load_matrix_from_disk(
         trip_origin=trip_origin, matrix_format="od_to", calib_params=segment_dict, csv=True,
     )
     od_to_path = os.path.join(mat_import_dir, od_to_fname)
-    od_to = pd.read_csv(od_to_path, index_col=0)
+    od_to = mat_store.read_matrix(od_to_path)
 
     od_from_fname = du.calib_params_to_dist_name(
         trip_origin=trip_origin, matrix_format="od_to", calib_params=segment_dict, csv=True,
     )
     od_from_path = os.path.join(mat_import_dir, od_from_fname)
-    od_from = pd.read_csv(od_from_path, index_col=0)
+    od_from = mat_store.read_matrix(od_from_path)
 
     od_mat = od_to + od_from
 
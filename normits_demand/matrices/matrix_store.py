@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+"""
+Created on: 18/10/2026
+Updated on:
+
+Last update made by:
+Other updates made by:
+
+File purpose:
+Segment-stacked matrix storage, built on OMXFile.
+
+A MatrixStore holds many segment matrices in a single chunked, compressed
+HDF5 file, indexed by segment name. It is an alternative to writing one
+CSV or compressed pickle per segment.
+
+The module level functions (`read_matrix()`, `write_matrix()`,
+`list_matrices()`) let matrix pipelines switch between the two layouts.
+Wherever a pipeline takes a matrix directory, a path to a store (ending in
+one of STORE_SUFFIXES) can be given instead. A path inside the store, such
+as `matrices.h5/hb_pa_yr2018_p1_m3.csv`, then refers to the segment
+`hb_pa_yr2018_p1_m3`.
+"""
+# Built-Ins
+import os
+import time
+import pathlib
+import warnings
+import contextlib
+
+from typing import Dict
+from typing import List
+from typing import Union
+from typing import Iterator
+
+# Third Party
+import numpy as np
+import pandas as pd
+import tables
+
+# Local Imports
+import normits_demand as nd
+from normits_demand import constants as consts
+from normits_demand.utils import compress
+from normits_demand.utils import file_ops
+from normits_demand.utils import general as du
+from normits_demand.matrices.omx_file import OMXFile
+
+# File suffixes which mark a path as a MatrixStore
+STORE_SUFFIXES = ('.omx', '.h5', '.hdf5')
+
+# Matrix file suffixes which are dropped to get the segment name.
+# Longest first, so '.csv.bz2' is dropped before '.csv'
+MATRIX_SUFFIXES = sorted(
+    set(consts.VALID_MAT_FTYPES) | set(compress.CODEC_SUFFIXES),
+    key=len,
+    reverse=True,
+)
+
+
+def is_matrix_store(path: nd.PathLike) -> bool:
+    """Checks whether path points to a MatrixStore, rather than a directory"""
+    return pathlib.Path(path).suffix.lower() in STORE_SUFFIXES
+
+
+def segment_name(fname: str) -> str:
+    """Converts a matrix filename into a MatrixStore segment name"""
+    for suffix in MATRIX_SUFFIXES:
+        if fname.endswith(suffix):
+            return fname[:-len(suffix)]
+    return fname
+
+
+class MatrixStoreError(nd.NormitsDemandError):
+    """Exception for all errors that occur in a MatrixStore"""
+    pass
+
+
+class MatrixStore:
+    """Many square segment matrices in a single OMX file
+
+    Every matrix in a store shares the same zones. Matrices are stored as
+    chunked, compressed arrays so blocks of rows and columns can be read
+    without reading the whole matrix.
+
+    The file is only opened for the length of each read or write, so a
+    MatrixStore can be safely passed to other processes. Writes take an
+    exclusive lock file, so many processes can append to the same store.
+    """
+    # Chunks are square blocks of up to this many zones
+    _chunk_zones = 256
+
+    # How long to wait for the lock file before giving up, in seconds
+    _lock_timeout = 600
+    _lock_poll = 0.05
+
+    def __init__(self,
+                 path: nd.PathLike,
+                 complevel: int = 4,
+                 complib: str = 'zlib',
+                 ):
+        """
+        Parameters
+        ----------
+        path:
+            The path to the store. Should end in one of STORE_SUFFIXES.
+            The file is created on the first write.
+
+        complevel:
+            The compression level to write matrices with, from 0 to 9.
+
+        complib:
+            The compression library to write matrices with. Any library
+            supported by pytables can be used.
+        """
+        if not is_matrix_store(path):
+            raise ValueError(
+                "A MatrixStore path should end in one of %s. Got %s"
+                % (STORE_SUFFIXES, path)
+            )
+
+        self.path = pathlib.Path(path)
+        self.filters = tables.Filters(complevel=complevel, complib=complib)
+
+    def __repr__(self) -> str:
+        return "%s(%r)" % (self.__class__.__name__, str(self.path))
+
+    def exists(self) -> bool:
+        """Whether the store has been created on disk yet"""
+        return self.path.is_file()
+
+    @contextlib.contextmanager
+    def _open(self, mode: str = 'r', **kwargs) -> Iterator[OMXFile]:
+        """Opens the store, suppressing pytables naming warnings"""
+        if mode == 'r' and not self.exists():
+            raise MatrixStoreError("No MatrixStore exists at %s" % self.path)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', tables.NaturalNameWarning)
+            omx = OMXFile(self.path, mode=mode, **kwargs)
+            try:
+                yield omx
+            finally:
+                omx.close()
+
+    @contextlib.contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Holds an exclusive lock on the store while writing"""
+        lock_path = '%s.lock' % self.path
+        start = time.time()
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if time.time() - start > self._lock_timeout:
+                    raise MatrixStoreError(
+                        "Timed out waiting for the lock on %s. If no other "
+                        "process is writing to it, delete %s."
+                        % (self.path, lock_path)
+                    )
+                time.sleep(self._lock_poll)
+
+        try:
+            os.close(fd)
+            yield
+        finally:
+            os.remove(lock_path)
+
+    @property
+    def segment_names(self) -> List[str]:
+        """The names of all the segments in the store"""
+        if not self.exists():
+            return list()
+        with self._open() as omx:
+            return omx.matrix_levels
+
+    @property
+    def zones(self) -> np.ndarray:
+        """The zones shared by every matrix in the store"""
+        with self._open() as omx:
+            return omx.zones
+
+    def __contains__(self, name: str) -> bool:
+        return segment_name(name) in self.segment_names
+
+    def __len__(self) -> int:
+        return len(self.segment_names)
+
+    def read_array(self,
+                   name: str,
+                   rows: slice = slice(None),
+                   cols: slice = slice(None),
+                   ) -> np.ndarray:
+        """Reads a block of a segment matrix
+
+        Parameters
+        ----------
+        name:
+            The name of the segment to read. Matrix file suffixes are
+            ignored.
+
+        rows:
+            The rows of the matrix to read. Defaults to all rows.
+
+        cols:
+            The columns of the matrix to read. Defaults to all columns.
+
+        Returns
+        -------
+        matrix:
+            The requested block of the matrix.
+        """
+        with self._open() as omx:
+            return omx.get_matrix_block(segment_name(name), rows, cols)
+
+    def read(self,
+             name: str,
+             rows: slice = slice(None),
+             cols: slice = slice(None),
+             ) -> pd.DataFrame:
+        """Reads a block of a segment matrix, labelled with its zones
+
+        See `read_array()` for a full description of the arguments.
+        """
+        with self._open() as omx:
+            zones = omx.zones
+            values = omx.get_matrix_block(segment_name(name), rows, cols)
+        return pd.DataFrame(values, index=zones[rows], columns=zones[cols])
+
+    def write_many(self,
+                   matrices: Dict[str, Union[pd.DataFrame, np.ndarray]],
+                   zones: np.ndarray = None,
+                   ) -> None:
+        """Writes segment matrices to the store, replacing any that exist
+
+        Parameters
+        ----------
+        matrices:
+            A dictionary of {segment_name: matrix}. Matrix file suffixes
+            on segment names are dropped. If matrices are DataFrames,
+            their index is used as the zones.
+
+        zones:
+            The zones of the matrices. Only needed if the store doesn't
+            exist yet and matrices are not DataFrames.
+
+        Raises
+        ------
+        MatrixStoreError:
+            If the matrices don't have the same zones as the store.
+        """
+        if matrices == dict():
+            return
+
+        # Get the zones from the first DataFrame, if not given
+        if zones is None:
+            frames = [x for x in matrices.values() if isinstance(x, pd.DataFrame)]
+            if frames != list():
+                zones = frames[0].index.to_numpy()
+
+        with self._write_lock():
+            if self.exists():
+                open_kwargs = {'mode': 'a'}
+            elif zones is None:
+                raise MatrixStoreError(
+                    "Zones must be given when creating a new MatrixStore."
+                )
+            else:
+                open_kwargs = {
+                    'mode': 'w',
+                    'omx_version': OMXFile._EXPECTED_OMX_VERSION,
+                    'shape': (len(zones), len(zones)),
+                }
+
+            with self._open(**open_kwargs) as omx:
+                if open_kwargs['mode'] == 'w':
+                    omx.zones = np.asarray(zones)
+                    omx.create_group("/", "data")
+
+                n_chunk = min(self._chunk_zones, omx.shape[0])
+                for name, matrix in matrices.items():
+                    self._check_zones(name, matrix, omx.zones)
+                    omx.set_matrix_level(
+                        segment_name(name),
+                        np.asarray(matrix, dtype=float),
+                        filters=self.filters,
+                        chunkshape=(n_chunk, n_chunk),
+                    )
+
+    def write(self,
+              name: str,
+              matrix: Union[pd.DataFrame, np.ndarray],
+              zones: np.ndarray = None,
+              ) -> None:
+        """Writes a single segment matrix to the store
+
+        See `write_many()` for a full description of the arguments.
+        """
+        self.write_many({name: matrix}, zones=zones)
+
+    def delete(self, name: str) -> None:
+        """Removes a segment matrix from the store"""
+        with self._write_lock():
+            with self._open('a') as omx:
+                omx.remove_node("/data", segment_name(name))
+
+    @staticmethod
+    def _check_zones(name: str,
+                     matrix: Union[pd.DataFrame, np.ndarray],
+                     zones: np.ndarray,
+                     ) -> None:
+        """Raises a MatrixStoreError if matrix doesn't use zones"""
+        if not isinstance(matrix, pd.DataFrame):
+            return
+
+        # CSV matrices are often read with string column names
+        zones = zones.astype(str)
+        for labels in (matrix.index, matrix.columns):
+            labels = labels.to_numpy().astype(str)
+            if len(labels) != len(zones) or np.any(labels != zones):
+                raise MatrixStoreError(
+                    "The zones of matrix %s do not match the zones of the store."
+                    % name
+                )
+
+
+# ## BACKEND SWITCHING ## #
+def _split_store_path(path: nd.PathLike):
+    """Splits path into (MatrixStore, name) if it is inside a store
+
+    Returns None if path is not inside a store.
+    """
+    path = pathlib.Path(path)
+    if is_matrix_store(path.parent):
+        return MatrixStore(path.parent), path.name
+    return None
+
+
+def matrix_location_exists(location: nd.PathLike) -> bool:
+    """Checks whether a matrix directory or MatrixStore can be used
+
+    Stores don't need to exist yet, as they are created on first write.
+    """
+    if is_matrix_store(location):
+        return os.path.isdir(os.path.dirname(os.path.abspath(location)))
+    return os.path.isdir(location)
+
+
+def list_matrices(location: nd.PathLike) -> List[str]:
+    """Lists the matrices in a directory, or the segments of a MatrixStore"""
+    if is_matrix_store(location):
+        return MatrixStore(location).segment_names
+    return du.list_files(location)
+
+
+def matrix_exists(path: nd.PathLike) -> bool:
+    """Checks whether a matrix file, or a segment in a store, exists"""
+    store_path = _split_store_path(path)
+    if store_path is None:
+        return os.path.isfile(path)
+
+    store, name = store_path
+    return name in store
+
+
+def read_matrix(path: nd.PathLike, **kwargs) -> pd.DataFrame:
+    """Reads a matrix from a file, or from a MatrixStore
+
+    Parameters
+    ----------
+    path:
+        The path to the matrix. If this is inside a MatrixStore, the
+        segment named by the final part of the path is read.
+
+    kwargs:
+        Passed to `file_ops.read_df()` when reading from a file. Ignored
+        when reading from a MatrixStore.
+
+    Returns
+    -------
+    matrix:
+        The matrix, with zones as the index and columns.
+    """
+    store_path = _split_store_path(path)
+    if store_path is None:
+        kwargs.setdefault('index_col', 0)
+        return file_ops.read_df(path, **kwargs)
+
+    store, name = store_path
+    return store.read(name)
+
+
+def write_matrix(matrix: pd.DataFrame, path: nd.PathLike, **kwargs) -> None:
+    """Writes a matrix to a file, or to a MatrixStore
+
+    Parameters
+    ----------
+    matrix:
+        The matrix to write, with zones as the index and columns.
+
+    path:
+        The path to write to. If this is inside a MatrixStore, it is
+        written to the segment named by the final part of the path.
+
+    kwargs:
+        Passed to `file_ops.write_df()` when writing to a file. Ignored
+        when writing to a MatrixStore.
+    """
+    store_path = _split_store_path(path)
+    if store_path is None:
+        file_ops.write_df(matrix, path, **kwargs)
+        return
+
+    store, name = store_path
+    store.write(name, matrix)
@@ -16,6 +16,7 @@ from normits_demand.utils import vehicle_occupancy as vo
 from normits_demand import AuditError
 
 from normits_demand.concurrency import multiprocessing
+from normits_demand.matrices import compilation as mat_comp
 
 
 def _decompile_od_internal(od_import,
@@ -128,7 +129,8 @@ def decompile_od(od_import: str,
         Which year to decompile the matrices for.
 
     decompile_factors_path:
-        Full path to the pickle file containing the decompile factors to use.
+        Full path to the file containing the decompile factors to use. Either
+        a factors array, see compilation.create_factors_array(), or a pickle.
 
     audit:
         Whether to perform print_audits to make sure the decompiled matrices are
@@ -146,7 +148,12 @@ def decompile_od(od_import: str,
     """
     # Check if file is compressed before loading the factors
     suffix = "".join(pathlib.Path(decompile_factors_path).suffixes)
-    if suffix.lower() in (file_ops.PD_COMPRESSION | {consts.COMPRESSION_SUFFIX}):
+    if mat_comp.is_factors_array(decompile_factors_path):
+        decompile_factors = mat_comp.read_factors_array(
+            decompile_factors_path,
+            as_dataframes=True,
+        )
+    elif suffix.lower() in (file_ops.PD_COMPRESSION | {consts.COMPRESSION_SUFFIX}):
         decompile_factors = compress.read_in(decompile_factors_path)
     else:
         decompile_factors = file_ops.read_pickle(decompile_factors_path)
@@ -78,9 +78,10 @@ class OMXFile(tables.File):
         self._shape = None
 
         if self.mode in ("r", "a", "r+"):
-            self._omx_version = self._check_omx_version(
-                self.root._v_attrs["OMX_VERSION"].decode()
-            )
+            omx_version = self.root._v_attrs["OMX_VERSION"]
+            if isinstance(omx_version, bytes):
+                omx_version = omx_version.decode()
+            self._omx_version = self._check_omx_version(omx_version)
             self._shape = self._check_shape(self.root._v_attrs["SHAPE"])
             self._zones = self._check_zones(self.get_node("/lookup", "ZoneNames"))
             self.get_node("/data")
@@ -170,13 +171,17 @@ class OMXFile(tables.File):
     def zones(self, value: np.ndarray) -> None:
         self._can_write("zones")
         value = self._check_zones(value)
-        if np.any(value != self._zones):
+        if self._zones is None or np.any(value != self._zones):
             self._zones = value
-            self.create_array("/data", "ZoneNames", self._zones)
+            if "/lookup/ZoneNames" in self:
+                self.remove_node("/lookup", "ZoneNames")
+            self.create_array("/lookup", "ZoneNames", self._zones, createparents=True)
 
     @property
     def matrix_levels(self) -> tuple[str]:
         """Names of all the matrix levels in the OMX file."""
+        if "/data" not in self:
+            return []
         return [n.name for n in self.list_nodes("/data", "Array")]
 
     def get_matrix_level(self, level_name: str) -> np.ndarray:
@@ -194,7 +199,37 @@ class OMXFile(tables.File):
         """
         return self.get_node("/data", level_name).read()
 
-    def set_matrix_level(self, level_name: str, matrix: np.ndarray) -> None:
+    def get_matrix_block(
+        self, level_name: str, rows: slice = slice(None), cols: slice = slice(None)
+    ) -> np.ndarray:
+        """Returns part of a single matrix level as an array.
+
+        Only the chunks containing the requested block are read
+        from disk.
+
+        Parameters
+        ----------
+        level_name : str
+            Name of the matrix level to read from.
+        rows : slice, default all rows
+            Rows of the matrix to return.
+        cols : slice, default all columns
+            Columns of the matrix to return.
+
+        Returns
+        -------
+        np.ndarray
+            2D block of the matrix level.
+        """
+        return self.get_node("/data", level_name)[rows, cols]
+
+    def set_matrix_level(
+        self,
+        level_name: str,
+        matrix: np.ndarray,
+        filters: tables.Filters = None,
+        chunkshape: tuple[int, int] = None,
+    ) -> None:
         """Sets matrix level in OMX file to given array.
 
         Parameters
@@ -203,6 +238,12 @@ class OMXFile(tables.File):
             Name of matrix level to set.
         matrix : np.ndarray
             Square array of matrix values.
+        filters : tables.Filters, optional
+            Compression to use for the matrix level, if given
+            the matrix is stored as a chunked array.
+        chunkshape : tuple[int, int], optional
+            Shape of the chunks to store the matrix in, only
+            used if `filters` is given.
 
         Raises
         ------
@@ -212,4 +253,17 @@ class OMXFile(tables.File):
         self._can_write("matrix level")
         if matrix.shape != self.shape:
             raise ValueError(f"matrix shape should be {self.shape} no {matrix.shape}")
-        self.create_array("/data", str(level_name), matrix)
+        level_name = str(level_name)
+        if level_name in self.matrix_levels:
+            self.remove_node("/data", level_name)
+        if filters is None:
+            self.create_array("/data", level_name, matrix, createparents=True)
+        else:
+            self.create_carray(
+                "/data",
+                level_name,
+                obj=matrix,
+                filters=filters,
+                chunkshape=chunkshape,
+                createparents=True,
+            )
@@ -32,6 +32,7 @@ from normits_demand import efs_constants as efs_consts
 from normits_demand.concurrency import multiprocessing
 
 from normits_demand.matrices import utils as mat_utils
+from normits_demand.matrices import matrix_store as mat_store
 from normits_demand.utils import general as du
 from normits_demand.utils import file_ops
 from normits_demand.utils import math_utils
@@ -443,11 +444,108 @@ def efs_build_tp_pa(
     )
 
 
+def phi_tensor(phi_factors: pd.DataFrame,
+               purpose: int,
+               tps: List[int],
+               ) -> np.ndarray:
+    """
+    Builds the tensor of phi factors for purpose
+
+    Parameters
+    ----------
+    phi_factors:
+        The phi factors, as returned by simplify_phi_factors().
+
+    purpose:
+        The from home purpose to get the phi factors for.
+
+    tps:
+        The time periods to build the tensor for.
+
+    Returns
+    -------
+    phi:
+        An array of shape (len(tps), len(tps)), where phi[f, t] is the factor
+        to get the to-home trips in time period tps[t] from the from-home
+        trips in time period tps[f].
+
+    Raises
+    ------
+    ValueError:
+        If there isn't a phi factor for every pair of time periods.
+    """
+    phi = phi_factors[phi_factors["purpose_from_home"] == purpose]
+    phi = phi.set_index(["time_from_home", "time_to_home"])["direction_factor"]
+    phi = phi.reindex(pd.MultiIndex.from_product([tps, tps]))
+
+    if phi.isna().any():
+        raise ValueError(
+            "Could not find a phi factor for every from-home, to-home time "
+            "period pair for purpose %s." % str(purpose)
+        )
+    return phi.to_numpy().reshape(len(tps), len(tps))
+
+
+def to_home_via_phi(fh_mats: np.ndarray, phi: np.ndarray) -> np.ndarray:
+    """
+    Builds to-home OD matrices from the from-home matrices in one contraction
+
+    to_home[t] = sum over f of (phi[f, t] * fh_mats[f].T)
+
+    Any leading dimensions are treated as a batch of segments, so many
+    segments can be converted at once.
+
+    Parameters
+    ----------
+    fh_mats:
+        The from-home matrices, stacked by time period. Of shape
+        (..., n_tp, n_zones, n_zones).
+
+    phi:
+        The phi factors, as returned by phi_tensor(). Of shape
+        (..., n_tp, n_tp).
+
+    Returns
+    -------
+    th_mats:
+        The to-home matrices, stacked by time period, in OD format.
+        The same shape as fh_mats.
+    """
+    return np.einsum("...ft,...fji->...tij", phi, fh_mats)
+
+
+def split_via_tp_factors(pa_24: np.ndarray, tp_factors: np.ndarray) -> np.ndarray:
+    """
+    Splits 24hr matrices into time periods in one contraction
+
+    split[t] = pa_24 * tp_factors[t]
+
+    Any leading dimensions are treated as a batch of segments, so many
+    segments can be converted at once.
+
+    Parameters
+    ----------
+    pa_24:
+        The 24hr matrices to split. Of shape (..., n_zones, n_zones).
+
+    tp_factors:
+        The splitting factors, stacked by time period. Of shape
+        (..., n_tp, n_zones, n_zones).
+
+    Returns
+    -------
+    split:
+        The time period split matrices, stacked by time period. The same
+        shape as tp_factors.
+    """
+    return np.einsum("...tij,...ij->...tij", tp_factors, pa_24)
+
+
 def _build_od_internal(
     pa_import,
     od_export,
     model_name,
-    calib_params,
+    calib_params_list,
     phi_lookup_folder,
     phi_type,
     aggregate_to_wday,
@@ -456,8 +554,12 @@ def _build_od_internal(
     echo=True,
 ):
     """
-    The internals of build_od(). Useful for making the code more
-    readable du to the number of nested loops needed
+    The internals of build_od(). Converts a batch of segments at once.
+
+    The from-home matrices of every segment in calib_params_list are stacked
+    by time period, and converted into to-home matrices in a single tensor
+    contraction, see to_home_via_phi(). Memory use grows with
+    len(calib_params_list).
 
     TODO: merge with TMS - NOTE:
     All this code below has been mostly copied from TMS pa_to_od.py
@@ -467,157 +569,122 @@ def _build_od_internal(
 
     Returns
     -------
-
+    matrix_totals:
+        A list of [pa_matrix_name, od_from_total, od_to_total] for each
+        time period of each segment.
     """
     # Init
     tps = ["tp1", "tp2", "tp3", "tp4"]
+    tp_ints = [int(x.replace("tp", "")) for x in tps]
     matrix_totals = list()
-    dir_contents = os.listdir(pa_import)
-    mode = calib_params["m"]
-    purpose = calib_params["p"]
+    dir_contents = mat_store.list_matrices(pa_import)
 
     model_zone_col = model_name + "_zone_id"
 
-    # Print out some info
-    dist_name = du.calib_params_to_dist_name("hb", "od", calib_params)
-    print("Generating %s..." % dist_name)
-
-    # Get appropriate phis and filter
-    phi_factors = get_time_period_splits(
-        mode, phi_type, aggregate_to_wday=aggregate_to_wday, lookup_folder=phi_lookup_folder
-    )
-    phi_factors = simplify_phi_factors(phi_factors)
-    phi_factors = phi_factors[phi_factors["purpose_from_home"] == purpose]
-
-    # Get the relevant filenames from the dir
-    dir_subset = dir_contents.copy()
-    for name, param in calib_params.items():
-        # Work around for 'p2' clashing with 'tp2'
-        if name == "p":
-            dir_subset = [x for x in dir_subset if "_" + name + str(param) in x]
-        else:
-            dir_subset = [x for x in dir_subset if (name + str(param)) in x]
-
-    # Build dict of tp names to filenames
-    tp_names = {}
-    for tp in tps:
-        tp_names.update({tp: [x for x in dir_subset if tp in x][0]})
-
-    # ## Build from_home dict from imported from_home PA ## #
-    frh_dist = {}
-    for tp, path in tp_names.items():
-        dist_df = pd.read_csv(os.path.join(pa_import, path))
-        zone_nums = dist_df[model_zone_col]  # Save to re-attach later
-        dist_df = dist_df.drop(model_zone_col, axis=1)
-        frh_dist.update({tp: dist_df})
+    # ## READ IN THE FROM HOME MATRICES AND PHIS ## #
+    phi_by_mode = dict()
+    phi = np.empty((len(calib_params_list), len(tps), len(tps)))
+    fh_mats = None
+    all_tp_names = list()
+    for seg_idx, calib_params in enumerate(calib_params_list):
+        mode = calib_params["m"]
+        purpose = calib_params["p"]
+
+        # Print out some info
+        dist_name = du.calib_params_to_dist_name("hb", "od", calib_params)
+        print("Generating %s..." % dist_name)
+
+        # Get appropriate phis and filter
+        if mode not in phi_by_mode:
+            phi_factors = get_time_period_splits(
+                mode,
+                phi_type,
+                aggregate_to_wday=aggregate_to_wday,
+                lookup_folder=phi_lookup_folder,
+            )
+            phi_by_mode[mode] = simplify_phi_factors(phi_factors)
+        phi[seg_idx] = phi_tensor(phi_by_mode[mode], purpose, tp_ints)
+
+        # Get the relevant filenames from the dir
+        dir_subset = dir_contents.copy()
+        for name, param in calib_params.items():
+            # Work around for 'p2' clashing with 'tp2'
+            if name == "p":
+                dir_subset = [x for x in dir_subset if "_" + name + str(param) in x]
+            else:
+                dir_subset = [x for x in dir_subset if (name + str(param)) in x]
+
+        # Build dict of tp names to filenames
+        tp_names = {}
+        for tp in tps:
+            tp_names.update({tp: [x for x in dir_subset if tp in x][0]})
+        all_tp_names.append(tp_names)
+
+        # ## Stack the imported from_home PA ## #
+        for tp_idx, tp in enumerate(tps):
+            dist_df = mat_store.read_matrix(os.path.join(pa_import, tp_names[tp]))
+
+            if fh_mats is None:
+                zone_nums = dist_df.index.to_series()  # Save to re-attach later
+                fh_mats = np.empty((len(calib_params_list), len(tps), *dist_df.shape))
+            elif dist_df.shape != fh_mats.shape[2:]:
+                raise nd.NormitsDemandError(
+                    "Cannot convert %s to OD. It is not the same shape as the "
+                    "other matrices being converted." % tp_names[tp]
+                )
+            fh_mats[seg_idx, tp_idx] = dist_df.to_numpy()
 
     # ## Build to_home matrices from the from_home PA ## #
-    frh_ph = {}
-    for tp_frh in tps:
-        du.print_w_toggle("From from_h " + str(tp_frh), verbose=echo)
-        frh_int = int(tp_frh.replace("tp", ""))
-        phi_frh = phi_factors[phi_factors["time_from_home"] == frh_int]
-
-        # Transpose to flip P & A
-        frh_base = frh_dist[tp_frh].copy()
-        frh_base = frh_base.values.T
-
-        toh_dists = {}
-        for tp_toh in tps:
-            # Get phi
-            du.print_w_toggle("\tBuilding to_h " + str(tp_toh), verbose=echo)
-            toh_int = int(tp_toh.replace("tp", ""))
-            phi_toh = phi_frh[phi_frh["time_to_home"] == toh_int]
-            phi_toh = phi_toh["direction_factor"]
-
-            # Cast phi toh
-            phi_mat = np.broadcast_to(phi_toh, (len(frh_base), len(frh_base)))
-            tp_toh_mat = frh_base * phi_mat
-            toh_dists.update({tp_toh: tp_toh_mat})
-        frh_ph.update({tp_frh: toh_dists})
-
-    # ## Aggregate to_home matrices by time period ## #
-    # removes the from_home splits
-    tp1_list = list()
-    tp2_list = list()
-    tp3_list = list()
-    tp4_list = list()
-    for item, toh_dict in frh_ph.items():
-        for toh_tp, toh_dat in toh_dict.items():
-            if toh_tp == "tp1":
-                tp1_list.append(toh_dat)
-            elif toh_tp == "tp2":
-                tp2_list.append(toh_dat)
-            elif toh_tp == "tp3":
-                tp3_list.append(toh_dat)
-            elif toh_tp == "tp4":
-                tp4_list.append(toh_dat)
-
-    toh_dist = {
-        "tp1": np.sum(tp1_list, axis=0),
-        "tp2": np.sum(tp2_list, axis=0),
-        "tp3": np.sum(tp3_list, axis=0),
-        "tp4": np.sum(tp4_list, axis=0),
-    }
+    du.print_w_toggle("Building to_home matrices", verbose=echo)
+    th_mats = to_home_via_phi(fh_mats, phi)
+
+    # Attach the zone_nums back on and round the outputs
+    def to_df(values):
+        return pd.DataFrame(
+            np.round(values, decimals=round_dp),
+            index=pd.Index(zone_nums.to_numpy(), name=model_zone_col),
+            columns=zone_nums.tolist(),
+        )
 
     # ## Output the from_home and to_home matrices ## #
-    for tp in tps:
-        # Get output matrices
-        output_name = tp_names[tp]
-
-        output_from = frh_dist[tp]
-        from_total = output_from.sum().sum()
-        output_from_name = output_name.replace("pa", "od_from")
-
-        output_to = toh_dist[tp]
-        to_total = output_to.sum().sum()
-        output_to_name = output_name.replace("pa", "od_to")
-
-        # ## Gotta fudge the row/column names ## #
-        # Add the zone_nums back on
-        output_from = pd.DataFrame(output_from).reset_index()
-        # noinspection PyUnboundLocalVariable
-        output_from["index"] = zone_nums
-        output_from.columns = [model_zone_col] + zone_nums.tolist()
-        output_from = output_from.set_index(model_zone_col)
-
-        output_to = pd.DataFrame(output_to).reset_index()
-        output_to["index"] = zone_nums
-        output_to.columns = [model_zone_col] + zone_nums.tolist()
-        output_to = output_to.set_index(model_zone_col)
-
-        # With columns fixed, created full OD output
-        output_od = output_from + output_to
-        output_od_name = output_name.replace("pa", "od")
-
-        du.print_w_toggle("Exporting " + output_from_name, verbose=echo)
-        du.print_w_toggle("& " + output_to_name, verbose=echo)
-        if full_od_out:
-            du.print_w_toggle("& " + output_od_name, verbose=echo)
-        du.print_w_toggle("To " + od_export, verbose=echo)
-
-        # Output from_home, to_home and full OD matrices
-        output_from_path = os.path.join(od_export, output_from_name)
-        output_to_path = os.path.join(od_export, output_to_name)
-        output_od_path = os.path.join(od_export, output_od_name)
-
-        # Round the outputs
-        output_from = output_from.round(decimals=round_dp)
-        output_to = output_to.round(decimals=round_dp)
-        output_od = output_od.round(decimals=round_dp)
-
-        # BACKLOG: Add tidality checks into efs_build_od()
-        #  labels: demand merge, audits, EFS
-        # Auditing checks - tidality
-        # OD from = PA
-        # OD to = if it leaves it should come back
-        # OD = 2(PA)
-        output_from.to_csv(output_from_path)
-        output_to.to_csv(output_to_path)
-        if full_od_out:
-            output_od.to_csv(output_od_path)
-
-        matrix_totals.append([output_name, from_total, to_total])
+    for seg_idx, tp_names in enumerate(all_tp_names):
+        for tp_idx, tp in enumerate(tps):
+            # Get output matrices
+            output_name = tp_names[tp]
+
+            output_from = fh_mats[seg_idx, tp_idx]
+            from_total = output_from.sum()
+            output_from_name = output_name.replace("pa", "od_from")
+
+            output_to = th_mats[seg_idx, tp_idx]
+            to_total = output_to.sum()
+            output_to_name = output_name.replace("pa", "od_to")
+
+            output_od_name = output_name.replace("pa", "od")
+
+            du.print_w_toggle("Exporting " + output_from_name, verbose=echo)
+            du.print_w_toggle("& " + output_to_name, verbose=echo)
+            if full_od_out:
+                du.print_w_toggle("& " + output_od_name, verbose=echo)
+            du.print_w_toggle("To " + od_export, verbose=echo)
+
+            # Output from_home, to_home and full OD matrices
+            output_from_path = os.path.join(od_export, output_from_name)
+            output_to_path = os.path.join(od_export, output_to_name)
+            output_od_path = os.path.join(od_export, output_od_name)
+
+            # BACKLOG: Add tidality checks into efs_build_od()
+            #  labels: demand merge, audits, EFS
+            # Auditing checks - tidality
+            # OD from = PA
+            # OD to = if it leaves it should come back
+            # OD = 2(PA)
+            mat_store.write_matrix(to_df(output_from), output_from_path)
+            mat_store.write_matrix(to_df(output_to), output_to_path)
+            if full_od_out:
+                mat_store.write_matrix(to_df(output_from + output_to), output_od_path)
+
+            matrix_totals.append([output_name, from_total, to_total])
 
     return matrix_totals
 
@@ -638,6 +705,7 @@ def efs_build_od(
     verbose: bool = True,
     round_dp: int = consts.DEFAULT_ROUNDING,
     process_count: int = consts.PROCESS_COUNT,
+    segment_batch_size: int = 1,
 ) -> None:
     """
      This function imports time period split factors from a given path.
@@ -645,8 +713,12 @@ def efs_build_od(
 
     Parameters
     ----------
-    pa_import
-    od_export
+    pa_import:
+        The directory, or MatrixStore, containing the PA matrices.
+
+    od_export:
+        The directory, or MatrixStore, to write the OD matrices to.
+
     model_name
     p_needed
     m_needed
@@ -667,6 +739,11 @@ def efs_build_od(
         use multiprocessing at all. Set to -1 to use all expect 1 available
         CPU.
 
+    segment_batch_size:
+        The number of segments each process converts at once. Each process
+        holds roughly 3 * 4 * segment_batch_size matrices in memory, so keep
+        this low for large zone systems.
+
     Returns
     -------
     None
@@ -691,7 +768,7 @@ def efs_build_od(
     }
 
     # Build a list of the changing arguments
-    kwargs_list = list()
+    all_calib_params = list()
     for year in years_needed:
         loop_generator = du.cp_segmentation_loop_generator(
             p_needed, m_needed, soc_needed, ns_needed, ca_needed
@@ -699,11 +776,15 @@ def efs_build_od(
 
         for calib_params in loop_generator:
             calib_params["yr"] = year
-            kwargs = unchanging_kwargs.copy()
-            kwargs.update(
-                {"calib_params": calib_params,}
-            )
-            kwargs_list.append(kwargs)
+            all_calib_params.append(calib_params)
+
+    kwargs_list = list()
+    for i in range(0, len(all_calib_params), segment_batch_size):
+        kwargs = unchanging_kwargs.copy()
+        kwargs.update(
+            {"calib_params_list": all_calib_params[i:i + segment_batch_size]}
+        )
+        kwargs_list.append(kwargs)
 
     # Multiprocess - split by time period and write to disk
     matrix_totals = multiprocessing.multiprocess(
@@ -789,19 +870,23 @@ def to_od_via_tour_props(
         factor_dict=th_factor_dict, tp_needed=tp_needed, n_row_col=n_od_vals,
     )
 
-    # Create the from home OD matrices
-    fh_mats = dict.fromkeys(fh_factor_dict.keys())
-    for tp, factor_mat in fh_factor_dict.items():
-        fh_mats[tp] = pa_24 * factor_mat
+    # Create the from home and to home OD matrices in one contraction
+    tps = list(fh_factor_dict.keys())
+    factors = np.stack(
+        [np.asarray(fh_factor_dict[tp]) for tp in tps]
+        + [np.asarray(th_factor_dict[tp]) for tp in tps]
+    )
+    od_mats = split_via_tp_factors(pa_24.to_numpy(), factors)
+
+    def to_df(values):
+        return pd.DataFrame(values, index=pa_24.index, columns=pa_24.columns)
 
-    # Create the to home OD matrices
-    th_mats = dict.fromkeys(th_factor_dict.keys())
-    for tp, factor_mat in th_factor_dict.items():
-        th_mats[tp] = pa_24 * factor_mat
+    fh_mats = {tp: to_df(od_mats[i]) for i, tp in enumerate(tps)}
+    th_mats = {tp: to_df(od_mats[len(tps) + i]) for i, tp in enumerate(tps)}
 
     # Validate return matrix totals
-    fh_total = np.sum([x.values.sum() for x in fh_mats.values()])
-    th_total = np.sum([x.values.sum() for x in th_mats.values()])
+    fh_total = od_mats[:len(tps)].sum()
+    th_total = od_mats[len(tps):].sum()
     od_total = fh_total + th_total
 
     # From home and to home should be the same total
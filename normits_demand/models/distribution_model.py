@@ -29,6 +29,7 @@ from normits_demand import constants
 
 from normits_demand.utils import timing
 from normits_demand.utils import file_ops
+from normits_demand.utils import checkpoint
 from normits_demand.utils import translation
 from normits_demand.utils import vehicle_occupancy
 from normits_demand.utils import general as du
@@ -57,6 +58,12 @@ class DistributionModel(DistributionModelExportPaths):
 
     _dist_overall_log_name = '{trip_origin}_overall_log.csv'
 
+    # Checkpoint stage names
+    _upper_model_stage = 'upper_model'
+    _lower_model_stage = 'lower_model'
+    _pa_to_od_stage = 'pa_to_od'
+    _all_segments_key = 'all_segments'
+
     # Trip End cache constants
 
     def __init__(self,
@@ -189,6 +196,7 @@ class DistributionModel(DistributionModelExportPaths):
             run_pa_matrix_reports: bool = False,
             run_pa_to_od: bool = False,
             run_od_matrix_reports: bool = False,
+            resume: bool = False,
             ) -> None:
         """Runs the components of Distribution Model
 
@@ -241,6 +249,13 @@ class DistributionModel(DistributionModelExportPaths):
             Sector Reports - by segment
             TLD curve by segment and in single mile bands.
 
+        resume:
+            Whether to resume a previous run or not. Each stage writes a
+            checkpoint manifest to self.cache_paths.checkpoints as it
+            completes each segment. When resuming, any segments whose
+            outputs still exist, and whose inputs have not changed since
+            they were completed, are skipped.
+
         Returns
         -------
         None
@@ -263,6 +278,7 @@ class DistributionModel(DistributionModelExportPaths):
         self._logger.debug("Running pa matrix reports: %s" % run_pa_matrix_reports)
         self._logger.debug("Running pa to od: %s" % run_pa_to_od)
         self._logger.debug("Running od matrix reports: %s" % run_od_matrix_reports)
+        self._logger.debug("Resuming previous run: %s" % resume)
         self._logger.debug("")
 
         # Check that we are actually running something
@@ -273,16 +289,16 @@ class DistributionModel(DistributionModelExportPaths):
 
         # Run the models
         if run_upper_model:
-            self.run_upper_model()
+            self.run_upper_model(resume=resume)
 
         if run_lower_model:
-            self.run_lower_model()
+            self.run_lower_model(resume=resume)
 
         if run_pa_matrix_reports:
             self.run_pa_matrix_reports()
 
         if run_pa_to_od:
-            self.run_pa_to_od()
+            self.run_pa_to_od(resume=resume)
 
         if run_od_matrix_reports:
             self.run_od_matrix_reports()
@@ -292,7 +308,15 @@ class DistributionModel(DistributionModelExportPaths):
         time_taken = timing.time_taken(start_time, end_time)
         self._logger.info("Distribution Model run complete! Took %s" % time_taken)
 
-    def run_upper_model(self):
+    def _get_stage_checkpoint(self, stage: str, resume: bool) -> checkpoint.StageCheckpoint:
+        """Gets the checkpoint manifest of stage"""
+        return checkpoint.StageCheckpoint(
+            checkpoint_dir=self.cache_paths.checkpoints,
+            stage=stage,
+            resume=resume,
+        )
+
+    def run_upper_model(self, resume: bool = False):
         self._logger.info("Building arguments for the Upper Model")
         kwargs = self.arg_builder.build_upper_model_arguments(
             cache_dir=self.cache_paths.upper_trip_ends,
@@ -323,10 +347,13 @@ class DistributionModel(DistributionModelExportPaths):
         )
 
         self._logger.info("Running the Upper Model")
-        upper_model.distribute(**kwargs)
+        upper_model.distribute(
+            checkpoint=self._get_stage_checkpoint(self._upper_model_stage, resume),
+            **kwargs,
+        )
         self._logger.info("Upper Model Done!")
 
-    def run_lower_model(self):
+    def run_lower_model(self, resume: bool = False):
         if self.lower_model_method is None:
             self._logger.info(
                 "Cannot run Lower Model as no method has been given to run "
@@ -363,7 +390,10 @@ class DistributionModel(DistributionModelExportPaths):
         })
 
         self._logger.info("Running the Lower Model")
-        lower_model.distribute(**kwargs)
+        lower_model.distribute(
+            checkpoint=self._get_stage_checkpoint(self._lower_model_stage, resume),
+            **kwargs,
+        )
         self._logger.info("Lower Model Done!")
 
     def run_pa_matrix_reports(self):
@@ -489,16 +519,44 @@ class DistributionModel(DistributionModelExportPaths):
 
         return out_dir
 
-    def run_pa_to_od(self):
+    def run_pa_to_od(self, resume: bool = False):
         # TODO(BT): Make sure the upper and lower matrices exist!
 
         # ## GET THE FULL PA MATRICES ## #
         self._recombine_pa_matrices()
 
+        # ## SKIP IF THE PA MATRICES AND FACTORS HAVEN'T CHANGED ## #
+        stage_checkpoint = self._get_stage_checkpoint(self._pa_to_od_stage, resume)
+        pa_paths = du.list_files(self.export_paths.full_pa_dir, include_path=True)
+
+        # Only HB conversion reads the tour proportion factors
+        pa_to_od_kwargs = None
+        factor_paths = list()
+        if self.trip_origin == 'hb':
+            pa_to_od_kwargs = self.arg_builder.build_pa_to_od_arguments()
+            factor_paths = du.list_files(
+                pa_to_od_kwargs['fh_th_factors_dir'],
+                include_path=True,
+            )
+
+        input_hash = checkpoint.hash_inputs(
+            self.trip_origin,
+            self.year,
+            checkpoint.hash_files(sorted(pa_paths)),
+            pa_to_od_kwargs,
+            checkpoint.hash_files(sorted(factor_paths)),
+        )
+        if stage_checkpoint.is_complete(self._all_segments_key, input_hash):
+            self._logger.info(
+                "PA matrices are unchanged since the last PA to OD conversion. "
+                "Skipping."
+            )
+            return
+        stage_checkpoint.mark_started(self._all_segments_key, input_hash)
+
         # ## CONVERT HB PA TO OD ## #
         if self.trip_origin == 'hb':
             self._logger.info("Converting HB PA matrices to OD")
-            kwargs = self.arg_builder.build_pa_to_od_arguments()
             pa_to_od.build_od_from_fh_th_factors(
                 pa_import=self.export_paths.full_pa_dir,
                 od_export=self.export_paths.full_od_dir,
@@ -507,7 +565,7 @@ class DistributionModel(DistributionModelExportPaths):
                 od_from_matrix_desc=self._od_from_matrix_desc,
                 base_year=self.year,
                 years_needed=[self.year],
-                **kwargs
+                **pa_to_od_kwargs
             )
 
         # ## MOVE NHB TO OD DIR ## #
@@ -528,6 +586,12 @@ class DistributionModel(DistributionModelExportPaths):
                 "'%s'." % self.trip_origin
             )
 
+        stage_checkpoint.mark_complete(
+            key=self._all_segments_key,
+            input_hash=input_hash,
+            output_paths=du.list_files(self.export_paths.full_od_dir, include_path=True),
+        )
+
     def run_od_matrix_reports(self):
         # PA RUN REPORTS
         # Matrix Trip ENd totals
@@ -36,6 +36,7 @@ from normits_demand.utils import general as du
 from normits_demand.utils import file_ops
 from normits_demand.models import efs_zone_translator as zt
 from normits_demand.concurrency import multiprocessing
+from normits_demand.concurrency import communication
 from normits_demand.elasticity import utils as eu
 from normits_demand.elasticity import generalised_costs as gc
 from normits_demand.elasticity import constants as ec
@@ -151,6 +152,9 @@ class ElasticityModel:
         else:
             self.common_zone_system = common_zone_system
 
+        # Zone lookups are cached in each process once read
+        self._zone_lookups = dict()
+
         # Set up the cost builder
         self.cost_builder = gc.CostBuilder(
             base_year=self.base_year,
@@ -167,6 +171,12 @@ class ElasticityModel:
 
         Segment information is read from `SEGMENTS_FILE` which is
         expected to be found in elasticity folder given.
+
+        Inputs shared between segments and years are only read once.
+        The elasticities are read once and filtered once per elasticity
+        segment. The constraint matrices and base costs are read once and
+        published into shared memory for every process to use. Each process
+        then runs all the future years of a single segment.
         """
         # Read in the cost changes
         print("Reading in the cost changes...")
@@ -176,22 +186,58 @@ class ElasticityModel:
         # Read in the segments to loop around
         segments = eu.read_segments_file(self.import_home / self._segments_filename)
 
-        # Set up the arguments for each iteration
-        kwarg_list = list()
-        print("Setting up arguments...")
-        for _, row in segments.iterrows():
-            for yr in self.future_years:
+        # Read in everything shared between segments once
+        print("Reading in the shared inputs...")
+        elasticities = self._read_elasticities(segments)
+
+        path = self.import_home / self._constraints_folder
+        needed_mats = cost_changes["adj_type"].unique().tolist()
+        constraint_mats = eu.get_constraint_mats(path, needed_mats)
+
+        raw_costs = dict()
+        for purpose in segments["p"].unique():
+            for m in ec.MODE_ZONE_SYSTEM:
+                fname = self._base_costs_fname.format(mode=m, purpose=purpose)
+                raw_costs[(str(purpose), m)] = gc.read_cost_file(
+                    self.cost_dirs[m] / fname,
+                    m,
+                )
+
+        # Set up the arguments for each future year
+        year_kwargs = list()
+        for yr in self.future_years:
+            year_kwargs.append({
+                'future_year': int(yr),
+                'future_gc_params': scalar_costs[yr],
+                'cost_changes': cost_changes.loc[cost_changes["yr"] == yr],
+            })
+
+        with communication.SharedDataFramePublisher() as publisher:
+            constraint_handles = {
+                k: publisher.publish(pd.DataFrame(v))
+                for k, v in constraint_mats.items()
+            }
+            cost_handles = {
+                k: publisher.publish(v.astype(float))
+                for k, v in raw_costs.items()
+            }
+            del constraint_mats, raw_costs
+
+            # Set up the arguments for each segment
+            kwarg_list = list()
+            print("Setting up arguments...")
+            for _, row in segments.iterrows():
                 # Grab the elasticity params from the file
                 elasticity_params = {
                     "purpose": str(row["elast_p"]),
                     "market_share": row["elast_market_share"],
                 }
+                elast_key = tuple(elasticity_params.values())
 
                 # Grab the segment params from the file
                 demand_seg_params = {
                     "trip_origin": row["trip_origin"],
                     "matrix_format": "pa",
-                    "year": yr,
                     "purpose": str(row["p"]),
                 }
                 if row["p"] in consts.SOC_P:
@@ -210,30 +256,137 @@ class ElasticityModel:
                 kwarg_list.append({
                     'demand_params': demand_seg_params,
                     'elasticity_params': elasticity_params,
+                    'elasticities': elasticities[elast_key],
                     'base_year_gc_params': scalar_costs[str(self.base_year)][uc],
-                    'future_gc_params': scalar_costs[yr][uc],
-                    'cost_changes': cost_changes.loc[cost_changes["yr"] == yr],
-                    'future_year': int(yr),
+                    'user_class': uc,
+                    'year_kwargs': year_kwargs,
+                    'constraint_handles': constraint_handles,
+                    'cost_handles': {
+                        m: cost_handles[(demand_seg_params["purpose"], m)]
+                        for m in ec.MODE_ZONE_SYSTEM
+                    },
                     'fname_suffix': '_int',
                 })
 
-        # Set up progress bar kwargs to track
-        pbar_kwargs = {
-            'total': len(segments) * len(self.future_years),
-            'desc': "Applying elasticities to segments",
-            'unit': "segment",
-            'colour': 'cyan',
-        }
+            # Set up progress bar kwargs to track
+            pbar_kwargs = {
+                'total': len(segments),
+                'desc': "Applying elasticities to segments",
+                'unit': "segment",
+                'colour': 'cyan',
+            }
 
-        # Call the functions
-        print("Running!")
-        multiprocessing.multiprocess(
-            fn=self.apply_elasticities,
-            kwargs=kwarg_list,
-            pbar_kwargs=pbar_kwargs,
-            process_count=process_count,
+            # Call the functions
+            print("Running!")
+            multiprocessing.multiprocess(
+                fn=self._apply_segment_all_years,
+                kwargs=kwarg_list,
+                pbar_kwargs=pbar_kwargs,
+                process_count=process_count,
+            )
+
+    def _read_elasticities(self, segments: pd.DataFrame) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """Reads the elasticities file once, filtering for each elasticity segment.
+
+        Parameters
+        ----------
+        segments : pd.DataFrame
+            The segments, as read by `eu.read_segments_file`.
+
+        Returns
+        -------
+        Dict[Tuple[str, str], pd.DataFrame]
+            The elasticities for each (elast_p, elast_market_share) in
+            segments.
+        """
+        all_elasticities = eu.read_elasticity_file(
+            self.import_home / self._elasticities_filename
         )
 
+        elasticities = dict()
+        elast_segments = segments[["elast_p", "elast_market_share"]].drop_duplicates()
+        for elast_p, market_share in elast_segments.itertuples(index=False, name=None):
+            elasticities[(str(elast_p), market_share)] = eu.read_elasticity_file(
+                all_elasticities,
+                purpose=str(elast_p),
+                market_share=market_share,
+            )
+        return elasticities
+
+    def _apply_segment_all_years(self,
+                                 demand_params: Dict[str, str],
+                                 elasticity_params: Dict[str, str],
+                                 elasticities: pd.DataFrame,
+                                 base_year_gc_params: Dict[str, Dict[str, float]],
+                                 user_class: str,
+                                 year_kwargs: List[Dict],
+                                 constraint_handles: Dict[str, communication.SharedDataFrameHandle],
+                                 cost_handles: Dict[str, communication.SharedDataFrameHandle],
+                                 fname_suffix: str = None,
+                                 ) -> None:
+        """Performs elasticity calculations for every future year of a segment.
+
+        The internal function of `apply_all_MP`. The shared inputs are
+        attached to once and reused for every year.
+
+        Parameters
+        ----------
+        demand_params : Dict[str, str]
+            Parameters to define what demand matrix to use, see
+            `apply_elasticities`. The year is added for each future year.
+
+        elasticity_params : Dict[str, str]
+            Parameters which define the elasticities of this segment, see
+            `apply_elasticities`.
+
+        elasticities : pd.DataFrame
+            The elasticities for this segment.
+
+        base_year_gc_params : Dict[str, Dict[str, float]]
+            Parameters used in the generalised cost calculations, see
+            `apply_elasticities`.
+
+        user_class : str
+            The user class of this segment, used to pick the future year
+            generalised cost parameters.
+
+        year_kwargs : List[Dict]
+            For each future year, a dictionary with the keys 'future_year',
+            'future_gc_params' (for all user classes) and 'cost_changes'.
+
+        constraint_handles : Dict[str, communication.SharedDataFrameHandle]
+            Handles to the shared constraint matrices.
+
+        cost_handles : Dict[str, communication.SharedDataFrameHandle]
+            Handles to the shared base costs for each mode, as read by
+            `gc.read_cost_file`.
+
+        fname_suffix:
+            An optional suffix to add onto the filename when searching for
+            the demand to read in.
+        """
+        constraint_mats = {k: v.get_values() for k, v in constraint_handles.items()}
+
+        # Costs were shared as floats, zone IDs need to be integers again
+        raw_costs = dict()
+        for m, handle in cost_handles.items():
+            zone_cols = [ec.COST_LOOKUP[m][c] for c in ("origin", "destination")]
+            raw_costs[m] = handle.get_df().astype({c: int for c in zone_cols})
+
+        for kwargs in year_kwargs:
+            self.apply_elasticities(
+                demand_params={**demand_params, "year": kwargs["future_year"]},
+                elasticity_params=elasticity_params,
+                base_year_gc_params=base_year_gc_params,
+                future_gc_params=kwargs["future_gc_params"][user_class],
+                cost_changes=kwargs["cost_changes"],
+                future_year=kwargs["future_year"],
+                fname_suffix=fname_suffix,
+                elasticities=elasticities,
+                constraint_mats=constraint_mats,
+                raw_costs=raw_costs,
+            )
+
     def apply_all(self):
         """Performs elasticity calculations for all segments provided.
 
@@ -325,6 +478,9 @@ class ElasticityModel:
                            cost_changes: pd.DataFrame,
                            future_year: int,
                            fname_suffix: str = None,
+                           elasticities: pd.DataFrame = None,
+                           constraint_mats: Dict[str, np.ndarray] = None,
+                           raw_costs: Dict[str, pd.DataFrame] = None,
                            ) -> Dict[str, pd.DataFrame]:
         """Performs elasticity calculation for a single EFS segment.
 
@@ -382,16 +538,29 @@ class ElasticityModel:
             An optional suffix to add onto the filename when searching for
             the demand to read in.
 
+        elasticities:
+            The elasticities to use, already filtered to elasticity_params.
+            If None, they are read in using elasticity_params.
+
+        constraint_mats:
+            The constraint matrices to use, must contain every adj_type in
+            cost_changes. If None, they are read in.
+
+        raw_costs:
+            The base costs for each mode, as read by `gc.read_cost_file`.
+            If None, they are read in.
+
         Returns
         -------
         Dict[str, pd.DataFrame]
             The adjusted demand for all modes.
         """
         # Init
-        elasticities = eu.read_elasticity_file(
-            self.import_home / self._elasticities_filename,
-            **elasticity_params,
-        )
+        if elasticities is None:
+            elasticities = eu.read_elasticity_file(
+                self.import_home / self._elasticities_filename,
+                **elasticity_params,
+            )
 
         # ## CHECK THE ELASTICITIES WE WANT EXIST ## #
         to_use = cost_changes["e_type"].unique()
@@ -405,9 +574,10 @@ class ElasticityModel:
             )
 
         # ## LOAD IN THE CONSTRAINT MATRICES ## #
-        path = self.import_home / self._constraints_folder
-        needed_mats = cost_changes["adj_type"].unique().tolist()
-        constraint_mats = eu.get_constraint_mats(path, needed_mats)
+        if constraint_mats is None:
+            path = self.import_home / self._constraints_folder
+            needed_mats = cost_changes["adj_type"].unique().tolist()
+            constraint_mats = eu.get_constraint_mats(path, needed_mats)
 
         # ## LOAD IN DEMAND FOR THIS SEGMENT ## #
         # common format and retain the translations to get back to original formats
@@ -425,7 +595,8 @@ class ElasticityModel:
         }
         base_costs = self._get_costs(
             purpose=demand_params["purpose"],
-            translation_weights=translation_weights
+            translation_weights=translation_weights,
+            raw_costs=raw_costs,
         )
         del car_original_mat
 
@@ -575,8 +746,14 @@ class ElasticityModel:
             )
             path = zone_translation_folder / fname
 
-            # Load in the translation file
-            translation = pd.read_csv(path, usecols=dtypes.keys(), dtype=dtypes)
+            # Load in the translation file, once per process
+            if path not in self._zone_lookups:
+                self._zone_lookups[path] = pd.read_csv(
+                    path,
+                    usecols=dtypes.keys(),
+                    dtype=dtypes,
+                )
+            translation = self._zone_lookups[path].copy()
             cols = [f"{from_zone}_zone_id", f"{self.common_zone_system}_zone_id"]
 
             # Try to translate!
@@ -718,6 +895,7 @@ class ElasticityModel:
     def _get_costs(self,
                    purpose: int,
                    translation_weights: Dict[str, pd.DataFrame],
+                   raw_costs: Dict[str, pd.DataFrame] = None,
                    ) -> Dict[str, pd.DataFrame]:
         """Read the cost files for each mode in `ec.MODE_ZONE_SYSTEM`.
 
@@ -732,6 +910,10 @@ class ElasticityModel:
         translation_weights : Dict[str, pd.DataFrame]
             Weights for zone translation.
 
+        raw_costs : Dict[str, pd.DataFrame], optional
+            The costs for each mode, as read by `gc.read_cost_file`. If
+            None, the costs are read from file.
+
         Returns
         -------
         Dict[str, pd.DataFrame]
@@ -739,17 +921,34 @@ class ElasticityModel:
         """
         costs = dict()
         for m, zone in ec.MODE_ZONE_SYSTEM.items():
-            # Get the path for this mode and purpose
-            fname = self._base_costs_fname.format(mode=m, purpose=purpose)
-            path = self.cost_dirs[m] / fname
+            if raw_costs is not None:
+                cost_file = raw_costs[m]
+            else:
+                # Get the path for this mode and purpose
+                fname = self._base_costs_fname.format(mode=m, purpose=purpose)
+                cost_file = self.cost_dirs[m] / fname
+
+            # Read the zone lookup once per process
+            zone_lookup = None
+            if zone != ec.COMMON_ZONE_SYSTEM:
+                key = (zone, ec.COMMON_ZONE_SYSTEM)
+                if key not in self._zone_lookups:
+                    self._zone_lookups[key] = du.get_zone_translation(
+                        import_dir=self.zone_translation_folder,
+                        from_zone=zone,
+                        to_zone=ec.COMMON_ZONE_SYSTEM,
+                        return_dataframe=True,
+                    )
+                zone_lookup = self._zone_lookups[key].copy()
 
             # Load in the costs, translate if needed
             costs[m] = gc.get_costs(
-                path,
+                cost_file,
                 m,
                 zone,
                 self.zone_translation_folder,
-                translation_weights.get(m)
+                translation_weights.get(m),
+                zone_lookup=zone_lookup,
             )
 
         # Add in Bus, Active or Non-travel as 1.0 as default
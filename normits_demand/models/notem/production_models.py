@@ -283,31 +283,35 @@ class HBProductionModel(HBProductionModelPaths):
                 )
 
             # ## SPLIT PURE DEMAND BY MODE AND TIME ## #
+            # Fully segmented demand is only built if it needs exporting,
+            # otherwise it is aggregated as the splits are applied
             self._logger.info("Splitting by mode and time")
             fully_segmented = self._split_by_tp_and_mode(pure_demand)
 
-            # ## PRODUCTIONS TOTAL CHECK ## #
-            if not pure_demand.sum_is_close(fully_segmented):
-                msg = (
-                    "The production totals before and after mode time split are not same.\n"
-                    "Expected %f\n"
-                    "Got %f"
-                    % (pure_demand.sum(), fully_segmented.sum())
-                )
-                self._logger.warning(msg)
-                warnings.warn(msg)
-
             # Output productions before any aggregation
             if export_fully_segmented:
                 self._logger.info("Exporting fully segmented productions to disk.")
+                fully_segmented = fully_segmented.evaluate()
                 fully_segmented.save(self.export_paths.fully_segmented[year])
+                fully_segmented = fully_segmented.lazy()
 
             # ## AGGREGATE INTO RETURN SEGMENTATION ## #
             return_seg = nd.get_segmentation_level(self._return_segmentation_name)
             productions = fully_segmented.aggregate(
                 out_segmentation=return_seg,
                 split_tfntt_segmentation=True
-            )
+            ).evaluate()
+
+            # ## PRODUCTIONS TOTAL CHECK ## #
+            if not pure_demand.sum_is_close(productions):
+                msg = (
+                    "The production totals before and after mode time split are not same.\n"
+                    "Expected %f\n"
+                    "Got %f"
+                    % (pure_demand.sum(), productions.sum())
+                )
+                self._logger.warning(msg)
+                warnings.warn(msg)
 
             if self.adjustment_factors is not None:
                 self._logger.info("Exporting pre-adjustment notem segmented demand to disk")
@@ -438,7 +442,7 @@ class HBProductionModel(HBProductionModelPaths):
 
     def _split_by_tp_and_mode(self,
                               pure_demand: nd.DVector,
-                              ) -> nd.DVector:
+                              ) -> nd.LazyDVector:
         """
         Applies time period and mode splits to the given pure demand.
 
@@ -450,7 +454,8 @@ class HBProductionModel(HBProductionModelPaths):
         Returns
         -------
         full_segmented_demand:
-            A DVector containing pure_demand split by mode and time.
+            A LazyDVector containing pure_demand split by mode and time.
+            Call evaluate() on this to build the DVector.
         """
         # Define the segmentation we want to use
         m_tp_splits_seg = nd.get_segmentation_level('notem_hb_productions_full_tfnat')
@@ -471,10 +476,7 @@ class HBProductionModel(HBProductionModelPaths):
             val_col="split",
         )
 
-        return pure_demand.multiply_and_aggregate(
-            other=mode_time_splits_dvec,
-            out_segmentation=full_seg,
-        )
+        return pure_demand.lazy().multiply(mode_time_splits_dvec).aggregate(full_seg)
 
     def _trip_end_adjustment(self, trip_ends: nd.DVector) -> nd.DVector:
         """Multiply `trip_ends` by `adjustment_factors`.
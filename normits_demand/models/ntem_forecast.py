@@ -21,7 +21,7 @@ from normits_demand import core as nd_core
 from normits_demand import efs_constants as efs_consts
 from normits_demand.distribution import furness
 from normits_demand.models.tempro_trip_ends import NTEMForecastError, TEMProTripEnds
-from normits_demand.matrices import pa_to_od, matrix_processing
+from normits_demand.matrices import pa_to_od, matrix_processing, matrix_store
 
 ##### CONSTANTS #####
 LOG = nd_log.get_logger(__name__)
@@ -440,7 +440,8 @@ def grow_matrix(
         Trip matrix for base year, columns and index
         should be zone numbers.
     output_path : Path
-        Path to save the output file to.
+        Path to save the output file to, can be a segment
+        in a `MatrixStore` e.g. `matrices.h5/segment.csv`.
     segment_name : str
         Name of the segment being grown, format
         `{purpose}_{mode}` e.g. `2_3`.
@@ -506,13 +507,17 @@ def grow_matrix(
     combined_future.sort_index(axis=1, inplace=True)
     _check_matrix(combined_future, output_path.stem)
     # Write future to file
-    file_ops.write_df(combined_future, output_path)
+    matrix_store.write_matrix(combined_future, output_path)
     LOG.info("Written: %s", output_path)
+    comparison_path = output_path.with_name(output_path.stem + "-growth_comparison.xlsx")
+    if matrix_store.is_matrix_store(output_path.parent):
+        # Write alongside the store, not inside it
+        comparison_path = output_path.parent.parent / comparison_path.name
     _pa_growth_comparison(
         {"base": matrix, "forecast": combined_future},
         {"attractions": growth["col_targets"], "productions": growth["row_targets"]},
         internals,
-        output_path.with_name(output_path.stem + "-growth_comparison.xlsx"),
+        comparison_path,
     )
     return combined_future
 
@@ -636,7 +641,8 @@ def grow_all_matrices(
     model : str
         Name of the model e.g. 'noham'.
     output_folder : Path
-        Path to folder for saving the output matrices.
+        Path to folder for saving the output matrices, or
+        path to a `MatrixStore` to save them in.
 
     Raises
     ------
@@ -652,11 +658,14 @@ def grow_all_matrices(
         "hb": (matrices.hb_paths, growth.hb_attractions, growth.hb_productions,),
         "nhb": (matrices.nhb_paths, growth.nhb_attractions, growth.nhb_productions,),
     }
-    output_folder.mkdir(exist_ok=True, parents=True)
+    if matrix_store.is_matrix_store(output_folder):
+        output_folder.parent.mkdir(exist_ok=True, parents=True)
+    else:
+        output_folder.mkdir(exist_ok=True, parents=True)
     for hb, (paths, attractions, productions) in iterator.items():
         for purp, path in paths.items():
             LOG.info("Reading base year matrix: %s", path)
-            base = file_ops.read_df(path, find_similar=True, index_col=0)
+            base = matrix_store.read_matrix(path, find_similar=True)
             base.columns = pd.to_numeric(base.columns, downcast="integer")
             for yr, attr in attractions.items():
                 LOG.info("Growing %s to %s", path.stem, yr)
@@ -65,6 +65,7 @@ _DistributorExportPaths_NT = collections.namedtuple(
     field_names=[
         'home',
         'matrix_dir',
+        'cache_dir',
     ]
 )
 
@@ -75,6 +76,7 @@ _DM_CachePaths_NT = collections.namedtuple(
         'home',
         'upper_trip_ends',
         'lower_trip_ends',
+        'checkpoints',
     ]
 )
 
@@ -1116,6 +1118,7 @@ class DistributorExportPaths:
 
     # Output dir names
     _matrix_out_dir = 'Matrices'
+    _cache_out_dir = 'Cache'
 
     # Report dir names
     _overall_log_name = '{trip_origin}_overall_log.csv'
@@ -1150,6 +1153,9 @@ class DistributorExportPaths:
         # Build the matrix output path
         matrix_dir = os.path.join(self.export_home, self._matrix_out_dir)
 
+        # Only made when something needs caching
+        cache_dir = os.path.join(self.export_home, self._cache_out_dir)
+
         # Make paths that don't exist
         dir_paths = [matrix_dir]
         for path in dir_paths:
@@ -1159,6 +1165,7 @@ class DistributorExportPaths:
         self.export_paths = _DistributorExportPaths_NT(
             home=self.export_home,
             matrix_dir=matrix_dir,
+            cache_dir=cache_dir,
         )
 
     def _create_report_paths(self) -> _DistributorReportPaths_NT:
@@ -1194,6 +1201,7 @@ class DistributionModelExportPaths:
     # Cache dir names
     _upper_te_dir = 'upper_trip_ends'
     _lower_te_dir = 'lower_trip_ends'
+    _checkpoint_dir = 'checkpoints'
 
     # Export dir names
     _upper_external_pa_out_dir = 'Upper External PA Matrices'
@@ -1325,16 +1333,18 @@ class DistributionModelExportPaths:
         # Build the paths
         upper_te_dir = cache_home / self._upper_te_dir
         lower_te_dir = cache_home / self._lower_te_dir
+        checkpoint_dir = cache_home / self._checkpoint_dir
 
         # Create the cache_paths object
         self.cache_paths = _DM_CachePaths_NT(
                 home=cache_home,
                 upper_trip_ends=upper_te_dir,
                 lower_trip_ends=lower_te_dir,
+                checkpoints=checkpoint_dir,
         )
 
         # Make all paths that don't exist
-        dir_paths = [upper_te_dir, lower_te_dir]
+        dir_paths = [upper_te_dir, lower_te_dir, checkpoint_dir]
         for path in dir_paths:
             file_ops.create_folder(path)
 
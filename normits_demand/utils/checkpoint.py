@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Created on: 18/10/2026
+Updated on:
+
+Last update made by:
+Other updates made by:
+
+File purpose:
+Checkpointing of long running, multi-stage model runs.
+
+Each stage of a model run keeps a manifest of the segments it has
+completed, made up of one JSON record per segment. Each record contains
+the completion status of the segment, the paths it output to, and a hash of
+the inputs used to create those outputs. A resumed run can then skip any
+segment whose outputs already exist and whose inputs have not changed.
+"""
+# Built-Ins
+import os
+import enum
+import json
+import time
+import hashlib
+import functools
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+# Third Party
+import numpy as np
+import pandas as pd
+
+# Local Imports
+import normits_demand as nd
+from normits_demand.utils import file_ops
+
+# Bump whenever the record or hashing format changes, to invalidate old checkpoints
+CHECKPOINT_VERSION = 1
+
+# How many bytes of a file to hash at once
+_FILE_CHUNK_SIZE = 2 ** 20
+
+
+class CheckpointStatus(enum.Enum):
+    """The completion status of a checkpointed segment"""
+    STARTED = 'started'
+    COMPLETE = 'complete'
+
+
+def _update_hash(hasher: 'hashlib._Hash', obj: Any) -> None:
+    """Recursively adds obj to hasher"""
+    # Tag everything with its type so [1] and (1, ) etc. hash differently
+    hasher.update(type(obj).__name__.encode())
+
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        hasher.update(pd.util.hash_pandas_object(obj, index=True).values.tobytes())
+        if isinstance(obj, pd.DataFrame):
+            hasher.update(repr(obj.columns.tolist()).encode())
+
+    elif isinstance(obj, np.ndarray):
+        obj = np.ascontiguousarray(obj)
+        hasher.update(str((obj.shape, obj.dtype.str)).encode())
+        hasher.update(obj.tobytes())
+
+    elif isinstance(obj, dict):
+        for key in sorted(obj.keys(), key=str):
+            hasher.update(str(key).encode())
+            _update_hash(hasher, obj[key])
+
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _update_hash(hasher, item)
+
+    elif isinstance(obj, enum.Enum):
+        hasher.update(str(obj.value).encode())
+
+    elif obj is None or isinstance(obj, (str, bytes, int, float, bool, np.generic)):
+        hasher.update(repr(obj).encode())
+
+    elif isinstance(obj, os.PathLike):
+        hasher.update(os.fspath(obj).encode())
+
+    elif hasattr(obj, 'name'):
+        # Objects such as zoning systems, segmentations and cost functions
+        # are uniquely defined by their names
+        hasher.update(str(obj.name).encode())
+
+    else:
+        raise TypeError(
+            "Cannot hash objects of type %s for a checkpoint."
+            % type(obj)
+        )
+
+
+def hash_inputs(*args: Any) -> str:
+    """Generates a hash of the given inputs
+
+    Parameters
+    ----------
+    *args:
+        The inputs to hash. These can be any combination of pandas objects,
+        numpy arrays, built-in types, enums and named objects. Dictionaries,
+        lists and tuples are hashed recursively.
+
+    Returns
+    -------
+    input_hash:
+        A hex string hash of args.
+
+    Raises
+    ------
+    TypeError:
+        If any of args, or the items within them, cannot be hashed.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(str(CHECKPOINT_VERSION).encode())
+    _update_hash(hasher, args)
+    return hasher.hexdigest()
+
+
+def hash_files(paths: List[nd.PathLike]) -> str:
+    """Generates a hash of the contents of the files at paths
+
+    Parameters
+    ----------
+    paths:
+        The paths to the files to hash. The files are hashed in the order
+        given.
+
+    Returns
+    -------
+    files_hash:
+        A hex string hash of the contents of the files.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(str(CHECKPOINT_VERSION).encode())
+    for path in paths:
+        hasher.update(os.path.basename(path).encode())
+        with open(path, 'rb') as f:
+            for chunk in iter(functools.partial(f.read, _FILE_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class StageCheckpoint:
+    """The checkpoint manifest of a single stage of a model run
+
+    A record is kept for each segment of a stage in a separate JSON file
+    in checkpoint_dir, so segments being run in parallel never write to
+    the same file. Instances hold no open resources, so can be passed to
+    other processes.
+    """
+    _fname_suffix = '_checkpoint.json'
+
+    def __init__(self,
+                 checkpoint_dir: nd.PathLike,
+                 stage: str,
+                 resume: bool = False,
+                 ):
+        """
+        Parameters
+        ----------
+        checkpoint_dir:
+            The directory to write the checkpoints of all stages to. A
+            sub-directory is made for this stage.
+
+        stage:
+            The name of the stage being checkpointed.
+
+        resume:
+            Whether this stage is being resumed or not. If False,
+            `is_complete()` always returns False, so every segment is run
+            again. Records are written either way, so later runs can resume.
+        """
+        self.stage = stage
+        self.resume = resume
+        self.stage_dir = os.path.join(checkpoint_dir, stage)
+        file_ops.create_folder(self.stage_dir, verbose_create=False)
+
+    def _get_path(self, key: str) -> str:
+        """Generates the path to the record of key"""
+        return os.path.join(self.stage_dir, key + self._fname_suffix)
+
+    def _write_record(self, key: str, record: Dict[str, Any]) -> None:
+        """Writes record to disk, replacing any previous record of key"""
+        # Write to a temporary file first so a partial write never
+        # leaves a broken record behind
+        path = self._get_path(key)
+        temp_path = '%s.%s.tmp' % (path, os.getpid())
+        with open(temp_path, 'w') as f:
+            json.dump(record, f, indent=2)
+        os.replace(temp_path, path)
+
+    def read_record(self, key: str) -> Optional[Dict[str, Any]]:
+        """Reads the record of key
+
+        Parameters
+        ----------
+        key:
+            The key of the segment to read. Usually the segment name.
+
+        Returns
+        -------
+        record:
+            A dictionary containing the 'status', 'input_hash' and
+            'output_paths' of key, as well as the time it was last updated.
+            None if no record exists, or it cannot be read.
+        """
+        path = self._get_path(key)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path, 'r') as f:
+                record = json.load(f)
+        except ValueError:
+            # A broken record is the same as no record
+            return None
+
+        if record.get('version') != CHECKPOINT_VERSION:
+            return None
+        return record
+
+    def is_complete(self, key: str, input_hash: str) -> bool:
+        """Checks whether key can be skipped in a resumed run
+
+        Parameters
+        ----------
+        key:
+            The key of the segment to check. Usually the segment name.
+
+        input_hash:
+            A hash of the inputs that would be used to run key.
+
+        Returns
+        -------
+        is_complete:
+            True if resuming, key has been completed with the same inputs,
+            and all of the outputs of key still exist. Otherwise False.
+        """
+        if not self.resume:
+            return False
+
+        record = self.read_record(key)
+        if record is None:
+            return False
+        if record.get('status') != CheckpointStatus.COMPLETE.value:
+            return False
+        if record.get('input_hash') != input_hash:
+            return False
+        return all(os.path.isfile(x) for x in record.get('output_paths', list()))
+
+    def mark_started(self, key: str, input_hash: str) -> None:
+        """Records that key has been started, but not yet completed
+
+        Parameters
+        ----------
+        key:
+            The key of the segment being started. Usually the segment name.
+
+        input_hash:
+            A hash of the inputs being used to run key.
+        """
+        self._write_record(key, {
+            'version': CHECKPOINT_VERSION,
+            'stage': self.stage,
+            'status': CheckpointStatus.STARTED.value,
+            'input_hash': input_hash,
+            'output_paths': list(),
+            'updated': time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+
+    def mark_complete(self,
+                      key: str,
+                      input_hash: str,
+                      output_paths: List[nd.PathLike],
+                      ) -> None:
+        """Records that key has been completed
+
+        Parameters
+        ----------
+        key:
+            The key of the segment that was completed. Usually the segment name.
+
+        input_hash:
+            A hash of the inputs used to run key.
+
+        output_paths:
+            The paths of all the files output by key. If any of these are
+            removed, key will be run again on the next resume.
+        """
+        self._write_record(key, {
+            'version': CHECKPOINT_VERSION,
+            'stage': self.stage,
+            'status': CheckpointStatus.COMPLETE.value,
+            'input_hash': input_hash,
+            'output_paths': [os.fspath(x) for x in output_paths],
+            'updated': time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
@@ -1,53 +1,223 @@
 """
-Test implementation of matrix compression
-from:
+Compressed pickle reading and writing, with a choice of compression codecs.
+
+By default, objects are written as a single compressed pickle, which can
+be read by anything that can decompress and unpickle the file. Optionally,
+objects can be written with pickle protocol 5 and any large buffers (such as
+the data behind numpy arrays and pandas DataFrames) written out-of-band,
+straight after the pickle stream. This avoids copying the data into the
+pickle stream before compressing it, but the file can then only be read
+with `read_in()`.
+
+The codec is selected by the file suffix on write (see `CODEC_SUFFIXES`),
+and detected from the file contents on read. Files written before codecs
+were introduced (bz2 compressed cPickles) can still be read in.
+
+Originally based on:
 https://medium.com/better-programming/load-fast-load-big-with-compressed-pickles-5f311584507e
-For further research!
 """
 # Builtins
+import io
 import bz2
-import _pickle as cPickle
+import gzip
+import pickle
+import struct
 import pathlib
 
 from typing import Any
+from typing import Dict
+from typing import List
+from typing import Callable
+from typing import Optional
 
 # Third party
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
 
 # Local imports
 import normits_demand as nd
 from normits_demand.utils import file_ops
 import normits_demand.constants as consts
 
-"""
-Test use
 
-import os
-import pandas as pd
+class Codec:
+    """A compression codec that compressed pickles can be written with
+
+    Attributes
+    ----------
+    name:
+        The name of the codec, as used to select it in `write_out()`.
+
+    suffix:
+        The default filetype suffix for files written with this codec.
 
-some_mat = 'I:/NorMITs Synthesiser/Noham/iter8c/Distribution Outputs/Compiled OD Matrices/od_m3_business_tp1.csv'
-mat_out = pd.read_csv(some_mat)
+    magic:
+        The bytes every file written with this codec starts with. Used to
+        detect the codec when reading files in.
+    """
 
-path = os.path.join(
-            os.getcwd(),
-            'matrix_name')
+    def __init__(self,
+                 name: str,
+                 suffix: str,
+                 magic: bytes,
+                 open_fn: Callable[[nd.PathLike, str], io.IOBase],
+                 ):
+        self.name = name
+        self.suffix = suffix
+        self.magic = magic
+        self._open_fn = open_fn
 
-dat_out(path,
-        mat_out)
+    @property
+    def available(self) -> bool:
+        """Whether the packages needed by this codec are installed"""
+        return self._open_fn is not None
 
-in_path = path + '.pbz2'
+    def open(self, path: nd.PathLike, mode: str) -> io.IOBase:
+        """Opens path as a binary file object using this codec"""
+        if not self.available:
+            raise ValueError(
+                "Cannot use the '%s' compression codec as the package it "
+                "depends on is not installed."
+                % self.name
+            )
+        return self._open_fn(path, mode)
 
-mat_in = dat_in(in_path)
 
-mat_out == mat_in
+def _zstd_open(path: nd.PathLike, mode: str) -> io.IOBase:
+    return zstandard.open(path, mode, cctx=zstandard.ZstdCompressor(level=3))
 
-Out as 56mb
-"""
+
+# ## CODEC REGISTRY ## #
+DEFAULT_CODEC = 'bz2'
+
+CODECS: Dict[str, Codec] = {
+    'bz2': Codec('bz2', '.pbz2', b'BZh', bz2.BZ2File),
+    'gzip': Codec('gzip', '.pgz', b'\x1f\x8b', lambda p, m: gzip.open(p, m, compresslevel=6)),
+    'zstd': Codec('zstd', '.pzst', b'\x28\xb5\x2f\xfd', _zstd_open if zstandard else None),
+    'lz4': Codec('lz4', '.plz4', b'\x04\x22\x4d\x18', lz4.frame.open if lz4 else None),
+}
+
+CODEC_SUFFIXES = {c.suffix: name for name, c in CODECS.items()}
+
+# Marks files written with out-of-band buffers
+_OOB_MAGIC = b'NDPKL5\x00\x00'
+_LEN = struct.Struct('<Q')
+
+
+def register_codec(codec: Codec) -> None:
+    """Adds codec to the registry so it can be used to read and write"""
+    if codec.suffix in CODEC_SUFFIXES and CODEC_SUFFIXES[codec.suffix] != codec.name:
+        raise ValueError(
+            "Suffix '%s' is already used by the '%s' codec."
+            % (codec.suffix, CODEC_SUFFIXES[codec.suffix])
+        )
+    CODECS[codec.name] = codec
+    CODEC_SUFFIXES[codec.suffix] = codec.name
+
+
+def get_codec(name: str) -> Codec:
+    """Gets the registered codec called name"""
+    if name not in CODECS:
+        raise ValueError(
+            "No compression codec named '%s'. Available codecs: %s"
+            % (name, list(CODECS.keys()))
+        )
+    return CODECS[name]
+
+
+def is_compressed_suffix(suffix: str) -> bool:
+    """Returns True if suffix is the suffix of a registered codec"""
+    return suffix in CODEC_SUFFIXES
+
+
+def detect_codec(path: nd.PathLike) -> Codec:
+    """Detects the codec the file at path was written with
+
+    Parameters
+    ----------
+    path:
+        The path to the file to check.
+
+    Returns
+    -------
+    codec:
+        The codec that the file at path was written with.
+
+    Raises
+    ------
+    ValueError:
+        If the codec cannot be detected.
+    """
+    with open(path, 'rb') as f:
+        start = f.read(max(len(c.magic) for c in CODECS.values()))
+
+    for codec in CODECS.values():
+        if start.startswith(codec.magic):
+            return codec
+
+    raise ValueError(
+        "Cannot detect the compression codec used to write '%s'."
+        % path
+    )
+
+
+def _read_exact(f: io.IOBase, n_bytes: int) -> bytearray:
+    """Reads exactly n_bytes from f into a new buffer"""
+    buf = bytearray(n_bytes)
+    view = memoryview(buf)
+    pos = 0
+    while pos < n_bytes:
+        n_read = f.readinto(view[pos:])
+        if not n_read:
+            raise EOFError(
+                "Unexpected end of file. Expected %s bytes, got %s."
+                % (n_bytes, pos)
+            )
+        pos += n_read
+    return buf
+
+
+def _dump(o: Any, f: io.IOBase) -> None:
+    """Pickles o into f, writing large buffers out-of-band"""
+    buffers: List[pickle.PickleBuffer] = list()
+    payload = pickle.dumps(o, protocol=5, buffer_callback=buffers.append)
+
+    f.write(_OOB_MAGIC)
+    f.write(_LEN.pack(len(payload)))
+    f.write(payload)
+    f.write(_LEN.pack(len(buffers)))
+    for buf in buffers:
+        raw = buf.raw()
+        f.write(_LEN.pack(raw.nbytes))
+        f.write(raw)
+
+
+def _load(f: io.IOBase) -> Any:
+    """Reads an object written by `_dump()` from f"""
+    payload_len, = _LEN.unpack(_read_exact(f, _LEN.size))
+    payload = _read_exact(f, payload_len)
+
+    n_buffers, = _LEN.unpack(_read_exact(f, _LEN.size))
+    buffers = list()
+    for _ in range(n_buffers):
+        buf_len, = _LEN.unpack(_read_exact(f, _LEN.size))
+        buffers.append(_read_exact(f, buf_len))
+
+    return pickle.loads(payload, buffers=buffers)
 
 
 def write_out(o: Any,
               path: nd.PathLike,
-              overwrite_suffix: bool = True
+              overwrite_suffix: bool = True,
+              codec: Optional[str] = None,
+              out_of_band: bool = False,
               ) -> pathlib.Path:
     """
     Write the given object o to disk at the given out_path
@@ -60,12 +230,26 @@ def write_out(o: Any,
         The object to write to disk. Must be serializable.
 
     path:
-        The path to write out to. If no filetype suffix is provided .pbz2
+        The path to write out to. If path ends in one of `CODEC_SUFFIXES`
+        it is kept, and used to select the codec if codec is not set.
+        Otherwise, if no filetype suffix is provided, the suffix of codec
         is added.
 
     overwrite_suffix:
         Whether to overwrite the filetype suffix of the given path to the
-        default compression suffix or not.
+        default compression suffix or not. Suffixes in `CODEC_SUFFIXES`
+        are never overwritten.
+
+    codec:
+        The name of the codec to compress with, one of `CODECS`.
+        If left as None, the codec is selected by the suffix of path,
+        falling back to `DEFAULT_CODEC`.
+
+    out_of_band:
+        Whether to write large buffers out-of-band with pickle protocol 5.
+        This is faster for objects holding large arrays, but the written
+        file can only be read back in with `read_in()`. If False, a plain
+        compressed pickle is written.
 
     Returns
     -------
@@ -75,10 +259,24 @@ def write_out(o: Any,
     # Init
     if not isinstance(path, pathlib.Path):
         path = pathlib.Path(path)
-    path = file_ops.maybe_add_suffix(path, consts.COMPRESSION_SUFFIX, overwrite_suffix)
 
-    with bz2.BZ2File(path, 'w') as f:
-        cPickle.dump(o, f)
+    # Select the codec and output path
+    if is_compressed_suffix(path.suffix):
+        if codec is None:
+            codec = CODEC_SUFFIXES[path.suffix]
+    else:
+        if codec is None:
+            codec = DEFAULT_CODEC
+            suffix = consts.COMPRESSION_SUFFIX
+        else:
+            suffix = get_codec(codec).suffix
+        path = file_ops.maybe_add_suffix(path, suffix, overwrite_suffix)
+
+    with get_codec(codec).open(path, 'wb') as f:
+        if out_of_band:
+            _dump(o, f)
+        else:
+            pickle.dump(o, f)
 
     return path
 
@@ -87,6 +285,9 @@ def read_in(path: nd.PathLike) -> Any:
     """
     Reads the data at path, decompresses, and returns the object.
 
+    The codec the file was written with, and whether it was written with
+    out-of-band buffers, are detected automatically.
+
     Parameters
     ----------
     path:
@@ -97,4 +298,12 @@ def read_in(path: nd.PathLike) -> Any:
     object:
         The object that was read in from disk.
     """
-    return cPickle.load(bz2.BZ2File(path, 'rb'))
+    codec = detect_codec(path)
+
+    with codec.open(path, 'rb') as f:
+        if f.read(len(_OOB_MAGIC)) == _OOB_MAGIC:
+            return _load(f)
+
+    # Written without out-of-band buffers - a single pickle
+    with codec.open(path, 'rb') as f:
+        return pickle.load(f)
@@ -264,6 +264,9 @@ def read_df(path: nd.PathLike,
         same name but different extensions will be looked for and read in
         instead. Will check for: '.csv', '.pbz2'
 
+    Any suffix in `compress.CODEC_SUFFIXES` is read in as a compressed
+    pickle, with the codec detected from the file.
+
     Returns
     -------
     df:
@@ -279,7 +282,7 @@ def read_df(path: nd.PathLike,
         path = find_filename(path)
 
     # Determine how to read in df
-    if pathlib.Path(path).suffix == '.pbz2':
+    if compress.is_compressed_suffix(pathlib.Path(path).suffix):
         df = compress.read_in(path)
 
         # Optionally try and set the index
@@ -323,6 +326,8 @@ def write_df(df: pd.DataFrame, path: nd.PathLike, **kwargs) -> pd.DataFrame:
 
     **kwargs:
         Any arguments to pass to the underlying write function.
+        If path ends in one of `compress.CODEC_SUFFIXES`, the df is written
+        as a compressed pickle using the matching codec.
 
     Returns
     -------
@@ -333,7 +338,7 @@ def write_df(df: pd.DataFrame, path: nd.PathLike, **kwargs) -> pd.DataFrame:
     path = pathlib.Path(path)
 
     # Determine how to read in df
-    if pathlib.Path(path).suffix == '.pbz2':
+    if compress.is_compressed_suffix(path.suffix):
         compress.write_out(df, path)
 
     elif pathlib.Path(path).suffix == '.csv':
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+Created on: 18/10/2026
+Updated on:
+
+Last update made by:
+Other updates made by:
+
+File purpose:
+Optional numba compiled kernels for the hot loops in distribution.
+
+Each kernel does in a single pass what the NumPy implementations do with
+several full-size temporaries. numba is an optional dependency. If it
+cannot be imported `ENABLED` is False and callers should fall back to
+their NumPy implementations. Set `ENABLED` to False to force the NumPy
+implementations, even when numba is installed.
+"""
+# Built-Ins
+import math
+
+# Third Party
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Local Imports
+
+# Whether to use the compiled kernels
+NUMBA_AVAILABLE = numba is not None
+ENABLED = NUMBA_AVAILABLE
+
+_SQRT_2_PI = math.sqrt(2 * math.pi)
+
+
+def _jit(fn):
+    """Compiles fn with numba, if it's available"""
+    if numba is None:
+        return fn
+    # nogil so kernels can be run in threads, numpy error model so float
+    # division by 0 behaves the same as the NumPy implementations
+    return numba.njit(cache=True, nogil=True, error_model='numpy')(fn)
+
+
+# ## KERNELS ## #
+@_jit
+def _tanner_kernel(base_cost, alpha, beta, min_return_val):
+    out = np.empty_like(base_cost)
+    for i in range(base_cost.size):
+        cost = base_cost[i]
+
+        # 0^x where x is anything (other than 0) is always 0
+        if cost == 0:
+            out[i] = 0.0
+            continue
+
+        # c^a * e^(b*c) == e^(a*ln(c) + b*c), one transcendental call fewer
+        if cost > 0:
+            val = np.exp(alpha * np.log(cost) + beta * cost)
+        else:
+            val = cost ** alpha * np.exp(beta * cost)
+        if 0 < val < min_return_val:
+            val = min_return_val
+        out[i] = val
+    return out
+
+
+@_jit
+def _log_normal_kernel(base_cost, sigma, mu, min_return_val):
+    out = np.empty_like(base_cost)
+    exp_denominator = 2 * sigma ** 2
+    for i in range(base_cost.size):
+        cost = base_cost[i]
+
+        frac_denominator = cost * sigma * _SQRT_2_PI
+        frac = 0.0
+        if frac_denominator != 0:
+            frac = 1 / frac_denominator
+
+        log = 0.0
+        if cost != 0:
+            log = np.log(cost)
+
+        val = frac * np.exp(-((log - mu) ** 2) / exp_denominator)
+        if val < min_return_val:
+            val = min_return_val
+        out[i] = val
+    return out
+
+
+@_jit
+def _weighted_histogram_kernel(values, weights, bin_edges):
+    n_bins = len(bin_edges) - 1
+    hist = np.zeros(n_bins)
+    first_edge = bin_edges[0]
+    last_edge = bin_edges[-1]
+    for i in range(values.size):
+        val = values[i]
+
+        # Also skips NaN
+        if not (first_edge <= val <= last_edge):
+            continue
+
+        # Bins are half open, apart from the last which includes its right edge
+        idx = np.searchsorted(bin_edges, val, side='right') - 1
+        if idx == n_bins:
+            idx -= 1
+        hist[idx] += weights[i]
+    return hist
+
+
+@_jit
+def _furness_stack_iteration_kernel(mats, row_targets, col_targets, rmse):
+    n_segments, n_rows, n_cols = mats.shape
+    col_ach = np.empty(n_cols)
+    row_ach = np.empty(n_rows)
+
+    for s in range(n_segments):
+        mat = mats[s]
+
+        # ## COL CONSTRAIN ## #
+        col_ach[:] = 0
+        for i in range(n_rows):
+            for j in range(n_cols):
+                col_ach[j] += mat[i, j]
+
+        # Re-use col_ach to store the factors
+        for j in range(n_cols):
+            if col_ach[j] != 0:
+                col_ach[j] = col_targets[s, j] / col_ach[j]
+            else:
+                col_ach[j] = 1.0
+
+        # Scale cols and get the row totals in the same pass
+        for i in range(n_rows):
+            total = 0.0
+            for j in range(n_cols):
+                mat[i, j] *= col_ach[j]
+                total += mat[i, j]
+            row_ach[i] = total
+
+        # ## ROW CONSTRAIN ## #
+        # Scale rows and get the achieved totals in the same pass
+        col_ach[:] = 0
+        row_diff = 0.0
+        for i in range(n_rows):
+            factor = 1.0
+            if row_ach[i] != 0:
+                factor = row_targets[s, i] / row_ach[i]
+            for j in range(n_cols):
+                mat[i, j] *= factor
+                col_ach[j] += mat[i, j]
+            row_diff += (row_targets[s, i] - row_ach[i] * factor) ** 2
+
+        col_diff = 0.0
+        for j in range(n_cols):
+            col_diff += (col_targets[s, j] - col_ach[j]) ** 2
+
+        rmse[s] = ((row_diff + col_diff) / n_rows) ** 0.5
+
+
+# ## WRAPPERS ## #
+def _as_flat_float(a: np.ndarray) -> np.ndarray:
+    """Returns a flat, contiguous, float64 version of a"""
+    return np.ascontiguousarray(a, dtype=float).ravel()
+
+
+def tanner(base_cost: np.ndarray,
+           alpha: float,
+           beta: float,
+           min_return_val: float,
+           ) -> np.ndarray:
+    """Compiled version of `cost_functions.tanner()`"""
+    base_cost = np.asarray(base_cost)
+    out = _tanner_kernel(
+        _as_flat_float(base_cost),
+        float(alpha),
+        float(beta),
+        float(min_return_val),
+    )
+    return out.reshape(base_cost.shape)
+
+
+def log_normal(base_cost: np.ndarray,
+               sigma: float,
+               mu: float,
+               min_return_val: float,
+               ) -> np.ndarray:
+    """Compiled version of `cost_functions.log_normal()`"""
+    base_cost = np.asarray(base_cost)
+    out = _log_normal_kernel(
+        _as_flat_float(base_cost),
+        float(sigma),
+        float(mu),
+        float(min_return_val),
+    )
+    return out.reshape(base_cost.shape)
+
+
+def weighted_histogram(values: np.ndarray,
+                       weights: np.ndarray,
+                       bin_edges: np.ndarray,
+                       ) -> np.ndarray:
+    """Single pass equivalent of `np.histogram(values, bin_edges, weights=weights)[0]`
+
+    Parameters
+    ----------
+    values:
+        The values to sort into bins.
+
+    weights:
+        The weight of each value in values. Must be the same shape as values.
+
+    bin_edges:
+        A monotonically increasing array of bin edges, including the
+        rightmost edge.
+
+    Returns
+    -------
+    histogram:
+        The sum of the weights in each bin.
+    """
+    values = np.asarray(values)
+    weights = np.asarray(weights)
+    bin_edges = np.asarray(bin_edges, dtype=float)
+
+    if values.shape != weights.shape:
+        raise ValueError(
+            "weights should have the same shape as values. Got %s and %s."
+            % (weights.shape, values.shape)
+        )
+
+    if np.any(np.diff(bin_edges) < 0):
+        raise ValueError("bin_edges must increase monotonically.")
+
+    return _weighted_histogram_kernel(
+        _as_flat_float(values),
+        _as_flat_float(weights),
+        bin_edges,
+    )
+
+
+def furness_stack_iteration(mats: np.ndarray,
+                            row_targets: np.ndarray,
+                            col_targets: np.ndarray,
+                            rmse: np.ndarray,
+                            ) -> None:
+    """Runs a single furness iteration on a stack of matrices, in place
+
+    Parameters
+    ----------
+    mats:
+        C-contiguous float64 array of shape (n_segments, n_rows, n_cols).
+        Updated in place.
+
+    row_targets:
+        float64 array of the row targets, of shape (n_segments, n_rows).
+
+    col_targets:
+        float64 array of the col targets, of shape (n_segments, n_cols).
+
+    rmse:
+        float64 array of shape (n_segments, ). Updated in place with the
+        RMSE achieved by each segment at the end of this iteration.
+    """
+    _furness_stack_iteration_kernel(mats, row_targets, col_targets, rmse)
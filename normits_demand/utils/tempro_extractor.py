@@ -6,22 +6,40 @@ https://www.microsoft.com/en-us/download/confirmation.aspx?id=54920
 
 This is in pretty good shape now, just need to use the functions
 for all queries and tidy up the trip end queries.
+
+Database connections are reused across queries, and the Zones table is
+only read once per database. Rows are fetched in batches and stored
+column-wise. If a cache_dir is given, each extracted table is also cached
+on disk and only re-read once its database changes. The regional
+databases can be read in parallel by setting worker_count.
 """
 # Builtins
 import os
+import hashlib
+import threading
+import concurrent.futures
 
+from typing import Any
+from typing import Dict
 from typing import List
 from typing import Tuple
+from typing import Callable
 
 # Third Party
-import pyodbc
 import pandas as pd
 import numpy as np
 from tqdm import tqdm
 
+try:
+    import pyodbc
+except ImportError:
+    pyodbc = None
+
 # local imports
+import normits_demand as nd
 from normits_demand import AuditError
 from normits_demand import constants as consts
+from normits_demand.core import definition_cache
 from normits_demand.models import efs_zone_translator as zt
 
 from normits_demand.utils import general as du
@@ -73,14 +91,35 @@ class TemproParser:
         'destinations': [4]
     }
 
+    # Number of rows to fetch from a database at a time
+    _fetch_batch_size = 100000
+
     def __init__(self,
                  access_driver: str = None,
                  data_source: str = None,
                  region_list: List[str] = None,
                  output_years: List[int] = None,
                  out_folder: str = None,
+                 connection_factory: Callable[[str], Any] = None,
+                 cache_dir: nd.PathLike = None,
+                 worker_count: int = 1,
                  ):
         """
+        Parameters
+        ----------
+        connection_factory:
+            A function taking the path to a database and returning an
+            open DB-API connection to it. Defaults to connecting with
+            pyodbc, using access_driver. Connections are reused across
+            queries, and may be used from any of the worker threads.
+
+        cache_dir:
+            A directory to cache extracted tables in. Cached tables are
+            used until the database they came from is modified. If left
+            as None, tables are not cached on disk.
+
+        worker_count:
+            The number of databases to read from at once.
         """
         print('Building a TEMPRO extractor...')
 
@@ -101,6 +140,15 @@ class TemproParser:
         self.output_years = output_years
         self.output_years_str = [str(x) for x in output_years]
         self.out_folder = out_folder
+        self.connection_factory = connection_factory
+        self.cache_dir = cache_dir
+        self.worker_count = worker_count
+
+        # Reused between queries
+        self._connections = dict()
+        self._zones = dict()
+        self._lookups = dict()
+        self._lock = threading.Lock()
 
         # Set up paths
         # TODO(CS/BT): Update these paths to search a bit
@@ -137,24 +185,13 @@ class TemproParser:
         # Init
         available_dbs = self.get_available_dbs()
         
-        # Loop setup
-        plan_ph = list()
-        
-        pbar = tqdm(
-            total=len(available_dbs),
-            desc="Extracting trip ends from DBs",
-            disable=(not verbose),
+        # Extract from each DB
+        plan_ph = self._map_dbs(
+            self._get_segmented_planning_data,
+            available_dbs,
+            verbose=verbose,
         )
 
-        for db_fname in available_dbs:
-            if verbose:
-                print(db_fname)
-            
-            plan_dat = self._get_segmented_planning_data(db_fname,
-                                                         pbar)
-
-            plan_ph.append(plan_dat)
-
         # Compile segments dict label wise
         plan_dat = du.concat_df_dict(plan_ph,
                                      non_sum_cols=['msoa_zone_id'],
@@ -198,25 +235,13 @@ class TemproParser:
         # Init
         available_dbs = self.get_available_dbs()
 
-        # Loop setup
-        te_ph = list()
-
-        pbar = tqdm(
-            total=len(available_dbs),
-            desc="Extracting trip ends from DBs",
-            disable=(not verbose),
+        # Extract from each DB
+        te_ph = self._map_dbs(
+            lambda db_fname, pbar: self._get_trip_ends(db_fname, pbar, trip_type),
+            available_dbs,
+            verbose=verbose,
         )
 
-        for db_fname in available_dbs:
-            if verbose:
-                print(db_fname)
-
-            te_dat = self._get_trip_ends(db_fname,
-                                         pbar,
-                                         trip_type)
-
-            te_ph.append(te_dat)
-
         # Compile segments dict label wise
         te_dat = du.concat_df_dict(te_ph,
                                    non_sum_cols=['msoa_zone_id'],
@@ -256,23 +281,17 @@ class TemproParser:
 
         available_dbs = self.get_available_dbs()
 
-        # Loop setup
-        prod_ph = list()
-        attr_ph = list()
-        pbar = tqdm(
-            total=len(available_dbs),
-            desc="Extracting trip ends from DBs",
-            disable=(not verbose),
-        )
-
-        for db_fname in available_dbs:
-            prods, attrs = self._get_growth_factors_internal(
+        # Extract from each DB
+        results = self._map_dbs(
+            lambda db_fname, pbar: self._get_growth_factors_internal(
                 db_fname,
                 col_indices,
                 pbar=pbar,
-            )
-            prod_ph.append(prods)
-            attr_ph.append(attrs)
+            ),
+            available_dbs,
+            verbose=verbose,
+        )
+        prod_ph, attr_ph = zip(*results)
 
         # Stick all the partials together
         prods = pd.concat(prod_ph)
@@ -307,24 +326,13 @@ class TemproParser:
         # Init
         available_dbs = self.get_available_dbs()
 
-        # Loop setup
-        co_ph = list()
-
-        pbar = tqdm(
-            total=len(available_dbs),
-            desc="Extracting trip ends from DBs",
-            disable=(not verbose),
+        # Extract from each DB
+        co_ph = self._map_dbs(
+            self._get_segmented_co_data,
+            available_dbs,
+            verbose=verbose,
         )
 
-        for db_fname in available_dbs:
-            if verbose:
-                print(db_fname)
-
-            co_dat = self._get_segmented_co_data(db_fname,
-                                                 pbar)
-
-            co_ph.append(co_dat)
-
         # Compile segments dict label wise
         co_dat = du.concat_df_dict(co_ph,
                                    non_sum_cols=['msoa_zone_id'],
@@ -353,22 +361,13 @@ class TemproParser:
         # Init
         available_dbs = self.get_available_dbs()
 
-        # Loop setup
-        nca_ph = list()
-        ca_ph = list()
-        pbar = tqdm(
-            total=len(available_dbs),
-            desc="Extracting trip ends from DBs",
-            disable=(not verbose),
+        # Extract from each DB
+        results = self._map_dbs(
+            self._get_co_growth_factors_internal,
+            available_dbs,
+            verbose=verbose,
         )
-
-        for db_fname in available_dbs:
-            nca, ca = self._get_co_growth_factors_internal(
-                db_fname,
-                pbar,
-            )
-            nca_ph.append(nca)
-            ca_ph.append(ca)
+        nca_ph, ca_ph = zip(*results)
 
         # Stick all the partials together
         nca = pd.concat(nca_ph)
@@ -512,7 +511,7 @@ class TemproParser:
             translator = zt.ZoneTranslator()
             query_out = translator.run(
                 query_out,
-                pd.read_csv(self.ntem_to_msoa_path),
+                self._read_lookup(self.ntem_to_msoa_path),
                 'ntem',
                 'msoa',
                 non_split_cols=['ntem_zone_id', 'Purpose', 'Mode', 'TimePeriod'])
@@ -535,51 +534,7 @@ class TemproParser:
                      db_fname
                      ):
         # TODO: Deprecate and remove, now in get_segmented_co_data
-        # Init
-        db_path = os.path.join(self.data_source, db_fname)
-        conn_string = (
-            'Driver=' + self.access_driver + ';'
-            'DBQ=' + db_path + ';'
-        )
-        conn = None
-        
-        try:
-            # Connect
-            conn = pyodbc.connect(conn_string)
-            cursor = conn.cursor()
-
-            # Grab and unpack the planning data
-            cursor.execute('select * from CarOwnership')
-
-            co_ph = list()
-            for row in cursor.fetchall():
-                co_ph.append([x for x in row])
-
-            co_data = pd.DataFrame(
-                data=co_ph,
-                columns=[column[0] for column in cursor.description]
-            )
-
-            print(list(co_data))
-
-            # Grab and unpack local db zone translations
-            cursor.execute('select * from Zones')
-
-            zonal_ph = list()
-            for row in cursor.fetchall():
-                zonal_ph.append([x for x in row])
-
-            zones = pd.DataFrame(
-                data=zonal_ph,
-                columns=[column[0] for column in cursor.description]
-            )
-        except BaseException as e:
-            if conn is not None:
-                conn.close()
-            raise e
-        finally:
-            if conn is not None:
-                conn.close()
+        co_data, zones = self._hit_ntem_db(db_fname, 'select * from CarOwnership')
 
         # Get years
         av_years = [int(x) for x in list(co_data) if x.isdigit()]
@@ -663,46 +618,11 @@ class TemproParser:
 
         ## TODO: DELETE
 
-        # Connect
-        db_path = os.path.join(self.data_source, db_fname)
-        conn_string = (
-                'Driver=' + self.access_driver + ';'
-                                                 'DBQ=' + db_path + ';'
+        # Get the trip end and zone tables
+        trip_ends, zones = self._hit_ntem_db(
+            db_fname,
+            'select * from TripEndDataByDirection where TripType in ' + col_indices,
         )
-        conn = pyodbc.connect(conn_string)
-        cursor = conn.cursor()
-
-        # Get and unpack trip and and zone tables
-        # run a query and get the results
-        cursor.execute('select * from TripEndDataByDirection where TripType in ' + col_indices)
-        trip_end_rows = cursor.fetchall()
-
-        # Unpack trip end data
-        trip_cols = [column[0] for column in cursor.description]
-
-        trip_ends = []
-        for row in trip_end_rows:
-            trip_ends.append([x for x in row])
-
-        trip_ends = pd.DataFrame(trip_ends)
-
-        trip_ends.columns = trip_cols
-
-        cursor.execute('select * from Zones')
-        zone_rows = cursor.fetchall()
-
-        # Unpack Zones Data
-        zone_cols = [column[0] for column in cursor.description]
-
-        zones = []
-        for row in zone_rows:
-            zones.append([x for x in row])
-
-        zones = pd.DataFrame(zones)
-        zones.columns = zone_cols
-
-        # Close db_fname
-        conn.close()
 
         # Get years
         av_years = [int(x) for x in list(trip_ends) if x.isdigit()]
@@ -764,8 +684,8 @@ class TemproParser:
         # Init
         val_cols = self.output_years_str if val_cols is None else val_cols
 
-        ntem_trans = pd.read_csv(self.ntem_trans_path)
-        ntem_code_trans = pd.read_csv(self.ntem_code_zone_trans_path)
+        ntem_trans = self._read_lookup(self.ntem_trans_path)
+        ntem_code_trans = self._read_lookup(self.ntem_code_zone_trans_path)
 
         # validate
         for col in val_cols:
@@ -861,7 +781,7 @@ class TemproParser:
         translator = zt.ZoneTranslator()
         trip_ends = translator.run(
             trip_ends,
-            pd.read_csv(self.ntem_to_msoa_path),
+            self._read_lookup(self.ntem_to_msoa_path),
             'ntem',
             'msoa',
             non_split_cols=group_cols,
@@ -968,7 +888,7 @@ class TemproParser:
             translator = zt.ZoneTranslator()
             query_out = translator.run(
                 query_out,
-                pd.read_csv(self.ntem_to_msoa_path),
+                self._read_lookup(self.ntem_to_msoa_path),
                 'ntem',
                 'msoa',
                 non_split_cols=['ntem_zone_id'])
@@ -1057,7 +977,7 @@ class TemproParser:
             translator = zt.ZoneTranslator()
             query_out = translator.run(
                 query_out,
-                pd.read_csv(self.ntem_to_msoa_path),
+                self._read_lookup(self.ntem_to_msoa_path),
                 'ntem',
                 'msoa',
                 non_split_cols=['ntem_zone_id'])
@@ -1109,14 +1029,14 @@ class TemproParser:
 
         nca = translator.run(
             nca,
-            pd.read_csv(self.ntem_to_msoa_path),
+            self._read_lookup(self.ntem_to_msoa_path),
             'ntem',
             'msoa',
             non_split_cols=group_cols,
         )
         ca = translator.run(
             ca,
-            pd.read_csv(self.ntem_to_msoa_path),
+            self._read_lookup(self.ntem_to_msoa_path),
             'ntem',
             'msoa',
             non_split_cols=group_cols,
@@ -1136,6 +1056,184 @@ class TemproParser:
         
         return nca, ca
     
+    def close(self) -> None:
+        """Closes all open database connections"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections = dict()
+
+        for conn in connections:
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _connect(self, db_path: str):
+        """Opens a new connection to the database at db_path"""
+        if self.connection_factory is not None:
+            return self.connection_factory(db_path)
+
+        if pyodbc is None:
+            raise ImportError(
+                "pyodbc is needed to connect to Tempro databases. Either "
+                "install pyodbc or pass in a connection_factory."
+            )
+
+        conn_string = (
+            'Driver=' + self.access_driver + ';'
+            'DBQ=' + db_path + ';'
+        )
+        return pyodbc.connect(conn_string)
+
+    def _get_connection(self, db_fname: str):
+        """Gets the open connection to db_fname, connecting if needed"""
+        with self._lock:
+            if db_fname not in self._connections:
+                db_path = os.path.join(self.data_source, db_fname)
+                self._connections[db_fname] = self._connect(db_path)
+            return self._connections[db_fname]
+
+    def _fetch_columnar(self, cursor) -> pd.DataFrame:
+        """Fetches all rows from cursor in batches, column by column"""
+        columns = [column[0] for column in cursor.description]
+
+        batches = list()
+        while True:
+            rows = cursor.fetchmany(self._fetch_batch_size)
+            if not rows:
+                break
+            batches.append([np.array(col) for col in zip(*rows)])
+
+        if batches == list():
+            return pd.DataFrame(columns=columns)
+
+        return pd.DataFrame({
+            name: np.concatenate([batch[i] for batch in batches])
+            for i, name in enumerate(columns)
+        })
+
+    def _get_cache_path(self, db_fname: str, query: str) -> str:
+        """Gets the path to the cached results of query on db_fname"""
+        query_hash = hashlib.md5(query.encode()).hexdigest()[:16]
+        fname = '%s_%s%s' % (
+            os.path.splitext(db_fname)[0],
+            query_hash,
+            definition_cache.CACHE_FTYPE,
+        )
+        return os.path.join(self.cache_dir, fname)
+
+    def read_table(self,
+                   db_fname: str,
+                   query: str,
+                   ) -> pd.DataFrame:
+        """
+        Runs query on db_fname and returns the results
+
+        If self.cache_dir is set, results are cached and only re-read
+        from the database once it has been modified.
+
+        Parameters
+        ----------
+        db_fname:
+            Name of the database in self.data_source to query.
+
+        query:
+            Query to run, as an Access SQL string.
+
+        Returns
+        -------
+        query_dat:
+            The results of query.
+        """
+        cache_path = None
+        source_paths = [os.path.join(self.data_source, db_fname)]
+        if self.cache_dir is not None:
+            cache_path = self._get_cache_path(db_fname, query)
+            arrays = definition_cache.read_cache(cache_path, source_paths)
+            if arrays is not None:
+                return pd.DataFrame(arrays)
+
+        cursor = self._get_connection(db_fname).cursor()
+        try:
+            cursor.execute(query)
+            query_dat = self._fetch_columnar(cursor)
+        finally:
+            cursor.close()
+
+        if cache_path is not None:
+            definition_cache.write_cache(
+                cache_path=cache_path,
+                source_paths=source_paths,
+                arrays={col: query_dat[col].values for col in query_dat},
+            )
+
+        return query_dat
+
+    def read_tables(self,
+                    query: str,
+                    db_fnames: List[str] = None,
+                    ) -> Dict[str, pd.DataFrame]:
+        """
+        Runs query on each of db_fnames, using self.worker_count workers
+
+        Parameters
+        ----------
+        query:
+            Query to run, as an Access SQL string.
+
+        db_fnames:
+            Names of the databases in self.data_source to query. If left
+            as None, self.get_available_dbs() is used.
+
+        Returns
+        -------
+        query_dats:
+            A dictionary of {db_fname: query results}.
+        """
+        db_fnames = self.get_available_dbs() if db_fnames is None else db_fnames
+        results = self._map_dbs(
+            lambda db_fname, pbar: self.read_table(db_fname, query),
+            db_fnames,
+            verbose=False,
+        )
+        return dict(zip(db_fnames, results))
+
+    def _map_dbs(self,
+                 fn: Callable,
+                 db_fnames: List[str],
+                 verbose: bool = True,
+                 ) -> List[Any]:
+        """Calls fn(db_fname, pbar) for each of db_fnames, in parallel
+
+        Results are returned in the same order as db_fnames.
+        """
+        pbar = tqdm(
+            total=len(db_fnames),
+            desc="Extracting trip ends from DBs",
+            disable=(not verbose),
+        )
+
+        def call(db_fname):
+            if verbose:
+                print(db_fname)
+            return fn(db_fname, pbar)
+
+        if self.worker_count <= 1:
+            return [call(x) for x in db_fnames]
+
+        with concurrent.futures.ThreadPoolExecutor(self.worker_count) as pool:
+            return list(pool.map(call, db_fnames))
+
+    def _read_lookup(self, path: str) -> pd.DataFrame:
+        """Reads the lookup at path, only reading from disk once"""
+        with self._lock:
+            if path not in self._lookups:
+                self._lookups[path] = pd.read_csv(path)
+            return self._lookups[path].copy()
+
     def _hit_ntem_db(self,
                      db_fname: str,
                      query: str,
@@ -1155,53 +1253,15 @@ class TemproParser:
         zones:
             Zones returned from same DB
         """
-            
-        db_path = os.path.join(self.data_source, db_fname)
-        conn_string = (
-            'Driver=' + self.access_driver + ';'
-            'DBQ=' + db_path + ';'
-        )
-        conn = None
-        
-        try:
-            # Connect
-            conn = pyodbc.connect(conn_string)
-            cursor = conn.cursor()
-
-            # Grab and unpack the planning data
-            cursor.execute(query)
-
-            co_ph = list()
-            for row in cursor.fetchall():
-                co_ph.append([x for x in row])
-
-            query_dat = pd.DataFrame(
-                data=co_ph,
-                columns=[column[0] for column in cursor.description]
-            )
-
-            print(list(query_dat))
+        query_dat = self.read_table(db_fname, query)
+        print(list(query_dat))
 
-            # Grab and unpack local db zone translations
-            cursor.execute(zone_query)
+        # Zones don't change, only grab them once per DB
+        zone_key = (db_fname, zone_query)
+        if zone_key not in self._zones:
+            self._zones[zone_key] = self.read_table(db_fname, zone_query)
 
-            zonal_ph = list()
-            for row in cursor.fetchall():
-                zonal_ph.append([x for x in row])
-
-            zones = pd.DataFrame(
-                data=zonal_ph,
-                columns=[column[0] for column in cursor.description]
-            )
-        except BaseException as e:
-            if conn is not None:
-                conn.close()
-            raise e
-        finally:
-            if conn is not None:
-                conn.close()
-        
-        return query_dat, zones
+        return query_dat, self._zones[zone_key].copy()
 
     def _select_years_and_interpolate(self,
                                       query_dat,
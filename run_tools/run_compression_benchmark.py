@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Created on: 18/10/2026
+Updated on:
+
+Last update made by:
+Other updates made by:
+
+File purpose:
+Benchmarks the compression codecs available in utils.compress. Compares the
+write time, read time and file size of each codec, with and without
+out-of-band buffers, on a representative DVector (msoa, hb_p_m_tp_week) and
+a 2,770-zone matrix.
+"""
+# Built-Ins
+import os
+import sys
+import time
+import tempfile
+
+# Third Party
+import numpy as np
+import pandas as pd
+
+# Local Imports
+sys.path.append("..")
+import normits_demand as nd
+from normits_demand.utils import compress
+
+N_REPEATS = 3
+MATRIX_ZONES = 2770
+
+
+def build_dvector() -> nd.DVector:
+    """Builds a DVector with random data, similar in size to NoTEM outputs"""
+    zoning = nd.get_zoning_system('msoa')
+    segmentation = nd.get_segmentation_level('hb_p_m_tp_week')
+    rng = np.random.default_rng(42)
+
+    data = {s: rng.random(zoning.n_zones) for s in segmentation.segment_names}
+    return nd.DVector(
+        segmentation=segmentation,
+        import_data=data,
+        zoning_system=zoning,
+        time_format='avg_week',
+        process_count=0,
+    )
+
+
+def build_matrix() -> pd.DataFrame:
+    """Builds a sparse-ish random matrix, like a NoHAM PA matrix"""
+    rng = np.random.default_rng(42)
+    mat = rng.random((MATRIX_ZONES, MATRIX_ZONES))
+    mat[mat < 0.6] = 0
+    zones = np.arange(1, MATRIX_ZONES + 1)
+    return pd.DataFrame(mat, index=zones, columns=zones)
+
+
+def benchmark(name: str, o, out_dir: str) -> pd.DataFrame:
+    """Times writing and reading o with every available codec"""
+    results = list()
+    for codec_name, codec in compress.CODECS.items():
+        if not codec.available:
+            print("Skipping %s - not installed" % codec_name)
+            continue
+
+        path = os.path.join(out_dir, '%s%s' % (name, codec.suffix))
+
+        for out_of_band in (False, True):
+            write_times = list()
+            read_times = list()
+            for _ in range(N_REPEATS):
+                start = time.perf_counter()
+                compress.write_out(o, path, out_of_band=out_of_band)
+                write_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                compress.read_in(path)
+                read_times.append(time.perf_counter() - start)
+
+            results.append({
+                'object': name,
+                'codec': codec_name,
+                'out_of_band': out_of_band,
+                'write_s': min(write_times),
+                'read_s': min(read_times),
+                'size_mb': os.path.getsize(path) / 1024 ** 2,
+            })
+
+    return pd.DataFrame(results)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as out_dir:
+        results = pd.concat([
+            benchmark('dvector', build_dvector(), out_dir),
+            benchmark('matrix', build_matrix(), out_dir),
+        ], ignore_index=True)
+
+    with pd.option_context('display.float_format', '{:.3f}'.format):
+        print(results.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
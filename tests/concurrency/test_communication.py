@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the communication module, tests are setup
+    to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+import pickle
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+from normits_demand.concurrency import communication
+
+
+##### FIXTURES #####
+@pytest.fixture(name="df", scope="module")
+def fixture_df() -> pd.DataFrame:
+    """Small matrix-like DataFrame."""
+    rng = np.random.default_rng(42)
+    return pd.DataFrame(rng.random((10, 10)), index=range(1, 11), columns=range(1, 11))
+
+
+##### CLASSES #####
+class TestSharedDataFramePublisher:
+    """Tests for the `SharedDataFramePublisher` class."""
+
+    @pytest.mark.parametrize("method", list(communication.SharingMethod))
+    def test_round_trip(self, method, df, tmp_path):
+        """Test pickled handles give back the same, read-only, DataFrame."""
+        with communication.SharedDataFramePublisher(method, tmp_path) as publisher:
+            handle = pickle.loads(pickle.dumps(publisher.publish(df)))
+            shared_df = handle.get_df()
+            pd.testing.assert_frame_equal(shared_df, df)
+            assert not shared_df.values.flags.writeable
+            del shared_df, handle
+
+    def test_de_duplicate(self, df, tmp_path):
+        """Test the same DataFrames are only published once."""
+        with communication.SharedDataFramePublisher() as publisher:
+            handles = [publisher.publish(x) for x in [df, df.copy(), df, df * 2]]
+            assert handles[0] is handles[1] is handles[2]
+            assert handles[0] is not handles[3]
+            assert publisher.n_published == 2
+
+    def test_memory_map_needs_dir(self):
+        """Test an error is raised when no memory map dir is given."""
+        with pytest.raises(ValueError):
+            communication.SharedDataFramePublisher(communication.SharingMethod.MEMORY_MAP)
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the core data_structures module, tests
+    are setup to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+import normits_demand as nd
+from normits_demand.core.data_structures import DenseDVectorData
+
+
+##### FIXTURES #####
+@pytest.fixture(name="zoning", scope="module")
+def fixture_zoning() -> nd.ZoningSystem:
+    """Small zoning system for testing DVectors."""
+    return nd.ZoningSystem(name="test", unique_zones=np.arange(1, 6))
+
+
+@pytest.fixture(name="segmentation", scope="module")
+def fixture_segmentation() -> nd.SegmentationLevel:
+    """Segmentation with a single level of aggregation defined."""
+    return nd.get_segmentation_level("hb_p_m_tp_week")
+
+
+@pytest.fixture(name="dvec_data", scope="module")
+def fixture_dvec_data(zoning, segmentation) -> nd.DVectorData:
+    """Random data for every segment in `segmentation`."""
+    rng = np.random.default_rng(42)
+    return {s: rng.random(zoning.n_zones) for s in segmentation.segment_names}
+
+
+##### CLASSES #####
+class TestDenseDVectorData:
+    """Tests for the `DenseDVectorData` class."""
+
+    NAMES = ["a", "b", "c"]
+    VALUES = np.arange(6, dtype=float).reshape(3, 2)
+
+    def test_dict_interface(self):
+        """Test the data can be accessed like a normal DVectorData dict."""
+        data = DenseDVectorData(self.NAMES, self.VALUES.copy())
+        assert list(data.keys()) == self.NAMES
+        assert len(data) == 3
+        np.testing.assert_array_equal(data["b"], [2, 3])
+
+        data["b"] = np.array([10, 11])
+        np.testing.assert_array_equal(data.array[1], [10, 11])
+
+        with pytest.raises(KeyError):
+            data["d"] = np.array([0, 0])
+
+    def test_from_dict_order(self):
+        """Test rows are stored in the given segment order."""
+        as_dict = {n: self.VALUES[i] for i, n in enumerate(self.NAMES)}
+        data = DenseDVectorData.from_dict(as_dict, ["c", "a", "b"])
+        np.testing.assert_array_equal(data.rows(["a", "c"]), [1, 0])
+        np.testing.assert_array_equal(data["c"], self.VALUES[2])
+
+    def test_wrong_shape(self):
+        """Test an error is raised when names and rows don't match."""
+        with pytest.raises(ValueError):
+            DenseDVectorData(["a", "b"], self.VALUES)
+
+
+class TestDenseDVector:
+    """Tests that dense DVectors give the same results as dict DVectors."""
+
+    @staticmethod
+    def _build(segmentation, zoning, dvec_data, dense):
+        return nd.DVector(
+            segmentation=segmentation,
+            import_data=dict(dvec_data),
+            zoning_system=zoning,
+            time_format="avg_week",
+            process_count=0,
+            dense=dense,
+        )
+
+    @staticmethod
+    def _assert_equal(dvec, dense_dvec):
+        assert dense_dvec.dense
+        assert dvec.segmentation == dense_dvec.segmentation
+        for segment in dvec.segmentation.segment_names:
+            np.testing.assert_allclose(
+                dvec.get_segment_data(segment),
+                dense_dvec.get_segment_data(segment),
+            )
+
+    def test_multiply(self, segmentation, zoning, dvec_data):
+        """Test dense multiplication matches dict multiplication."""
+        dvec = self._build(segmentation, zoning, dvec_data, False)
+        dense = self._build(segmentation, zoning, dvec_data, True)
+        self._assert_equal(dvec * dvec, dense * dense)
+
+    def test_aggregate(self, segmentation, zoning, dvec_data):
+        """Test dense aggregation matches dict aggregation."""
+        out_segmentation = nd.get_segmentation_level("hb_p_m")
+        dvec = self._build(segmentation, zoning, dvec_data, False)
+        dense = self._build(segmentation, zoning, dvec_data, True)
+        self._assert_equal(
+            dvec.aggregate(out_segmentation),
+            dense.aggregate(out_segmentation),
+        )
+
+    @pytest.mark.parametrize("method, in_name, out_name", [
+        ("reduce", "notem_nhb_output", "notem_nhb_output_reduced"),
+        ("subset", "notem_hb_output", "notem_hb_output_wday"),
+    ])
+    def test_segment_index_methods(self, zoning, method, in_name, out_name):
+        """Test dense reduce and subset match the dict versions."""
+        in_segmentation = nd.get_segmentation_level(in_name)
+        out_segmentation = nd.get_segmentation_level(out_name)
+        rng = np.random.default_rng(42)
+        dvec_data = {s: rng.random(zoning.n_zones) for s in in_segmentation.segment_names}
+
+        dvec = self._build(in_segmentation, zoning, dvec_data, False)
+        dense = self._build(in_segmentation, zoning, dvec_data, True)
+        self._assert_equal(
+            getattr(dvec, method)(out_segmentation),
+            getattr(dense, method)(out_segmentation),
+        )
+
+    @pytest.mark.parametrize("zonal_average", [True, False])
+    def test_split_segmentation_like(self, segmentation, zoning, dvec_data, zonal_average):
+        """Test dense splitting matches dict splitting, including 0 totals."""
+        in_segmentation = nd.get_segmentation_level("hb_p_m")
+        rng = np.random.default_rng(1)
+        in_data = {s: rng.random(zoning.n_zones) for s in in_segmentation.segment_names}
+
+        # Zero out some splits completely, and some in a single zone
+        split_data = dict(dvec_data)
+        split_dict = in_segmentation.split(segmentation)
+        out_segs = list(split_dict.values())
+        for segment in out_segs[0]:
+            split_data[segment] = np.zeros(zoning.n_zones)
+        for segment in out_segs[1]:
+            split_data[segment] = split_data[segment].copy()
+            split_data[segment][0] = 0
+
+        dvec = self._build(in_segmentation, zoning, in_data, False)
+        dense = self._build(in_segmentation, zoning, in_data, True)
+        other = self._build(segmentation, zoning, split_data, False)
+        self._assert_equal(
+            dvec.split_segmentation_like(other, zonal_average=zonal_average),
+            dense.split_segmentation_like(other, zonal_average=zonal_average),
+        )
+
+    def test_sum_zoning(self, segmentation, zoning, dvec_data):
+        """Test dense DVectors without zoning keep their values."""
+        dvec = self._build(segmentation, zoning, dvec_data, False)
+        dense = self._build(segmentation, zoning, dvec_data, True)
+        self._assert_equal(dvec.sum_zoning(), dense.sum_zoning())
+        assert dense.sum() == pytest.approx(dvec.sum())
+
+    def test_save_load(self, segmentation, zoning, dvec_data):
+        """Test dense DVectors are still dense after save and load."""
+        dense = self._build(segmentation, zoning, dvec_data, True)
+        loaded = nd.DVector.load(dense.save())
+        self._assert_equal(dense, loaded)
+
+    def test_save_load_memory_map(self, segmentation, zoning, dvec_data, tmp_path):
+        """Test memory mapped DVectors load lazily with the same values."""
+        dvec = self._build(segmentation, zoning, dvec_data, False)
+        path = tmp_path / "dvec.pkl"
+        dvec.save(path, memory_map=True)
+        assert (tmp_path / "dvec.pkl.npy").is_file()
+
+        loaded = nd.DVector.load(path)
+        assert not loaded._data.array.flags.writeable
+        self._assert_equal(dvec, loaded)
+
+
+class TestDataFrameToDVector:
+    """Tests for building DVectors from DataFrames."""
+
+    @pytest.fixture(name="df")
+    def fixture_df(self, segmentation, zoning, dvec_data) -> pd.DataFrame:
+        """dvec_data in long format, with the first segment missing."""
+        df = nd.DVector(
+            segmentation=segmentation,
+            import_data=dict(dvec_data),
+            zoning_system=zoning,
+            time_format="avg_week",
+            process_count=0,
+        ).to_df()
+        missing = segmentation.segments.iloc[0]
+        is_missing = np.all([df[k] == v for k, v in missing.items()], axis=0)
+        return df[~is_missing].sample(frac=1, random_state=42)
+
+    def _build(self, df, segmentation, zoning, **kwargs):
+        return nd.DVector(
+            segmentation=segmentation,
+            import_data=df,
+            zoning_system=zoning,
+            time_format="avg_week",
+            process_count=0,
+            df_chunk_size=100,
+            **kwargs,
+        )
+
+    @pytest.mark.parametrize("dense", [False, True])
+    def test_values(self, df, segmentation, zoning, dvec_data, dense):
+        """Test values are put into the right segments and zones."""
+        dvec = self._build(df, segmentation, zoning, infill=-1, dense=dense)
+        first, *others = segmentation.segment_names
+        np.testing.assert_array_equal(dvec.get_segment_data(first), -1)
+        for segment in others:
+            np.testing.assert_array_equal(dvec.get_segment_data(segment), dvec_data[segment])
+
+    def test_duplicates(self, df, segmentation, zoning):
+        """Test an error is raised for repeated segment / zone values."""
+        df = pd.concat([df, df.iloc[[-1]]])
+        with pytest.raises(ValueError, match="repeated values"):
+            self._build(df, segmentation, zoning)
+
+    def test_invalid_zones(self, df, segmentation, zoning):
+        """Test an error is raised for zones not in the zoning system."""
+        df = df.copy()
+        df.iloc[0, df.columns.get_loc(zoning.col_name)] = 100
+        with pytest.raises(ValueError, match="do not belong"):
+            self._build(df, segmentation, zoning)
+
+    def test_invalid_segments(self, df, segmentation, zoning):
+        """Test an error is raised for invalid segment values."""
+        df = df.copy()
+        df.iloc[0, df.columns.get_loc("p")] = 100
+        with pytest.raises(ValueError, match="not valid"):
+            self._build(df, segmentation, zoning)
+
+
+class TestLazyDVector:
+    """Tests that lazy DVector chains match the eager DVector operations."""
+
+    @staticmethod
+    def _build(segmentation, zoning, dense, seed):
+        rng = np.random.default_rng(seed)
+        n_zones = 1 if zoning is None else zoning.n_zones
+        return nd.DVector(
+            segmentation=segmentation,
+            import_data={s: rng.random(n_zones) for s in segmentation.segment_names},
+            zoning_system=zoning,
+            time_format="avg_week",
+            process_count=0,
+            dense=dense,
+        )
+
+    @staticmethod
+    def _assert_equal(dvec, lazy_dvec):
+        assert dvec.segmentation == lazy_dvec.segmentation
+        for segment in dvec.segmentation.segment_names:
+            np.testing.assert_allclose(
+                dvec.get_segment_data(segment),
+                lazy_dvec.get_segment_data(segment),
+            )
+
+    @pytest.mark.parametrize("dense", [True, False])
+    def test_multiply_aggregate(self, segmentation, zoning, dense):
+        """Test a multiply then aggregate chain matches the eager result."""
+        out_segmentation = nd.get_segmentation_level("hb_p_m")
+        a = self._build(segmentation, zoning, dense, 1)
+        b = self._build(segmentation, None, dense, 2)
+
+        lazy = a.lazy().multiply(b).aggregate(out_segmentation)
+        assert lazy.segmentation == out_segmentation
+        result = lazy.evaluate()
+        assert result.dense == dense
+        self._assert_equal((a * b).aggregate(out_segmentation), result)
+
+    def test_chain(self, segmentation, zoning):
+        """Test longer chains match, whatever the chunk size."""
+        agg_segmentation = nd.get_segmentation_level("hb_p_m")
+        a = self._build(segmentation, zoning, True, 1)
+        b = self._build(segmentation, None, True, 2)
+        c = self._build(agg_segmentation, zoning, True, 3)
+
+        expected = ((a * b).aggregate(agg_segmentation) * c).sum_zoning()
+        lazy = ((a.lazy() * b).aggregate(agg_segmentation) * c)
+
+        original_rows = nd.DVector._dense_chunk_rows
+        try:
+            nd.DVector._dense_chunk_rows = 3
+            self._assert_equal(expected, lazy.evaluate().sum_zoning())
+        finally:
+            nd.DVector._dense_chunk_rows = original_rows
+
+    def test_unchanged(self, segmentation, zoning):
+        """Test recording an operation leaves the original chain unchanged."""
+        a = self._build(segmentation, zoning, True, 1)
+        lazy = a.lazy()
+        lazy.multiply(a).aggregate(nd.get_segmentation_level("hb_p_m"))
+        assert lazy.segmentation == segmentation
+        assert lazy.n_terms == len(segmentation)
+        self._assert_equal(a, lazy.evaluate())
+
+    @pytest.mark.parametrize("out_rows", [[0], [1, 3], [2, 39], [39]])
+    @pytest.mark.parametrize("chunk_rows", [3, 10_000])
+    def test_empty_segments(self, zoning, out_rows, chunk_rows):
+        """Test empty output segments are zero, and don't cut other sums short."""
+        segmentation = nd.get_segmentation_level("hb_p_m")
+        a = self._build(segmentation, zoning, True, 1)
+        array = a._get_dense_data().array
+
+        # Split every segment as evenly as possible between out_rows
+        n_segments = len(segmentation)
+        groups = np.array_split(np.arange(n_segments), len(out_rows))
+        counts = np.zeros(n_segments, dtype=np.int64)
+        counts[out_rows] = [len(x) for x in groups]
+        index = nd.core.SegmentAggregationIndex(
+            rows=np.arange(n_segments),
+            offsets=np.cumsum(counts) - counts,
+        )
+        lazy = a.lazy()._regroup(index, segmentation)
+
+        expected = np.zeros_like(array)
+        for row, group in zip(out_rows, groups):
+            expected[row] = array[group].sum(axis=0)
+
+        original_rows = nd.DVector._dense_chunk_rows
+        try:
+            nd.DVector._dense_chunk_rows = chunk_rows
+            result = lazy.evaluate()
+        finally:
+            nd.DVector._dense_chunk_rows = original_rows
+        np.testing.assert_allclose(result._get_dense_data().array, expected)
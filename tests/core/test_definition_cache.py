@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the core definition_cache module, tests
+    are setup to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+import os
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Local imports
+from normits_demand.core import definition_cache
+
+
+##### FIXTURES #####
+@pytest.fixture(name="source_path")
+def fixture_source_path(tmp_path):
+    """A definition source file that exists on disk."""
+    path = tmp_path / "zones.csv"
+    path.write_text("zone_name\nA\nB\n")
+    return path
+
+
+##### CLASSES #####
+class TestDefinitionCache:
+    """Tests for `read_cache()` and `write_cache()`."""
+
+    ARRAYS = {
+        "ints": np.arange(5),
+        "strs": np.array(["a", "bb", "ccc"], dtype=object),
+    }
+
+    def test_round_trip(self, tmp_path, source_path):
+        """Test cached arrays are read back with the same values and types."""
+        cache_path = tmp_path / "cache" / "zones.npz"
+        definition_cache.write_cache(cache_path, [source_path], self.ARRAYS)
+
+        arrays = definition_cache.read_cache(cache_path, [source_path])
+        assert arrays.keys() == self.ARRAYS.keys()
+        for key, expected in self.ARRAYS.items():
+            np.testing.assert_array_equal(arrays[key], expected)
+            assert arrays[key].dtype == expected.dtype
+
+    def test_source_modified(self, tmp_path, source_path):
+        """Test the cache is invalid once a source file is modified."""
+        cache_path = tmp_path / "zones.npz"
+        definition_cache.write_cache(cache_path, [source_path], self.ARRAYS)
+
+        mtime = os.path.getmtime(source_path)
+        os.utime(source_path, (mtime + 10, mtime + 10))
+        assert definition_cache.read_cache(cache_path, [source_path]) is None
+
+    def test_sources_changed(self, tmp_path, source_path):
+        """Test the cache is invalid if built from different sources."""
+        cache_path = tmp_path / "zones.npz"
+        definition_cache.write_cache(cache_path, [source_path], self.ARRAYS)
+
+        other_path = tmp_path / "internal_zones.csv"
+        other_path.write_text("zone_name\nA\n")
+        assert definition_cache.read_cache(cache_path, [source_path, other_path]) is None
+
+    def test_not_strings(self, tmp_path, source_path):
+        """Test object arrays which aren't all strings aren't cached."""
+        cache_path = tmp_path / "zones.npz"
+        arrays = {"mixed": np.array(["a", 1], dtype=object)}
+        definition_cache.write_cache(cache_path, [source_path], arrays)
+        assert not cache_path.exists()
+
+    @pytest.mark.parametrize("truncate", [None, 0, 200, -100])
+    def test_broken_cache(self, tmp_path, source_path, truncate):
+        """Test an unreadable cache is treated as no cache."""
+        cache_path = tmp_path / "zones.npz"
+        if truncate is None:
+            cache_path.write_bytes(b"not a cache")
+        else:
+            definition_cache.write_cache(cache_path, [source_path], self.ARRAYS)
+            cache_path.write_bytes(cache_path.read_bytes()[:truncate])
+
+        assert definition_cache.read_cache(cache_path, [source_path]) is None
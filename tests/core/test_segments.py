@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the core segments module, tests are setup
+    to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Local imports
+import normits_demand as nd
+from normits_demand.core import segments
+
+
+##### FIXTURES #####
+@pytest.fixture(name="segmentation", scope="module")
+def fixture_segmentation() -> nd.SegmentationLevel:
+    """Segmentation with a single level of aggregation defined."""
+    return nd.get_segmentation_level("hb_p_m_tp_week")
+
+
+##### CLASSES #####
+class TestGetSegmentationLevel:
+    """Tests for `get_segmentation_level()`."""
+
+    def test_cached(self):
+        """Test repeat calls return the same segmentation."""
+        segmentation = nd.get_segmentation_level("hb_p_m")
+        assert nd.get_segmentation_level("hb_p_m") is segmentation
+
+    def test_disk_cache(self, tmp_path, monkeypatch):
+        """Test segmentations read from disk match the definitions."""
+        expected = nd.get_segmentation_level("hb_p_m_tp_week")
+
+        seg_cls = nd.SegmentationLevel
+        monkeypatch.setattr(seg_cls, "_definitions_cache_dir", str(tmp_path))
+        monkeypatch.setattr(seg_cls, "definitions_disk_cache", True)
+        for _ in range(2):
+            segments.clear_segmentation_cache()
+            segmentation = nd.get_segmentation_level("hb_p_m_tp_week")
+            assert segmentation.segment_names == expected.segment_names
+            assert segmentation.segments.equals(expected.segments)
+        assert (tmp_path / "hb_p_m_tp_week.npz").exists()
+
+
+class TestSegmentIndex:
+    """Tests for the integer segment ids of `SegmentationLevel`."""
+
+    def test_segment_ids(self, segmentation):
+        """Test segment ids are the position of each segment name."""
+        names = segmentation.segment_names
+        assert segmentation.segment_index[names[3]] == 3
+        np.testing.assert_array_equal(
+            segmentation.get_segment_ids([names[5], names[0]]),
+            [5, 0],
+        )
+
+    def test_invalid_segment_ids(self, segmentation):
+        """Test an error is raised for invalid segment names."""
+        assert not segmentation.is_valid_segment_name("not_a_segment")
+        with pytest.raises(nd.SegmentationError):
+            segmentation.get_segment_ids(["not_a_segment"])
+
+    def test_aggregate_index(self, segmentation):
+        """Test the aggregate index matches the aggregate dictionary."""
+        out_segmentation = nd.get_segmentation_level("hb_p_m")
+        index = segmentation.aggregate_index(out_segmentation)
+        aggregation_dict = segmentation.aggregate(out_segmentation)
+
+        groups = np.split(index.rows, index.offsets[1:])
+        for out_seg, rows in zip(out_segmentation.segment_names, groups):
+            expected = segmentation.get_segment_ids(aggregation_dict[out_seg])
+            np.testing.assert_array_equal(np.sort(rows), np.sort(expected))
+
+    def test_split_index(self, segmentation):
+        """Test the split index matches the split dictionary."""
+        in_segmentation = nd.get_segmentation_level("hb_p_m")
+        index = in_segmentation.split_index(segmentation)
+        split_dict = in_segmentation.split(segmentation)
+
+        assert len(index) == len(segmentation)
+        for in_seg, out_segs in split_dict.items():
+            rows = index[segmentation.get_segment_ids(out_segs)]
+            assert set(rows) == {in_segmentation.segment_index[in_seg]}
+
+    def test_index_cached(self, segmentation):
+        """Test indexes are only built once, and cannot be edited."""
+        out_segmentation = nd.get_segmentation_level("hb_p_m")
+        index = segmentation.aggregate_index(out_segmentation)
+        assert segmentation.aggregate_index(out_segmentation) is index
+        with pytest.raises(ValueError):
+            index.rows[0] = 1
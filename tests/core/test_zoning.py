@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the core zoning module, tests are setup
+    to use pytest. Translations are read from a temporary folder.
+"""
+
+##### IMPORTS #####
+# Standard imports
+import os
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse
+
+# Local imports
+import normits_demand as nd
+from normits_demand.core import zoning
+
+##### CONSTANTS #####
+FROM_ZONES = np.arange(1, 6)
+TO_ZONES = np.arange(1, 4)
+TRANSLATION = pd.DataFrame({
+    "zone_a_zone_id": [1, 2, 3, 3, 4, 5],
+    "zone_b_zone_id": [1, 1, 2, 3, 3, 3],
+    "zone_a_to_zone_b": [1.0, 1.0, 0.25, 0.75, 1.0, 1.0],
+})
+
+
+##### FIXTURES #####
+@pytest.fixture(name="translation_dir")
+def fixture_translation_dir(tmp_path, monkeypatch):
+    """Folder containing a single zone_a to zone_b translation."""
+    translation_dir = tmp_path / "_translations"
+    translation_dir.mkdir()
+    TRANSLATION.to_csv(
+        translation_dir / "zone_a_to_zone_b_correspondence.csv",
+        index=False,
+    )
+
+    monkeypatch.setattr(nd.ZoningSystem, "_translation_dir", str(translation_dir))
+    monkeypatch.setattr(
+        nd.ZoningSystem,
+        "_translation_cache_dir",
+        str(tmp_path / "_translations_cache"),
+    )
+    zoning.clear_translation_cache()
+    yield translation_dir
+    zoning.clear_translation_cache()
+
+
+@pytest.fixture(name="zone_a")
+def fixture_zone_a() -> nd.ZoningSystem:
+    """Zoning system to translate from."""
+    return nd.ZoningSystem(name="zone_a", unique_zones=FROM_ZONES)
+
+
+@pytest.fixture(name="zone_b")
+def fixture_zone_b() -> nd.ZoningSystem:
+    """Zoning system to translate to."""
+    return nd.ZoningSystem(name="zone_b", unique_zones=TO_ZONES)
+
+
+##### CLASSES #####
+class TestSparseTranslation:
+    """Tests that sparse translations match the dense translations."""
+
+    EXPECTED = np.array([
+        [1, 0, 0],
+        [1, 0, 0],
+        [0, 0.25, 0.75],
+        [0, 0, 1],
+        [0, 0, 1],
+    ])
+
+    def test_translate(self, translation_dir, zone_a, zone_b):
+        """Test the sparse and dense translations have the same values."""
+        dense = zone_a.translate(zone_b)
+        sparse = zone_a.translate(zone_b, sparse=True)
+
+        assert isinstance(dense, np.ndarray)
+        assert scipy.sparse.issparse(sparse)
+        np.testing.assert_array_equal(dense, self.EXPECTED)
+        np.testing.assert_array_equal(sparse.toarray(), dense)
+
+    def test_returns_copy(self, translation_dir, zone_a, zone_b):
+        """Test editing a returned translation doesn't edit later ones."""
+        sparse = zone_a.translate(zone_b, sparse=True)
+        sparse.data[:] = 0
+        np.testing.assert_array_equal(zone_a.translate(zone_b), self.EXPECTED)
+
+    @pytest.mark.parametrize("dense", [False, True])
+    def test_translate_zoning(self, translation_dir, zone_a, zone_b, dense):
+        """Test DVector.translate_zoning matches a dense translation."""
+        segmentation = nd.get_segmentation_level("hb_p_m")
+        rng = np.random.default_rng(42)
+        dvec_data = {s: rng.random(len(FROM_ZONES)) for s in segmentation.segment_names}
+        dvec = nd.DVector(
+            segmentation=segmentation,
+            import_data=dict(dvec_data),
+            zoning_system=zone_a,
+            time_format="avg_week",
+            process_count=0,
+            dense=dense,
+        )
+
+        translated = dvec.translate_zoning(zone_b)
+        assert translated.zoning_system == zone_b
+        assert translated.dense == dense
+        for segment, data in dvec_data.items():
+            np.testing.assert_allclose(
+                translated.get_segment_data(segment),
+                data @ self.EXPECTED,
+            )
+
+
+class TestTranslationCache:
+    """Tests for the in memory and on disk translation caches."""
+
+    @pytest.fixture(name="read_count")
+    def fixture_read_count(self, monkeypatch) -> list:
+        """Counts how many times a translation is read from its source file."""
+        reads = list()
+        original = nd.ZoningSystem._get_translation_definition
+
+        def counting_read(self, *args, **kwargs):
+            reads.append(self.name)
+            return original(self, *args, **kwargs)
+
+        monkeypatch.setattr(nd.ZoningSystem, "_get_translation_definition", counting_read)
+        return reads
+
+    @pytest.fixture(name="disk_cache")
+    def fixture_disk_cache(self, monkeypatch):
+        """Turns on the on disk translation cache."""
+        monkeypatch.setattr(nd.ZoningSystem, "translation_disk_cache", True)
+
+    @staticmethod
+    def _update_translation(translation_dir, factor: float = 2):
+        """Rewrites the translation file with new values and a new mtime."""
+        path = translation_dir / "zone_a_to_zone_b_correspondence.csv"
+        mtime = path.stat().st_mtime
+        translation = TRANSLATION.copy()
+        translation["zone_a_to_zone_b"] *= factor
+        translation.to_csv(path, index=False)
+        os.utime(path, (mtime + 10, mtime + 10))
+
+    def test_memory_cache(self, translation_dir, zone_a, zone_b, read_count):
+        """Test repeat lookups are read from the in memory cache."""
+        first = zone_a.translate(zone_b)
+        second = zone_a.translate(zone_b, sparse=True)
+        assert len(read_count) == 1
+        np.testing.assert_array_equal(second.toarray(), first)
+
+        # A new, but equal, zoning system should hit the same cache
+        nd.ZoningSystem(name="zone_a", unique_zones=FROM_ZONES).translate(zone_b)
+        assert len(read_count) == 1
+
+    def test_cache_size(self, translation_dir, zone_a, zone_b, read_count, monkeypatch):
+        """Test the least recently used translations are dropped."""
+        monkeypatch.setattr(nd.ZoningSystem, "translation_cache_size", 0)
+        zone_a.translate(zone_b)
+        zone_a.translate(zone_b)
+        assert len(read_count) == 2
+
+    def test_memory_cache_mtime(self, translation_dir, zone_a, zone_b, read_count):
+        """Test the in memory cache is rebuilt when the source file changes."""
+        first = zone_a.translate(zone_b)
+        self._update_translation(translation_dir)
+        second = zone_a.translate(zone_b)
+
+        assert len(read_count) == 2
+        np.testing.assert_array_equal(second, first * 2)
+
+    def test_disk_cache(self, translation_dir, zone_a, zone_b, read_count, disk_cache):
+        """Test translations are read from the disk cache in a new process."""
+        first = zone_a.translate(zone_b)
+        assert len(list(translation_dir.parent.glob("_translations_cache/*.npz"))) == 1
+
+        # Only clearing memory looks like a fresh process
+        zoning.clear_translation_cache()
+        second = zone_a.translate(zone_b)
+        assert len(read_count) == 1
+        np.testing.assert_array_equal(second, first)
+
+    def test_disk_cache_mtime(self, translation_dir, zone_a, zone_b, read_count, disk_cache):
+        """Test the disk cache is rebuilt when the source file changes."""
+        first = zone_a.translate(zone_b)
+        zoning.clear_translation_cache()
+        self._update_translation(translation_dir)
+        second = zone_a.translate(zone_b)
+
+        assert len(read_count) == 2
+        np.testing.assert_array_equal(second, first * 2)
+
+        # The rebuilt translation should now be cached
+        zoning.clear_translation_cache()
+        np.testing.assert_array_equal(zone_a.translate(zone_b), second)
+        assert len(read_count) == 2
+
+    @pytest.mark.parametrize("truncate", [None, 200])
+    def test_broken_disk_cache(self,
+                               translation_dir,
+                               zone_a,
+                               zone_b,
+                               read_count,
+                               disk_cache,
+                               truncate,
+                               ):
+        """Test an unreadable disk cache is rebuilt, rather than raising."""
+        first = zone_a.translate(zone_b)
+        cache_path = zone_a._get_translation_cache_path(zone_b)
+        if truncate is None:
+            cache_path.write_bytes(b"not a cache")
+        else:
+            cache_path.write_bytes(cache_path.read_bytes()[:truncate])
+
+        zoning.clear_translation_cache()
+        np.testing.assert_array_equal(zone_a.translate(zone_b), first)
+        assert len(read_count) == 2
+
+        # The rebuilt translation should be cached again
+        zoning.clear_translation_cache()
+        np.testing.assert_array_equal(zone_a.translate(zone_b), first)
+        assert len(read_count) == 2
+
+    def test_clear_disk_cache(self, translation_dir, zone_a, zone_b, read_count, disk_cache):
+        """Test clearing the disk cache removes the cached files."""
+        cache_dir = translation_dir.parent / "_translations_cache"
+        zone_a.translate(zone_b)
+        assert len(list(cache_dir.glob("*.npz"))) == 1
+
+        zoning.clear_translation_cache(clear_disk_cache=True)
+        assert list(cache_dir.glob("*.npz")) == list()
+
+        zone_a.translate(zone_b)
+        assert len(read_count) == 2
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the cost utils module, tests are setup
+    to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Local imports
+from normits_demand.cost import utils as cost_utils
+
+
+##### CONSTANTS #####
+MIN_BOUNDS = [0, 1, 2, 5, 10, 20]
+MAX_BOUNDS = [1, 2, 5, 10, 20, 50]
+
+
+##### FIXTURES #####
+@pytest.fixture(name="cost", scope="module")
+def fixture_cost() -> np.ndarray:
+    """Random cost matrix, with some costs on the band edges."""
+    rng = np.random.default_rng(42)
+    cost = np.round(rng.random((30, 30)) * 60, 0)
+    cost[0, :5] = MAX_BOUNDS[-1]
+    return cost
+
+
+@pytest.fixture(name="matrix", scope="module")
+def fixture_matrix(cost) -> np.ndarray:
+    """Random trip matrix the same shape as cost."""
+    return np.random.default_rng(42).random(cost.shape)
+
+
+##### CLASSES #####
+class TestCostBandIndex:
+    """Tests for the `CostBandIndex` class."""
+
+    def test_bin_edges(self, cost, matrix):
+        """Test bin edges sort cells the same as np.histogram."""
+        bin_edges = [MIN_BOUNDS[0]] + MAX_BOUNDS
+        band_index = cost_utils.CostBandIndex(cost, bin_edges=bin_edges)
+        expected, _ = np.histogram(cost, bins=bin_edges, weights=matrix)
+        np.testing.assert_allclose(band_index.band_totals(matrix), expected)
+
+    def test_bounds(self, cost, matrix):
+        """Test bounds sort cells the same as band masks."""
+        band_index = cost_utils.CostBandIndex(
+            cost, min_bounds=MIN_BOUNDS, max_bounds=MAX_BOUNDS,
+        )
+        expected = [
+            matrix[(cost >= min_val) & (cost < max_val)].sum()
+            for min_val, max_val in zip(MIN_BOUNDS, MAX_BOUNDS)
+        ]
+        np.testing.assert_allclose(band_index.band_totals(matrix), expected)
+        np.testing.assert_array_equal(
+            band_index.cell_counts(),
+            cost_utils.cells_in_bounds(MIN_BOUNDS, MAX_BOUNDS, cost),
+        )
+
+    def test_band_lookup(self, cost):
+        """Test cells outside of all bands get the fill value."""
+        band_index = cost_utils.CostBandIndex(
+            cost, min_bounds=MIN_BOUNDS, max_bounds=MAX_BOUNDS,
+        )
+        lookup = band_index.band_lookup(np.arange(len(MIN_BOUNDS)), fill_value=-1)
+        assert lookup[0, 0] == -1
+        assert lookup[cost == 3].tolist() == [2] * (cost == 3).sum()
+
+    def test_overlapping_bounds(self, cost):
+        """Test an error is raised for overlapping bands."""
+        with pytest.raises(ValueError):
+            cost_utils.CostBandIndex(cost, min_bounds=[0, 1], max_bounds=[2, 3])
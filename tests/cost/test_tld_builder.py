@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the tld_builder module, tests are setup
+    to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+from normits_demand.cost import tld_builder
+
+##### CONSTANTS #####
+N_TRIPS = 2000
+BANDS = pd.DataFrame({"lower": [0, 1, 5, 25], "upper": [1, 5, 25, 100]})
+
+
+##### FIXTURES #####
+@pytest.fixture(name="nts_data", scope="module")
+def fixture_nts_data() -> pd.DataFrame:
+    """Random NTS-like trip records."""
+    rng = np.random.default_rng(42)
+    trip_origin = rng.choice(["hb", "nhb"], N_TRIPS)
+    is_hb = trip_origin == "hb"
+    data = pd.DataFrame({
+        "TravelWeekDay_B01ID": rng.integers(1, 8, N_TRIPS),
+        "CarAccess_B01ID": rng.integers(1, 8, N_TRIPS),
+        "main_mode": rng.integers(1, 7, N_TRIPS),
+        "hb_purpose": np.where(is_hb, rng.integers(1, 9, N_TRIPS), np.nan),
+        "nhb_purpose": np.where(is_hb, np.nan, rng.choice([12, 13, 18], N_TRIPS)),
+        "nhb_purpose_hb_leg": np.where(is_hb, np.nan, rng.integers(1, 9, N_TRIPS)),
+        "trip_origin": trip_origin,
+        "start_time": rng.integers(1, 7, N_TRIPS),
+        "TripDisIncSW": rng.random(N_TRIPS) * 120,
+        "TripOrigGOR_B02ID": rng.integers(1, 12, N_TRIPS),
+        "TripDestGOR_B02ID": rng.integers(1, 12, N_TRIPS),
+        "tfn_area_type": rng.integers(1, 9, N_TRIPS),
+        "weighted_trip": rng.random(N_TRIPS),
+    })
+    return data
+
+
+@pytest.fixture(name="builder")
+def fixture_builder(nts_data, tmp_path) -> tld_builder.TripLengthDistributionBuilder:
+    """TLD builder set up without the interactive prompts."""
+    builder = tld_builder.TripLengthDistributionBuilder.__new__(
+        tld_builder.TripLengthDistributionBuilder
+    )
+    builder.trip_length_bands = BANDS
+    builder.target_segmentation = pd.DataFrame({
+        "trip_origin": ["hb", "hb", "nhb", "nhb"],
+        "p": [1, 3, 13, 12],
+        "m": [3, 0, 3, 0],
+        "ca": [0, 2, 0, 1],
+        "tp": [1, 0, 3, 2],
+    })
+    builder.geo_area = "gb"
+    builder.region_filter = "trip_OD"
+    builder.export = str(tmp_path)
+    builder.nts_import = nts_data
+    builder._grouped_trips_cache = dict()
+    return builder
+
+
+##### CLASSES #####
+class TestRunTlbLookups:
+    """Tests for building all the target TLDs at once."""
+
+    @staticmethod
+    def _expected(nts_data, segment, agg_purp):
+        """Filters and bands the trips of one segment directly."""
+        trips = nts_data[nts_data["TravelWeekDay_B01ID"].isin([1, 2, 3, 4, 5])]
+        trips = trips.assign(ca=np.where(trips["CarAccess_B01ID"] <= 4, 2, 1))
+
+        trips = trips[trips["trip_origin"] == segment["trip_origin"]]
+        if segment["trip_origin"] == "hb":
+            trips = trips[
+                (trips["nhb_purpose_hb_leg"] == segment["p"])
+                | (trips["hb_purpose"] == segment["p"])
+            ]
+        else:
+            trips = trips[trips["nhb_purpose"] == segment["p"]]
+        for col, nts_col in [("m", "main_mode"), ("ca", "ca")]:
+            if segment[col] != 0:
+                trips = trips[trips[nts_col] == segment[col]]
+        if segment["tp"] != 0:
+            tps = [3, 4] if segment["p"] in agg_purp else [segment["tp"]]
+            trips = trips[trips["start_time"].isin(tps)]
+
+        ave_km, totals = list(), list()
+        for _, band in BANDS.iterrows():
+            in_band = trips[
+                (trips["TripDisIncSW"] >= band["lower"])
+                & (trips["TripDisIncSW"] < band["upper"])
+            ]
+            ave_km.append(in_band["TripDisIncSW"].mean() * 1.61)
+            totals.append(in_band["weighted_trip"].sum())
+        return np.array(ave_km), np.array(totals)
+
+    @pytest.mark.parametrize("agg_purp", [[], [13]])
+    def test_totals(self, builder, nts_data, agg_purp):
+        """Test the grouped TLDs match filtering the trips directly."""
+        out_mat, final = builder.run_tlb_lookups(agg_purp=agg_purp, write=False)
+
+        assert len(out_mat) == len(builder.target_segmentation)
+        for out, (_, segment) in zip(out_mat, builder.target_segmentation.iterrows()):
+            ave_km, trips = self._expected(nts_data, segment, agg_purp)
+            np.testing.assert_allclose(out["ave_km"], ave_km)
+            np.testing.assert_allclose(out["trips"], trips)
+            assert out["band_share"].sum() == pytest.approx(1)
+
+    def test_grouped_cached(self, builder):
+        """Test the grouped trips are reused for the same weekdays."""
+        builder.run_tlb_lookups(write=False)
+        grouped = builder._grouped_trips_cache[(1, 2, 3, 4, 5)]
+        builder.run_tlb_lookups(write=False)
+        assert builder._grouped_trips_cache[(1, 2, 3, 4, 5)] is grouped
+
+    def test_overlapping_bands(self, builder):
+        """Test an error is raised when trips could be in several bands."""
+        builder.trip_length_bands = pd.DataFrame({"lower": [0, 1], "upper": [2, 5]})
+        with pytest.raises(ValueError):
+            builder.run_tlb_lookups(write=False)
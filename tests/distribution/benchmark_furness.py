@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+    Benchmark of the doubly constrained furness kernel.
+
+    Times the in-place furness kernel against the previous implementation
+    on synthetic matrices, and checks both give the same result.
+    Not collected by pytest, run directly:
+
+        python tests/distribution/benchmark_furness.py [n_zones ...]
+"""
+
+##### IMPORTS #####
+# Standard imports
+import sys
+import time
+
+# Third party imports
+import numpy as np
+
+# Local imports
+from normits_demand.distribution import furness
+
+##### CONSTANTS #####
+DEFAULT_SIZES = [1000, 5000, 10000]
+MAX_ITERS = 200
+TOL = 1e-9
+
+
+##### FUNCTIONS #####
+def reference_furness(seed_vals, row_targets, col_targets, tol, max_iters):
+    """The furness kernel as it was before the in-place rework."""
+    furnessed_mat = seed_vals.copy()
+    cur_rmse = np.inf
+    iter_num = 0
+    n_vals = len(row_targets)
+
+    for iter_num in range(max_iters):
+        col_ach = np.sum(furnessed_mat, axis=0)
+        diff_factor = np.divide(
+            col_targets,
+            col_ach,
+            where=col_ach != 0,
+            out=np.ones_like(col_targets, dtype=float),
+        )
+        furnessed_mat *= diff_factor
+
+        row_ach = np.sum(furnessed_mat, axis=1)
+        diff_factor = np.divide(
+            row_targets,
+            row_ach,
+            where=row_ach != 0,
+            out=np.ones_like(row_targets, dtype=float),
+        )
+        furnessed_mat *= np.atleast_2d(diff_factor).T
+
+        row_diff = (row_targets - np.sum(furnessed_mat, axis=1)) ** 2
+        col_diff = (col_targets - np.sum(furnessed_mat, axis=0)) ** 2
+        cur_rmse = (np.sum(row_diff + col_diff) / n_vals) ** 0.5
+        if cur_rmse < tol:
+            break
+
+    return furnessed_mat, iter_num + 1, cur_rmse
+
+
+def build_inputs(n_zones: int):
+    """Builds a gravity-like seed matrix with balanced targets."""
+    rng = np.random.default_rng(42)
+    seed = rng.random((n_zones, n_zones))
+    seed *= -10
+    np.exp(seed, out=seed)
+    row_targets = rng.lognormal(size=n_zones) * 1000
+    col_targets = rng.random(n_zones)
+    col_targets *= row_targets.sum() / col_targets.sum()
+    return seed, row_targets, col_targets
+
+
+def time_kernel(fn, *args, **kwargs):
+    """Times a single call of fn, returning the time and the results."""
+    start = time.perf_counter()
+    results = fn(*args, **kwargs)
+    return time.perf_counter() - start, results
+
+
+def main(sizes):
+    print("%8s %12s %12s %12s %8s" % ("zones", "reference_s", "new_s", "new_k5_s", "speedup"))
+    for n_zones in sizes:
+        seed, row_targets, col_targets = build_inputs(n_zones)
+
+        ref_time, (ref_mat, *_) = time_kernel(
+            reference_furness, seed, row_targets, col_targets, TOL, MAX_ITERS,
+        )
+        new_time, (new_mat, *_) = time_kernel(
+            furness.doubly_constrained_furness, seed, row_targets, col_targets,
+            tol=TOL, max_iters=MAX_ITERS, warning=False,
+        )
+
+        # Compare in chunks to keep memory down on the big matrices
+        for start in range(0, n_zones, 1000):
+            np.testing.assert_allclose(
+                new_mat[start:start + 1000],
+                ref_mat[start:start + 1000],
+                rtol=1e-9,
+            )
+        del ref_mat, new_mat
+
+        k5_time, _ = time_kernel(
+            furness.doubly_constrained_furness, seed, row_targets, col_targets,
+            tol=TOL, max_iters=MAX_ITERS, warning=False, check_interval=5,
+        )
+        print("%8d %12.3f %12.3f %12.3f %7.2fx"
+              % (n_zones, ref_time, new_time, k5_time, ref_time / new_time))
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or DEFAULT_SIZES)
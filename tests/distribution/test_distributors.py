@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the distributors module, tests are setup
+    to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+import os
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+import normits_demand as nd
+from normits_demand.distribution import distributors
+from normits_demand.utils import checkpoint
+
+##### CONSTANTS #####
+ZONES = np.arange(1, 7)
+FAILING_PURPOSE = 5
+GRAVITY_KWARGS = {
+    "cost_function": nd.BuiltInCostFunction.LOG_NORMAL.get_cost_function(),
+    "target_convergence": 0.9,
+    "furness_max_iters": 100,
+    "furness_tol": 1e-3,
+    "use_perceived_factors": False,
+    "grav_max_iters": 10,
+    "calibrate_params": False,
+    "init_params": {"sigma": 1, "mu": 1},
+    "verbose": 0,
+}
+
+
+##### FIXTURES #####
+@pytest.fixture(name="zoning", scope="module")
+def fixture_zoning() -> nd.ZoningSystem:
+    """Small zoning system to distribute over."""
+    return nd.ZoningSystem(name="test", unique_zones=ZONES)
+
+
+@pytest.fixture(name="segmentation", scope="module")
+def fixture_segmentation() -> nd.SegmentationLevel:
+    """Segmentation with a handful of segments."""
+    return nd.get_segmentation_level("hb_p_m_car")
+
+
+@pytest.fixture(name="distribute_kwargs")
+def fixture_distribute_kwargs(zoning, segmentation) -> dict:
+    """Inputs to distribute every segment of `segmentation`."""
+    rng = np.random.default_rng(42)
+    trip_ends = list()
+    cost_matrices = dict()
+    target_costs = dict()
+    for segment_params in segmentation:
+        segment_name = segmentation.get_segment_name(segment_params)
+        trip_ends.append(pd.DataFrame({
+            zoning.col_name: ZONES,
+            **segment_params,
+            "val": rng.random(len(ZONES)) * 100 + 1,
+        }))
+        cost_matrices[segment_name] = pd.DataFrame(
+            rng.random((len(ZONES), len(ZONES))) * 20 + 1,
+            index=ZONES,
+            columns=ZONES,
+        )
+        target_costs[segment_name] = pd.DataFrame({
+            "min": [0, 5, 10],
+            "max": [5, 10, 25],
+            "ave_km": [2.5, 7.5, 15],
+            "trips": [30, 40, 30],
+            "band_share": [0.3, 0.4, 0.3],
+        })
+
+    trip_ends = pd.concat(trip_ends, ignore_index=True)
+    return {
+        "productions": trip_ends,
+        "attractions": trip_ends,
+        "running_segmentation": segmentation,
+        "cost_matrices": cost_matrices,
+        "calibration_matrix": pd.DataFrame(1, index=ZONES, columns=ZONES),
+        "target_cost_distributions": {1: target_costs},
+        "calibration_naming": dict(),
+        "share_matrices": None,
+        **GRAVITY_KWARGS,
+    }
+
+
+##### CLASSES #####
+class TestDistributeResume:
+    """Tests for resuming a partly finished distribution."""
+
+    @staticmethod
+    def _distributor(zoning, tmp_path) -> distributors.GravityDistributor:
+        return distributors.GravityDistributor(
+            year=2018,
+            running_mode=nd.Mode.CAR,
+            trip_origin="hb",
+            zoning_system=zoning,
+            running_zones=ZONES,
+            export_home=tmp_path,
+            process_count=0,
+        )
+
+    @staticmethod
+    def _checkpoint(tmp_path, resume: bool) -> checkpoint.StageCheckpoint:
+        return checkpoint.StageCheckpoint(tmp_path / "checkpoints", "gravity", resume=resume)
+
+    @pytest.fixture(name="partial_run")
+    def fixture_partial_run(self, zoning, distribute_kwargs, tmp_path, monkeypatch):
+        """Runs the distribution, failing part way through."""
+        distributor = self._distributor(zoning, tmp_path)
+        original = distributors.GravityDistributor.distribute_segment
+
+        def failing_segment(self, segment_params, **kwargs):
+            if segment_params["p"] == FAILING_PURPOSE:
+                raise RuntimeError("Segment failed")
+            return original(self, segment_params=segment_params, **kwargs)
+
+        with monkeypatch.context() as patch:
+            patch.setattr(distributors.GravityDistributor, "distribute_segment", failing_segment)
+            with pytest.raises(RuntimeError):
+                distributor.distribute(
+                    checkpoint=self._checkpoint(tmp_path, False),
+                    **distribute_kwargs,
+                )
+        return distributor
+
+    @staticmethod
+    def _logged_purposes(distributor) -> list:
+        return sorted(pd.read_csv(distributor.report_paths.overall_log)["p"].tolist())
+
+    def test_resume_overall_log(self, partial_run, segmentation, distribute_kwargs, tmp_path):
+        """Test the overall log lists every segment once after resuming."""
+        all_purposes = sorted(s["p"] for s in segmentation)
+        assert self._logged_purposes(partial_run) == [p for p in all_purposes if p < FAILING_PURPOSE]
+
+        resumed = self._distributor(partial_run.zoning_system, tmp_path)
+        resumed.distribute(checkpoint=self._checkpoint(tmp_path, True), **distribute_kwargs)
+        assert self._logged_purposes(resumed) == all_purposes
+
+    def test_rerun_overall_log(self, partial_run, segmentation, distribute_kwargs, tmp_path):
+        """Test the overall log is started again when not resuming."""
+        partial_run.distribute(checkpoint=self._checkpoint(tmp_path, False), **distribute_kwargs)
+        assert self._logged_purposes(partial_run) == sorted(s["p"] for s in segmentation)
+
+    def test_output_paths(self, partial_run, segmentation):
+        """Test the reports and logs of a segment are recorded in the checkpoint."""
+        stage = self._checkpoint(partial_run.export_home, True)
+        segment_params = next(iter(segmentation))
+        record = stage.read_record(segmentation.get_segment_name(segment_params))
+        paths = partial_run._get_report_paths(segmentation, segment_params)
+
+        assert set(paths.values()) <= set(record["output_paths"])
+        assert partial_run.report_paths.overall_log in record["output_paths"]
+
+    def test_missing_report_reruns(self, partial_run, segmentation, tmp_path):
+        """Test a segment is run again if its TLD report is removed."""
+        segment_params = next(iter(segmentation))
+        segment_name = segmentation.get_segment_name(segment_params)
+        stage = self._checkpoint(tmp_path, True)
+        input_hash = stage.read_record(segment_name)["input_hash"]
+        assert stage.is_complete(segment_name, input_hash)
+
+        paths = partial_run._get_report_paths(segmentation, segment_params)
+        os.remove(paths["tld_report"])
+        assert not stage.is_complete(segment_name, input_hash)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the furness module, tests are setup
+    to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Local imports
+from normits_demand.distribution import furness
+
+
+##### FIXTURES #####
+@pytest.fixture(name="furness_inputs", scope="module")
+def fixture_furness_inputs():
+    """Stack of random seed matrices with balanced row and col targets."""
+    rng = np.random.default_rng(42)
+    seeds = rng.random((20, 15, 15))
+    row_targets = rng.random((20, 15)) * 100
+    col_targets = rng.random((20, 15))
+    col_targets *= (row_targets.sum(axis=1) / col_targets.sum(axis=1))[:, np.newaxis]
+
+    # One segment with no targets
+    row_targets[5] = 0
+    return seeds, row_targets, col_targets
+
+
+##### CLASSES #####
+class TestBatchedFurness:
+    """Tests for `batched_doubly_constrained_furness`."""
+
+    def test_matches_single(self, furness_inputs):
+        """Test each segment matches the single matrix furness."""
+        seeds, row_targets, col_targets = furness_inputs
+        mats, iters, rmse = furness.batched_doubly_constrained_furness(
+            seeds, row_targets, col_targets, tol=1e-6, max_iters=500,
+        )
+
+        for i, seed in enumerate(seeds):
+            mat, n_iters, seg_rmse = furness.doubly_constrained_furness(
+                seed, row_targets[i], col_targets[i], tol=1e-6, max_iters=500,
+            )
+            np.testing.assert_allclose(mats[i], mat)
+            assert iters[i] == n_iters
+            assert rmse[i] == pytest.approx(seg_rmse)
+
+    def test_zero_targets(self, furness_inputs):
+        """Test segments with 0 targets are returned as 0."""
+        seeds, row_targets, col_targets = furness_inputs
+        mats, iters, _ = furness.batched_doubly_constrained_furness(
+            seeds, row_targets, col_targets,
+        )
+        assert (mats[5] == 0).all()
+        assert iters[5] == 0
+
+    def test_bad_shape(self, furness_inputs):
+        """Test an error is raised when the targets don't match the seeds."""
+        seeds, row_targets, col_targets = furness_inputs
+        with pytest.raises(ValueError):
+            furness.batched_doubly_constrained_furness(
+                seeds, row_targets[:, :-1], col_targets,
+            )
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the gravity model module, tests are setup
+    to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+from normits_demand import cost
+from normits_demand.distribution import gravity_model
+
+
+##### FIXTURES #####
+@pytest.fixture(name="calib_inputs", scope="module")
+def fixture_calib_inputs() -> dict:
+    """Random single area inputs for a gravity model."""
+    rng = np.random.default_rng(42)
+    n_zones = 50
+    row_targets = rng.random(n_zones) * 100
+    col_targets = rng.random(n_zones)
+    col_targets *= row_targets.sum() / col_targets.sum()
+    edges = [0, 5, 10, 20, 30, 50, 100]
+    tcd = pd.DataFrame({
+        "min": edges[:-1],
+        "max": edges[1:],
+        "trips": [10, 30, 25, 15, 10, 5],
+        "ave_km": [2.5, 7.5, 15, 25, 40, 75],
+    })
+    return {
+        "row_targets": row_targets,
+        "col_targets": col_targets,
+        "cost_matrix": rng.random((n_zones, n_zones)) * 80 + 1,
+        "target_cost_distribution": tcd,
+    }
+
+
+@pytest.fixture(name="multi_area_inputs", scope="module")
+def fixture_multi_area_inputs(calib_inputs) -> dict:
+    """Random inputs for a gravity model, split into two areas."""
+    n_zones = len(calib_inputs["row_targets"])
+    calibration_matrix = np.ones((n_zones, n_zones), dtype=int)
+    calibration_matrix[n_zones // 2:] = 2
+
+    tcd = calib_inputs["target_cost_distribution"]
+    tcd_2 = tcd.copy()
+    tcd_2["trips"] = [5, 10, 20, 30, 20, 15]
+
+    inputs = calib_inputs.copy()
+    inputs.update({
+        "calibration_matrix": calibration_matrix,
+        "target_cost_distributions": {1: tcd, 2: tcd_2},
+        "calibration_naming": {1: "area_1", 2: "area_2"},
+    })
+    del inputs["target_cost_distribution"]
+    return inputs
+
+
+##### CLASSES #####
+class TestGravityModelCalibrator:
+    """Tests for the `GravityModelCalibrator` class."""
+
+    def _calibrate(self, calib_inputs, log_path, jacobian_threads):
+        calib = gravity_model.GravityModelCalibrator(
+            cost_function=cost.BuiltInCostFunction.LOG_NORMAL.get_cost_function(),
+            target_convergence=0.9,
+            furness_max_iters=1000,
+            furness_tol=1e-9,
+            use_perceived_factors=False,
+            running_log_path=log_path,
+            jacobian_threads=jacobian_threads,
+            **calib_inputs,
+        )
+        params = calib.calibrate({"sigma": 1, "mu": 2}, grav_max_iters=20)
+        return params, calib.achieved_distribution
+
+    def test_threaded_jacobian(self, calib_inputs, tmp_path):
+        """Test threaded jacobians give identical results to serial."""
+        serial_params, serial_mat = self._calibrate(
+            calib_inputs, tmp_path / "serial.csv", 1
+        )
+        threaded_params, threaded_mat = self._calibrate(
+            calib_inputs, tmp_path / "threaded.csv", 2
+        )
+        assert threaded_params == serial_params
+        np.testing.assert_array_equal(threaded_mat, serial_mat)
+
+
+class TestMultiAreaGravityModelCalibrator:
+    """Tests for the `MultiAreaGravityModelCalibrator` class."""
+
+    def _calibrate(self, multi_area_inputs, log_path, execution_mode):
+        log_path.parent.mkdir()
+        calib = gravity_model.MultiAreaGravityModelCalibrator(
+            cost_function=cost.BuiltInCostFunction.LOG_NORMAL.get_cost_function(),
+            target_convergence=0.9,
+            furness_max_iters=1000,
+            furness_tol=1e-9,
+            running_log_path=log_path,
+            execution_mode=execution_mode,
+            **multi_area_inputs,
+        )
+        params = calib.calibrate({"sigma": 1, "mu": 2}, grav_max_iters=5)
+        return params, calib.achieved_full_distribution
+
+    def test_process_execution(self, multi_area_inputs, tmp_path):
+        """Test calibrating in processes gives identical results to threads."""
+        thread_params, thread_mat = self._calibrate(
+            multi_area_inputs,
+            tmp_path / "thread" / "log.csv",
+            gravity_model.MultiAreaExecutionMode.THREAD,
+        )
+        process_params, process_mat = self._calibrate(
+            multi_area_inputs,
+            tmp_path / "process" / "log.csv",
+            gravity_model.MultiAreaExecutionMode.PROCESS,
+        )
+        assert process_params == thread_params
+        np.testing.assert_array_equal(process_mat, thread_mat)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the gravity model param_cache module,
+    tests are setup to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+from normits_demand.distribution import param_cache
+from normits_demand.distribution import distributors
+
+
+##### FIXTURES #####
+@pytest.fixture(name="inputs", scope="module")
+def fixture_inputs() -> dict:
+    """Random calibration inputs."""
+    rng = np.random.default_rng(42)
+    n_zones = 20
+    tcd = pd.DataFrame({
+        "min": [0, 5, 10, 20],
+        "max": [5, 10, 20, 50],
+        "band_share": [0.1, 0.4, 0.3, 0.2],
+    })
+    return {
+        "row_targets": rng.random(n_zones) * 100,
+        "col_targets": rng.random(n_zones) * 100,
+        "cost_matrix": rng.random((n_zones, n_zones)) * 50 + 1,
+        "target_cost_distribution": tcd,
+    }
+
+
+def _cache_inputs(inputs: dict):
+    """Builds the hash and fingerprint of inputs"""
+    input_hash = param_cache.hash_inputs(
+        arrays=[inputs["row_targets"], inputs["col_targets"], inputs["cost_matrix"]],
+        settings={"target_convergence": 0.9},
+    )
+    fingerprint = param_cache.fingerprint_inputs(
+        cost_function_name="log_normal",
+        **inputs,
+    )
+    return input_hash, fingerprint
+
+
+##### CLASSES #####
+class TestGravityParamsCache:
+    """Tests for the `GravityParamsCache` class."""
+
+    @pytest.fixture(name="cache")
+    def fixture_cache(self, inputs, tmp_path) -> param_cache.GravityParamsCache:
+        """A cache containing a calibration of inputs."""
+        cache = param_cache.GravityParamsCache(tmp_path / "cache")
+        input_hash, fingerprint = _cache_inputs(inputs)
+        cache.save("seg", {
+            1: param_cache.CachedCalibration(
+                cost_params={"sigma": 0.5, "mu": 1.25},
+                convergence=0.95,
+                input_hash=input_hash,
+                fingerprint=fingerprint,
+            )
+        })
+        return cache
+
+    def test_identical(self, cache, inputs):
+        """Test identical inputs are found, with the same params."""
+        match, cached = cache.find("seg", 1, *_cache_inputs(inputs))
+        assert match == param_cache.CacheMatch.IDENTICAL
+        assert cached.cost_params == {"sigma": 0.5, "mu": 1.25}
+        assert cached.convergence == 0.95
+
+    @pytest.mark.parametrize("target_convergence, expected", [
+        (0.9, param_cache.CacheMatch.IDENTICAL),
+        (0.95, param_cache.CacheMatch.IDENTICAL),
+        (0.99, param_cache.CacheMatch.CLOSE),
+    ])
+    def test_identical_convergence(self, cache, inputs, target_convergence, expected):
+        """Test identical inputs are only matched if they converged."""
+        match, cached = cache.find(
+            "seg", 1, *_cache_inputs(inputs), target_convergence=target_convergence
+        )
+        assert match == expected
+        assert cached.cost_params == {"sigma": 0.5, "mu": 1.25}
+
+    def test_close(self, cache, inputs):
+        """Test slightly different inputs are close."""
+        inputs = inputs.copy()
+        inputs["row_targets"] = inputs["row_targets"] * 1.01
+        match, cached = cache.find("seg", 1, *_cache_inputs(inputs))
+        assert match == param_cache.CacheMatch.CLOSE
+        assert cached.cost_params == {"sigma": 0.5, "mu": 1.25}
+
+    @pytest.mark.parametrize("segment_name, area_id, scale", [
+        ("seg", 1, 2),
+        ("seg", 2, 1),
+        ("other_seg", 1, 1),
+    ])
+    def test_no_match(self, cache, inputs, segment_name, area_id, scale):
+        """Test different inputs, areas or segments are not matched."""
+        inputs = inputs.copy()
+        inputs["cost_matrix"] = inputs["cost_matrix"] * scale
+        match, cached = cache.find(segment_name, area_id, *_cache_inputs(inputs))
+        assert match == param_cache.CacheMatch.NONE
+        assert cached is None
+
+    def test_broken_cache(self, cache, inputs):
+        """Test a broken cache file is treated as no cache."""
+        with open(cache._get_path("seg"), "w") as f:
+            f.write("{not json")
+        match, _ = cache.find("seg", 1, *_cache_inputs(inputs))
+        assert match == param_cache.CacheMatch.NONE
+
+
+class TestGravityDistributorCache:
+    """Tests for how the `GravityDistributor` uses the params cache."""
+
+    def test_warm_start_off_by_default(self):
+        """Test the cache is only used when warm_start is set."""
+        get_cache = distributors.GravityDistributor._get_param_cache
+        assert get_cache(None, calibrate_params=True) is None
+        assert get_cache(None, warm_start=False) is None
+
+    def test_init_params_hashed(self, inputs):
+        """Test different init_params give a different input hash."""
+        arrays = [inputs["row_targets"], inputs["col_targets"], inputs["cost_matrix"]]
+        hashes = set()
+        for init_params in [None, {"sigma": 1}, {"sigma": 2}]:
+            settings = distributors.GravityDistributor._get_calibration_settings(
+                target_convergence=0.9,
+                init_params=init_params,
+            )
+            hashes.add(param_cache.hash_inputs(arrays, settings))
+        assert len(hashes) == 3
@@ -310,6 +310,29 @@ class TestGetCosts:
         msg = "Columns missing from car cost, columns expected but not found: ['toll']"
         assert e.value.args[0] == msg
 
+    def test_read_dataframe(self, costs: Tuple[Dict[str, Path], Path]):
+        """Test that costs read by `read_cost_file` give the same result as a path.
+
+        Parameters
+        ----------
+        costs : Tuple[Dict[str, Path], Path]
+            Paths to the car and rail cost files and the zone translation folder.
+        """
+        raw = gc.read_cost_file(costs[0]["rail"], "rail")
+        test = gc.get_costs(raw, "rail", "norms", costs[1])
+        pd.testing.assert_frame_equal(
+            test, self.CONVERTED_COSTS["rail"], check_dtype=False
+        )
+        # The given costs shouldn't be changed
+        assert raw.columns.tolist() == self.COSTS["rail"].columns.tolist()
+
+    def test_missing_dataframe(self):
+        """Test that a ValueError is raised if a column is missing from the costs."""
+        with pytest.raises(ValueError) as e:
+            gc.get_costs(self.COSTS["missing_car"], "car", None, None)
+        msg = "Columns missing from car cost, columns expected but not found: ['toll']"
+        assert e.value.args[0] == msg
+
 
 class TestGenCostMode:
     """Tests for the `gen_cost_mode` and `calculate_gen_costs` functions."""
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the matrix_processing module, tests are
+    setup to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+import normits_demand as nd
+from normits_demand.matrices import compilation
+from normits_demand.matrices import decompilation
+from normits_demand.matrices import matrix_processing
+from normits_demand.matrices import matrix_store
+from normits_demand.utils import compress
+
+##### CONSTANTS #####
+ZONES = np.arange(1, 6)
+
+
+##### FIXTURES #####
+@pytest.fixture(name="import_dir")
+def fixture_import_dir(tmp_path) -> str:
+    """Directory of random matrices for a few segments."""
+    rng = np.random.default_rng(42)
+    import_dir = tmp_path / "import"
+    import_dir.mkdir()
+    for ca in (1, 2):
+        for tp in (1, 2, 3):
+            mat = pd.DataFrame(
+                rng.random((len(ZONES), len(ZONES))), index=ZONES, columns=ZONES
+            )
+            mat.to_csv(import_dir / ("hb_pa_yr2018_p1_m3_ca%d_tp%d.csv" % (ca, tp)))
+    return str(import_dir)
+
+
+@pytest.fixture(name="compile_params")
+def fixture_compile_params(import_dir, tmp_path) -> str:
+    """Compile params joining the ca segments of each time period."""
+    params = pd.DataFrame({
+        "distribution_name": [
+            "hb_pa_yr2018_p1_m3_ca%d_tp%d.csv" % (ca, tp)
+            for tp in (1, 2, 3)
+            for ca in (1, 2)
+        ],
+        "compilation": ["tp%d.csv" % tp for tp in (1, 2, 3) for _ in (1, 2)],
+    })
+    path = tmp_path / "compile_params.csv"
+    params.to_csv(path, index=False)
+    return str(path)
+
+
+class CountingReader:
+    """Wraps matrix_store.read_matrix to count the reads of each file."""
+
+    def __init__(self):
+        self.reads = list()
+        self._read_matrix = matrix_store.read_matrix
+
+    def __call__(self, path, **kwargs):
+        self.reads.append(path)
+        return self._read_matrix(path, **kwargs)
+
+
+##### CLASSES #####
+class TestAggregationPlan:
+    """Tests for planning and batching matrix aggregation."""
+
+    def test_plan(self, import_dir):
+        """Test every output gets the matching inputs."""
+        plan = matrix_processing._plan_aggregation(
+            year=2018,
+            p=1,
+            m=3,
+            all_matrices=matrix_store.list_matrices(import_dir),
+            export_dir="out",
+            trip_origin="hb",
+            matrix_format="pa",
+            segment_needed=None,
+            ca_needed=[1, 2],
+            tp_needed=None,
+            segment_str=list(),
+            ca_strs=["_ca1", "_ca2"],
+            tp_strs=list(),
+            compress_out=False,
+        )
+        assert sorted(plan) == [
+            "out/hb_pa_yr2018_p1_m3_ca1.csv",
+            "out/hb_pa_yr2018_p1_m3_ca2.csv",
+        ]
+        assert sorted(plan["out/hb_pa_yr2018_p1_m3_ca2.csv"]) == [
+            "hb_pa_yr2018_p1_m3_ca2_tp%d.csv" % tp for tp in (1, 2, 3)
+        ]
+
+    def test_batches_keep_shared_inputs(self):
+        """Test outputs sharing inputs are batched together."""
+        plan = {
+            "a": ["1", "2"],
+            "b": ["3"],
+            "c": ["2", "4"],
+            "d": ["5"],
+        }
+        batches = matrix_processing._batch_aggregation_plan(plan, 2)
+
+        assert [sorted(x) for x in batches] == [["a", "c"], ["b", "d"]]
+
+    def test_batches_bounded(self):
+        """Test no batch has more than max_open_outputs outputs."""
+        plan = {str(i): ["shared", str(i)] for i in range(7)}
+        batches = matrix_processing._batch_aggregation_plan(plan, 3)
+
+        assert [len(x) for x in batches] == [3, 3, 1]
+        assert sorted(k for x in batches for k in x) == sorted(plan)
+
+
+class TestAggregateMatrices:
+    """Tests for aggregating matrices in batches."""
+
+    @pytest.mark.parametrize("max_open_outputs", [1, 16])
+    def test_single_read(self, import_dir, tmp_path, monkeypatch, max_open_outputs):
+        """Test each input is read once and summed into the right output."""
+        reader = CountingReader()
+        monkeypatch.setattr(matrix_store, "read_matrix", reader)
+
+        matrix_processing.aggregate_matrices(
+            import_dir=import_dir,
+            export_dir=str(tmp_path),
+            trip_origin="hb",
+            matrix_format="pa",
+            years_needed=[2018],
+            p_needed=[1],
+            m_needed=[3],
+            ca_needed=[1, 2],
+            tp_needed=[1, 2],
+            process_count=0,
+            max_open_outputs=max_open_outputs,
+        )
+
+        # tp3 is never needed
+        assert len(reader.reads) == len(set(reader.reads)) == 4
+        for ca in (1, 2):
+            for tp in (1, 2):
+                fname = "hb_pa_yr2018_p1_m3_ca%d_tp%d.csv" % (ca, tp)
+                expected = pd.read_csv("%s/%s" % (import_dir, fname), index_col=0)
+                result = pd.read_csv(tmp_path / fname, index_col=0)
+                np.testing.assert_allclose(result.values, expected.values, atol=1e-5)
+
+    def test_missing_inputs(self, import_dir, tmp_path):
+        """Test an error is raised before anything is written."""
+        with pytest.raises(nd.NormitsDemandError):
+            matrix_processing.aggregate_matrices(
+                import_dir=import_dir,
+                export_dir=str(tmp_path),
+                trip_origin="hb",
+                matrix_format="pa",
+                years_needed=[2018],
+                p_needed=[1],
+                m_needed=[3],
+                ca_needed=[1, 3],
+                process_count=0,
+            )
+        assert not list(tmp_path.glob("*.csv"))
+
+
+class TestCompileMatrices:
+    """Tests for compiling matrices and their decompile factors."""
+
+    @staticmethod
+    def _compile(import_dir, compile_params, tmp_path, factors_fname):
+        export_dir = tmp_path / "compiled"
+        export_dir.mkdir()
+        factors_path = matrix_processing.compile_matrices(
+            mat_import=import_dir,
+            mat_export=str(export_dir),
+            compile_params_path=compile_params,
+            factor_pickle_path=str(tmp_path / factors_fname),
+            process_count=0,
+        )
+        return export_dir, factors_path
+
+    def test_factors_array(self, import_dir, compile_params, tmp_path):
+        """Test factors are written as a float32 array that splits the totals."""
+        export_dir, factors_path = self._compile(
+            import_dir, compile_params, tmp_path, "factors.npy"
+        )
+        factors = compilation.read_factors_array(factors_path)
+
+        assert np.load(factors_path, mmap_mode="r").dtype == np.float32
+        assert sorted(factors) == ["tp1.csv", "tp2.csv", "tp3.csv"]
+        for tp in (1, 2, 3):
+            comp = pd.read_csv(export_dir / ("tp%d.csv" % tp), index_col=0)
+            parts = factors["tp%d.csv" % tp]
+            np.testing.assert_allclose(sum(parts.values()), 1, rtol=1e-6)
+            for ca in (1, 2):
+                name = "hb_pa_yr2018_p1_m3_ca%d_tp%d.csv" % (ca, tp)
+                expected = pd.read_csv("%s/%s" % (import_dir, name), index_col=0)
+                np.testing.assert_allclose(
+                    comp.values * parts[name], expected.values, atol=1e-4
+                )
+
+    def test_matches_pickle(self, import_dir, compile_params, tmp_path):
+        """Test the array and pickled factors are the same."""
+        _, array_path = self._compile(import_dir, compile_params, tmp_path, "f.npy")
+        array_factors = compilation.read_factors_array(array_path, as_dataframes=True)
+
+        pickle_dir = tmp_path / "pickle"
+        pickle_dir.mkdir()
+        _, pickle_path = self._compile(import_dir, compile_params, pickle_dir, "f.pbz2")
+        pickle_factors = compress.read_in(pickle_path)
+
+        for comp_name, parts in pickle_factors.items():
+            for part_name, factors in parts.items():
+                np.testing.assert_allclose(
+                    array_factors[comp_name][part_name].values,
+                    factors.values,
+                    rtol=1e-6,
+                )
+
+    def test_decompile(self, import_dir, compile_params, tmp_path):
+        """Test decompiling with the array factors recreates the inputs."""
+        export_dir, factors_path = self._compile(
+            import_dir, compile_params, tmp_path, "factors.npy"
+        )
+        decompiled_dir = tmp_path / "decompiled"
+        decompiled_dir.mkdir()
+        decompilation.decompile_matrices(
+            matrix_import=str(export_dir),
+            matrix_export=str(decompiled_dir),
+            decompile_factors_path=factors_path,
+        )
+
+        for path in decompiled_dir.iterdir():
+            expected = pd.read_csv("%s/%s" % (import_dir, path.name), index_col=0)
+            result = pd.read_csv(path, index_col=0)
+            np.testing.assert_allclose(result.values, expected.values, atol=1e-4)
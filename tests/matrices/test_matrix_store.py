@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the matrix_store module, tests are
+    setup to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+import concurrent.futures
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+from normits_demand.matrices import matrix_processing
+from normits_demand.matrices import matrix_store
+
+##### CONSTANTS #####
+ZONES = np.arange(1, 11)
+
+
+##### FIXTURES #####
+@pytest.fixture(name="matrices", scope="module")
+def fixture_matrices() -> dict:
+    """Random matrices for a few segments."""
+    rng = np.random.default_rng(42)
+    return {
+        "hb_pa_yr2018_p1_m3_ca%d_tp%d" % (ca, tp): pd.DataFrame(
+            rng.random((len(ZONES), len(ZONES))), index=ZONES, columns=ZONES
+        )
+        for ca in (1, 2)
+        for tp in (1, 2)
+    }
+
+
+def _write(store, name, matrix):
+    store.write(name, matrix)
+
+
+##### CLASSES #####
+class TestMatrixStore:
+    """Tests for reading and writing segment matrices."""
+
+    def test_round_trip(self, matrices, tmp_path):
+        """Test matrices are the same after writing and reading."""
+        store = matrix_store.MatrixStore(tmp_path / "store.h5")
+        store.write_many(matrices)
+
+        assert sorted(store.segment_names) == sorted(matrices)
+        np.testing.assert_array_equal(store.zones, ZONES)
+        for name, matrix in matrices.items():
+            pd.testing.assert_frame_equal(store.read(name + ".csv"), matrix)
+
+    def test_partial_read(self, matrices, tmp_path):
+        """Test blocks of a matrix can be read."""
+        store = matrix_store.MatrixStore(tmp_path / "store.omx")
+        name, matrix = next(iter(matrices.items()))
+        store.write(name, matrix)
+
+        block = store.read_array(name, slice(2, 5), slice(7, None))
+        np.testing.assert_array_equal(block, matrix.values[2:5, 7:])
+
+    def test_overwrite(self, matrices, tmp_path):
+        """Test writing an existing segment replaces it."""
+        store = matrix_store.MatrixStore(tmp_path / "store.h5")
+        name, matrix = next(iter(matrices.items()))
+        store.write(name, matrix)
+        store.write(name, matrix * 2)
+        assert len(store) == 1
+        np.testing.assert_allclose(store.read_array(name), matrix.values * 2)
+
+    def test_wrong_zones(self, matrices, tmp_path):
+        """Test an error is raised when zones don't match the store."""
+        store = matrix_store.MatrixStore(tmp_path / "store.h5")
+        name, matrix = next(iter(matrices.items()))
+        store.write(name, matrix)
+        with pytest.raises(matrix_store.MatrixStoreError):
+            store.write("other", matrix.iloc[:5, :5])
+
+    def test_parallel_append(self, matrices, tmp_path):
+        """Test many processes can append to the same store."""
+        store = matrix_store.MatrixStore(tmp_path / "store.h5")
+        with concurrent.futures.ProcessPoolExecutor(2) as pool:
+            futures = [pool.submit(_write, store, n, m) for n, m in matrices.items()]
+            for future in futures:
+                future.result()
+
+        assert sorted(store.segment_names) == sorted(matrices)
+        for name, matrix in matrices.items():
+            np.testing.assert_array_equal(store.read_array(name), matrix.values)
+
+
+class TestBackendSwitch:
+    """Tests for pipelines reading and writing either layout."""
+
+    @pytest.mark.parametrize("use_store", [False, True])
+    def test_aggregate_matrices(self, matrices, tmp_path, use_store):
+        """Test aggregating from a store matches aggregating files."""
+        import_dir = tmp_path / "import"
+        import_dir.mkdir()
+        for name, matrix in matrices.items():
+            matrix.to_csv(import_dir / (name + ".csv"))
+
+        export_dir = tmp_path / "export"
+        export_dir.mkdir()
+        if use_store:
+            store = matrix_store.MatrixStore(tmp_path / "import.h5")
+            store.write_many(matrices)
+            import_dir = store.path
+            export_dir = tmp_path / "export.h5"
+
+        matrix_processing.aggregate_matrices(
+            import_dir=import_dir,
+            export_dir=export_dir,
+            trip_origin="hb",
+            matrix_format="pa",
+            years_needed=[2018],
+            p_needed=[1],
+            m_needed=[3],
+            ca_needed=[1, 2],
+            process_count=0,
+        )
+
+        for ca in (1, 2):
+            name = "hb_pa_yr2018_p1_m3_ca%d.csv" % ca
+            expected = sum(matrices["hb_pa_yr2018_p1_m3_ca%d_tp%d" % (ca, tp)] for tp in (1, 2))
+            result = matrix_store.read_matrix(export_dir / name)
+            np.testing.assert_allclose(result.values, expected.values, atol=1e-5)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the pa_to_od module, tests are setup to
+    use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+import itertools
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+from normits_demand.matrices import pa_to_od
+
+##### CONSTANTS #####
+ZONES = np.arange(1, 8)
+TPS = [1, 2, 3, 4]
+PURPOSES = [1, 2]
+
+
+##### FIXTURES #####
+@pytest.fixture(name="phi_folder")
+def fixture_phi_folder(tmp_path) -> str:
+    """Folder containing random phi factors for mode 3."""
+    rng = np.random.default_rng(1)
+    rows = list()
+    for p, fh, th in itertools.product(PURPOSES, TPS, TPS):
+        rows.append((p, fh, th, rng.random()))
+    phis = pd.DataFrame(
+        rows,
+        columns=["purpose_from_home", "time_from_home", "time_to_home", "direction_factor"],
+    )
+    folder = tmp_path / "phi"
+    folder.mkdir()
+    phis.to_csv(folder / "phi_factors_mode_3_fhp_tp.csv", index=False)
+    return str(folder)
+
+
+@pytest.fixture(name="pa_import")
+def fixture_pa_import(tmp_path) -> str:
+    """Directory of random tp split PA matrices."""
+    rng = np.random.default_rng(2)
+    folder = tmp_path / "pa"
+    folder.mkdir()
+    for p, ca, tp in itertools.product(PURPOSES, (1, 2), TPS):
+        mat = pd.DataFrame(
+            rng.random((len(ZONES), len(ZONES))), index=ZONES, columns=ZONES
+        )
+        mat.to_csv(folder / ("hb_pa_yr2018_p%d_m3_soc1_ca%d_tp%d.csv" % (p, ca, tp)))
+    return str(folder)
+
+
+##### CLASSES #####
+class TestBuildOd:
+    """Tests for converting tp split PA to OD with phi factors."""
+
+    @staticmethod
+    def _expected_to_home(pa_import, phis, p, ca, th):
+        """Builds a to-home matrix one time period pair at a time."""
+        total = 0
+        for fh in TPS:
+            fname = "hb_pa_yr2018_p%d_m3_soc1_ca%d_tp%d.csv" % (p, ca, fh)
+            pa = pd.read_csv("%s/%s" % (pa_import, fname), index_col=0).values
+            phi = phis[
+                (phis["purpose_from_home"] == p)
+                & (phis["time_from_home"] == fh)
+                & (phis["time_to_home"] == th)
+            ]["direction_factor"].squeeze()
+            total = total + pa.T * phi
+        return total
+
+    @pytest.mark.parametrize("segment_batch_size", [1, 3])
+    def test_to_home(self, pa_import, phi_folder, tmp_path, segment_batch_size):
+        """Test the to-home matrices match converting each pair separately."""
+        od_export = tmp_path / "od"
+        od_export.mkdir()
+        totals = pa_to_od.efs_build_od(
+            pa_import=pa_import,
+            od_export=str(od_export),
+            model_name="noham",
+            p_needed=PURPOSES,
+            m_needed=[3],
+            soc_needed=[1],
+            ns_needed=[1],
+            ca_needed=[1, 2],
+            years_needed=[2018],
+            phi_lookup_folder=phi_folder,
+            aggregate_to_wday=False,
+            verbose=False,
+            process_count=0,
+            segment_batch_size=segment_batch_size,
+        )
+
+        assert len(totals) == len(PURPOSES) * 2 * len(TPS)
+        phis = pd.read_csv("%s/phi_factors_mode_3_fhp_tp.csv" % phi_folder)
+        for p, ca, tp in itertools.product(PURPOSES, (1, 2), TPS):
+            name = "hb_od_to_yr2018_p%d_m3_soc1_ca%d_tp%d.csv" % (p, ca, tp)
+            result = pd.read_csv(od_export / name, index_col=0)
+            expected = self._expected_to_home(pa_import, phis, p, ca, tp)
+
+            assert result.index.name == "noham_zone_id"
+            np.testing.assert_allclose(result.values, expected, atol=1e-5)
+
+    def test_missing_phi(self):
+        """Test an error is raised if a phi factor is missing."""
+        phis = pd.DataFrame({
+            "purpose_from_home": [1, 1, 1],
+            "time_from_home": [1, 1, 2],
+            "time_to_home": [1, 2, 1],
+            "direction_factor": [0.5, 0.5, 1],
+        })
+        with pytest.raises(ValueError):
+            pa_to_od.phi_tensor(phis, 1, [1, 2])
+
+
+class TestToOdViaTourProps:
+    """Tests for converting 24hr PA to OD with tour proportions."""
+
+    def test_split(self):
+        """Test the factors are applied to each time period."""
+        rng = np.random.default_rng(3)
+        pa_24 = pd.DataFrame(rng.random((len(ZONES), len(ZONES))), index=ZONES, columns=ZONES)
+
+        # Random factors which split the PA evenly into from and to home
+        splits = rng.random((len(TPS), len(ZONES), len(ZONES)))
+        splits /= splits.sum(axis=0)
+        fh_factors = {tp: splits[i] for i, tp in enumerate(TPS)}
+        th_factors = {tp: splits[-(i + 1)] for i, tp in enumerate(TPS)}
+
+        fh_mats, th_mats = pa_to_od.to_od_via_tour_props(
+            n_od_vals=len(ZONES),
+            pa_24=pa_24,
+            fh_factor_dict=fh_factors,
+            th_factor_dict=th_factors,
+            tp_needed=TPS,
+        )
+
+        for tp in TPS:
+            pd.testing.assert_frame_equal(fh_mats[tp], pa_24 * fh_factors[tp])
+            pd.testing.assert_frame_equal(th_mats[tp], pa_24 * th_factors[tp])
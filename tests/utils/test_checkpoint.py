@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the checkpoint module, tests are setup
+    to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+from normits_demand import cost
+from normits_demand.utils import checkpoint
+
+
+##### FIXTURES #####
+@pytest.fixture(name="inputs")
+def fixture_inputs() -> dict:
+    """A mix of inputs to hash."""
+    return {
+        "productions": pd.DataFrame({"zone": [1, 2, 3], "val": [1.0, 2.0, 3.0]}),
+        "cost": np.arange(9, dtype=float).reshape(3, 3),
+        "cost_function": cost.BuiltInCostFunction.TANNER.get_cost_function(),
+        "target_convergence": 0.9,
+        "init_params": {"alpha": 1, "beta": -1},
+    }
+
+
+##### CLASSES #####
+class TestHashInputs:
+    """Tests for `hash_inputs()`."""
+
+    def test_repeatable(self, inputs):
+        """Test the same inputs always give the same hash."""
+        copied = {k: v.copy() if hasattr(v, "copy") else v for k, v in inputs.items()}
+        assert checkpoint.hash_inputs(inputs) == checkpoint.hash_inputs(copied)
+
+    @pytest.mark.parametrize("key, value", [
+        ("productions", pd.DataFrame({"zone": [1, 2, 3], "val": [1.0, 2.0, 3.5]})),
+        ("cost", np.arange(9, dtype=float).reshape(3, 3).T),
+        ("cost_function", cost.BuiltInCostFunction.LOG_NORMAL.get_cost_function()),
+        ("target_convergence", 0.95),
+        ("init_params", {"alpha": 1, "beta": -2}),
+    ])
+    def test_changes(self, inputs, key, value):
+        """Test changing any input changes the hash."""
+        changed = inputs.copy()
+        changed[key] = value
+        assert checkpoint.hash_inputs(inputs) != checkpoint.hash_inputs(changed)
+
+    def test_unhashable(self):
+        """Test an error is raised for objects that can't be hashed."""
+        with pytest.raises(TypeError):
+            checkpoint.hash_inputs(object())
+
+
+class TestStageCheckpoint:
+    """Tests for the `StageCheckpoint` class."""
+
+    @pytest.fixture(name="output_path")
+    def fixture_output_path(self, tmp_path):
+        """A segment output that exists on disk."""
+        path = tmp_path / "output.csv"
+        path.write_text("a,b\n1,2\n")
+        return path
+
+    def test_resume(self, tmp_path, output_path):
+        """Test completed segments are only skipped when resuming."""
+        stage = checkpoint.StageCheckpoint(tmp_path / "checkpoints", "stage")
+        stage.mark_complete("seg", "hash", [output_path])
+        assert not stage.is_complete("seg", "hash")
+
+        resumed = checkpoint.StageCheckpoint(tmp_path / "checkpoints", "stage", resume=True)
+        assert resumed.is_complete("seg", "hash")
+        assert not resumed.is_complete("other_seg", "hash")
+        assert not resumed.is_complete("seg", "other_hash")
+
+    def test_started(self, tmp_path):
+        """Test segments that were started but not completed are rerun."""
+        stage = checkpoint.StageCheckpoint(tmp_path, "stage", resume=True)
+        stage.mark_started("seg", "hash")
+        assert stage.read_record("seg")["status"] == checkpoint.CheckpointStatus.STARTED.value
+        assert not stage.is_complete("seg", "hash")
+
+    def test_missing_output(self, tmp_path, output_path):
+        """Test segments are rerun if their outputs have been removed."""
+        stage = checkpoint.StageCheckpoint(tmp_path, "stage", resume=True)
+        stage.mark_complete("seg", "hash", [output_path])
+        output_path.unlink()
+        assert not stage.is_complete("seg", "hash")
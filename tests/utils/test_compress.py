@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the compress module, tests are setup
+    to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+import bz2
+import pickle
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# Local imports
+from normits_demand.utils import compress
+from normits_demand.utils import file_ops
+
+
+##### FIXTURES #####
+@pytest.fixture(name="df", scope="module")
+def fixture_df() -> pd.DataFrame:
+    """Small matrix-like DataFrame."""
+    rng = np.random.default_rng(42)
+    return pd.DataFrame(rng.random((10, 10)), index=range(1, 11), columns=range(1, 11))
+
+
+##### CLASSES #####
+class TestCompress:
+    """Tests for writing and reading with each codec."""
+
+    @pytest.mark.parametrize("codec_name", list(compress.CODECS))
+    def test_round_trip(self, codec_name, df, tmp_path):
+        """Test objects are the same after writing and reading."""
+        codec = compress.get_codec(codec_name)
+        if not codec.available:
+            pytest.skip("%s is not installed" % codec_name)
+
+        path = compress.write_out(df, tmp_path / ("df" + codec.suffix))
+        assert path.suffix == codec.suffix
+        assert compress.detect_codec(path) is codec
+        pd.testing.assert_frame_equal(compress.read_in(path), df)
+
+    @pytest.mark.parametrize("codec_name", list(compress.CODECS))
+    def test_round_trip_out_of_band(self, codec_name, df, tmp_path):
+        """Test objects written with out-of-band buffers read back the same."""
+        codec = compress.get_codec(codec_name)
+        if not codec.available:
+            pytest.skip("%s is not installed" % codec_name)
+
+        path = compress.write_out(df, tmp_path / ("df" + codec.suffix), out_of_band=True)
+        with codec.open(path, "rb") as f:
+            assert f.read(len(compress._OOB_MAGIC)) == compress._OOB_MAGIC
+        pd.testing.assert_frame_equal(compress.read_in(path), df)
+
+    def test_default_plain_pickle(self, df, tmp_path):
+        """Test the default output can be read as a plain bz2 pickle."""
+        path = compress.write_out(df, tmp_path / "df.pbz2")
+        with bz2.BZ2File(path, "rb") as f:
+            pd.testing.assert_frame_equal(pickle.load(f), df)
+
+    def test_codec_overrides_suffix(self, df, tmp_path):
+        """Test the codec suffix is added to paths without one."""
+        path = compress.write_out(df, tmp_path / "df", codec="gzip")
+        assert path.name == "df.pgz"
+        pd.testing.assert_frame_equal(compress.read_in(path), df)
+
+    def test_read_legacy(self, df, tmp_path):
+        """Test files written as a plain bz2 cPickle can still be read."""
+        path = tmp_path / "df.pbz2"
+        with bz2.BZ2File(path, "w") as f:
+            pickle.dump(df, f)
+        pd.testing.assert_frame_equal(compress.read_in(path), df)
+
+    def test_file_ops(self, df, tmp_path):
+        """Test read_df and write_df choose the codec by suffix."""
+        path = tmp_path / "df.pgz"
+        file_ops.write_df(df, path)
+        pd.testing.assert_frame_equal(file_ops.read_df(path, index_col=0), df)
+
+    def test_unknown_codec(self, df, tmp_path):
+        """Test an error is raised for codecs that don't exist."""
+        with pytest.raises(ValueError):
+            compress.write_out(df, tmp_path / "df", codec="not_a_codec")
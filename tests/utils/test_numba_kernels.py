@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the numba_kernels module, tests are setup
+    to use pytest.
+"""
+
+##### IMPORTS #####
+# Standard imports
+
+# Third party imports
+import numpy as np
+import pytest
+
+# Local imports
+from normits_demand.cost import utils as cost_utils
+from normits_demand.cost import cost_functions
+from normits_demand.distribution import furness
+from normits_demand.utils import numba_kernels
+
+
+##### FIXTURES #####
+@pytest.fixture(name="cost", scope="module")
+def fixture_cost() -> np.ndarray:
+    """Random cost matrix with some 0 costs."""
+    rng = np.random.default_rng(42)
+    cost = rng.random((50, 50)) * 100
+    cost[cost < 5] = 0
+    return cost
+
+
+@pytest.fixture(name="furness_inputs", scope="module")
+def fixture_furness_inputs():
+    """Stack of seed matrices which converge after different numbers of iterations."""
+    rng = np.random.default_rng(42)
+    seeds = rng.random((6, 8, 8))
+    row_targets = rng.random((6, 8)) * 100
+    col_targets = rng.random((6, 8))
+    col_targets *= (row_targets.sum(axis=1) / col_targets.sum(axis=1))[:, np.newaxis]
+
+    # One segment already at its targets, one with a very uneven seed,
+    # and one with no targets
+    seeds[1] = np.outer(row_targets[1], col_targets[1]) / row_targets[1].sum()
+    seeds[2] **= 8
+    row_targets[3] = 0
+    return seeds, row_targets, col_targets
+
+
+def _compare(monkeypatch, fn, *args, **kwargs):
+    """Returns the results of fn with and without the kernels.
+
+    The kernels are run as plain Python when numba is not installed, so
+    their logic is always tested.
+    """
+    monkeypatch.setattr(numba_kernels, "ENABLED", True)
+    jit_result = fn(*args, **kwargs)
+    monkeypatch.setattr(numba_kernels, "ENABLED", False)
+    return jit_result, fn(*args, **kwargs)
+
+
+##### CLASSES #####
+class TestNumbaKernels:
+    """Tests the compiled kernels match the NumPy implementations."""
+
+    @pytest.mark.parametrize(
+        "function, params",
+        [
+            (cost_functions.tanner, {"alpha": -1.2, "beta": -0.1}),
+            (cost_functions.tanner, {"alpha": 2, "beta": -5}),
+            (cost_functions.log_normal, {"sigma": 1.1, "mu": 2}),
+        ],
+    )
+    def test_cost_functions(self, monkeypatch, cost, function, params):
+        """Test the cost functions give the same values."""
+        jit_result, np_result = _compare(monkeypatch, function, cost, **params)
+        np.testing.assert_allclose(jit_result, np_result, rtol=1e-12)
+
+    def test_cost_distribution(self, monkeypatch, cost):
+        """Test the weighted histogram matches `np.histogram`."""
+        matrix = np.random.default_rng(42).random(cost.shape)
+        jit_result, np_result = _compare(
+            monkeypatch,
+            cost_utils.calculate_cost_distribution,
+            matrix,
+            cost,
+            bin_edges=[0, 1, 5, 10, 50, 100],
+        )
+        np.testing.assert_allclose(jit_result, np_result)
+
+    @pytest.mark.parametrize("max_iters", [3, 500])
+    def test_batched_furness(self, monkeypatch, furness_inputs, max_iters):
+        """Test the batched furness matches, as segments converge at different times."""
+        seeds, row_targets, col_targets = furness_inputs
+        jit_result, np_result = _compare(
+            monkeypatch,
+            furness.batched_doubly_constrained_furness,
+            seeds,
+            row_targets,
+            col_targets,
+            tol=1e-6,
+            max_iters=max_iters,
+            warning=False,
+        )
+        jit_mats, jit_iters, jit_rmse = jit_result
+        np_mats, np_iters, np_rmse = np_result
+
+        np.testing.assert_allclose(jit_mats, np_mats, rtol=1e-10)
+        np.testing.assert_array_equal(jit_iters, np_iters)
+        np.testing.assert_allclose(jit_rmse, np_rmse, rtol=1e-6, atol=1e-10)
+
+        # Make sure segments really did drop out of the stack at different times
+        if max_iters == 500:
+            assert len(np.unique(jit_iters)) > 2
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+    Module containing tests for the tempro_extractor module, tests are
+    setup to use pytest. Local SQLite databases stand in for the Tempro
+    Access databases.
+"""
+
+##### IMPORTS #####
+# Standard imports
+import sqlite3
+
+# Third party imports
+import pandas as pd
+import pytest
+
+# Local imports
+from normits_demand.utils import tempro_extractor
+
+##### CONSTANTS #####
+REGIONS = ["EAST_", "WM_"]
+PLANNING_QUERY = "select * from Planning"
+
+
+##### FIXTURES #####
+@pytest.fixture(name="data_source")
+def fixture_data_source(tmp_path) -> str:
+    """Folder of small regional databases."""
+    for i, region in enumerate(REGIONS):
+        conn = sqlite3.connect(tmp_path / (region + "test.mdb"))
+        conn.execute('create table Planning (ZoneID, PlanningDataType, "2011", "2018")')
+        conn.executemany(
+            "insert into Planning values (?, ?, ?, ?)",
+            [(z, t, float(z * t + i), float(z * t + i + 1)) for z in (1, 2) for t in (1, 2)],
+        )
+        conn.execute("create table Zones (ZoneID, ZoneName)")
+        conn.executemany("insert into Zones values (?, ?)", [(1, "a"), (2, "b")])
+        conn.commit()
+        conn.close()
+    return str(tmp_path)
+
+
+class CountingFactory:
+    """Connection factory which counts connections and queries."""
+
+    def __init__(self):
+        self.n_connections = 0
+        self.queries = list()
+
+    def __call__(self, db_path):
+        self.n_connections += 1
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.set_trace_callback(self.queries.append)
+        return conn
+
+
+def _parser(data_source, factory, **kwargs) -> tempro_extractor.TemproParser:
+    return tempro_extractor.TemproParser(
+        data_source=data_source,
+        region_list=REGIONS,
+        output_years=[2011, 2018],
+        connection_factory=factory,
+        **kwargs,
+    )
+
+
+##### CLASSES #####
+class TestTemproParser:
+    """Tests for extracting tables from the Tempro databases."""
+
+    def test_read_table(self, data_source):
+        """Test tables are read in full with the right columns."""
+        with _parser(data_source, CountingFactory()) as parser:
+            planning = parser.read_table("EAST_test.mdb", PLANNING_QUERY)
+
+        assert list(planning) == ["ZoneID", "PlanningDataType", "2011", "2018"]
+        assert len(planning) == 4
+        assert planning["2018"].sum() == pytest.approx(planning["2011"].sum() + 4)
+
+    def test_batched_fetch(self, data_source, monkeypatch):
+        """Test rows fetched in several batches are all kept in order."""
+        monkeypatch.setattr(tempro_extractor.TemproParser, "_fetch_batch_size", 3)
+        with _parser(data_source, CountingFactory()) as parser:
+            planning = parser.read_table("EAST_test.mdb", PLANNING_QUERY)
+        assert planning["ZoneID"].tolist() == [1, 1, 2, 2]
+
+    def test_connections_and_zones_reused(self, data_source):
+        """Test one connection is made per db and zones are read once."""
+        factory = CountingFactory()
+        with _parser(data_source, factory) as parser:
+            for _ in range(3):
+                _, zones = parser._hit_ntem_db("EAST_test.mdb", PLANNING_QUERY)
+
+        assert factory.n_connections == 1
+        assert sum("Zones" in q for q in factory.queries) == 1
+        assert zones["ZoneName"].tolist() == ["a", "b"]
+
+    @pytest.mark.parametrize("worker_count", [1, 2])
+    def test_read_tables(self, data_source, worker_count):
+        """Test every regional db is read."""
+        with _parser(data_source, CountingFactory(), worker_count=worker_count) as parser:
+            tables = parser.read_tables(PLANNING_QUERY)
+
+        assert sorted(tables) == ["EAST_test.mdb", "WM_test.mdb"]
+        assert tables["WM_test.mdb"]["2011"].sum() == tables["EAST_test.mdb"]["2011"].sum() + 4
+
+    def test_disk_cache(self, data_source, tmp_path):
+        """Test cached tables are used without hitting the db."""
+        cache_dir = tmp_path / "cache"
+        with _parser(data_source, CountingFactory(), cache_dir=cache_dir) as parser:
+            expected = parser.read_table("EAST_test.mdb", PLANNING_QUERY)
+
+        factory = CountingFactory()
+        with _parser(data_source, factory, cache_dir=cache_dir) as parser:
+            cached = parser.read_table("EAST_test.mdb", PLANNING_QUERY)
+
+        assert factory.n_connections == 0
+        pd.testing.assert_frame_equal(cached, expected)